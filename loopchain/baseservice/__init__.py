@@ -16,12 +16,16 @@
 from .broadcast_command import *
 from .score_code import *
 from .stub_manager import *
+from .peer_scoreboard import *
+from .stub_pool import *
 from .object_manager import *
 from .common_thread import *
 from .common_process import *
 from .rest_client import *
 from .timer_service import *
 from .common_subprocess import *
+from .block_batch import *
+from .subscriber_fanout import *
 from .node_subscriber import *
 from .slot_timer import *
 from .broadcast_scheduler import *
@@ -0,0 +1,130 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Batches of blocks for citizens catching up by websocket"""
+
+import base64
+import json
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def dumps_block_batch(blocks: Iterable[Tuple[int, Optional[bytes], bytes]]) -> str:
+    """Dump blocks of `ChannelInnerTask.block_sync_range` to a batch.
+    Each block stays compressed as `BlockChain.block_data_dumps` made it, so a rep compresses a block once
+    for all of the citizens and peers syncing it.
+
+    :param blocks: [(block_height, confirm_info, block_dumped), ...]
+    :return: json of [[block_height, base64 of block_dumped, confirm_info], ...]
+    """
+    return json.dumps([
+        [height, base64.b64encode(block_dumped).decode(), confirm_info.decode() if confirm_info else ""]
+        for height, confirm_info, block_dumped in blocks
+    ])
+
+
+def loads_block_batch(batch: str) -> List[Tuple[int, dict, str]]:
+    """:return: [(block_height, serialized block, confirm_info), ...]"""
+    return [(height, json.loads(zlib.decompress(base64.b64decode(block_encoded))), confirm_info)
+            for height, block_encoded, confirm_info in json.loads(batch)]
+
+
+class CatchUpWindow:
+    """Flow control of a citizen which requests batches of blocks to catch up.
+
+    At most `window` requests are in flight, and the next ones are made only when the received blocks are taken
+    in height order. So blocks held by the citizen are bounded by `window * batch_size`.
+    A short batch, which a rep cut by its size limit, is requested again for the rest.
+    An empty batch stops the catch-up, and the rest is left to the subscription of new blocks.
+    """
+
+    def __init__(self, next_height: int, batch_size: int, window: int):
+        self.__next_height = next_height
+        self.__batch_size = batch_size
+        self.__window = window
+        self.__max_height: Optional[int] = None
+        self.__requested: Dict[int, int] = {}  # {from_height: count}
+        self.__retries: List[Tuple[int, int]] = []
+        self.__received: Dict[int, Tuple[dict, str]] = {}
+        self.__stopped = False
+
+    @property
+    def done(self) -> bool:
+        if self.__requested:
+            return False
+        if self.__stopped:
+            return True
+        return (self.__max_height is not None and self.__next_height > self.__max_height
+                and not self.__retries and not self.__received)
+
+    def requests(self) -> List[Tuple[int, int]]:
+        """New requests to fill the window.
+
+        :return: [(from_height, count), ...]
+        """
+        requests = []
+        if self.__stopped:
+            return requests
+
+        while len(self.__requested) + len(self.__received) // self.__batch_size < self.__window:
+            if self.__retries:
+                from_height, count = self.__retries.pop(0)
+            elif self.__max_height is None and self.__requested:
+                # The first reply tells how far to request.
+                break
+            elif self.__max_height is not None and self.__next_height > self.__max_height:
+                break
+            else:
+                from_height = self.__next_height
+                count = self.__batch_size
+                if self.__max_height is not None:
+                    count = min(count, self.__max_height - from_height + 1)
+                self.__next_height += count
+
+            self.__requested[from_height] = count
+            requests.append((from_height, count))
+        return requests
+
+    def receive(self, from_height: int, max_height: int, blocks: List[Tuple[int, dict, str]]):
+        count = self.__requested.pop(from_height, None)
+        if count is None or self.__stopped:
+            return
+        if not blocks:
+            self.__stopped = True
+            return
+
+        if self.__max_height is None or max_height > self.__max_height:
+            self.__max_height = max_height
+        for height, block, confirm_info in blocks:
+            if from_height <= height < from_height + count:
+                self.__received[height] = (block, confirm_info)
+
+        last_height = max(height for height, _, _ in blocks)
+        last_height_to_request = min(from_height + count - 1, self.__max_height)
+        if last_height < last_height_to_request:
+            self.__retries.append((last_height + 1, last_height_to_request - last_height))
+
+    def pop_ready(self, current_height: int) -> List[Tuple[dict, str]]:
+        """Received blocks next to the current height in order. Blocks not higher than it are dropped.
+
+        :return: [(serialized block, confirm_info), ...]
+        """
+        for height in [height for height in self.__received if height <= current_height]:
+            del self.__received[height]
+
+        blocks = []
+        height = current_height + 1
+        while height in self.__received:
+            blocks.append(self.__received.pop(height))
+            height += 1
+        return blocks
@@ -24,16 +24,18 @@ import time
 from concurrent import futures
 from enum import Enum
 from functools import partial
+from typing import Dict
 
 import grpc
 from grpc._channel import _Rendezvous
 
 from loopchain import configure as conf, utils as util
-from loopchain.baseservice import StubManager, ObjectManager, CommonThread, BroadcastCommand, \
-    TimerService, Timer
+from loopchain.baseservice import StubManager, PeerStubPool, PeerScoreboard, ObjectManager, CommonThread, \
+    BroadcastCommand, TimerService, Timer
 from loopchain.baseservice.module_process import ModuleProcess, ModuleProcessProperties
+from loopchain.baseservice.peer_outbox import PeerOutbox
+from loopchain.baseservice.tx_batcher import TxBatcher
 from loopchain.baseservice.tx_item_helper import TxItem
-from loopchain.protos import loopchain_pb2_grpc, loopchain_pb2
 
 
 class PeerThreadStatus(Enum):
@@ -50,10 +52,14 @@ class _Broadcaster:
         self.__self_target = self_target
 
         self.__audience = {}  # self.__audience[peer_target] = stub_manager
+        self.__outboxes: Dict[str, PeerOutbox] = {}  # used if conf.BROADCAST_QUEUE_SIZE > 0
+        self.__outbox_stats_logged_time = time.monotonic()
         self.__thread_variables = dict()
         self.__thread_variables[self.THREAD_VARIABLE_PEER_STATUS] = PeerThreadStatus.normal
 
-        if conf.IS_BROADCAST_ASYNC:
+        if conf.BROADCAST_QUEUE_SIZE > 0:
+            self.__broadcast_run = self.__broadcast_run_outbox
+        elif conf.IS_BROADCAST_ASYNC:
             self.__broadcast_run = self.__broadcast_run_async
         else:
             self.__broadcast_run = self.__broadcast_run_sync
@@ -71,7 +77,9 @@ class _Broadcaster:
             "BroadcastVote"
         }
 
-        self.stored_tx = queue.Queue()
+        self.__tx_batcher = TxBatcher(channel)
+        self.__send_tx_lock = threading.Lock()
+        self.__tx_batch_stats_logged_time = time.monotonic()
 
         self.__timer_service = TimerService()
 
@@ -86,6 +94,13 @@ class _Broadcaster:
         if self.__timer_service.is_run():
             self.__timer_service.stop()
             self.__timer_service.wait()
+        for outbox in self.__outboxes.values():
+            outbox.stop()
+        self.__outboxes.clear()
+
+    def get_outbox_stats(self) -> dict:
+        """Depth of the queue and counts of sent, failed and dropped messages of each peer."""
+        return {target: outbox.get_stats() for target, outbox in list(self.__outboxes.items())}
 
     def handle_command(self, command, params):
         func = self.__handler_map[command]
@@ -97,9 +112,20 @@ class _Broadcaster:
                and stub_manager.elapsed_last_succeed_time() < timeout
 
     def __broadcast_retry_async(self, peer_target, method_name, method_param, retry_times, timeout, stub, result):
+        scoreboard = PeerScoreboard()
         if isinstance(result, _Rendezvous) and result.code() == grpc.StatusCode.OK:
+            scoreboard.record_success(peer_target)
             return
         if isinstance(result, futures.Future) and not result.exception():
+            scoreboard.record_success(peer_target)
+            return
+
+        if isinstance(result, futures.Future):
+            scoreboard.record_failure(peer_target, result.exception())
+        else:
+            scoreboard.record_failure(peer_target, result if isinstance(result, grpc.RpcError) else None)
+        if retry_times > 0 and not scoreboard.is_available(peer_target):
+            logging.debug(f"broadcast_thread:__broadcast_retry_async ({peer_target}) is in cooldown. No retry.")
             return
 
         logging.debug(f"try retry to : peer_target({peer_target})\n")
@@ -165,6 +191,25 @@ class _Broadcaster:
             # util.logger.debug(f"method_name({method_name}), peer_target({target})")
             self.__call_async_to_target(target, method_name, method_param, True, retry_times, timeout)
 
+    def __broadcast_run_outbox(self, method_name, method_param, retry_times=None, timeout=None):
+        """put the message in the queue of each audience
+
+        :param method_name: gRPC interface
+        :param method_param: gRPC message
+        """
+        if timeout is None:
+            timeout = conf.GRPC_TIMEOUT_BROADCAST_RETRY
+
+        retry_times = conf.BROADCAST_RETRY_TIMES if retry_times is None else retry_times
+
+        for target in self.__get_broadcast_targets(method_name):
+            outbox = self.__outboxes.get(target)
+            if outbox is None:
+                logging.debug(f"broadcast_thread:__broadcast_run_outbox ({target}) not in audience.")
+                continue
+            outbox.put(method_name, method_param, retry_times, timeout)
+        self.__log_outbox_stats()
+
     def __broadcast_run_sync(self, method_name, method_param, retry_times=None, timeout=None):
         """call gRPC interface of audience
 
@@ -199,16 +244,21 @@ class _Broadcaster:
         method_name = param[0]
         method_param = param[1]
         target = param[2]
-        self.__call_async_to_target(target, method_name, method_param, True, 0, conf.GRPC_TIMEOUT_BROADCAST_RETRY)
+        outbox = self.__outboxes.get(target)
+        if outbox is not None:
+            outbox.put(method_name, method_param, 0, conf.GRPC_TIMEOUT_BROADCAST_RETRY)
+        else:
+            self.__call_async_to_target(target, method_name, method_param, True, 0,
+                                        conf.GRPC_TIMEOUT_BROADCAST_RETRY)
 
     def __add_audience(self, audience_target):
         util.logger.debug(f"audience_target({audience_target})")
         if audience_target not in self.__audience:
-            stub_manager = StubManager(
-                audience_target, loopchain_pb2_grpc.PeerServiceStub,
-                ssl_auth_type=conf.GRPC_SSL_TYPE
-            )
-            self.__audience[audience_target] = stub_manager
+            self.__audience[audience_target] = PeerStubPool().get(audience_target)
+            if conf.BROADCAST_QUEUE_SIZE > 0:
+                outbox = PeerOutbox(audience_target, self.__audience[audience_target])
+                outbox.start()
+                self.__outboxes[audience_target] = outbox
 
     def __handler_update_audience(self, audience_targets):
         old_audience = self.__audience.copy()
@@ -219,6 +269,9 @@ class _Broadcaster:
 
         for old_audience_target in old_audience:
             old_stubmanager: StubManager = self.__audience.pop(old_audience_target, None)
+            old_outbox: PeerOutbox = self.__outboxes.pop(old_audience_target, None)
+            if old_outbox is not None:
+                old_outbox.stop()
             # TODO If necessary, close grpc with old_stubmanager. If not necessary just remove this comment.
 
     def __handler_broadcast(self, broadcast_param):
@@ -230,62 +283,63 @@ class _Broadcaster:
         # util.logger.debug("BroadcastThread method param: " + str(broadcast_method_param))
         self.__broadcast_run(broadcast_method_name, broadcast_method_param, **broadcast_method_kwparam)
 
-    def __make_tx_list_message(self):
-        tx_list = []
-        tx_list_size = 0
-        tx_list_count = 0
-        remains = False
-        while not self.stored_tx.empty():
-            stored_tx_item = self.stored_tx.get()
-            tx_list_size += len(stored_tx_item)
-            tx_list_count += 1
-            if tx_list_size >= conf.MAX_TX_SIZE_IN_BLOCK or tx_list_count >= conf.MAX_TX_COUNT_IN_ADDTX_LIST:
-                self.stored_tx.put(stored_tx_item)
-                remains = True
-                break
-            tx_list.append(stored_tx_item.get_tx_message())
-        message = loopchain_pb2.TxSendList(
-            channel=self.__channel,
-            tx_list=tx_list
-        )
-
-        return remains, message
-
     def __send_tx_by_timer(self, **kwargs):
         # util.logger.spam(f"broadcast_scheduler:__send_tx_by_timer")
         if self.__thread_variables[self.THREAD_VARIABLE_PEER_STATUS] == PeerThreadStatus.leader_complained:
             logging.warning("Leader is complained your tx just stored in queue by temporally: "
-                            + str(self.stored_tx.qsize()))
+                            + str(len(self.__tx_batcher)))
         else:
-            # Send single tx for test
-            # stored_tx_item = self.stored_tx.get()
-            # self.__broadcast_run("AddTx", stored_tx_item.get_tx_message())
-
-            # Send multiple tx
-            remains, message = self.__make_tx_list_message()
-            self.__broadcast_run("AddTxList", message)
-            if remains:
-                self.__send_tx_in_timer()
+            message = self.__tx_batcher.pop_message()
+            if message is not None:
+                self.__broadcast_run("AddTxList", message)
+            self.__log_tx_batch_stats()
+            self.__send_tx_in_timer()
 
     def __send_tx_in_timer(self, tx_item=None):
+        """Arm the timer to send txs in time of the latency budget of TxBatcher.
+
+        If the budget has been shrunk by new txs, the timer is armed again with the shorter delay.
+        """
         # util.logger.spam(f"broadcast_scheduler:__send_tx_in_timer")
-        duration = 0
-        if tx_item:
-            self.stored_tx.put(tx_item)
-            duration = conf.SEND_TX_LIST_DURATION
+        with self.__send_tx_lock:
+            if tx_item:
+                self.__tx_batcher.add(tx_item)
+
+            delay = self.__tx_batcher.get_flush_delay()
+            if delay is None:
+                return
+
+            timer = self.__timer_service.timer_list.get(TimerService.TIMER_KEY_ADD_TX)
+            if timer is not None:
+                if timer.remain_time() <= delay:
+                    return
+                self.__timer_service.stop_timer(TimerService.TIMER_KEY_ADD_TX)
 
-        if TimerService.TIMER_KEY_ADD_TX not in self.__timer_service.timer_list:
             self.__timer_service.add_timer(
                 TimerService.TIMER_KEY_ADD_TX,
                 Timer(
                     target=TimerService.TIMER_KEY_ADD_TX,
-                    duration=duration,
+                    duration=delay,
                     callback=self.__send_tx_by_timer,
                     callback_kwargs={}
                 )
             )
-        else:
-            pass
+
+    def __log_tx_batch_stats(self):
+        now = time.monotonic()
+        if now - self.__tx_batch_stats_logged_time < conf.TX_BATCH_STATS_LOG_INTERVAL:
+            return
+
+        self.__tx_batch_stats_logged_time = now
+        util.logger.info(f"AddTxList batch stats of channel({self.__channel}): {self.__tx_batcher.get_stats()}")
+
+    def __log_outbox_stats(self):
+        now = time.monotonic()
+        if now - self.__outbox_stats_logged_time < conf.BROADCAST_QUEUE_STATS_LOG_INTERVAL:
+            return
+
+        self.__outbox_stats_logged_time = now
+        util.logger.info(f"Broadcast queues of channel({self.__channel}): {self.get_outbox_stats()}")
 
     def __handler_create_tx(self, create_tx_param):
         # logging.debug(f"Broadcast create_tx....")
@@ -331,6 +385,10 @@ class BroadcastScheduler(metaclass=abc.ABCMeta):
     def reset_audience_reps_hash(self):
         self.__audience_reps_hash = None
 
+    def get_outbox_stats(self) -> dict:
+        """Stats of the queue of each peer. It is empty if the broadcaster is in another process."""
+        return {}
+
     def add_schedule_listener(self, callback, commands: tuple):
         if not commands:
             raise ValueError("commands parameter is required")
@@ -381,15 +439,18 @@ class BroadcastScheduler(metaclass=abc.ABCMeta):
         else:
             util.logger.warning(f"fail find_preps_by_roothash by ({reps_hash})")
 
-    def schedule_broadcast(self,
-                           method_name,
-                           method_param, *,
-                           reps_hash=None, retry_times=None, timeout=None):
+    def __check_audience(self, reps_hash):
         if reps_hash and reps_hash != self.__audience_reps_hash:
             self._update_audience(reps_hash)
         elif not self.__audience_reps_hash:
             self._update_audience(ObjectManager().channel_service.peer_manager.reps_hash())
 
+    def schedule_broadcast(self,
+                           method_name,
+                           method_param, *,
+                           reps_hash=None, retry_times=None, timeout=None):
+        self.__check_audience(reps_hash)
+
         kwargs = {}
         if retry_times is not None:
             kwargs['retry_times'] = retry_times
@@ -402,6 +463,11 @@ class BroadcastScheduler(metaclass=abc.ABCMeta):
     def schedule_send_failed_leader_complain(self, method_name, method_param, *, target: str):
         self.schedule_job(BroadcastCommand.SEND_TO_SINGLE_TARGET, (method_name, method_param, target))
 
+    def schedule_send(self, method_name, method_param, *, target: str, reps_hash=None):
+        """Send to a target in the audience of the reps_hash"""
+        self.__check_audience(reps_hash)
+        self.schedule_job(BroadcastCommand.SEND_TO_SINGLE_TARGET, (method_name, method_param, target))
+
 
 class _BroadcastThread(CommonThread):
     def __init__(self, channel: str, self_target: str=None):
@@ -409,6 +475,9 @@ class _BroadcastThread(CommonThread):
         self.__broadcast_pool = futures.ThreadPoolExecutor(conf.MAX_BROADCAST_WORKERS, "BroadcastThread")
         self.__broadcaster = _Broadcaster(channel, self_target)
 
+    def get_outbox_stats(self) -> dict:
+        return self.__broadcaster.get_outbox_stats()
+
     def stop(self):
         super().stop()
         self.broadcast_queue.put((None, None, None, None))
@@ -450,6 +519,9 @@ class _BroadcastSchedulerThread(BroadcastScheduler):
     def wait(self):
         self.__broadcast_thread.wait()
 
+    def get_outbox_stats(self) -> dict:
+        return self.__broadcast_thread.get_outbox_stats()
+
     def _put_command(self, command, params, block=False, block_timeout=None):
         if command == BroadcastCommand.CREATE_TX:
             priority = (10, time.time())
@@ -0,0 +1,50 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Fan-out tree of broadcast"""
+
+import hashlib
+from typing import List, Sequence
+
+
+def get_fanout_order(nodes: Sequence[str], root: str, height: int) -> List[str]:
+    """Order of nodes in the k-ary tree of the height. The root comes first.
+
+    The other nodes are shuffled by the height, so every node gets the same tree from the same reps
+    and the inner nodes which forward messages change in every height.
+    """
+    seed = height.to_bytes(8, byteorder='big', signed=False)
+    others = sorted((node for node in nodes if node != root),
+                    key=lambda node: hashlib.sha256(seed + node.encode()).digest())
+    return [root] + others
+
+
+def get_fanout_children(nodes: Sequence[str], root: str, node: str, height: int, fanout: int) -> List[str]:
+    """Nodes to which `node` forwards a message from `root` in the tree of the height.
+
+    :param nodes: ids of all nodes to receive the message
+    :param root: id of the node which started the broadcast
+    :param node: id of the node which forwards
+    :param height: block height
+    :param fanout: max count of children of a node. All other nodes are children of the root if it is not positive.
+    """
+    order = get_fanout_order(nodes, root, height)
+    try:
+        index = order.index(node)
+    except ValueError:
+        return []
+
+    if fanout <= 0:
+        return order[1:] if index == 0 else []
+    first_child = index * fanout + 1
+    return order[first_child:first_child + fanout]
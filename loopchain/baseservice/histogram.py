@@ -0,0 +1,63 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Histogram with fixed buckets"""
+
+import bisect
+import threading
+from typing import Sequence
+
+
+class Histogram:
+    """Counts observed values into buckets by their upper bounds.
+
+    A value greater than every bound is counted in "+Inf" bucket.
+    """
+
+    def __init__(self, bounds: Sequence[float]):
+        self.__bounds = tuple(sorted(bounds))
+        self.__counts = [0] * (len(self.__bounds) + 1)
+        self.__sum = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return sum(self.__counts)
+
+    @property
+    def sum(self):
+        return self.__sum
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.__bounds, value)
+        with self.__lock:
+            self.__counts[index] += 1
+            self.__sum += value
+
+    def reset(self):
+        with self.__lock:
+            self.__counts = [0] * (len(self.__bounds) + 1)
+            self.__sum = 0
+
+    def to_dict(self) -> dict:
+        with self.__lock:
+            counts = list(self.__counts)
+            sum_ = self.__sum
+
+        buckets = {str(bound): count for bound, count in zip(self.__bounds, counts)}
+        buckets["+Inf"] = counts[-1]
+        return {
+            "buckets": buckets,
+            "count": sum(counts),
+            "sum": sum_
+        }
@@ -29,6 +29,7 @@ from websockets import WebSocketClientProtocol
 from loopchain import configure as conf
 from loopchain import utils
 from loopchain.baseservice import ObjectManager, TimerService, Timer
+from loopchain.baseservice.block_batch import CatchUpWindow, loads_block_batch
 from loopchain.blockchain import AnnounceNewBlockError
 from loopchain.blockchain.blocks import BlockSerializer, BlockVerifier
 from loopchain.blockchain.votes.v0_1a import BlockVotes
@@ -80,9 +81,11 @@ class NodeSubscriber:
         self._exception = None
         self._websocket: WebSocketClientProtocol = None
         self._subscribe_event: Event = None
+        self._catch_up: CatchUpWindow = None
 
         ws_methods.add(self.node_ws_PublishHeartbeat)
         ws_methods.add(self.node_ws_PublishNewBlock)
+        ws_methods.add(self.node_ws_PublishBlocks)
 
         logging.debug(f"websocket target uri : {self._target_uri}")
 
@@ -160,8 +163,53 @@ class NodeSubscriber:
         finally:
             await self.close()
 
+    async def _start_catch_up(self):
+        """Request batches of blocks from the height of this node, while new blocks are published one by one.
+        The blocks published by both ways are added once, because the blocks not higher than this node are ignored.
+        """
+        if conf.CITIZEN_CATCH_UP_WINDOW <= 0:
+            return
+
+        blockchain = ObjectManager().channel_service.block_manager.blockchain
+        self._catch_up = CatchUpWindow(blockchain.block_height + 1,
+                                       conf.CITIZEN_BLOCK_BATCH_SIZE,
+                                       conf.CITIZEN_CATCH_UP_WINDOW)
+        await self._request_blocks()
+
+    async def _request_blocks(self):
+        for from_height, count in self._catch_up.requests():
+            request = Request(
+                method="node_ws_RequestBlocks",
+                height=from_height,
+                count=count
+            )
+            await self._websocket.send(json.dumps(request))
+
+    async def node_ws_PublishBlocks(self, **kwargs):
+        """A batch of blocks requested by `_request_blocks`."""
+        if self._catch_up is None:
+            return
+
+        blockchain = ObjectManager().channel_service.block_manager.blockchain
+        self._catch_up.receive(kwargs['height'], kwargs['max_height'], loads_block_batch(kwargs['blocks']))
+        blocks = self._catch_up.pop_ready(blockchain.block_height)
+        # Request the next batches before adding blocks, so the rep prepares them meanwhile.
+        await self._request_blocks()
+
+        for block_dict, votes_dumped in blocks:
+            self._add_block(block_dict, votes_dumped)
+            if self._exception:
+                break
+
+        if self._catch_up.done:
+            utils.logger.info(f"Catch-up by batches of blocks is complete at height({blockchain.block_height}).")
+            self._catch_up = None
+
     async def node_ws_PublishNewBlock(self, **kwargs):
         block_dict, votes_dumped = kwargs.get('block'), kwargs.get('confirm_info', '')
+        self._add_block(block_dict, votes_dumped)
+
+    def _add_block(self, block_dict: dict, votes_dumped: str):
         try:
             votes_serialized = json.loads(votes_dumped)
             vote = BlockVotes.deserialize_votes(votes_serialized)
@@ -201,6 +249,7 @@ class NodeSubscriber:
         if not self._subscribe_event.is_set():
             # set subscribe_event to transit the state to Watch.
             self._subscribe_event.set()
+            await self._start_catch_up()
 
         timer_key = TimerService.TIMER_KEY_WS_HEARTBEAT
         timer_service = ObjectManager().channel_service.timer_service
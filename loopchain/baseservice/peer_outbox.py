@@ -0,0 +1,160 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Bounded queue and sender of broadcast messages to a peer"""
+
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from enum import Enum
+from typing import Deque, Dict, NamedTuple, Optional
+
+from loopchain import configure as conf
+from loopchain.baseservice.peer_scoreboard import PeerScoreboard
+from loopchain.baseservice.stub_manager import StubManager
+
+
+class DropPolicy(Enum):
+    stale = "stale"  # a message replaces the same one in the queue, and these are dropped first
+    oldest = "oldest"  # dropped next, from the oldest
+    keep = "keep"  # dropped last
+
+
+class _OutboxMessage(NamedTuple):
+    method_name: str
+    message: object
+    retry_times: int
+    timeout: float
+
+
+class PeerOutbox:
+    """Messages to a peer in a bounded queue, sent in order by a thread of the peer.
+
+    A slow or unreachable peer delays its own queue only. When the queue is full, a queued message is dropped
+    by `DropPolicy` of its method in `conf.BROADCAST_DROP_POLICY`, or the new one if all of them are to keep.
+    A message which fails is retried with exponential backoff, but not while the peer is in cooldown
+    of `PeerScoreboard`.
+    """
+
+    def __init__(self, target: str, stub_manager: StubManager,
+                 max_size=conf.BROADCAST_QUEUE_SIZE,
+                 backoff=conf.BROADCAST_RETRY_BACKOFF):
+        self.__target = target
+        self.__stub_manager = stub_manager
+        self.__max_size = max(max_size, 1)
+        self.__backoff = backoff
+
+        self.__queue: Deque[_OutboxMessage] = deque()
+        self.__condition = threading.Condition()
+        self.__stop_event = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+
+        self.__sent = 0
+        self.__failed = 0
+        self.__dropped: Dict[str, int] = defaultdict(int)
+
+    @property
+    def target(self) -> str:
+        return self.__target
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__run, name=f"PeerOutbox({self.__target})", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        self.__stop_event.set()
+        with self.__condition:
+            self.__condition.notify_all()
+
+    def put(self, method_name: str, message, retry_times: int, timeout: float) -> bool:
+        """:return: False if the message is dropped by the full queue"""
+        outbox_message = _OutboxMessage(method_name, message, retry_times, timeout)
+        policy = self.__get_policy(method_name)
+        with self.__condition:
+            if policy is DropPolicy.stale:
+                for queued in [queued for queued in self.__queue
+                               if queued.method_name == method_name and queued.message == message]:
+                    self.__queue.remove(queued)
+                    self.__dropped[method_name] += 1
+
+            if len(self.__queue) >= self.__max_size and not self.__drop_one():
+                self.__dropped[method_name] += 1
+                return False
+
+            self.__queue.append(outbox_message)
+            self.__condition.notify()
+            return True
+
+    def get_stats(self) -> dict:
+        with self.__condition:
+            return {
+                "depth": len(self.__queue),
+                "sent": self.__sent,
+                "failed": self.__failed,
+                "dropped": dict(self.__dropped)
+            }
+
+    def __drop_one(self) -> bool:
+        """Drop a queued message to make room. It is called with the lock of the queue."""
+        for policy in (DropPolicy.stale, DropPolicy.oldest):
+            for queued in self.__queue:
+                if self.__get_policy(queued.method_name) is policy:
+                    self.__queue.remove(queued)
+                    self.__dropped[queued.method_name] += 1
+                    return True
+        return False
+
+    @staticmethod
+    def __get_policy(method_name: str) -> DropPolicy:
+        return DropPolicy(conf.BROADCAST_DROP_POLICY.get(method_name, DropPolicy.keep.value))
+
+    def __run(self):
+        while not self.__stop_event.is_set():
+            with self.__condition:
+                while not self.__queue and not self.__stop_event.is_set():
+                    self.__condition.wait()
+                if self.__stop_event.is_set():
+                    break
+                outbox_message = self.__queue.popleft()
+
+            is_sent = self.__send(outbox_message)
+            with self.__condition:
+                if is_sent:
+                    self.__sent += 1
+                else:
+                    self.__failed += 1
+
+    def __send(self, outbox_message: _OutboxMessage) -> bool:
+        scoreboard = PeerScoreboard()
+        for i in range(outbox_message.retry_times + 1):
+            if i > 0:
+                if not scoreboard.is_available(self.__target):
+                    logging.debug(f"PeerOutbox({self.__target}) is in cooldown. No retry.")
+                    break
+                if self.__stop_event.wait(self.__backoff * (2 ** (i - 1))):
+                    break
+
+            start_time = time.monotonic()
+            try:
+                self.__stub_manager.call(outbox_message.method_name, outbox_message.message,
+                                         timeout=outbox_message.timeout, is_raise=True)
+            except Exception as e:
+                scoreboard.record_failure(self.__target, e)
+            else:
+                scoreboard.record_success(self.__target, time.monotonic() - start_time)
+                return True
+
+        logging.warning(f"PeerOutbox({self.__target}) fail to send {outbox_message.method_name} "
+                        f"in {outbox_message.retry_times} retries.")
+        return False
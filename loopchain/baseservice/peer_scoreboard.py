@@ -0,0 +1,131 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Health of peers by the results of requests to them"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+import grpc
+
+from loopchain import configure as conf
+from loopchain.components import SingletonMetaClass
+
+
+def is_timeout_error(exception: Optional[Exception]) -> bool:
+    if isinstance(exception, (TimeoutError, asyncio.TimeoutError)):
+        return True
+    if isinstance(exception, grpc.RpcError) and callable(getattr(exception, "code", None)):
+        return exception.code() in (grpc.StatusCode.DEADLINE_EXCEEDED, grpc.StatusCode.CANCELLED)
+    return False
+
+
+class PeerScore:
+    def __init__(self):
+        self.rtt: Optional[float] = None  # moving average of seconds
+        self.error_rate = 0.0  # moving average of failures
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.served_blocks = 0
+        self.served_time = 0.0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "rtt": round(self.rtt, 4) if self.rtt is not None else None,
+            "error_rate": round(self.error_rate, 4),
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "blocks_per_second": round(self.served_blocks / self.served_time, 3) if self.served_time > 0 else 0.0,
+            "cooldown": round(max(self.cooldown_until - now, 0.0), 3)
+        }
+
+
+class PeerScoreboard(metaclass=SingletonMetaClass):
+    """RTT, error rate, timeouts and served blocks of peers shared in the process.
+
+    A peer which failed `conf.PEER_FAILURES_TO_COOLDOWN` times in a row is cooled down, and the cooldown
+    doubles with every further failure up to `conf.PEER_COOLDOWN_MAX`. A success ends the cooldown.
+    Block height sync asks healthy peers first, and broadcast does not retry to peers in cooldown.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.__clock = clock
+        self.__scores: Dict[str, PeerScore] = {}
+        self.__lock = threading.Lock()
+
+    def record_success(self, target: str, rtt: Optional[float] = None, served_blocks: int = 0):
+        """
+        :param rtt: seconds of the request. None if it is unknown
+        :param served_blocks: count of blocks the peer gave in the request
+        """
+        weight = conf.PEER_SCORE_WEIGHT
+        with self.__lock:
+            score = self.__get_score(target)
+            score.requests += 1
+            score.error_rate *= 1 - weight
+            if rtt is not None:
+                score.rtt = rtt if score.rtt is None else score.rtt * (1 - weight) + rtt * weight
+                if served_blocks:
+                    score.served_blocks += served_blocks
+                    score.served_time += rtt
+            score.consecutive_failures = 0
+            score.cooldown_until = 0.0
+
+    def record_failure(self, target: str, exception: Exception = None):
+        weight = conf.PEER_SCORE_WEIGHT
+        with self.__lock:
+            score = self.__get_score(target)
+            score.requests += 1
+            score.errors += 1
+            if is_timeout_error(exception):
+                score.timeouts += 1
+            score.error_rate = score.error_rate * (1 - weight) + weight
+            score.consecutive_failures += 1
+
+            exponent = score.consecutive_failures - conf.PEER_FAILURES_TO_COOLDOWN
+            if exponent >= 0:
+                cooldown = min(conf.PEER_COOLDOWN_BASE * (2 ** exponent), conf.PEER_COOLDOWN_MAX)
+                score.cooldown_until = self.__clock() + cooldown
+
+    def is_available(self, target: str) -> bool:
+        with self.__lock:
+            score = self.__scores.get(target)
+            return score is None or score.cooldown_until <= self.__clock()
+
+    def sort_targets(self, targets: Iterable[str]) -> List[str]:
+        """Healthy targets first: not in cooldown, low error rate and short RTT. Unknown targets are healthy."""
+        now = self.__clock()
+        with self.__lock:
+            def _key(target):
+                score = self.__scores.get(target)
+                if score is None:
+                    return False, 0.0, 0.0
+                return score.cooldown_until > now, round(score.error_rate, 1), score.rtt or 0.0
+            return sorted(targets, key=_key)
+
+    def to_dict(self) -> dict:
+        now = self.__clock()
+        with self.__lock:
+            return {target: score.to_dict(now) for target, score in self.__scores.items()}
+
+    def __get_score(self, target: str) -> PeerScore:
+        score = self.__scores.get(target)
+        if score is None:
+            score = self.__scores[target] = PeerScore()
+        return score
@@ -22,7 +22,7 @@ from typing import List, Optional, NamedTuple, Sequence, Iterator, Dict
 from urllib.parse import urlparse
 
 import requests
-from aiohttp import ClientSession
+from aiohttp import ClientSession, TCPConnector
 from jsonrpcclient import HTTPClient, Request
 from jsonrpcclient.aiohttp_client import aiohttpClient
 from loopchain import utils, configure as conf
@@ -139,6 +139,46 @@ class RestClient:
             utils.logger.spam(f"REST call async complete method_name({method.value.name})")
             return response
 
+    def create_session(self, limit: int) -> ClientSession:
+        """A session of which connections are pooled up to the limit, to be shared by `call_batch_async`."""
+        return ClientSession(connector=TCPConnector(limit=limit))
+
+    async def call_batch_async(self, method: RestMethod, params_list: Sequence[NamedTuple],
+                               session: ClientSession, timeout=None) -> List[dict]:
+        """Call the json-rpc method with each params in a batch request.
+
+        A rep rejects a whole batch with an error if one of the requests is malformed,
+        so the requests of the batch are sent one by one instead to tell which of them is rejected.
+        The v2 api takes a single request only, so its requests are always sent one by one.
+
+        :return: responses in the order of params_list. Each of them has 'result' or 'error'.
+        """
+        timeout = timeout or conf.REST_ADDITIONAL_TIMEOUT
+        url = self._create_jsonrpc_url(self.target, method)
+        requests_ = [self._create_jsonrpc_params(method, params) for params in params_list]
+        if method.value.version == conf.ApiVersion.v2:
+            return await self._post_jsonrpc_each(session, url, requests_, timeout)
+
+        responses = await self._post_jsonrpc(session, url, requests_, timeout)
+        if not isinstance(responses, list):
+            logging.debug(f"Batch request of {len(requests_)} is rejected by {self.target}. response({responses})")
+            return await self._post_jsonrpc_each(session, url, requests_, timeout)
+
+        responses = {response.get("id"): response for response in responses if isinstance(response, dict)}
+        no_response = {"error": {"message": "No response in the batch."}}
+        return [responses.get(request["id"], no_response) for request in requests_]
+
+    async def _post_jsonrpc_each(self, session: ClientSession, url: str, requests_: List[dict], timeout) -> List[dict]:
+        responses = await asyncio.gather(*[self._post_jsonrpc(session, url, request, timeout)
+                                           for request in requests_])
+        invalid_response = {"error": {"message": "Invalid response."}}
+        return [response if isinstance(response, dict) else invalid_response for response in responses]
+
+    @staticmethod
+    async def _post_jsonrpc(session: ClientSession, url: str, request, timeout):
+        async with session.post(url=url, json=request, timeout=timeout) as response:
+            return await response.json()
+
     def _call_rest(self, target: str, method: RestMethod, timeout):
         url = self._create_rest_url(target, method)
         params = self._create_rest_params()
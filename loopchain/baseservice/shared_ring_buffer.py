@@ -0,0 +1,133 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Ring buffer of byte frames on shared memory between two processes"""
+
+import ctypes
+import multiprocessing as mp
+import queue
+import struct
+from typing import List
+
+
+class SharedRingBuffer:
+    """Single producer, single consumer ring buffer on shared memory.
+
+    Each `put` writes one length-prefixed frame. `get_all` drains every frame written so far,
+    so the consumer wakes up once for many frames.
+    It has to be created in the parent process and passed to the child process as an argument of `Process`.
+    """
+    _frame_header = struct.Struct("!I")
+
+    def __init__(self, capacity: int, ctx=None):
+        ctx = ctx or mp.get_context('spawn')
+
+        self._capacity = capacity
+        self._buffer = ctx.RawArray(ctypes.c_ubyte, capacity)
+        self._head = ctx.RawValue(ctypes.c_uint64, 0)  # total bytes read
+        self._tail = ctx.RawValue(ctypes.c_uint64, 0)  # total bytes written
+        self._closed = ctx.RawValue(ctypes.c_bool, False)
+
+        self._lock = ctx.Lock()
+        self._not_empty = ctx.Condition(self._lock)
+        self._not_full = ctx.Condition(self._lock)
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.value
+
+    def usage(self) -> float:
+        """Ratio of used bytes. Producer can use it as a backpressure signal."""
+        with self._lock:
+            return (self._tail.value - self._head.value) / self._capacity
+
+    def put(self, data: bytes, timeout=None):
+        """Write a frame.
+
+        :param data: frame payload
+        :param timeout: seconds to wait for free space. None means waiting forever.
+        :raise queue.Full: there is not enough space until timeout
+        """
+        frame_size = self._frame_header.size + len(data)
+        if frame_size > self._capacity:
+            raise ValueError(f"Frame size({frame_size}) exceeds capacity({self._capacity})")
+
+        with self._not_full:
+            if not self._not_full.wait_for(lambda: self._free_size() >= frame_size or self._closed.value, timeout):
+                raise queue.Full
+            if self._closed.value:
+                raise ValueError("SharedRingBuffer is closed")
+            tail = self._tail.value
+
+        # Only producer writes behind the tail, so copying bytes doesn't need the lock.
+        self._write(tail, self._frame_header.pack(len(data)))
+        self._write(tail + self._frame_header.size, data)
+
+        with self._not_empty:
+            self._tail.value = tail + frame_size
+            self._not_empty.notify()
+
+    def get_all(self, timeout=None) -> List[bytes]:
+        """Read all written frames.
+
+        :param timeout: seconds to wait for any frame. None means waiting forever.
+        :return: list of frame payloads. Empty if timed out or closed.
+        """
+        with self._not_empty:
+            self._not_empty.wait_for(lambda: self._tail.value > self._head.value or self._closed.value, timeout)
+            head, tail = self._head.value, self._tail.value
+
+        frames = []
+        position = head
+        while position < tail:
+            data_size, = self._frame_header.unpack(self._read(position, self._frame_header.size))
+            position += self._frame_header.size
+            frames.append(self._read(position, data_size))
+            position += data_size
+
+        if frames:
+            with self._not_full:
+                self._head.value = position
+                self._not_full.notify()
+
+        return frames
+
+    def close(self):
+        with self._lock:
+            self._closed.value = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def _free_size(self) -> int:
+        return self._capacity - (self._tail.value - self._head.value)
+
+    def _write(self, position: int, data: bytes):
+        buffer = memoryview(self._buffer).cast('B')
+        offset = position % self._capacity
+        first = min(len(data), self._capacity - offset)
+        buffer[offset:offset + first] = data[:first]
+        if first < len(data):
+            buffer[:len(data) - first] = data[first:]
+
+    def _read(self, position: int, size: int) -> bytes:
+        buffer = memoryview(self._buffer).cast('B')
+        offset = position % self._capacity
+        first = min(size, self._capacity - offset)
+        data = bytes(buffer[offset:offset + first])
+        if first < size:
+            data += bytes(buffer[:size - first])
+        return data
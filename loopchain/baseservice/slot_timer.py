@@ -58,6 +58,17 @@ class SlotTimer:
             )
         )
 
+    @property
+    def duration(self):
+        return self.__duration
+
+    def set_duration(self, duration):
+        """Change the duration of slot. It is applied from the next slot."""
+        self.__duration = duration
+        timer = self.__timer_service.get_timer(self.__timer_key)
+        if timer:
+            timer.duration = duration
+
     def __timer_callback(self):
         util.logger.spam(f"__timer_callback slot({self.__slot}) delayed({self.__delayed})")
         self.__slot += 1
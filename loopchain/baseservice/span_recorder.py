@@ -0,0 +1,151 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Recorder of phase durations by block height"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import loopchain.utils as util
+
+
+@dataclass(frozen=True)
+class Span:
+    name: str
+    height: int
+    start: float  # seconds since epoch
+    duration: float  # seconds
+    thread_id: int
+
+    def to_trace_event(self, pid: int) -> dict:
+        """Complete event of Chrome trace event format"""
+        return {
+            "name": self.name,
+            "cat": "consensus",
+            "ph": "X",
+            "ts": int(self.start * 1_000_000),
+            "dur": int(self.duration * 1_000_000),
+            "pid": pid,
+            "tid": self.thread_id,
+            "args": {"height": self.height}
+        }
+
+
+class SpanRecorder:
+    """Keep spans of the last `max_heights` block heights.
+
+    Spans of the same name in a height are summed up in the phases of the height.
+    If `trace_path` is given, every span is also appended to the file in JSON array format of Chrome trace,
+    which chrome://tracing and Perfetto can open while it is being written.
+
+    Usage:
+        with span_recorder.span("score_invoke", block.header.height):
+            ...
+    """
+
+    def __init__(self, max_heights: int = 100, trace_path: str = None):
+        self.__max_heights = max_heights
+        self.__heights: Dict[int, List[Span]] = {}
+        self.__lock = threading.Lock()
+        self.__pid = os.getpid()
+        self.__trace_path = trace_path
+        self.__trace_file = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.__max_heights > 0 or bool(self.__trace_path)
+
+    @contextmanager
+    def span(self, name: str, height: int):
+        if not self.enabled:
+            yield
+            return
+
+        start = time.time()
+        start_counter = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(Span(name=name,
+                             height=height,
+                             start=start,
+                             duration=time.perf_counter() - start_counter,
+                             thread_id=threading.get_ident()))
+
+    def record(self, span: Span):
+        with self.__lock:
+            if self.__max_heights > 0:
+                self.__add(span)
+            if self.__trace_path:
+                self.__write_trace_event(span)
+
+    def __add(self, span: Span):
+        spans = self.__heights.setdefault(span.height, [])
+        spans.append(span)
+        while len(self.__heights) > self.__max_heights:
+            del self.__heights[min(self.__heights)]
+
+    def __write_trace_event(self, span: Span):
+        try:
+            if self.__trace_file is None:
+                self.__trace_file = open(self.__trace_path, "w")
+                self.__trace_file.write("[\n")
+            self.__trace_file.write(json.dumps(span.to_trace_event(self.__pid)) + ",\n")
+            self.__trace_file.flush()
+        except OSError as e:
+            util.logger.warning(f"Stop writing trace to {self.__trace_path}. {e}")
+            self.__trace_path = None
+
+    def close(self):
+        with self.__lock:
+            if self.__trace_file is not None:
+                self.__trace_file.close()
+                self.__trace_file = None
+
+    def get_heights(self, count: int = None) -> List[dict]:
+        """Phase durations of the last `count` heights in seconds, from the oldest height."""
+        with self.__lock:
+            heights = sorted((height, list(spans)) for height, spans in self.__heights.items())
+        if count is not None:
+            heights = heights[-count:] if count > 0 else []
+
+        result = []
+        for height, spans in heights:
+            phases = OrderedDict()
+            for span in spans:
+                phases[span.name] = phases.get(span.name, 0) + span.duration
+            result.append({
+                "height": height,
+                "start": min(span.start for span in spans),
+                "phases": {name: round(duration, 6) for name, duration in phases.items()}
+            })
+        return result
+
+    def get_spans(self, height: int) -> Optional[List[Span]]:
+        with self.__lock:
+            spans = self.__heights.get(height)
+            return list(spans) if spans is not None else None
+
+    def to_chrome_trace(self) -> dict:
+        with self.__lock:
+            spans = [span for height in sorted(self.__heights) for span in self.__heights[height]]
+        return {
+            "traceEvents": [span.to_trace_event(self.__pid) for span in spans],
+            "displayTimeUnit": "ms"
+        }
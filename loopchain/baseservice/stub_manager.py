@@ -15,10 +15,11 @@ from loopchain import configure as conf
 
 class StubManager:
 
-    def __init__(self, target, stub_type, ssl_auth_type=conf.SSLAuthType.none):
+    def __init__(self, target, stub_type, ssl_auth_type=conf.SSLAuthType.none, options=None):
         self.__target = target
         self.__stub_type = stub_type
         self.__ssl_auth_type = ssl_auth_type
+        self.__options = options
         self.__stub = None
         self.__channel = None
         self.__stub_update_time = datetime.datetime.now()
@@ -32,7 +33,7 @@ class StubManager:
             util.logger.spam(f"StubManager:__make_stub is_stub_reuse({is_stub_reuse}) self.__stub({self.__stub})")
 
             self.__stub, self.__channel = util.get_stub_to_server(
-                self.__target, self.__stub_type, ssl_auth_type=self.__ssl_auth_type)
+                self.__target, self.__stub_type, ssl_auth_type=self.__ssl_auth_type, options=self.__options)
             self.__stub_update_time = datetime.datetime.now()
             if self.__stub:
                 self.__update_last_succeed_time()
@@ -0,0 +1,99 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Pool of gRPC channels to peers"""
+
+import threading
+import time
+from functools import partial
+from typing import Dict, Iterable
+
+import loopchain.utils as util
+from loopchain import configure as conf
+from loopchain.baseservice.peer_scoreboard import PeerScoreboard
+from loopchain.baseservice.stub_manager import StubManager
+from loopchain.components import SingletonMetaClass
+from loopchain.protos import loopchain_pb2_grpc
+
+
+def get_keepalive_options() -> list:
+    """Options of gRPC client channels to keep idle connections to peers alive."""
+    if conf.GRPC_KEEPALIVE_TIME <= 0:
+        return []
+    return [
+        ("grpc.keepalive_time_ms", conf.GRPC_KEEPALIVE_TIME * 1000),
+        ("grpc.keepalive_timeout_ms", conf.GRPC_KEEPALIVE_TIMEOUT * 1000),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0)
+    ]
+
+
+class PeerStubPool(metaclass=SingletonMetaClass):
+    """StubManagers of peers shared in the process.
+
+    A channel to a peer is made once with keepalive and reused by broadcast, block height sync and status probes,
+    so they do not pay for a new connection to the same peer.
+    """
+
+    def __init__(self):
+        self.__stub_managers: Dict[str, StubManager] = {}
+        self.__lock = threading.Lock()
+
+    def get(self, target: str) -> StubManager:
+        with self.__lock:
+            stub_manager = self.__stub_managers.get(target)
+            if stub_manager is None:
+                stub_manager = StubManager(target, loopchain_pb2_grpc.PeerServiceStub,
+                                           ssl_auth_type=conf.GRPC_SSL_TYPE,
+                                           options=get_keepalive_options())
+                self.__stub_managers[target] = stub_manager
+            return stub_manager
+
+    def discard(self, target: str):
+        with self.__lock:
+            self.__stub_managers.pop(target, None)
+
+    def call_all(self, targets: Iterable[str], method_name: str, message, timeout: float) -> Dict[str, object]:
+        """Call the method of the targets at once and wait for them until the timeout in total.
+        The results are recorded in `PeerScoreboard`.
+
+        :return: {target: response} of the targets which responded in time
+        """
+        scoreboard = PeerScoreboard()
+        futures = {}
+        for target in targets:
+            start_time = time.monotonic()
+            future = self.get(target).call_async(method_name, message, lambda result: None, timeout)
+            if future is None:
+                scoreboard.record_failure(target)
+                continue
+            future.add_done_callback(partial(self.__record_result, scoreboard, target, start_time))
+            futures[target] = future
+
+        deadline = time.monotonic() + timeout
+        responses = {}
+        for target, future in futures.items():
+            try:
+                responses[target] = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except Exception as e:
+                future.cancel()
+                util.logger.warning(f"Fail to call {method_name} of {target}. {e!r}")
+        return responses
+
+    @staticmethod
+    def __record_result(scoreboard: PeerScoreboard, target: str, start_time: float, future):
+        exception = TimeoutError() if future.cancelled() else future.exception()
+        if exception is None:
+            scoreboard.record_success(target, time.monotonic() - start_time)
+        else:
+            scoreboard.record_failure(target, exception)
@@ -0,0 +1,74 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Fan-out of payloads to subscribers by bounded queues"""
+
+import asyncio
+from typing import Dict, List, NamedTuple
+
+
+class BlockAnnouncement(NamedTuple):
+    """A new block made once for all of the citizens. It is immutable, so subscribers share it."""
+    height: int
+    block_json: str
+    confirm_info: bytes
+
+
+class SubscriberFanout:
+    """Payloads published once and shared by subscribers through a bounded queue of each.
+
+    `publish` never waits for subscribers. A subscriber whose queue is full is slow to consume,
+    so it is dropped instead of blocking the publisher, and it has to resync by itself.
+    A subscriber waiting for its queue gets None when it is unsubscribed.
+    It must be used in a thread of the event loop.
+    """
+
+    def __init__(self, max_queue_size: int):
+        self.__max_queue_size = max_queue_size
+        self.__queues: Dict[str, asyncio.Queue] = {}
+
+    def __len__(self):
+        return len(self.__queues)
+
+    def __contains__(self, subscriber_id: str):
+        return subscriber_id in self.__queues
+
+    def subscribe(self, subscriber_id: str) -> asyncio.Queue:
+        """:return: the queue of the subscriber. It is made if the subscriber is new or was dropped."""
+        queue = self.__queues.get(subscriber_id)
+        if queue is None:
+            queue = self.__queues[subscriber_id] = asyncio.Queue(self.__max_queue_size)
+        return queue
+
+    def unsubscribe(self, subscriber_id: str):
+        queue = self.__queues.pop(subscriber_id, None)
+        if queue is None:
+            return
+        try:
+            queue.put_nowait(None)
+        except asyncio.QueueFull:
+            # Nobody waits for a queue which is not empty.
+            pass
+
+    def publish(self, payload) -> List[str]:
+        """:return: ids of the subscribers dropped by their full queues"""
+        dropped = []
+        for subscriber_id, queue in self.__queues.items():
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                dropped.append(subscriber_id)
+
+        for subscriber_id in dropped:
+            del self.__queues[subscriber_id]
+        return dropped
@@ -0,0 +1,114 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Adaptive batcher of txs for AddTxList"""
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from loopchain import configure as conf
+from loopchain.baseservice.histogram import Histogram
+from loopchain.baseservice.tx_item_helper import TxItem
+from loopchain.protos import loopchain_pb2
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+BATCH_DELAY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+
+class TxBatcher:
+    """Collect TxItems and make TxSendList.
+
+    A batch is ready when its serialized size or tx count reaches the limit.
+    Otherwise it has to be sent within the latency budget from its oldest tx.
+    The budget shrinks from `max_delay` to `min_delay` as more txs are pending.
+    """
+
+    def __init__(self, channel: str, max_size: int = None, max_count: int = None,
+                 max_delay: float = None, min_delay: float = None):
+        self.__channel = channel
+        self.__max_size = max_size or conf.MAX_TX_SIZE_IN_BLOCK
+        self.__max_count = max_count or conf.MAX_TX_COUNT_IN_ADDTX_LIST
+        self.__max_delay = conf.SEND_TX_LIST_DURATION if max_delay is None else max_delay
+        self.__min_delay = conf.SEND_TX_LIST_MIN_DURATION if min_delay is None else min_delay
+
+        self.__items: Deque[Tuple[TxItem, float]] = deque()
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.batch_delay_histogram = Histogram(BATCH_DELAY_BUCKETS)
+
+    def __len__(self):
+        return len(self.__items)
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def add(self, tx_item: TxItem):
+        with self.__lock:
+            self.__items.append((tx_item, time.monotonic()))
+            self.__size += len(tx_item)
+
+    def is_ready(self) -> bool:
+        return len(self.__items) >= self.__max_count or self.__size >= self.__max_size
+
+    def get_latency_budget(self) -> float:
+        depth_ratio = min(1.0, len(self.__items) / self.__max_count)
+        return max(self.__min_delay, self.__max_delay * (1 - depth_ratio))
+
+    def get_flush_delay(self) -> Optional[float]:
+        """Seconds to wait before sending the next batch. None if there is no pending tx."""
+        with self.__lock:
+            if not self.__items:
+                return None
+            if self.is_ready():
+                return 0
+
+            _, oldest_time = self.__items[0]
+            return max(0.0, oldest_time + self.get_latency_budget() - time.monotonic())
+
+    def pop_message(self) -> Optional[loopchain_pb2.TxSendList]:
+        """Pop txs as many as the limits allow and make TxSendList. None if there is no pending tx."""
+        with self.__lock:
+            if not self.__items:
+                return None
+
+            _, oldest_time = self.__items[0]
+            tx_list = []
+            tx_list_size = 0
+            while self.__items and len(tx_list) < self.__max_count:
+                tx_item, _ = self.__items[0]
+                if tx_list and tx_list_size + len(tx_item) > self.__max_size:
+                    break
+                self.__items.popleft()
+                tx_list.append(tx_item.get_tx_message())
+                tx_list_size += len(tx_item)
+            self.__size -= tx_list_size
+
+        self.batch_size_histogram.observe(len(tx_list))
+        self.batch_delay_histogram.observe(time.monotonic() - oldest_time)
+
+        return loopchain_pb2.TxSendList(
+            channel=self.__channel,
+            tx_list=tx_list
+        )
+
+    def get_stats(self) -> dict:
+        return {
+            "pending": len(self.__items),
+            "batch_size": self.batch_size_histogram.to_dict(),
+            "batch_delay": self.batch_delay_histogram.to_dict()
+        }
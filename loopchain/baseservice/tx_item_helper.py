@@ -13,42 +13,36 @@
 # limitations under the License.
 """helper class for TxItem"""
 
-import json
-import sys
-
-from loopchain.blockchain.transactions import Transaction, TransactionVersioner, TransactionSerializer
 from loopchain.protos import loopchain_pb2
 
 
-class TxItem:
-    tx_serializers = {}
+def _varint_size(value: int) -> int:
+    return max(1, (value.bit_length() + 6) // 7)
+
 
+class TxItem:
     def __init__(self, tx_json: str, channel: str):
         self.channel = channel
         self.__tx_json = tx_json
-        self.__len = sys.getsizeof(tx_json) + sys.getsizeof(channel)
+        self.__message = loopchain_pb2.TxSend(
+            tx_json=self.__tx_json,
+            channel=self.channel)
+
+        # The size of this item as an element of TxSendList.tx_list on the wire. (tag + length + message)
+        message_size = self.__message.ByteSize()
+        self.__len = 1 + _varint_size(message_size) + message_size
 
     def __len__(self):
         return self.__len
 
     def get_tx_message(self):
-        message = loopchain_pb2.TxSend(
-            tx_json=self.__tx_json,
-            channel=self.channel)
-        return message
+        return self.__message
 
     @classmethod
     def create_tx_item(cls, tx_param: tuple, channel: str):
         tx, tx_versioner = tx_param
-        tx_serializer = cls.get_serializer(tx, tx_versioner)
         tx_item = TxItem(
-            json.dumps(tx_serializer.to_raw_data(tx)),
+            tx.raw_json(tx_versioner),
             channel
         )
         return tx_item
-
-    @classmethod
-    def get_serializer(cls, tx: Transaction, tx_versioner: TransactionVersioner):
-        if tx.version not in cls.tx_serializers:
-            cls.tx_serializers[tx.version] = TransactionSerializer.new(tx.version, tx.type(), tx_versioner)
-        return cls.tx_serializers[tx.version]
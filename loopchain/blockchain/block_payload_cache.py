@@ -0,0 +1,112 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Cache of encoded block payloads"""
+
+import threading
+from collections import OrderedDict, defaultdict
+from enum import Enum
+from typing import Callable, Dict, Set, TYPE_CHECKING, Tuple, TypeVar, Union
+
+from loopchain.blockchain.types import Hash32
+
+if TYPE_CHECKING:
+    from loopchain.blockchain.blocks import Block
+
+Payload = TypeVar('Payload', bytes, str)
+
+
+class PayloadType(Enum):
+    dumped = "dumped"  # BlockChain.block_dumps: compressed json with confirm_prev_block
+    serialized_json = "serialized_json"  # json of BlockSerializer.serialize
+
+
+class BlockPayloadCache:
+    """LRU cache of encoded payloads of blocks, bounded by the total size of payloads.
+
+    A block is encoded once and the payload is reused by the broadcast, the rebroadcast timer,
+    block sync and citizen announcement. Payloads of the other blocks in the same height are
+    dropped when a block is cached or confirmed in the height, because the block replaced them.
+    """
+
+    def __init__(self, max_size: int):
+        self.__max_size = max_size
+        self.__size = 0
+        # {(payload_type, block_hash, confirm_prev_block): (height, payload, size of payload in bytes)}
+        self.__payloads: 'OrderedDict[Tuple, Tuple[int, Union[bytes, str], int]]' = OrderedDict()
+        # {height: keys of __payloads in the height}
+        self.__keys_by_height: Dict[int, Set[Tuple]] = defaultdict(set)
+        self.__lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    def __len__(self):
+        return len(self.__payloads)
+
+    def get(self, payload_type: PayloadType, block: 'Block', encode: Callable[[], Payload]) -> Payload:
+        """Return the cached payload of the block or cache the payload made by `encode`."""
+        # confirm_prev_block is not covered by the block hash, and a block loaded from DB does not have it.
+        return self.get_by_key(payload_type, block.header.height, block.header.hash,
+                               getattr(block.body, "confirm_prev_block", None), encode)
+
+    def get_by_key(self, payload_type: PayloadType, height: int, block_hash: Hash32, confirm_prev_block,
+                   encode: Callable[[], Payload]) -> Payload:
+        """`get` of a block which is not deserialized. e.g. the data of a block in DB"""
+        key = (payload_type, block_hash, confirm_prev_block)
+        with self.__lock:
+            try:
+                self.__payloads.move_to_end(key)
+                return self.__payloads[key][1]
+            except KeyError:
+                pass
+
+        payload = encode()
+        payload_size = self.__payload_size(payload)
+        if payload_size > self.__max_size:
+            return payload
+
+        with self.__lock:
+            self.__discard_replaced(height, block_hash)
+            if key not in self.__payloads:
+                self.__payloads[key] = (height, payload, payload_size)
+                self.__keys_by_height[height].add(key)
+                self.__size += payload_size
+            while self.__size > self.__max_size:
+                self.__pop(next(iter(self.__payloads)))
+        return payload
+
+    def confirm(self, height: int, block_hash: Hash32):
+        """Drop payloads of the blocks replaced by the confirmed block."""
+        with self.__lock:
+            self.__discard_replaced(height, block_hash)
+
+    def __discard_replaced(self, height: int, block_hash: Hash32):
+        replaced_keys = [key for key in self.__keys_by_height.get(height, ()) if key[1] != block_hash]
+        for key in replaced_keys:
+            self.__pop(key)
+
+    def __pop(self, key: Tuple):
+        height, _, payload_size = self.__payloads.pop(key)
+        self.__size -= payload_size
+
+        keys = self.__keys_by_height[height]
+        keys.discard(key)
+        if not keys:
+            del self.__keys_by_height[height]
+
+    @staticmethod
+    def __payload_size(payload: Payload) -> int:
+        # The size of a str payload is counted in bytes as it is sent.
+        return len(payload.encode("utf-8")) if isinstance(payload, str) else len(payload)
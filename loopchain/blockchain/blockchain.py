@@ -30,6 +30,7 @@ from loopchain import configure as conf
 from loopchain import utils
 from loopchain.baseservice import ScoreResponse, ObjectManager
 from loopchain.baseservice.aging_cache import AgingCache
+from loopchain.blockchain.block_payload_cache import BlockPayloadCache, PayloadType
 from loopchain.blockchain.blocks import Block, BlockBuilder, BlockSerializer, BlockHeader, v0_1a
 from loopchain.blockchain.blocks import BlockProver, BlockProverType, BlockVersioner, NextRepsChangeReason
 from loopchain.blockchain.exception import *
@@ -93,6 +94,7 @@ class BlockChain:
 
         # tx receipts and next prep after invoke, {Hash32: (receipts, next_prep)}
         self.__invoke_results: AgingCache = AgingCache(max_age_seconds=conf.INVOKE_RESULT_AGING_SECONDS)
+        self.__block_payload_cache = BlockPayloadCache(conf.BLOCK_PAYLOAD_CACHE_SIZE)
 
         self.__add_block_lock = threading.RLock()
         self.__confirmed_block_lock = threading.RLock()
@@ -368,6 +370,29 @@ class BlockChain:
 
         return self.__find_block_by_key(key)
 
+    def find_block_hash_by_height(self, block_height: int) -> Optional[Hash32]:
+        """find the hash of the block in DB by its height"""
+        try:
+            block_hash_encoded = self._blockchain_store.get(
+                BlockChain.BLOCK_HEIGHT_KEY + block_height.to_bytes(conf.BLOCK_HEIGHT_BYTES_LEN, byteorder='big'))
+        except KeyError:
+            return None
+        return Hash32.fromhex(block_hash_encoded.decode(encoding='UTF-8'), ignore_prefix=True)
+
+    def find_block_data_by_hash(self, block_hash: Union[str, Hash32]) -> Optional[bytes]:
+        """find the data of the block in DB as it is stored, without deserialization.
+        It is the json of the serialized block, the same as `block_serialized_json`.
+
+        :param block_hash: plain string or Hash32
+        :return: None or json bytes
+        """
+        if isinstance(block_hash, Hash32):
+            block_hash = block_hash.hex()
+        try:
+            return self._blockchain_store.get(block_hash.encode(encoding='UTF-8'))
+        except KeyError:
+            return None
+
     def find_confirm_info_by_hash(self, block_hash: Union[str, Hash32]) -> bytes:
         if isinstance(block_hash, Hash32):
             block_hash = block_hash.hex()
@@ -473,7 +498,7 @@ class BlockChain:
         :param need_to_score_invoke:
         :return:
         """
-        with self.__add_block_lock:
+        with self.__block_manager.span_recorder.span("add_block", block.header.height), self.__add_block_lock:
             if need_to_write_tx_info and need_to_score_invoke and \
                     not self.prevent_next_block_mismatch(block.header.height):
                 return True
@@ -491,12 +516,14 @@ class BlockChain:
             return self.__add_block(block, confirm_info, need_to_write_tx_info, need_to_score_invoke)
 
     def __add_block(self, block: Block, confirm_info, need_to_write_tx_info=True, need_to_score_invoke=True):
+        span_recorder = self.__block_manager.span_recorder
         with self.__add_block_lock:
             channel_service = ObjectManager().channel_service
 
             receipts, next_prep = self.__invoke_results.get(block.header.hash, (None, None))
             if receipts is None and need_to_score_invoke:
-                self.get_invoke_func(block.header.height)(block, self.__last_block)
+                with span_recorder.span("score_invoke", block.header.height):
+                    self.get_invoke_func(block.header.height)(block, self.__last_block)
                 receipts, next_prep = self.__invoke_results.get(block.header.hash, (None, None))
 
             if not need_to_write_tx_info:
@@ -506,11 +533,14 @@ class BlockChain:
                     Hash32.fromhex(next_prep['rootHash'], ignore_prefix=True)):
                 next_prep = None
 
-            next_total_tx = self.__write_block_data(block, confirm_info, receipts, next_prep)
+            with span_recorder.span("write_block_data", block.header.height):
+                next_total_tx = self.__write_block_data(block, confirm_info, receipts, next_prep)
+            self.__block_payload_cache.confirm(block.header.height, block.header.hash)
 
             try:
                 if need_to_score_invoke:
-                    channel_service.score_write_precommit_state(block)
+                    with span_recorder.span("score_write_precommit_state", block.header.height):
+                        channel_service.score_write_precommit_state(block)
             except Exception as e:
                 utils.exit_and_msg(f"score_write_precommit_state FAIL {e}")
 
@@ -536,7 +566,7 @@ class BlockChain:
                 }})
 
             if not (conf.SAFE_BLOCK_BROADCAST and channel_service.state_machine.state == 'BlockGenerate'):
-                channel_service.inner_service.notify_new_block()
+                channel_service.inner_service.notify_new_block(block.header.height)
                 channel_service.reset_leader(new_leader_id=self.__block_manager.epoch.leader_id)
 
             if block.header.prep_changed and channel_service.state_machine.state != 'BlockSync':
@@ -1013,6 +1043,22 @@ class BlockChain:
         utils.logger.spam(f"add_genesis_block({self.__channel_name}/nid({nid}))")
 
     def block_dumps(self, block: Block) -> bytes:
+        return self.__block_payload_cache.get(PayloadType.dumped, block, lambda: self.__block_dumps(block))
+
+    def block_data_dumps(self, block_height: int, block_hash: Hash32, block_data: bytes) -> bytes:
+        """`block_dumps` of a block in DB by its data from `find_block_data_by_hash`, without deserialization."""
+        return self.__block_payload_cache.get_by_key(PayloadType.dumped, block_height, block_hash, None,
+                                                     lambda: zlib.compress(block_data))
+
+    def block_serialized_json(self, block: Block) -> str:
+        """json of the serialized block. It is cached like block_dumps."""
+        def _serialize():
+            block_serializer = BlockSerializer.new(block.header.version, self.__tx_versioner)
+            return json.dumps(block_serializer.serialize(block))
+
+        return self.__block_payload_cache.get(PayloadType.serialized_json, block, _serialize)
+
+    def __block_dumps(self, block: Block) -> bytes:
         block_version = self.__block_versioner.get_version(block.header.height)
         block_serializer = BlockSerializer.new(block_version, self.__tx_versioner)
         block_serialized = block_serializer.serialize(block)
@@ -13,9 +13,12 @@
 # limitations under the License.
 """Candidate Blocks"""
 
+import asyncio
+import heapq
 import logging
 import threading
-from typing import Dict, List, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence, Set, Tuple
 
 import loopchain.utils as util
 from loopchain import configure as conf
@@ -78,37 +81,161 @@ class CandidateBlock:
                     util.logger.info(e)
             self.votes_buffer.clear()
 
-    def add_vote(self, vote: BlockVote):
+    def add_vote(self, vote: BlockVote, signature_verified: bool = False):
         if self.votes:
             if not self.votes.get(vote.round_):
                 self.votes[vote.round_] = \
                     BlockVotes(self._reps, conf.VOTING_RATIO, self.height, vote.round_, self.hash)
             try:
-                self.votes[vote.round_].add_vote(vote)
+                self.votes[vote.round_].add_vote(vote, signature_verified)
             except VoteError as e:
                 util.logger.info(e)
-        else:
+        elif vote not in self.votes_buffer:
             self.votes_buffer.append(vote)
 
+    def has_vote(self, vote: BlockVote) -> bool:
+        if not self.votes:
+            return vote in self.votes_buffer
+        votes = self.votes.get(vote.round_)
+        return votes is not None and votes.has_vote(vote)
+
+
+def _set_quorum_result(future: asyncio.Future, votes: BlockVotes):
+    if not future.done():
+        future.set_result(votes)
+
 
 class CandidateBlocks:
+    """Candidate blocks indexed by hash, height and previous hash.
+
+    Every candidate is in `blocks` and in the index of its height.
+    A candidate is in the index of its previous hash after its block is set.
+    The number of candidates is bounded by `conf.MAX_CANDIDATE_BLOCKS`, evicting the lowest heights first.
+    """
     def __init__(self, blockchain):
         self.blocks: Dict[Hash32, CandidateBlock] = {}
         self.__blocks_lock = threading.Lock()
         self._blockchain = blockchain
 
+        self.__heights: Dict[int, Set[Hash32]] = {}
+        self.__height_heap: List[int] = []  # may have heights already removed. check `__heights` when popped.
+        self.__children: Dict[Hash32, Set[Hash32]] = {}
+
+        self.__evicted_count = 0
+        self.__timed_out_count = 0
+
+        self.__quorum_waiters: Dict[Tuple[Hash32, int], List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+        self.__quorum_waiters_lock = threading.Lock()
+
+        self.__verify_executor = \
+            ThreadPoolExecutor(conf.VOTE_VERIFY_WORKERS, "VoteVerifyThread") if conf.VOTE_VERIFY_WORKERS > 1 else None
+
     def add_vote(self, vote: BlockVote):
+        for candidate_block in self.__get_candidates_of_vote(vote):
+            candidate_block.add_vote(vote)
+            self.__notify_quorum(candidate_block.hash, vote.round_)
+
+    def add_votes(self, votes: Sequence[BlockVote]) -> int:
+        """Add a batch of votes relayed at once.
+
+        Votes already added are skipped, so adding the same batch again changes nothing.
+        Signatures of the others are verified in a pass, in parallel by `conf.VOTE_VERIFY_WORKERS` threads.
+
+        :return: the number of verified signatures
+        """
+        new_votes: List[Tuple[BlockVote, List[CandidateBlock]]] = []
+        for vote in votes:
+            candidate_blocks = self.__get_candidates_of_vote(vote)
+            if any(not candidate_block.has_vote(vote) for candidate_block in candidate_blocks) and \
+                    all(vote != new_vote for new_vote, _ in new_votes):
+                new_votes.append((vote, candidate_blocks))
+
+        verified = self.__verify_signatures([vote for vote, _ in new_votes])
+        for (vote, candidate_blocks), is_valid in zip(new_votes, verified):
+            if not is_valid:
+                continue
+            for candidate_block in candidate_blocks:
+                candidate_block.add_vote(vote, signature_verified=True)
+                self.__notify_quorum(candidate_block.hash, vote.round_)
+        return len(new_votes)
+
+    def has_vote(self, vote: BlockVote) -> bool:
+        """True if a candidate block of the vote took it. A vote which failed to be verified is not taken."""
+        with self.__blocks_lock:
+            if vote.block_hash != Hash32.empty():
+                candidate_blocks = [self.blocks[vote.block_hash]] if vote.block_hash in self.blocks else []
+            else:
+                candidate_blocks = [self.blocks[block_hash] for block_hash in self.__heights.get(vote.block_height, ())]
+        return any(candidate_block.has_vote(vote) for candidate_block in candidate_blocks)
+
+    def get_candidates_of_height(self, height: int) -> List[CandidateBlock]:
+        with self.__blocks_lock:
+            return [self.blocks[block_hash] for block_hash in self.__heights.get(height, ())]
+
+    def __get_candidates_of_vote(self, vote: BlockVote) -> List[CandidateBlock]:
         with self.__blocks_lock:
             if vote.block_hash != Hash32.empty() and vote.block_hash not in self.blocks:
                 # util.logger.debug(f"-------------block_hash({block_hash}) self.blocks({self.blocks})")
-                self.blocks[vote.block_hash] = CandidateBlock.from_hash(vote.block_hash, vote.block_height)
+                self.__put(CandidateBlock.from_hash(vote.block_hash, vote.block_height))
 
-        if vote.block_hash != Hash32.empty():
-            self.blocks[vote.block_hash].add_vote(vote)
-        else:
-            for block in self.blocks.values():
-                if block.height == vote.block_height:
-                    block.add_vote(vote)
+            if vote.block_hash != Hash32.empty():
+                return [self.blocks[vote.block_hash]] if vote.block_hash in self.blocks else []
+            else:
+                return [self.blocks[block_hash] for block_hash in self.__heights.get(vote.block_height, ())]
+
+    def __verify_signatures(self, votes: List[BlockVote]) -> List[bool]:
+        def _verify(vote: BlockVote) -> bool:
+            try:
+                vote.verify()
+            except RuntimeError as e:
+                util.logger.info(e)
+                return False
+            return True
+
+        if self.__verify_executor and len(votes) > 1:
+            return list(self.__verify_executor.map(_verify, votes))
+        return [_verify(vote) for vote in votes]
+
+    def wait_for_quorum(self, block_hash: Hash32, round_: int, loop: asyncio.AbstractEventLoop) -> asyncio.Future:
+        """Future of the votes which is resolved as soon as the votes of the block are completed.
+
+        Votes are completed when they reach the quorum or fail definitively.
+        The future is resolved in `loop` even if the vote is added in another thread.
+        """
+        future = loop.create_future()
+        key = (block_hash, round_)
+        with self.__quorum_waiters_lock:
+            waiters = [waiter for waiter in self.__quorum_waiters.get(key, []) if not waiter[1].done()]
+            waiters.append((loop, future))
+            self.__quorum_waiters[key] = waiters
+
+        self.__notify_quorum(block_hash, round_)
+        return future
+
+    def __notify_quorum(self, block_hash: Hash32, round_: int):
+        key = (block_hash, round_)
+        if key not in self.__quorum_waiters:
+            return
+
+        candidate_block = self.blocks.get(block_hash)
+        votes = candidate_block.votes.get(round_) if candidate_block else None
+        if not votes or not votes.is_completed():
+            return
+
+        with self.__quorum_waiters_lock:
+            waiters = self.__quorum_waiters.pop(key, [])
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_set_quorum_result, future, votes)
+
+    def __cancel_quorum_waiters(self, block_hash: Hash32):
+        if not self.__quorum_waiters:
+            return
+
+        with self.__quorum_waiters_lock:
+            keys = [key for key in self.__quorum_waiters if key[0] == block_hash]
+            waiters = [waiter for key in keys for waiter in self.__quorum_waiters.pop(key)]
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(future.cancel)
 
     def get_votes(self, block_hash, round_: int):
         votes = self.blocks[block_hash].votes
@@ -123,18 +250,110 @@ class CandidateBlocks:
 
         with self.__blocks_lock:
             if block.header.hash not in self.blocks:
-                self.blocks[block.header.hash] = CandidateBlock.from_block(block, reps)
+                self.__put(CandidateBlock.from_block(block, reps))
             else:
                 self.blocks[block.header.hash].add_block(block, reps)
+            self.__children.setdefault(block.header.prev_hash, set()).add(block.header.hash)
+
+            rounds = list(self.blocks[block.header.hash].votes)
+
+        # Votes arrived before the block are counted now.
+        for round_ in rounds:
+            self.__notify_quorum(block.header.hash, round_)
 
     def remove_block(self, block_hash):
-        if block_hash in self.blocks and self.blocks[block_hash].block:
-            prev_block_hash = self.blocks[block_hash].block.header.prev_hash
-
-            for _block_hash in list(self.blocks.keys()):
-                if self.blocks[_block_hash].block:
-                    if self.blocks[_block_hash].block.header.prev_hash == prev_block_hash:
-                        self.blocks.pop(_block_hash, None)
-                        continue
-                if util.diff_in_seconds(self.blocks[_block_hash].start_time) >= conf.CANDIDATE_BLOCK_TIMEOUT:
-                    self.blocks.pop(_block_hash, None)
+        """Remove the block with its siblings, candidates of lower heights and timed out candidates."""
+        with self.__blocks_lock:
+            if block_hash in self.blocks and self.blocks[block_hash].block:
+                candidate_block = self.blocks[block_hash]
+                prev_block_hash = candidate_block.block.header.prev_hash
+
+                for sibling_hash in list(self.__children.get(prev_block_hash, ())):
+                    self.__pop(sibling_hash)
+                self.__pop_heights_lower_than(candidate_block.height)
+                self.__pop_timed_out()
+
+    def get_stats(self) -> dict:
+        with self.__blocks_lock:
+            return {
+                "backlog": len(self.blocks),
+                "heights": len(self.__heights),
+                "lowest_height": min(self.__heights, default=-1),
+                "highest_height": max(self.__heights, default=-1),
+                "evicted": self.__evicted_count,
+                "timed_out": self.__timed_out_count
+            }
+
+    def __put(self, candidate_block: CandidateBlock):
+        self.blocks[candidate_block.hash] = candidate_block
+
+        hashes = self.__heights.get(candidate_block.height)
+        if hashes is None:
+            hashes = self.__heights[candidate_block.height] = set()
+            heapq.heappush(self.__height_heap, candidate_block.height)
+        hashes.add(candidate_block.hash)
+
+        if len(self.blocks) > conf.MAX_CANDIDATE_BLOCKS:
+            self.__evict(protected_height=candidate_block.height)
+
+    def __pop(self, block_hash: Hash32):
+        candidate_block = self.blocks.pop(block_hash, None)
+        if candidate_block is None:
+            return
+
+        hashes = self.__heights.get(candidate_block.height)
+        if hashes is not None:
+            hashes.discard(block_hash)
+            if not hashes:
+                del self.__heights[candidate_block.height]
+
+        if candidate_block.block:
+            prev_hash = candidate_block.block.header.prev_hash
+            children = self.__children.get(prev_hash)
+            if children is not None:
+                children.discard(block_hash)
+                if not children:
+                    del self.__children[prev_hash]
+
+        self.__cancel_quorum_waiters(block_hash)
+
+    def __pop_height(self, height: int) -> int:
+        hashes = list(self.__heights.get(height, ()))
+        for block_hash in hashes:
+            self.__pop(block_hash)
+        return len(hashes)
+
+    def __pop_heights_lower_than(self, height: int):
+        while self.__height_heap and self.__height_heap[0] < height:
+            self.__pop_height(heapq.heappop(self.__height_heap))
+
+    def __pop_timed_out(self):
+        # Candidates are kept in the order of creation.
+        timed_out = []
+        for block_hash, candidate_block in self.blocks.items():
+            if util.diff_in_seconds(candidate_block.start_time) < conf.CANDIDATE_BLOCK_TIMEOUT:
+                break
+            timed_out.append(block_hash)
+
+        for block_hash in timed_out:
+            self.__pop(block_hash)
+        self.__timed_out_count += len(timed_out)
+
+    def __evict(self, protected_height: int):
+        """Evict candidates of the lowest heights except the height of the candidate just added."""
+        skipped_heights = []
+        while len(self.blocks) > conf.MAX_CANDIDATE_BLOCKS and self.__height_heap:
+            height = heapq.heappop(self.__height_heap)
+            if height not in self.__heights:
+                continue
+            if height == protected_height:
+                skipped_heights.append(height)
+                continue
+
+            evicted_count = self.__pop_height(height)
+            self.__evicted_count += evicted_count
+            util.logger.warning(f"{evicted_count} candidate blocks of height({height}) are evicted. "
+                                f"backlog({len(self.blocks)}), evicted({self.__evicted_count})")
+
+        for height in skipped_heights:
+            heapq.heappush(self.__height_heap, height)
@@ -130,13 +130,13 @@ class Epoch:
         else:
             return None
 
-    def __add_tx_to_block(self, block_builder):
+    def __add_tx_to_block(self, block_builder, max_tx_size: int):
         tx_queue = self.__block_manager.get_tx_queue()
 
         block_tx_size = 0
         tx_versioner = self.__blockchain.tx_versioner
         while tx_queue:
-            if block_tx_size >= conf.MAX_TX_SIZE_IN_BLOCK:
+            if block_tx_size >= max_tx_size:
                 logging.warning(
                     f"consensus_base total size({block_builder.size()}) "
                     f"count({len(block_builder.transactions)}) "
@@ -188,22 +188,24 @@ class Epoch:
                      complain_votes: LeaderVotes,
                      prev_votes,
                      new_term: bool = False,
-                     skip_add_tx: bool = False):
+                     skip_add_tx: bool = False,
+                     max_tx_size: int = None):
         last_block = self.__blockchain.last_unconfirmed_block or self.__blockchain.last_block
         block_height = last_block.header.height + 1
-        block_version = self.__blockchain.block_versioner.get_version(block_height)
-        block_builder = BlockBuilder.new(block_version, self.__blockchain.tx_versioner)
-        block_builder.fixed_timestamp = int(time.time() * 1_000_000)
-        block_builder.prev_votes = prev_votes
-        if complain_votes and complain_votes.get_result():
-            block_builder.leader_votes = complain_votes.votes
-
-        if new_term:
-            block_builder.next_leader = None
-            block_builder.reps = None
-        elif skip_add_tx:
-            utils.logger.debug(f"skip_add_tx for block height({self.height})")
-        else:
-            self.__add_tx_to_block(block_builder)
+        with self.__block_manager.span_recorder.span("makeup_block", block_height):
+            block_version = self.__blockchain.block_versioner.get_version(block_height)
+            block_builder = BlockBuilder.new(block_version, self.__blockchain.tx_versioner)
+            block_builder.fixed_timestamp = int(time.time() * 1_000_000)
+            block_builder.prev_votes = prev_votes
+            if complain_votes and complain_votes.get_result():
+                block_builder.leader_votes = complain_votes.votes
+
+            if new_term:
+                block_builder.next_leader = None
+                block_builder.reps = None
+            elif skip_add_tx:
+                utils.logger.debug(f"skip_add_tx for block height({self.height})")
+            else:
+                self.__add_tx_to_block(block_builder, max_tx_size or conf.MAX_TX_SIZE_IN_BLOCK)
 
         return block_builder
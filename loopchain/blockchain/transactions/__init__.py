@@ -3,3 +3,4 @@ from .transaction_builder import TransactionBuilder
 from .transaction_serializer import TransactionSerializer
 from .transaction_verifier import TransactionVerifier
 from .transaction_versioner import TransactionVersioner
+from .transaction_envelope import TransactionEnvelope
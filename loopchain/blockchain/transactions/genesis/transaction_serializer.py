@@ -18,8 +18,8 @@ class TransactionSerializer(BaseTransactionSerializer):
     def to_db_data(self, tx: 'Transaction'):
         return dict(tx.raw_data)
 
-    def from_(self, tx_data: dict) -> 'Transaction':
-        hash_ = self._hash_generator.generate_hash(tx_data)
+    def from_(self, tx_data: dict, tx_hash: Hash32 = None) -> 'Transaction':
+        hash_ = self._hash_generator.generate_hash(tx_data) if tx_hash is None else tx_hash
         nid = tx_data.get('nid')
         if nid:
             nid = int(nid, 16)
@@ -8,6 +8,7 @@ if TYPE_CHECKING:
     from loopchain.blockchain.transactions import TransactionVersioner
 
 _size_attr_name_ = "_size_attr_"
+_raw_json_attr_name_ = "_raw_json_attr_"
 
 
 @dataclass(frozen=True)
@@ -49,6 +50,22 @@ class Transaction(ABC):
 
         return getattr(self, _size_attr_name_)
 
+    def raw_json(self, versioner: 'TransactionVersioner') -> str:
+        """Json string of raw data which is sent to other peers.
+
+        If the transaction has been deserialized from json string, the original string is kept and returned as it is.
+        """
+        if not hasattr(self, _raw_json_attr_name_):
+            from loopchain.blockchain.transactions import TransactionSerializer
+            ts = TransactionSerializer.new(self.version, self.type(), versioner)
+            object.__setattr__(self, _raw_json_attr_name_, json.dumps(ts.to_raw_data(self)))
+
+        return getattr(self, _raw_json_attr_name_)
+
+    def set_raw_json(self, raw_json: str):
+        """Keep the original json string which this transaction has been deserialized from."""
+        object.__setattr__(self, _raw_json_attr_name_, raw_json)
+
     def is_signed(self):
         return self.signature is not None
 
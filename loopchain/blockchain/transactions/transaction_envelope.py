@@ -0,0 +1,132 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Envelope which carries verification results of a transaction between processes"""
+
+import json
+import struct
+from dataclasses import dataclass
+from typing import Dict, TYPE_CHECKING, Tuple
+
+from loopchain.blockchain.transactions.transaction import _size_attr_name_
+from loopchain.blockchain.types import Hash32
+
+if TYPE_CHECKING:
+    from loopchain.blockchain.transactions import Transaction, TransactionSerializer, TransactionVersioner
+
+_verified_attr_names_ = ("_cache_verify_hash", "_cache_verify_signature")
+
+# hash, verified, size, length of verifier version, length of tx data
+_record_header_ = struct.Struct("!32s?IHI")
+
+# {(tx version, tx type, hash generator version): TransactionSerializer}. Serializers keep no state of a tx.
+_serializers_: Dict[Tuple[str, str, int], 'TransactionSerializer'] = {}
+
+
+@dataclass(frozen=True)
+class TransactionEnvelope:
+    """Transaction verified by a sub process, with the results of its verification.
+
+    `verified` means both tx hash and signature have been checked successfully.
+    Checks which depend on the blockchain state (nid, uniqueness) are not included.
+    """
+    tx: 'Transaction'
+    hash: Hash32
+    verified: bool
+    size: int
+    verifier_version: str
+
+    @classmethod
+    def seal(cls, tx: 'Transaction', versioner: 'TransactionVersioner') -> 'TransactionEnvelope':
+        verified = all(getattr(tx, attr_name, False) is True for attr_name in _verified_attr_names_)
+        return cls(tx=tx,
+                   hash=tx.hash,
+                   verified=verified,
+                   size=tx.size(versioner),
+                   verifier_version=cls.get_verifier_version(tx.version, versioner))
+
+    def open(self, versioner: 'TransactionVersioner', trust=True) -> 'Transaction':
+        """Unwrap transaction.
+
+        If the envelope is trusted, verification results are restored to the transaction
+        so that TransactionVerifier skips hashing and signature verification.
+        Otherwise every cached result is dropped and the transaction will be verified again.
+
+        :param versioner: TransactionVersioner of this process
+        :param trust: trust verification results of the envelope
+        :return: Transaction
+        """
+        tx = self.tx
+        for attr_name in _verified_attr_names_:
+            tx.__dict__.pop(attr_name, None)
+
+        if trust and self.is_trustable(versioner):
+            for attr_name in _verified_attr_names_:
+                object.__setattr__(tx, attr_name, True)
+            object.__setattr__(tx, _size_attr_name_, self.size)
+
+        return tx
+
+    def is_trustable(self, versioner: 'TransactionVersioner') -> bool:
+        return (self.verified
+                and self.hash == self.tx.hash
+                and self.verifier_version == self.get_verifier_version(self.tx.version, versioner))
+
+    def to_bytes(self, versioner: 'TransactionVersioner') -> bytes:
+        """Encode to compact binary record. Transaction is carried as its raw json string."""
+        tx_data = self.tx.raw_json(versioner).encode('utf-8')
+        verifier_version = self.verifier_version.encode('utf-8')
+
+        header = _record_header_.pack(self.hash, self.verified, self.size, len(verifier_version), len(tx_data))
+        return b''.join((header, verifier_version, tx_data))
+
+    @classmethod
+    def from_bytes(cls, record: bytes, versioner: 'TransactionVersioner') -> 'TransactionEnvelope':
+        """Decode binary record.
+
+        The transaction is made with the hash in the record, not by hashing its data again.
+        A record is not checked here. The transport checks the frame of records.
+        """
+        tx_hash, verified, size, verifier_version_len, tx_data_len = _record_header_.unpack_from(record)
+        tx_hash = Hash32(tx_hash)
+        offset = _record_header_.size
+        # str() decodes a memoryview of the record as well as bytes.
+        verifier_version = str(record[offset:offset + verifier_version_len], 'utf-8')
+        offset += verifier_version_len
+        tx_json = str(record[offset:offset + tx_data_len], 'utf-8')
+        tx_data = json.loads(tx_json)
+
+        tx_version, tx_type = versioner.get_version(tx_data)
+        key = (tx_version, tx_type, versioner.get_hash_generator_version(tx_version))
+        ts = _serializers_.get(key)
+        if ts is None:
+            from loopchain.blockchain.transactions import TransactionSerializer
+            ts = _serializers_[key] = TransactionSerializer.new(tx_version, tx_type, versioner)
+        tx = ts.from_(tx_data, tx_hash=tx_hash)
+        tx.set_raw_json(tx_json)
+
+        return cls(tx=tx,
+                   hash=tx_hash,
+                   verified=verified,
+                   size=size,
+                   verifier_version=verifier_version)
+
+    @staticmethod
+    def hash_from_bytes(record: bytes, offset: int = 0) -> Hash32:
+        """Read the tx hash of the record at the offset without decoding the record."""
+        tx_hash, *_ = _record_header_.unpack_from(record, offset)
+        return Hash32(tx_hash)
+
+    @staticmethod
+    def get_verifier_version(version: str, versioner: 'TransactionVersioner') -> str:
+        return f"{version}:{versioner.get_hash_generator_version(version)}"
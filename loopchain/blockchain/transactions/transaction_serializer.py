@@ -4,6 +4,7 @@ from loopchain.crypto.hashing import build_hash_generator
 
 if TYPE_CHECKING:
     from loopchain.blockchain.transactions import Transaction, TransactionVersioner
+    from loopchain.blockchain.types import Hash32
 
 
 class TransactionSerializer(ABC):
@@ -29,7 +30,11 @@ class TransactionSerializer(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def from_(self, tx_dumped: dict) -> 'Transaction':
+    def from_(self, tx_dumped: dict, tx_hash: 'Hash32' = None) -> 'Transaction':
+        """
+        :param tx_dumped: data of tx
+        :param tx_hash: hash of the data which is known already. The hash is not generated again if it is given.
+        """
         raise NotImplementedError
 
     @abstractmethod
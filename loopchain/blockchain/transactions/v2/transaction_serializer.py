@@ -24,7 +24,7 @@ class TransactionSerializer(BaseTransactionSerializer):
     def to_db_data(self, tx: 'Transaction'):
         return self.to_full_data(tx)
 
-    def from_(self, tx_data: dict) -> 'Transaction':
+    def from_(self, tx_data: dict, tx_hash: Hash32 = None) -> 'Transaction':
         tx_data_copied = dict(tx_data)
 
         tx_data_copied.pop('method', None)
@@ -46,7 +46,7 @@ class TransactionSerializer(BaseTransactionSerializer):
 
         return Transaction(
             raw_data=tx_data,
-            hash=Hash32.fromhex(hash, ignore_prefix=True, allow_malformed=False),
+            hash=Hash32.fromhex(hash, ignore_prefix=True, allow_malformed=False) if tx_hash is None else tx_hash,
             signature=Signature.from_base64str(signature),
             timestamp=int(timestamp) if timestamp is not None else None,
             from_address=ExternalAddress.fromhex(from_address, ignore_prefix=False, allow_malformed=True),
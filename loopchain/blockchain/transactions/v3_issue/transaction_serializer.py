@@ -20,12 +20,13 @@ class TransactionSerializer(BaseTransactionSerializer):
     def to_db_data(self, tx: 'Transaction'):
         return dict(tx.raw_data)
 
-    def from_(self, tx_data: dict) -> 'Transaction':
+    def from_(self, tx_data: dict, tx_hash: Hash32 = None) -> 'Transaction':
         tx_data_copied = dict(tx_data)
         tx_data_copied.pop('txHash', None)
         raw_data = dict(tx_data_copied)
 
-        tx_hash = self._hash_generator.generate_hash(tx_data_copied)
+        if tx_hash is None:
+            tx_hash = self._hash_generator.generate_hash(tx_data_copied)
 
         return Transaction(
             raw_data=raw_data,
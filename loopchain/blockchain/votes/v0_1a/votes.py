@@ -29,7 +29,7 @@ class BlockVotes(BaseVotes[BlockVote]):
         self.block_hash = block_hash
         super().__init__(reps, voting_ratio, votes)
 
-    def verify_vote(self, vote: BlockVote):
+    def verify_vote(self, vote: BlockVote, signature_verified: bool = False):
         if vote.block_height != self.block_height:
             raise RuntimeError(f"Vote block_height not match. {vote.block_height} != {self.block_height}\n"
                                f"{vote}")
@@ -41,20 +41,24 @@ class BlockVotes(BaseVotes[BlockVote]):
         if vote.block_hash != self.block_hash and vote.block_hash != Hash32.empty():
             raise RuntimeError(f"Vote block_hash not match. {vote.block_hash} != {self.block_hash}\n"
                                f"{vote}")
-        super().verify_vote(vote)
+        super().verify_vote(vote, signature_verified)
+
+    def _get_tally_key(self, vote: BlockVote):
+        if vote.block_hash == self.block_hash:
+            return True
+        if vote.block_hash == Hash32.empty():
+            return False
+        # The vote for another block which is not verified yet. It is neither true nor false.
+        return vote.block_hash
 
     def is_completed(self):
         return self.get_result() is not None
 
     def get_result(self):
-        true_vote_count = sum(1 for vote in self.votes
-                              if vote and vote.block_hash == self.block_hash)
-        if true_vote_count >= self.quorum:
+        if self.get_count(True) >= self.quorum:
             return True
 
-        false_vote_count = sum(1 for vote in self.votes
-                               if vote and vote.block_hash == Hash32.empty())
-        if false_vote_count >= len(self.reps) - self.quorum + 1:
+        if self.get_count(False) >= len(self.reps) - self.quorum + 1:
             return False
         return None
 
@@ -91,7 +95,7 @@ class LeaderVotes(BaseVotes[LeaderVote]):
         self.old_leader = old_leader
         super().__init__(reps, voting_ratio, votes)
 
-    def verify_vote(self, vote: LeaderVote):
+    def verify_vote(self, vote: LeaderVote, signature_verified: bool = False):
         if vote.block_height != self.block_height:
             raise RuntimeError(f"Vote block_height not match. {vote.block_height} != {self.block_height}\n"
                                f"{vote}")
@@ -103,7 +107,7 @@ class LeaderVotes(BaseVotes[LeaderVote]):
         if vote.old_leader != self.old_leader:
             raise RuntimeError(f"Vote old_leader not match. {vote.old_leader} != {self.old_leader}\n"
                                f"{vote}")
-        super().verify_vote(vote)
+        super().verify_vote(vote, signature_verified)
 
     def is_completed(self):
         majority_pair = self.get_majority()
@@ -113,8 +117,7 @@ class LeaderVotes(BaseVotes[LeaderVote]):
             if majority_count >= self.quorum or self.is_failed(majority_value, majority_count):
                 return True
 
-            empty_count = self.votes.count(None)
-            if majority_count + empty_count < self.quorum:
+            if majority_count + self.empty_count < self.quorum:
                 # It determines the majority of this votes cannot reach the quorum
                 return True
         return False
@@ -123,16 +126,15 @@ class LeaderVotes(BaseVotes[LeaderVote]):
         return value == ExternalAddress.empty() and count >= len(self.reps) - self.quorum + 1
 
     def get_result(self):
-        majority_pairs = self.get_majority(2)
-        if majority_pairs:
-            rank_1_value, rank_1_count = majority_pairs[0]
-            if rank_1_count >= self.quorum or self.is_failed(rank_1_value, rank_1_count):
-                return rank_1_value
-
-            if len(majority_pairs) > 1:
-                rank_2_value, rank_2_count = majority_pairs[1]
-                if self.is_failed(rank_2_value, rank_2_count):
-                    return rank_2_value
+        majority_pair = self.get_majority()
+        if majority_pair:
+            majority_value, majority_count = majority_pair[0]
+            if majority_count >= self.quorum:
+                return majority_value
+
+            empty_leader = ExternalAddress.empty()
+            if self.is_failed(empty_leader, self.get_count(empty_leader)):
+                return empty_leader
         return None
 
     def get_summary(self):
@@ -165,8 +167,7 @@ class LeaderVotes(BaseVotes[LeaderVote]):
             reps = [vote.rep for vote in votes]
             votes_instance = cls(reps, voting_ratio, votes[0].block_height, votes[0].round_, votes[0].old_leader)
             for vote in votes:
-                index = reps.index(vote.rep)
-                votes_instance.votes[index] = vote
+                votes_instance.set_vote(votes_instance._rep_indexes[vote.rep], vote)
             return votes_instance
         else:
             return cls([], voting_ratio, -1, -1, ExternalAddress.empty())
@@ -15,8 +15,9 @@
 import math
 from abc import ABC, abstractmethod
 from collections import Counter
-from typing import Iterable, List, Generic, TypeVar, Optional
+from typing import Iterable, List, Generic, TypeVar, Optional, Tuple, Any
 
+from loopchain import configure as conf
 from loopchain.blockchain.types import ExternalAddress
 from loopchain.blockchain.votes import Vote
 
@@ -24,28 +25,93 @@ TVote = TypeVar("TVote", bound=Vote)
 
 
 class Votes(ABC, Generic[TVote]):
+    """Votes of reps.
+
+    Votes are tallied by their results as they are added,
+    so the majority and the result are found without counting every vote again.
+    Set `votes` only by `add_vote` or `set_vote` to keep the tallies.
+    """
     VoteType: TVote = None
 
     def __init__(self, reps: Iterable['ExternalAddress'], voting_ratio: float, votes: List[TVote] = None):
         super().__init__()
         self.reps = tuple(reps)
-        if votes is None:
-            self.votes: List[Optional[TVote]] = [None] * len(self.reps)
-        else:
-            self.votes = votes
+        self._rep_indexes = {}
+        for index, rep in enumerate(self.reps):
+            self._rep_indexes.setdefault(rep, index)
+
+        self.votes: List[Optional[TVote]] = [None] * len(self.reps)
         self.voting_ratio = voting_ratio
         self.quorum = math.ceil(voting_ratio * len(self.reps))
 
-    def add_vote(self, vote: TVote):
+        self._tallies = Counter()
+        self._empty_count = len(self.votes)
+        self._majority: Optional[Tuple[Any, int]] = None
+        if votes is not None:
+            self.votes = [None] * len(votes)
+            self._empty_count = len(votes)
+            for index, vote in enumerate(votes):
+                self.set_vote(index, vote)
+
+    def add_vote(self, vote: TVote, signature_verified: bool = False):
+        """Verify and add the vote. Adding the same vote again changes nothing.
+
+        :param vote:
+        :param signature_verified: the signature of the vote is verified already. e.g. by `CandidateBlocks.add_votes`
+        """
         try:
-            self.verify_vote(vote)
+            self.verify_vote(vote, signature_verified)
         except VoteSafeDuplicateError:
             pass
         except VoteError:
             raise
         else:
-            index = self.reps.index(vote.rep)
-            self.votes[index] = vote
+            index = self._rep_indexes[vote.rep]
+            self.set_vote(index, vote)
+
+    def set_vote(self, index: int, vote: Optional[TVote]):
+        """Put the vote to the index of its rep without verification and update the tallies."""
+        old_vote = self.votes[index]
+        if old_vote is not None:
+            result = self._get_tally_key(old_vote)
+            self._tallies[result] -= 1
+            if not self._tallies[result]:
+                del self._tallies[result]
+            self._empty_count += 1
+            self._majority = max(self._tallies.items(), key=lambda item: item[1]) if self._tallies else None
+
+        self.votes[index] = vote
+        if vote is not None:
+            result = self._get_tally_key(vote)
+            self._tallies[result] += 1
+            self._empty_count -= 1
+            if self._majority is None or self._tallies[result] > self._majority[1]:
+                self._majority = (result, self._tallies[result])
+
+        if conf.VERIFY_VOTE_TALLIES:
+            self.verify_tallies()
+
+    def verify_tallies(self):
+        """Count every vote again and compare it with the tallies. It is for debugging."""
+        counter = Counter(self._get_tally_key(vote) for vote in self.votes if vote)
+        empty_count = sum(1 for vote in self.votes if not vote)
+        if counter != self._tallies or empty_count != self._empty_count:
+            raise RuntimeError(f"Vote tallies are not consistent. "
+                               f"tallies({dict(self._tallies)}, empty={self._empty_count}), "
+                               f"recount({dict(counter)}, empty={empty_count})")
+        if counter and counter[self._majority[0]] != max(counter.values()):
+            raise RuntimeError(f"Vote majority is not consistent. "
+                               f"majority({self._majority}), recount({dict(counter)})")
+
+    def _get_tally_key(self, vote: TVote):
+        return vote.result()
+
+    def get_count(self, result) -> int:
+        return self._tallies[result]
+
+    @property
+    def empty_count(self) -> int:
+        return self._empty_count
 
     def verify(self):
         for rep, vote in zip(self.reps, self.votes):
@@ -60,12 +126,16 @@ class Votes(ABC, Generic[TVote]):
             except VoteSafeDuplicateError:
                 pass
 
-    def verify_vote(self, vote: TVote):
-        vote.verify()
+    def has_vote(self, vote: TVote) -> bool:
+        index = self._rep_indexes.get(vote.rep)
+        return index is not None and self.votes[index] == vote
 
-        try:
-            index = self.reps.index(vote.rep)
-        except ValueError:
+    def verify_vote(self, vote: TVote, signature_verified: bool = False):
+        if not signature_verified:
+            vote.verify()
+
+        index = self._rep_indexes.get(vote.rep)
+        if index is None:
             raise VoteNoRightRep(f"This rep({vote.rep.hex_hx()}) has no right to vote"
                                  f"\nreps({self.reps})")
 
@@ -86,26 +156,24 @@ class Votes(ABC, Generic[TVote]):
         raise NotImplementedError
 
     def get_majority(self, n: int = 1):
-        counter = Counter(vote.result() for vote in self.votes if vote)
-        majorities = counter.most_common(n)
-        return majorities
+        if n == 1:
+            return [self._majority] if self._majority else []
+        return self._tallies.most_common(n)
 
     def get_summary(self):
         def _fill_space(left_str):
             return ' ' * (length - len(str(left_str)))
 
         length = 8
-        counter = Counter(vote.result() for vote in self.votes if vote)
-        for k, v in counter.items():
+        for k, v in self._tallies.items():
             length = max(length, len(str(k)))
         length += 1
 
         msg = "Votes\n"
-        for k, v in counter.items():
+        for k, v in self._tallies.items():
             msg += f"{k} {_fill_space(k)}: {v}/{len(self.reps)}\n"
 
-        empty_count = sum(1 for vote in self.votes if not vote)
-        msg += f"Empty {_fill_space('Empty')}: {empty_count}/{len(self.reps)}\n"
+        msg += f"Empty {_fill_space('Empty')}: {self._empty_count}/{len(self.reps)}\n"
         msg += f"Result {_fill_space('Result')}: {self.get_result()}\n"
         msg += f"Quorum {_fill_space('Quorum')}: {self.quorum}\n"
         return msg
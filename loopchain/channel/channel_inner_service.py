@@ -2,11 +2,14 @@
 
 import json
 import multiprocessing as mp
+import queue
 import signal
+import struct
+import zlib
 from asyncio import Condition
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from concurrent.futures import ThreadPoolExecutor
-from typing import Union, Dict, List, Tuple
+from typing import Callable, Union, Dict, List, Tuple, Optional
 
 from earlgrey import *
 from pkg_resources import parse_version
@@ -14,16 +17,19 @@ from pkg_resources import parse_version
 from loopchain import configure as conf
 from loopchain import utils as util
 from loopchain.baseservice import (BroadcastCommand, BroadcastScheduler, BroadcastSchedulerFactory,
-                                   ScoreResponse)
+                                   PeerScoreboard, ScoreResponse, dumps_block_batch, BlockAnnouncement,
+                                   SubscriberFanout)
 from loopchain.baseservice.module_process import ModuleProcess, ModuleProcessProperties
+from loopchain.baseservice.shared_ring_buffer import SharedRingBuffer
 from loopchain.blockchain.blocks import Block, BlockSerializer
 from loopchain.blockchain.exception import *
-from loopchain.blockchain.transactions import (Transaction, TransactionSerializer, TransactionVerifier,
-                                               TransactionVersioner)
+from loopchain.blockchain.transactions import (Transaction, TransactionEnvelope, TransactionSerializer,
+                                               TransactionVerifier, TransactionVersioner)
 from loopchain.blockchain.types import Hash32
-from loopchain.blockchain.votes.v0_1a import BlockVote, LeaderVote
+from loopchain.blockchain.votes.v0_1a import LeaderVote
 from loopchain.channel.channel_property import ChannelProperty
 from loopchain.jsonrpc.exception import JsonError
+from loopchain.peer.vote_relay import loads_votes
 from loopchain.protos import message_code
 from loopchain.qos.qos_controller import QosController, QosCountControl
 from loopchain.utils.message_queue import StubCollection
@@ -207,6 +213,13 @@ class ChannelTxReceiverInnerTask:
         self.__nid: int = None
         self.__tx_versioner = tx_versioner
         self.__tx_queue = tx_queue
+        self.__received_tx_jsons = OrderedDict()  # recently received tx json strings to skip duplicates
+
+    def __remember_tx_jsons(self, tx_jsons: List[str]):
+        for tx_json in tx_jsons:
+            self.__received_tx_jsons[tx_json] = None
+        while len(self.__received_tx_jsons) > conf.MAX_PRE_VALIDATE_TX_CACHE:
+            self.__received_tx_jsons.popitem(last=False)
 
     @message_queue_task
     async def update_properties(self, properties: dict):
@@ -223,29 +236,46 @@ class ChannelTxReceiverInnerTask:
             return response_code, message
 
         tx_list = []
+        tx_jsons = []
+        duplicated_count = 0
         for tx_item in request.tx_list:
+            # Compare the original strings before parsing, to drop txs which have been already received cheaply.
+            if tx_item.tx_json in self.__received_tx_jsons or tx_item.tx_json in tx_jsons:
+                duplicated_count += 1
+                continue
+
             tx_json = json.loads(tx_item.tx_json)
 
             tx_version, tx_type = self.__tx_versioner.get_version(tx_json)
 
             ts = TransactionSerializer.new(tx_version, tx_type, self.__tx_versioner)
             tx = ts.from_(tx_json)
+            tx.set_raw_json(tx_item.tx_json)
 
             tv = TransactionVerifier.new(tx_version, tx_type, self.__tx_versioner)
             tv.pre_verify(tx, nid=self.__nid)
 
-            tx.size(self.__tx_versioner)
-
-            tx_list.append(tx)
+            tx_list.append(TransactionEnvelope.seal(tx, self.__tx_versioner))
+            tx_jsons.append(tx_item.tx_json)
 
         tx_len = len(tx_list)
-        if tx_len == 0:
+        if tx_len == 0 and duplicated_count > 0:
+            response_code = message_code.Response.success
+            message = f"all txs are duplicated ({duplicated_count})"
+        elif tx_len == 0:
             response_code = message_code.Response.fail
             message = "fail tx validate while AddTxList"
         else:
-            self.__tx_queue.put(tx_list)
-            response_code = message_code.Response.success
-            message = f"success ({len(tx_list)})/({len(request.tx_list)})"
+            try:
+                self.__tx_queue.put(tx_list)
+            except queue.Full:
+                util.logger.warning(f"tx queue is full. drop tx list({tx_len})")
+                response_code = message_code.Response.fail_out_of_tps_limit
+                message = "tx queue is full"
+            else:
+                self.__remember_tx_jsons(tx_jsons)
+                response_code = message_code.Response.success
+                message = f"success ({len(tx_list)})/({len(request.tx_list)})"
 
         return response_code, message
 
@@ -259,17 +289,31 @@ class ChannelTxReceiverInnerService(MessageQueueService[ChannelTxReceiverInnerTa
     def _callback_connection_lost_callback(self, connection: RobustConnection):
         util.exit_and_msg("MQ Connection lost.")
 
+    @staticmethod
+    def get_worker_count(channel_name: str) -> int:
+        channel_option = conf.CHANNEL_OPTION.get(channel_name, {})
+        return max(1, channel_option.get("tx_receiver_workers", conf.CHANNEL_TX_RECEIVER_WORKERS))
+
+    @staticmethod
+    def get_queue_name(channel_name: str, amqp_key: str, worker_index: int = 0) -> str:
+        if worker_index == 0:
+            return conf.CHANNEL_TX_RECEIVER_QUEUE_NAME_FORMAT.format(channel_name=channel_name, amqp_key=amqp_key)
+        return conf.CHANNEL_TX_RECEIVER_WORKER_QUEUE_NAME_FORMAT.format(
+            channel_name=channel_name, amqp_key=amqp_key, worker_index=worker_index)
+
     @staticmethod
     def main(channel_name: str, amqp_target: str, amqp_key: str,
-             tx_versioner: TransactionVersioner, tx_queue: mp.Queue, properties: ModuleProcessProperties=None):
+             tx_versioner: TransactionVersioner, tx_queue: Union[mp.Queue, '_TxSharedRingBuffer'],
+             worker_index: int = 0, properties: ModuleProcessProperties=None):
         if properties is not None:
-            ModuleProcess.load_properties(properties, "txreceiver")
+            module_name = "txreceiver" if worker_index == 0 else f"txreceiver{worker_index}"
+            ModuleProcess.load_properties(properties, module_name)
 
-        logging.info(f"Channel TX Receiver start")
+        logging.info(f"Channel TX Receiver({worker_index}) start")
 
         tx_queue.cancel_join_thread()
 
-        queue_name = conf.CHANNEL_TX_RECEIVER_QUEUE_NAME_FORMAT.format(channel_name=channel_name, amqp_key=amqp_key)
+        queue_name = ChannelTxReceiverInnerService.get_queue_name(channel_name, amqp_key, worker_index)
         service = ChannelTxReceiverInnerService(amqp_target, queue_name,
                                                 conf.AMQP_USERNAME, conf.AMQP_PASSWORD,
                                                 tx_versioner=tx_versioner, tx_queue=tx_queue)
@@ -335,12 +379,94 @@ class _ChannelTxCreatorProcess(ModuleProcess):
         self.__broadcast_queue.put((command, params))
 
 
+class _TxSharedRingBuffer:
+    """Transport of tx envelope list on SharedRingBuffer. It has the same interface as mp.Queue.
+
+    A tx envelope list is written as one frame of binary records instead of pickled Transactions.
+    A frame has the crc32 of its records, so a broken frame is dropped instead of trusting its tx hashes.
+    `get` returns all tx envelopes written so far at once. The records of txs known by `is_known_tx`
+    are skipped by the hash in their headers without decoding them.
+    """
+    _frame_header = struct.Struct("!II")  # count of records, crc32 of records
+    _record_header = struct.Struct("!I")
+
+    def __init__(self, tx_versioner: TransactionVersioner, capacity: int,
+                 is_known_tx: Callable[[Hash32], bool] = None):
+        self.__tx_versioner = tx_versioner
+        self.__ring_buffer = SharedRingBuffer(capacity)
+        self.__is_known_tx = is_known_tx
+
+    def __getstate__(self):
+        # The writer in the sub process does not need the filter of the reader.
+        state = dict(self.__dict__)
+        state["_TxSharedRingBuffer__is_known_tx"] = None
+        return state
+
+    def cancel_join_thread(self):
+        pass
+
+    def empty(self) -> bool:
+        return self.__ring_buffer.usage() == 0
+
+    def put(self, tx_envelope_list: Optional[List[TransactionEnvelope]], timeout=None):
+        """Write tx envelope list. None closes the transport.
+
+        :raise queue.Full: ring buffer is full until timeout
+        """
+        if tx_envelope_list is None:
+            self.__ring_buffer.close()
+            return
+
+        records = []
+        for tx_envelope in tx_envelope_list:
+            record = tx_envelope.to_bytes(self.__tx_versioner)
+            records.append(self._record_header.pack(len(record)))
+            records.append(record)
+        records = b''.join(records)
+
+        if timeout is None:
+            timeout = conf.SHARED_MEMORY_TX_PUT_TIMEOUT
+        frame_header = self._frame_header.pack(len(tx_envelope_list), zlib.crc32(records))
+        self.__ring_buffer.put(frame_header + records, timeout=timeout)
+
+    def get(self) -> Optional[List[TransactionEnvelope]]:
+        """Read all tx envelopes. Return None if the transport is closed."""
+        frames = self.__ring_buffer.get_all()
+        if not frames:
+            return None
+
+        tx_envelope_list = []
+        for frame in frames:
+            count, checksum = self._frame_header.unpack_from(frame)
+            records = memoryview(frame)[self._frame_header.size:]
+            if zlib.crc32(records) != checksum:
+                util.logger.error(f"Drop a broken frame of {count} txs in the shared memory.")
+                continue
+
+            offset = 0
+            for _ in range(count):
+                record_size, = self._record_header.unpack_from(records, offset)
+                offset += self._record_header.size
+                record = records[offset:offset + record_size]
+                offset += record_size
+
+                if self.__is_known_tx and self.__is_known_tx(TransactionEnvelope.hash_from_bytes(record)):
+                    continue
+                tx_envelope_list.append(TransactionEnvelope.from_bytes(record, self.__tx_versioner))
+
+        return tx_envelope_list
+
+
 class _ChannelTxReceiverProcess(ModuleProcess):
-    def __init__(self, tx_versioner: TransactionVersioner, add_tx_list_callback, loop, crash_callback_in_join_thread):
+    def __init__(self, tx_versioner: TransactionVersioner, add_tx_list_callback, loop, crash_callback_in_join_thread,
+                 worker_index: int = 0, is_known_tx: Callable[[Hash32], bool] = None):
         super().__init__()
 
         self.__is_running = True
-        self.__tx_queue = self.Queue()
+        if conf.USE_SHARED_MEMORY_TX_TRANSPORT:
+            self.__tx_queue = _TxSharedRingBuffer(tx_versioner, conf.SHARED_MEMORY_TX_BUFFER_SIZE, is_known_tx)
+        else:
+            self.__tx_queue = self.Queue()
         self.__tx_queue.cancel_join_thread()
 
         async def _add_tx_list(tx_list):
@@ -363,7 +489,8 @@ class _ChannelTxReceiverProcess(ModuleProcess):
                 StubCollection().amqp_target,
                 StubCollection().amqp_key,
                 tx_versioner,
-                self.__tx_queue)
+                self.__tx_queue,
+                worker_index)
         super().start(target=ChannelTxReceiverInnerService.main,
                       args=args,
                       crash_callback_in_join_thread=crash_callback_in_join_thread)
@@ -392,8 +519,9 @@ class ChannelInnerTask:
         CitizenInfo = namedtuple("CitizenInfo", "peer_id target connected_time")
         self._CitizenInfo = CitizenInfo
         self._citizens: Dict[str, CitizenInfo] = dict()
-        self._citizen_condition_new_block: Condition = None
+        self._citizen_fanout = SubscriberFanout(conf.CITIZEN_SEND_QUEUE_SIZE)
         self._citizen_condition_unregister: Condition = None
+        self.__block_announcements: Dict[int, BlockAnnouncement] = OrderedDict()
 
         self.__sub_processes = []
         self.__loop_for_sub_services = None
@@ -421,20 +549,24 @@ class ChannelInnerTask:
         self.__sub_processes.append(tx_creator_process)
         logging.info(f"Channel({ChannelProperty().name}) TX Creator: initialized")
 
-        tx_receiver_process = _ChannelTxReceiverProcess(tx_versioner,
-                                                        self.__add_tx_list,
-                                                        loop,
-                                                        crash_callback_in_join_thread)
-        self.__sub_processes.append(tx_receiver_process)
-        logging.info(f"Channel({ChannelProperty().name}) TX Receiver: initialized")
+        for worker_index in range(ChannelTxReceiverInnerService.get_worker_count(ChannelProperty().name)):
+            tx_receiver_process = _ChannelTxReceiverProcess(tx_versioner,
+                                                            self.__add_tx_list,
+                                                            loop,
+                                                            crash_callback_in_join_thread,
+                                                            worker_index,
+                                                            self.__is_known_tx)
+            self.__sub_processes.append(tx_receiver_process)
+            logging.info(f"Channel({ChannelProperty().name}) TX Receiver({worker_index}): initialized")
 
     def update_sub_services_properties(self, **properties):
         logging.info(f"properties {properties}")
         stub = StubCollection().channel_tx_creator_stubs[ChannelProperty().name]
         asyncio.run_coroutine_threadsafe(stub.async_task().update_properties(properties), self.__loop_for_sub_services)
 
-        stub = StubCollection().channel_tx_receiver_stubs[ChannelProperty().name]
-        asyncio.run_coroutine_threadsafe(stub.async_task().update_properties(properties), self.__loop_for_sub_services)
+        for stub in StubCollection().channel_tx_receiver_worker_stubs[ChannelProperty().name]:
+            asyncio.run_coroutine_threadsafe(stub.async_task().update_properties(properties),
+                                             self.__loop_for_sub_services)
 
     def cleanup_sub_services(self):
         for process in self.__sub_processes:
@@ -458,15 +590,23 @@ class ChannelInnerTask:
             # Call this function by cleanup
             pass
 
-    def __add_tx_list(self, tx_list):
-        for tx in tx_list:
-            if tx.hash.hex() in self._block_manager.get_tx_queue():
-                util.logger.debug(f"tx hash {tx.hash.hex_0x()} already exists in transaction queue.")
+    def __is_known_tx(self, tx_hash: Hash32) -> bool:
+        # It is called in the thread which receives txs. `__add_tx_list` checks the tx queue again in the loop.
+        return tx_hash.hex() in self._block_manager.get_tx_queue()
+
+    def __add_tx_list(self, tx_envelope_list: List[TransactionEnvelope]):
+        tx_versioner = self._blockchain.tx_versioner
+        for tx_envelope in tx_envelope_list:
+            tx_hash = tx_envelope.hash
+            if tx_hash.hex() in self._block_manager.get_tx_queue():
+                util.logger.debug(f"tx hash {tx_hash.hex_0x()} already exists in transaction queue.")
                 continue
-            if self._blockchain.find_tx_by_key(tx.hash.hex()):
-                util.logger.debug(f"tx hash {tx.hash.hex_0x()} already exists in blockchain.")
+            if self._blockchain.find_tx_by_key(tx_hash.hex()):
+                util.logger.debug(f"tx hash {tx_hash.hex_0x()} already exists in blockchain.")
                 continue
 
+            tx = tx_envelope.open(tx_versioner, trust=conf.TRUST_VERIFIED_TX_ENVELOPE)
+
             self._block_manager.add_tx_obj(tx)
             util.apm_event(ChannelProperty().peer_id, {
                 'event_type': 'AddTx',
@@ -489,27 +629,68 @@ class ChannelInnerTask:
             if subscriber_block_height > my_block_height:
                 logging.warning(f"subscriber's height({subscriber_block_height}) is higher "
                                 f"than this node's height({my_block_height}).")
+                self._citizen_fanout.unsubscribe(subscriber_id)
                 self._channel_service.inner_service.notify_unregister()
                 error_msg = {"error": "Invalid block height from citizen."}
                 return json.dumps(error_msg), b''
             elif subscriber_block_height == my_block_height:
-                async with self._citizen_condition_new_block:
-                    await self._citizen_condition_new_block.wait()
-
-            new_block_height = subscriber_block_height + 1
-            new_block = self._blockchain.find_block_by_height(new_block_height)
-
-            if new_block is None:
-                logging.warning(f"Cannot find block height({new_block_height})")
-                # To prevent excessive occupancy of the CPU in an infinite loop
-                await asyncio.sleep(2 * conf.INTERVAL_BLOCKGENERATION)
-                continue
+                send_queue = self._citizen_fanout.subscribe(subscriber_id)
+                if self._blockchain.block_height != my_block_height:
+                    # A block was added before the subscription.
+                    continue
+                announcement = await send_queue.get()
+                if announcement is None:
+                    logging.debug(f"announce_new_block: {subscriber_id} is unsubscribed.")
+                    error_msg = {"error": "Unsubscribed citizen."}
+                    return json.dumps(error_msg), b''
+                if announcement.height != subscriber_block_height + 1:
+                    # It is old, or the subscriber has missed blocks in its queue. The loop resyncs it.
+                    continue
+            else:
+                # The subscriber is behind, so it is served from DB until it reaches the last block.
+                self._citizen_fanout.unsubscribe(subscriber_id)
+                announcement = self.__get_block_announcement(subscriber_block_height + 1)
+                if announcement is None:
+                    logging.warning(f"Cannot find block height({subscriber_block_height + 1})")
+                    # To prevent excessive occupancy of the CPU in an infinite loop
+                    await asyncio.sleep(2 * conf.INTERVAL_BLOCKGENERATION)
+                    continue
+
+            logging.debug(f"announce_new_block: height({announcement.height}), to: {subscriber_id}")
+            return announcement.block_json, announcement.confirm_info
+
+    def publish_new_block(self, block_height: int):
+        """Announce the block to the citizens waiting for it at once. It is loaded and serialized once for them."""
+        if not len(self._citizen_fanout):
+            return
 
-            confirm_info: bytes = self._blockchain.find_confirm_info_by_hash(new_block.header.hash)
+        announcement = self.__get_block_announcement(block_height)
+        if announcement is None:
+            logging.warning(f"Cannot find block height({block_height}) to announce")
+            return
 
-            logging.debug(f"announce_new_block: height({new_block.header.height}), to: {subscriber_id}")
-            bs = BlockSerializer.new(new_block.header.version, self._blockchain.tx_versioner)
-            return json.dumps(bs.serialize(new_block)), confirm_info
+        dropped = self._citizen_fanout.publish(announcement)
+        if dropped:
+            util.logger.warning(f"Citizens({dropped}) are too slow to receive blocks. They will resync.")
+
+    def __get_block_announcement(self, block_height: int) -> Optional[BlockAnnouncement]:
+        announcement = self.__block_announcements.get(block_height)
+        if announcement is not None:
+            return announcement
+
+        block_hash = self._blockchain.find_block_hash_by_height(block_height)
+        block_data = self._blockchain.find_block_data_by_hash(block_hash) if block_hash else None
+        if block_data is None:
+            return None
+
+        confirm_info = bytes(self._blockchain.find_confirm_info_by_hash(block_hash))
+        announcement = BlockAnnouncement(block_height, block_data.decode(), confirm_info)
+        # confirm_info of the last block may be stored later, so the block without it is not kept.
+        if confirm_info:
+            self.__block_announcements[block_height] = announcement
+            while len(self.__block_announcements) > conf.CITIZEN_SEND_QUEUE_SIZE:
+                self.__block_announcements.popitem(last=False)
+        return announcement
 
     @message_queue_task
     async def register_citizen(self, peer_id, target, connected_time):
@@ -527,6 +708,7 @@ class ChannelInnerTask:
 
     @message_queue_task
     async def unregister_citizen(self, peer_id):
+        self._citizen_fanout.unsubscribe(peer_id)
         try:
             logging.info(f"unregister citizen: {peer_id}")
             del self._citizens[peer_id]
@@ -590,6 +772,7 @@ class ChannelInnerTask:
         status_data["round"] = self._block_manager.epoch.round if self._block_manager.epoch else -1
         status_data["epoch_height"] = self._block_manager.epoch.height if self._block_manager.epoch else -1
         status_data["unconfirmed_block_height"] = unconfirmed_block_height or -1
+        status_data["candidate_blocks"] = self._block_manager.candidate_blocks.get_stats()
         status_data["total_tx"] = self._block_manager.get_total_tx()
         status_data["unconfirmed_tx"] = self._block_manager.get_count_of_unconfirmed_tx()
         status_data["peer_target"] = ChannelProperty().peer_target
@@ -598,9 +781,23 @@ class ChannelInnerTask:
         status_data["leader"] = self._block_manager.epoch.leader_id if self._block_manager.epoch else ""
         status_data["epoch_leader"] = self._block_manager.epoch.leader_id if self._block_manager.epoch else ""
         status_data["versions"] = conf.ICON_VERSIONS
+        status_data["peer_scoreboard"] = PeerScoreboard().to_dict()
+        status_data["broadcast_queues"] = self._channel_service.broadcast_scheduler.get_outbox_stats()
 
         return status_data
 
+    @message_queue_task
+    async def get_consensus_trace(self, height_count: int = None, chrome_trace: bool = False) -> dict:
+        """Durations of consensus phases of the last heights.
+
+        :param height_count: the number of the last heights. All kept heights if None.
+        :param chrome_trace: return spans in Chrome trace format instead of the sum of durations by phase.
+        """
+        span_recorder = self._block_manager.span_recorder
+        if chrome_trace:
+            return span_recorder.to_chrome_trace()
+        return {"heights": span_recorder.get_heights(height_count)}
+
     @message_queue_task
     def create_tx(self, data):
         tx = Transaction()
@@ -697,6 +894,8 @@ class ChannelInnerTask:
             logging.error(f"announce_unconfirmed_block: {e}")
             return
 
+        self._block_manager.forward_unconfirmed_block(unconfirmed_block, block_dumped, round_)
+
         util.logger.debug(
             f"announce_unconfirmed_block \n"
             f"peer_id({unconfirmed_block.header.peer_id.hex()})\n"
@@ -734,6 +933,11 @@ class ChannelInnerTask:
 
     @message_queue_task
     def block_sync(self, block_hash, block_height):
+        if block_hash == "" and block_height != -1:
+            result = self.__block_sync_by_block_data(block_height)
+            if result is not None:
+                return result
+
         response_code = None
         block: Block = None
         if block_hash != "":
@@ -743,10 +947,7 @@ class ChannelInnerTask:
         else:
             response_code = message_code.Response.fail_not_enough_data
 
-        if self._blockchain.last_unconfirmed_block is None:
-            unconfirmed_block_height = -1
-        else:
-            unconfirmed_block_height = self._blockchain.last_unconfirmed_block.header.height
+        unconfirmed_block_height = self.__get_unconfirmed_block_height()
 
         if block is None:
             if response_code is None:
@@ -763,21 +964,122 @@ class ChannelInnerTask:
         return (message_code.Response.success, block.header.height, self._blockchain.block_height,
                 unconfirmed_block_height, confirm_info, self._blockchain.block_dumps(block))
 
+    def __block_sync_by_block_data(self, block_height: int):
+        """`block_sync` of a block in DB by its stored data without deserialization.
+        It returns None for the block which is not in DB, e.g. the last unconfirmed block.
+        """
+        block_hash = self._blockchain.find_block_hash_by_height(block_height)
+        block_data = self._blockchain.find_block_data_by_hash(block_hash) if block_hash else None
+        if block_data is None:
+            return None
+
+        max_block_height = self._blockchain.block_height
+        unconfirmed_block_height = self.__get_unconfirmed_block_height()
+        confirm_info = self.__find_confirm_info_to_sync(block_height, block_hash)
+        if confirm_info is False:
+            return (message_code.Response.fail_no_confirm_info, -1, max_block_height, unconfirmed_block_height,
+                    None, None)
+
+        return (message_code.Response.success, block_height, max_block_height, unconfirmed_block_height,
+                confirm_info, self._blockchain.block_data_dumps(block_height, block_hash, block_data))
+
+    def __find_confirm_info_to_sync(self, block_height: int, block_hash: Hash32):
+        """confirm_info of the block in DB to sync. False if a block of 0.3 or later does not have it."""
+        if not 0 < block_height <= self._blockchain.block_height:
+            return None
+
+        confirm_info = self._blockchain.find_confirm_info_by_hash(block_hash)
+        block_version = self._blockchain.block_versioner.get_version(block_height)
+        if not confirm_info and parse_version(block_version) >= parse_version("0.3"):
+            return False
+        return confirm_info
+
+    def __get_unconfirmed_block_height(self) -> int:
+        if self._blockchain.last_unconfirmed_block is None:
+            return -1
+        return self._blockchain.last_unconfirmed_block.header.height
+
+    @message_queue_task
+    def block_sync_range(self, from_height: int, count: int, max_bytes: int):
+        """Blocks in a reply of BlockSyncRange
+
+        :return: see `__blocks_to_sync`
+        """
+        return self.__blocks_to_sync(from_height, count, max_bytes)
+
+    @message_queue_task
+    def citizen_block_batch(self, from_height: int, count: int):
+        """A batch of blocks for node_ws_RequestBlocks of a citizen catching up
+
+        :return: response_code, max_block_height, batch of `dumps_block_batch`
+        """
+        count = min(count, conf.CITIZEN_BLOCK_BATCH_SIZE)
+        response_code, max_block_height, _, blocks = \
+            self.__blocks_to_sync(from_height, count, conf.CITIZEN_BLOCK_BATCH_MAX_BYTES)
+        return response_code, max_block_height, dumps_block_batch(blocks)
+
+    def __blocks_to_sync(self, from_height: int, count: int, max_bytes: int):
+        """Blocks in DB from the height, without deserialization.
+
+        :param from_height: the first height
+        :param count: max count of blocks
+        :param max_bytes: max bytes of blocks. There is one block at least even if it is larger.
+        :return: response_code, max_block_height, unconfirmed_block_height,
+            [(block_height, confirm_info, block_dumped), ...]
+        """
+        unconfirmed_block_height = self.__get_unconfirmed_block_height()
+        max_block_height = self._blockchain.block_height
+        blocks = []
+        size = 0
+        for height in range(from_height, min(from_height + count - 1, max_block_height) + 1):
+            block_hash = self._blockchain.find_block_hash_by_height(height)
+            block_data = self._blockchain.find_block_data_by_hash(block_hash) if block_hash else None
+            if block_data is None:
+                break
+
+            confirm_info = self.__find_confirm_info_to_sync(height, block_hash)
+            if confirm_info is False:
+                break
+
+            block_dumped = self._blockchain.block_data_dumps(height, block_hash, block_data)
+            size += len(block_dumped) + len(confirm_info or b"")
+            if blocks and size > max_bytes:
+                break
+            blocks.append((height, confirm_info, block_dumped))
+
+        if blocks:
+            response_code = message_code.Response.success
+        elif from_height > max_block_height:
+            response_code = message_code.Response.fail_wrong_block_height
+        else:
+            response_code = message_code.Response.fail_no_confirm_info
+        return response_code, max_block_height, unconfirmed_block_height, blocks
+
     @message_queue_task(type_=MessageQueueType.Worker)
     def vote_unconfirmed_block(self, vote_dumped: str) -> None:
         try:
-            vote_serialized = json.loads(vote_dumped)
+            votes = loads_votes(vote_dumped)
         except json.decoder.JSONDecodeError:
             util.logger.warning(f"This vote({vote_dumped}) may be from old version.")
         else:
-            vote = BlockVote.deserialize(vote_serialized)
-            util.logger.debug(
-                f"Peer vote to : {vote.block_height}({vote.round_}) {vote.block_hash} from {vote.rep.hex_hx()}")
-            self._block_manager.candidate_blocks.add_vote(vote)
+            candidate_blocks = self._block_manager.candidate_blocks
+            if len(votes) == 1:
+                vote = votes[0]
+                util.logger.debug(
+                    f"Peer vote to : {vote.block_height}({vote.round_}) {vote.block_hash} from {vote.rep.hex_hx()}")
+                candidate_blocks.add_vote(vote)
+            else:
+                verified_count = candidate_blocks.add_votes(votes)
+                util.logger.debug(f"Peer votes : {len(votes)} votes, {verified_count} new")
+
+            # Votes rejected by a wrong signature, no right to vote or a conflict must not replace relayed ones.
+            accepted_votes = [vote for vote in votes if candidate_blocks.has_vote(vote)]
+            self._block_manager.relay_votes(accepted_votes)
 
             if self._channel_service.state_machine.state == "BlockGenerate" and \
                     self._block_manager.consensus_algorithm:
-                self._block_manager.consensus_algorithm.vote(vote)
+                for vote in accepted_votes:
+                    self._block_manager.consensus_algorithm.vote(vote)
 
     @message_queue_task(type_=MessageQueueType.Worker)
     async def complain_leader(self, vote_dumped: str) -> None:
@@ -825,55 +1127,78 @@ class ChannelInnerTask:
     @message_queue_task
     async def get_block_v2(self, block_height, block_hash) -> Tuple[int, str, str]:
         # This is a temporary function for v2 support of exchanges.
-        block, block_hash, _, fail_response_code = await self.__get_block(block_hash, block_height)
-        if fail_response_code:
-            return fail_response_code, block_hash, json.dumps({})
-
-        tx_versioner = self._blockchain.tx_versioner
-        bs = BlockSerializer.new(block.header.version, tx_versioner)
-        block_data_dict = bs.serialize(block)
+        block_data, block_hash, _ = self.__find_block_data(block_hash, block_height)
+        if block_data is None:
+            block, block_hash, _, fail_response_code = await self.__get_block(block_hash, block_height)
+            if fail_response_code:
+                return fail_response_code, block_hash, json.dumps({})
+            block_data_dict = json.loads(self._blockchain.block_serialized_json(block))
+        else:
+            block_data_dict = json.loads(block_data)
 
-        if block.header.height == 0:
+        block_version = block_data_dict["version"]
+        block_height = block_data_dict["height"]
+        if not isinstance(block_height, int):
+            block_height = int(block_height, 16)
+        if block_height == 0:
             return message_code.Response.success, block_hash, json.dumps(block_data_dict)
 
+        tx_list_key = "confirmed_transaction_list" if block_version == "0.1a" else "transactions"
+        tx_versioner = self._blockchain.tx_versioner
         confirmed_tx_list_without_fail = []
-        for tx in block.body.transactions.values():
-            invoke_result = self._block_manager.get_invoke_result(tx.hash)
+        for tx_data in block_data_dict[tx_list_key]:
+            tx_version, tx_type = tx_versioner.get_version(tx_data)
+            ts = TransactionSerializer.new(tx_version, tx_type, tx_versioner)
+            tx_hash = Hash32.fromhex(ts.get_hash(tx_data), ignore_prefix=True)
+            invoke_result = self._block_manager.get_invoke_result(tx_hash)
 
             if 'failure' in invoke_result:
                 continue
 
-            ts = TransactionSerializer.new(tx.version, tx.type(), tx_versioner)
-            full_data = ts.to_full_data(tx)
-            if tx.version == "0x3":
+            if tx_version == "0x3":
                 step_used, step_price = int(invoke_result["stepUsed"], 16), int(invoke_result["stepPrice"], 16)
-                full_data["fee"] = hex(step_used * step_price)
+                tx_data["fee"] = hex(step_used * step_price)
 
-            confirmed_tx_list_without_fail.append(full_data)
+            confirmed_tx_list_without_fail.append(tx_data)
 
         # Replace the existing confirmed_transactions with v2 ver.
-        if block.header.version == "0.1a":
-            block_data_dict["confirmed_transaction_list"] = confirmed_tx_list_without_fail
-        else:
-            block_data_dict["transactions"] = confirmed_tx_list_without_fail
-        block_data_json = json.dumps(block_data_dict)
-
-        if fail_response_code:
-            return fail_response_code, block_hash, json.dumps({})
-
-        return message_code.Response.success, block_hash, block_data_json
+        block_data_dict[tx_list_key] = confirmed_tx_list_without_fail
+        return message_code.Response.success, block_hash, json.dumps(block_data_dict)
 
     @message_queue_task
     async def get_block(self, block_height, block_hash) -> Tuple[int, str, bytes, str]:
+        block_data, block_hash, confirm_info = self.__find_block_data(block_hash, block_height)
+        if block_data is not None:
+            return message_code.Response.success, block_hash, confirm_info, block_data.decode(encoding='UTF-8')
+
         block, block_hash, confirm_info, fail_response_code = await self.__get_block(block_hash, block_height)
 
         if fail_response_code:
             return fail_response_code, block_hash, b"", json.dumps({})
 
-        tx_versioner = self._blockchain.tx_versioner
-        bs = BlockSerializer.new(block.header.version, tx_versioner)
-        block_dict = bs.serialize(block)
-        return message_code.Response.success, block_hash, confirm_info, json.dumps(block_dict)
+        return message_code.Response.success, block_hash, confirm_info, self._blockchain.block_serialized_json(block)
+
+    def __find_block_data(self, block_hash, block_height) -> Tuple[Optional[bytes], str, bytes]:
+        """The stored data of the block in DB instead of `Block` of `__get_block`.
+        The data is None if the block is not in DB, and `__get_block` handles it.
+
+        :return: block_data, block_hash, confirm_info
+        """
+        if block_hash == "" and block_height == -1 and self._blockchain.last_block:
+            block_hash = self._blockchain.last_block.header.hash.hex()
+
+        if block_hash:
+            block_data = self._blockchain.find_block_data_by_hash(block_hash)
+            confirm_info_key = Hash32.fromhex(block_hash, True) if block_data is not None else None
+        elif block_height != -1:
+            confirm_info_key = self._blockchain.find_block_hash_by_height(block_height)
+            block_data = self._blockchain.find_block_data_by_hash(confirm_info_key) if confirm_info_key else None
+        else:
+            return None, block_hash, b''
+
+        if block_data is None:
+            return None, block_hash, b''
+        return block_data, block_hash, bytes(self._blockchain.find_confirm_info_by_hash(confirm_info_key))
 
     async def __get_block(self, block_hash, block_height):
         if block_hash == "" and block_height == -1 and self._blockchain.last_block:
@@ -982,18 +1307,15 @@ class ChannelInnerService(MessageQueueService[ChannelInnerTask]):
 
     def __init__(self, amqp_target, route_key, username=None, password=None, **task_kwargs):
         super().__init__(amqp_target, route_key, username, password, **task_kwargs)
-        self._task._citizen_condition_new_block = Condition(loop=self.loop)
         self._task._citizen_condition_unregister = Condition(loop=self.loop)
 
     def _callback_connection_lost_callback(self, connection: RobustConnection):
         util.exit_and_msg("MQ Connection lost.")
 
-    def notify_new_block(self):
+    def notify_new_block(self, block_height: int):
 
         async def _notify_new_block():
-            condition = self._task._citizen_condition_new_block
-            async with condition:
-                condition.notify_all()
+            self._task.publish_new_block(block_height)
 
         asyncio.run_coroutine_threadsafe(_notify_new_block(), self.loop)
 
@@ -62,6 +62,16 @@ MONITOR_LOG_MODULE = 'fluent'
 ENABLE_PROFILING = False
 SUB_PROCESS_JOIN_TIMEOUT = 30
 IS_BROADCAST_MULTIPROCESSING = False
+# Trust hash and signature verification results sent by tx receiver process.
+# If False, channel process verifies transactions from AddTxList again.
+TRUST_VERIFIED_TX_ENVELOPE = True
+# Use shared memory ring buffer instead of mp.Queue to send txs from tx receiver process to channel process.
+USE_SHARED_MEMORY_TX_TRANSPORT = False
+SHARED_MEMORY_TX_BUFFER_SIZE = 32 * 1024 * 1024  # bytes
+# If the ring buffer is still full after this timeout, AddTxList is rejected for backpressure.
+SHARED_MEMORY_TX_PUT_TIMEOUT = 1  # seconds
+# The number of tx receiver processes per channel. "tx_receiver_workers" in CHANNEL_OPTION overrides it.
+CHANNEL_TX_RECEIVER_WORKERS = 1
 
 
 ##########
@@ -106,6 +116,16 @@ GRPC_TIMEOUT_BROADCAST_RETRY = 6  # seconds
 GRPC_TIMEOUT_TEST = 30  # seconds
 GRPC_CONNECTION_TIMEOUT = GRPC_TIMEOUT * 2  # seconds, Connect Peer 메시지는 처리시간이 좀 더 필요함
 STUB_REUSE_TIMEOUT = 60  # minutes
+# Pooled gRPC channels to peers send keepalive pings in this interval while idle. 0 means no keepalive.
+GRPC_KEEPALIVE_TIME = 60  # seconds
+GRPC_KEEPALIVE_TIMEOUT = 20  # seconds
+# Health of peers in PeerScoreboard. RTT and error rate are moving averages with this weight of a new result.
+PEER_SCORE_WEIGHT = 0.2
+# A peer which failed this times in a row is cooled down for PEER_COOLDOWN_BASE seconds,
+# and the cooldown doubles with every further failure up to PEER_COOLDOWN_MAX seconds.
+PEER_FAILURES_TO_COOLDOWN = 3
+PEER_COOLDOWN_BASE = 1
+PEER_COOLDOWN_MAX = 60
 
 GRPC_SSL_TYPE = SSLAuthType.none
 GRPC_SSL_KEY_LOAD_TYPE = KeyLoadType.FILE_LOAD
@@ -126,8 +146,22 @@ class ConsensusAlgorithm(IntEnum):
 
 INTERVAL_BLOCKGENERATION = 2
 INTERVAL_BROADCAST_SEND_UNCONFIRMED_BLOCK = INTERVAL_BLOCKGENERATION
+# Leader tunes the interval of block generation and the tx size of a block within the bounds below
+# by tx queue depth, invoke latency and vote latency. (BlockPaceController)
+# BLOCK_PACE_MAX_INTERVAL must be shorter than TIMEOUT_FOR_LEADER_COMPLAIN.
+ALLOW_ADAPTIVE_BLOCK_PACE = False
+BLOCK_PACE_MIN_INTERVAL = 0.5  # seconds
+BLOCK_PACE_MAX_INTERVAL = 10  # seconds
+BLOCK_PACE_MIN_TX_SIZE = 128 * 1024
+BLOCK_PACE_MAX_TX_SIZE = 2 * 1024 * 1024
 MAX_MADE_BLOCK_COUNT = 10
 WAIT_SECONDS_FOR_VOTE = 0.2
+# Keep durations of consensus phases (makeup_block, score_invoke, voting, add_block...) of the last heights.
+# 0 disables it. See ChannelInnerService.get_consensus_trace.
+CONSENSUS_TRACE_HEIGHTS = 100
+# Also append the spans to consensus_trace_{channel}.json in this directory if it is set.
+# The file is in Chrome trace format (chrome://tracing, Perfetto).
+CONSENSUS_TRACE_DIR = ""
 # blockchain 용 level db 생성 재시도 횟수, 테스트가 아닌 경우 1로 설정하여도 무방하다.
 MAX_RETRY_CREATE_DB = 10
 # default key value store type
@@ -148,15 +182,30 @@ MAX_BLOCK_KBYTES = 3000  # default: 3000
 # The total size of the transactions in a block.
 MAX_TX_SIZE_IN_BLOCK = 1 * 1024 * 1024  # 1 MB is better than 2 MB (because tx invoke need CPU time)
 MAX_TX_COUNT_IN_ADDTX_LIST = 128  # AddTxList can send multiple tx in one message.
-SEND_TX_LIST_DURATION = 0.3  # seconds
+# Txs are sent by AddTxList when the size or count of pending txs reaches the limit above.
+# Otherwise they wait for the latency budget, which shrinks from SEND_TX_LIST_DURATION
+# to SEND_TX_LIST_MIN_DURATION as more txs are pending.
+SEND_TX_LIST_DURATION = 0.05  # seconds
+SEND_TX_LIST_MIN_DURATION = 0.005  # seconds
+TX_BATCH_STATS_LOG_INTERVAL = 60  # seconds
 # Consensus Vote Ratio 1 = 100%, 0.5 = 50%
 VOTING_RATIO = 0.67  # for Add Block
 LEADER_COMPLAIN_RATIO = 0.51  # for Leader Complain
+# Count every vote again whenever a vote is added and compare with the tallies. (for debugging)
+VERIFY_VOTE_TALLIES = False
+# Validators send a block vote only to the proposer of the block, and the proposer relays the votes it got
+# to reps in a batch. Every rep must support the batch of votes before this is turned on.
+ALLOW_AGGREGATED_VOTES = False
+VOTE_AGGREGATION_DELAY = 0.05  # seconds. votes that arrive in this delay are relayed together.
+# Signatures of votes in a batch are verified in parallel by this number of threads.
+VOTE_VERIFY_WORKERS = 4
 # Block Height 를 level_db 의 key(bytes)로 변환할때 bytes size
 BLOCK_HEIGHT_BYTES_LEN = 12
 # Block vote timeout
 BLOCK_VOTE_TIMEOUT = 60 * 5  # seconds
 CANDIDATE_BLOCK_TIMEOUT = 60 * 60  # seconds
+# Candidate blocks of the lowest heights are evicted when the number of candidate blocks exceeds this.
+MAX_CANDIDATE_BLOCKS = 1000
 # default storage path
 DEFAULT_STORAGE_PATH = os.getenv('DEFAULT_STORAGE_PATH', os.path.join(LOOPCHAIN_ROOT_PATH, '.storage'))
 # max tx list size by address
@@ -169,6 +218,8 @@ TIMESTAMP_BOUNDARY_SECOND = 60 * 15
 TIMESTAMP_BUFFER_IN_VERIFIER = int(0.3 * 1_000_000)  # 300ms (as microsecond)
 MAX_TX_QUEUE_AGING_SECONDS = 60 * 5
 INVOKE_RESULT_AGING_SECONDS = 60 * 60
+# Encoded payloads of blocks are cached for rebroadcast, block sync and citizens up to this size.
+BLOCK_PAYLOAD_CACHE_SIZE = 64 * 1024 * 1024  # bytes
 READ_CACHED_TX_COUNT = True
 SAFE_BLOCK_BROADCAST = True
 
@@ -217,7 +268,23 @@ CONNECTION_RETRY_TIMEOUT_TO_RS = 60 * 5  # seconds
 CONNECTION_RETRY_TIMEOUT_TO_RS_TEST = 30  # seconds for testcase
 CONNECTION_RETRY_TIMES = 3  # times
 BROADCAST_RETRY_TIMES = 1  # times
+# Count of messages queued for each peer in broadcast. Each peer has its own sender of the queue,
+# so a slow peer does not delay the others. 0 means to send to all peers from the broadcast thread.
+BROADCAST_QUEUE_SIZE = 256
+BROADCAST_RETRY_BACKOFF = 0.5  # seconds before the first retry of broadcast to a peer. It doubles with every retry.
+# Messages dropped first when the queue of a peer is full, by method.
+# "stale": a message replaces the same one in the queue, and these are dropped first.
+# "oldest": dropped next, from the oldest. Messages of the other methods are dropped last.
+BROADCAST_DROP_POLICY = {
+    "AnnounceUnconfirmedBlock": "stale",
+    "AddTx": "oldest",
+    "AddTxList": "oldest"
+}
+BROADCAST_QUEUE_STATS_LOG_INTERVAL = 60  # seconds between logs of the queues of peers in broadcast
 RELAY_RETRY_TIMES = 3  # times
+RELAY_RETRY_BACKOFF = 0.5  # seconds before the first retry of relay. It doubles with every retry.
+RELAY_BATCH_SIZE = 100  # count of txs in a batch request of relay
+RELAY_CONCURRENCY = 4  # count of batch requests of relay sent at once, and of the connections for them
 REQUEST_BLOCK_GENERATOR_TIMEOUT = 10  # seconds
 BLOCK_GENERATOR_BROADCAST_TIMEOUT = 5  # seconds
 WAIT_GRPC_SERVICE_START = 5  # seconds
@@ -227,11 +294,30 @@ WAIT_SUB_PROCESS_RETRY_TIMES = 5
 INTERVAL_SECONDS_PROCESS_MONITORING = 30  # seconds
 PEER_NAME = "no_name"
 IS_BROADCAST_ASYNC = True
+# A leader sends an unconfirmed block to this number of reps first, and they forward it to the same number of reps
+# in the tree of the block height. Rebroadcasts of the block go to all reps directly.
+# Every rep must forward blocks before this is turned on. 0 means to send to all reps directly.
+BROADCAST_FANOUT = 0
+MAX_FANOUT_SENT_BLOCKS = 100  # count of (block hash, round) remembered not to forward a block again
 SUBSCRIBE_LIMIT = 10
 SUBSCRIBE_RETRY_TIMER = 14
 SHUTDOWN_TIMER = 60 * 120
 GET_LAST_BLOCK_TIMER = 30
 BLOCK_SYNC_RETRY_NUMBER = 5
+# Peers request blocks of this number of heights ahead to sync peers concurrently in block height sync.
+# 1 means to request a block after the previous block is added.
+BLOCK_SYNC_WINDOW = 64
+BLOCK_SYNC_WORKERS = 4  # count of threads which request blocks concurrently in block height sync
+# Count of threads which verify transactions of the blocks ahead while the current block is invoked
+# in block height sync. 0 means to verify them in order.
+BLOCK_SYNC_VERIFY_WORKERS = 2
+# Count of heights requested at once by BlockSyncRange in block height sync. 1 means to use BlockSync only.
+BLOCK_SYNC_RANGE_SIZE = 16
+BLOCK_SYNC_RANGE_CHUNK_SIZE = 4  # count of blocks in a reply of BlockSyncRange the client wants
+# Limits of a reply of BlockSyncRange. A reply has one block at least even if it is larger than the bytes.
+BLOCK_SYNC_RANGE_MAX_CHUNK_SIZE = 100
+BLOCK_SYNC_RANGE_MAX_CHUNK_BYTES = 3 * 1024 * 1024  # under 4MB, the max message size of gRPC by default
+BLOCK_SYNC_RANGE_MAX_BLOCKS = 1000  # max count of blocks in a stream of BlockSyncRange
 TIMEOUT_FOR_LEADER_COMPLAIN = 60
 MAX_TIMEOUT_FOR_LEADER_COMPLAIN = 300
 
@@ -285,6 +371,7 @@ PEER_QUEUE_NAME_FORMAT = "Peer.{amqp_key}"
 CHANNEL_QUEUE_NAME_FORMAT = "Channel.{channel_name}.{amqp_key}"
 CHANNEL_TX_CREATOR_QUEUE_NAME_FORMAT = "ChannelTxCreator.{channel_name}.{amqp_key}"
 CHANNEL_TX_RECEIVER_QUEUE_NAME_FORMAT = "ChannelTxReceiver.{channel_name}.{amqp_key}"
+CHANNEL_TX_RECEIVER_WORKER_QUEUE_NAME_FORMAT = "ChannelTxReceiver.{channel_name}.{amqp_key}.{worker_index}"
 SCORE_QUEUE_NAME_FORMAT = "Score.{score_package_name}.{channel_name}.{amqp_key}"
 ICON_SCORE_QUEUE_NAME_FORMAT = "IconScore.{channel_name}.{amqp_key}"
 AMQP_KEY_DEFAULT = "amqp_key"
@@ -352,6 +439,16 @@ NO_TIMEOUT_FOR_RS_INIT = -1
 
 TIMEOUT_FOR_FUTURE = 30
 TIMEOUT_FOR_WS_HEARTBEAT = 30
+# Citizens which fall behind request batches of blocks by websocket to catch up.
+# Count of batches a citizen requests ahead. 0 means to wait for new blocks one by one.
+# Set it only if the websocket of reps serves node_ws_RequestBlocks by `ChannelInnerTask.citizen_block_batch`.
+CITIZEN_CATCH_UP_WINDOW = 0
+CITIZEN_BLOCK_BATCH_SIZE = 100  # max count of blocks in a batch
+# Max bytes of the compressed blocks in a batch. It is under the max message size of the websocket of citizens.
+CITIZEN_BLOCK_BATCH_MAX_BYTES = 2 * 1024 * 1024
+# Count of new blocks queued for a citizen. A citizen which falls behind more is dropped from the queue
+# and resyncs from DB. Blocks of this count from the last one are kept serialized for citizens.
+CITIZEN_SEND_QUEUE_SIZE = 16
 
 TIMEOUT_FOR_BLOCK_MONITOR = 14
 SLEEP_SECONDS_FOR_INIT_COMMON_PROCESS = 0.5
@@ -367,6 +464,10 @@ SLEEP_SECONDS_FOR_INIT_COMMON_PROCESS = 0.5
 # This Option can effect that strategy.
 ####################
 ALLOW_MAKE_EMPTY_BLOCK = True
+# Leader packs txs of the next block while votes of the unconfirmed block are being collected.
+# The next block is also invoked speculatively if its block version allows it.
+# It is discarded if the unconfirmed block fails or the leader changes.
+ALLOW_PIPELINED_BLOCK_GENERATION = False
 
 
 ####################
@@ -0,0 +1,236 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Fetch blocks of block height sync from peers in parallel"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, TYPE_CHECKING
+
+import loopchain.utils as util
+
+if TYPE_CHECKING:
+    from loopchain.baseservice import PeerScoreboard
+
+
+class BlockFetcher:
+    """Fetch blocks ahead in a sliding window from several peers concurrently and give them in height order.
+
+    Heights in the window are requested by `workers` threads, `batch_size` heights in a request.
+    Requests go to the peers in turn, so the peers share the load, and a failed request is retried with
+    the next peer up to `retry_times`. If a peer gives fewer blocks than requested, the rest are requested again.
+    A peer which failed `max_peer_failures` times in a row, or is in cooldown of `scoreboard`,
+    is not asked while other peers are available. Results of requests are recorded in `scoreboard`.
+    If the heights of peers are given by `peer_heights`, a peer is asked only for the heights it has,
+    so a peer behind does not fail for the blocks above its height.
+
+    If `verify` is given, every fetched block is verified by `verify_workers` other threads as soon as it arrives,
+    and a block is given after its verification, so the stateless verification of the blocks ahead overlaps
+    with the work of the caller on the current block.
+
+    Usage:
+        fetcher = BlockFetcher(peer_stubs, request, my_height + 1, max_height)
+        try:
+            for height, peer_target, response in fetcher:
+                ...  # apply the block, and fetcher.extend(new_max_height) if peers have more blocks.
+        finally:
+            fetcher.close()
+    """
+
+    def __init__(self,
+                 peers: Sequence[Tuple[str, Any]],
+                 request: Callable[[Any, int, int], List[Any]],
+                 start_height: int,
+                 end_height: int,
+                 *,
+                 window: int = 16,
+                 batch_size: int = 1,
+                 workers: int = 4,
+                 retry_times: int = 5,
+                 max_peer_failures: int = 3,
+                 verify: Callable[[Any], None] = None,
+                 verify_workers: int = 2,
+                 scoreboard: 'PeerScoreboard' = None,
+                 peer_heights: Dict[str, int] = None):
+        """
+        :param peers: [(peer_target, peer_stub), ...]
+        :param request: request(peer_stub, height, count) returns responses of `count` heights from the height
+            in order. It may return fewer responses, and it raises if it fails.
+        :param start_height: the first height to fetch
+        :param end_height: the last height to fetch
+        :param verify: verify(response) checks what does not depend on the previous blocks.
+            Its exceptions are only logged, because the caller verifies the block again in order.
+        :param peer_heights: {peer_target: the last height of blocks of the peer}
+            A peer which is not in it is asked for any height.
+        """
+        if not peers:
+            raise ValueError("peers are required")
+
+        self.__peers = list(peers)
+        self.__request = request
+        self.__end_height = end_height
+        self.__window = max(window, 1)
+        self.__batch_size = max(min(batch_size, self.__window), 1)
+        self.__retry_times = max(retry_times, 1)
+        self.__max_peer_failures = max_peer_failures
+        self.__scoreboard = scoreboard
+
+        self.__executor = ThreadPoolExecutor(max(workers, 1), "BlockFetchThread")
+        self.__verify = verify
+        self.__verify_executor = ThreadPoolExecutor(max(verify_workers, 1), "BlockVerifyThread") if verify else None
+        self.__futures: Dict[int, Tuple[int, Future]] = {}  # {start height: (count, future)}
+        self.__next_request_height = start_height
+        self.__next_height = start_height
+        self.__is_closed = False
+
+        self.__lock = threading.Lock()
+        self.__peer_failures: Dict[str, int] = {target: 0 for target, _ in self.__peers}
+        self.__peer_blocks: Dict[str, int] = {target: 0 for target, _ in self.__peers}
+        self.__peer_heights: Dict[str, int] = dict(peer_heights or {})
+        self.__start_time = time.monotonic()
+        self.__fetched_count = 0
+        self.__verify_wait = 0.0
+
+    @property
+    def end_height(self) -> int:
+        return self.__end_height
+
+    def extend(self, end_height: int):
+        """Fetch up to the higher height which is found while fetching."""
+        self.__end_height = max(self.__end_height, end_height)
+
+    def update_peer_height(self, peer_target: str, height: int):
+        """Ask the peer for blocks up to the height, which the peer reports while fetching."""
+        with self.__lock:
+            if peer_target in self.__peer_heights:
+                self.__peer_heights[peer_target] = max(self.__peer_heights[peer_target], height)
+
+    def __iter__(self) -> Iterator[Tuple[int, str, Any]]:
+        """Yield (height, peer_target, response) from the first height in order.
+
+        :raise ConnectionError: if no peer gives the block of a height
+        """
+        while not self.__is_closed and self.__next_height <= self.__end_height:
+            self.__fill_window()
+            start_height = self.__next_height
+            count, future = self.__futures.pop(start_height)
+            peer_target, responses, verify_futures = future.result()
+
+            for index, response in enumerate(responses[:count]):
+                if verify_futures:
+                    self.__wait_verification(verify_futures[index])
+                height = self.__next_height
+                self.__next_height += 1
+                self.__fetched_count += 1
+                yield height, peer_target, response
+
+            rest_count = start_height + count - self.__next_height
+            if rest_count > 0 and not self.__is_closed:
+                self.__submit(self.__next_height, rest_count)
+
+    def close(self):
+        self.__is_closed = True
+        for _, future in self.__futures.values():
+            future.cancel()
+        self.__futures.clear()
+        self.__executor.shutdown(wait=False)
+        if self.__verify_executor:
+            self.__verify_executor.shutdown(wait=False)
+
+    def get_stats(self) -> dict:
+        elapsed = time.monotonic() - self.__start_time
+        with self.__lock:
+            peer_blocks = dict(self.__peer_blocks)
+        return {
+            "blocks": self.__fetched_count,
+            "elapsed": round(elapsed, 3),
+            "blocks_per_second": round(self.__fetched_count / elapsed, 3) if elapsed > 0 else 0.0,
+            "peer_blocks": peer_blocks,
+            "verify_wait": round(self.__verify_wait, 3)  # seconds to wait for the verification of the next block
+        }
+
+    def __fill_window(self):
+        window_end_height = min(self.__end_height, self.__next_height + self.__window - 1)
+        while self.__next_request_height <= window_end_height:
+            height = self.__next_request_height
+            count = min(self.__batch_size, window_end_height - height + 1)
+            self.__submit(height, count)
+            self.__next_request_height += count
+
+    def __submit(self, height: int, count: int):
+        self.__futures[height] = (count, self.__executor.submit(self.__fetch, height, count))
+
+    def __fetch(self, height: int, count: int) -> Tuple[str, List[Any], List[Future]]:
+        last_exception = None
+        for attempt in range(self.__retry_times):
+            if self.__is_closed:
+                break
+
+            peer_target, peer_stub = self.__select_peer(height, attempt)
+            start_time = time.monotonic()
+            try:
+                responses = self.__request(peer_stub, height, count)
+                if not responses:
+                    raise ValueError("No block in the response.")
+            except Exception as e:
+                util.logger.warning(f"Fail to fetch block({height}) from {peer_target}. {e}")
+                last_exception = e
+                with self.__lock:
+                    self.__peer_failures[peer_target] += 1
+                if self.__scoreboard:
+                    self.__scoreboard.record_failure(peer_target, e)
+                continue
+
+            if self.__scoreboard:
+                self.__scoreboard.record_success(peer_target, time.monotonic() - start_time, len(responses))
+
+            with self.__lock:
+                self.__peer_failures[peer_target] = 0
+                self.__peer_blocks[peer_target] += len(responses)
+
+            verify_futures = []
+            if self.__verify and not self.__is_closed:
+                verify_futures = [self.__verify_executor.submit(self.__verify_response, height + index, response)
+                                  for index, response in enumerate(responses)]
+            return peer_target, responses, verify_futures
+
+        raise ConnectionError(f"Fail to fetch block({height}) from peers. {last_exception}")
+
+    def __verify_response(self, height: int, response):
+        if self.__is_closed:
+            return
+        try:
+            self.__verify(response)
+        except Exception as e:
+            util.logger.debug(f"Fail to verify block({height}) ahead. {e}")
+
+    def __wait_verification(self, verify_future: Future):
+        if verify_future.done():
+            return
+        start_time = time.monotonic()
+        verify_future.result()
+        self.__verify_wait += time.monotonic() - start_time
+
+    def __select_peer(self, height: int, attempt: int) -> Tuple[str, Any]:
+        with self.__lock:
+            # All peers are asked if no peer is known to have the height. Their heights may be old.
+            peers_having_height: List[Tuple[str, Any]] = [
+                peer for peer in self.__peers if self.__peer_heights.get(peer[0], height) >= height
+            ] or self.__peers
+            peers = [peer for peer in peers_having_height
+                     if self.__peer_failures[peer[0]] < self.__max_peer_failures]
+        if self.__scoreboard:
+            peers = [peer for peer in peers if self.__scoreboard.is_available(peer[0])]
+        peers = peers or peers_having_height
+        return peers[(height // self.__batch_size + attempt) % len(peers)]
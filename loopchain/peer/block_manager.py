@@ -1,18 +1,24 @@
 """A management class for blockchain."""
 
 import json
+import os
 import threading
+import time
 import traceback
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from concurrent.futures import ThreadPoolExecutor, Future
+from functools import partial
 from typing import TYPE_CHECKING, Dict, DefaultDict, Optional, Tuple, List
 
+import grpc
 from pkg_resources import parse_version
 
 import loopchain.utils as util
 from loopchain import configure as conf
-from loopchain.baseservice import TimerService, ObjectManager, Timer, RestMethod
+from loopchain.baseservice import TimerService, ObjectManager, Timer, RestMethod, PeerStubPool, PeerScoreboard
 from loopchain.baseservice.aging_cache import AgingCache
+from loopchain.baseservice.broadcast_tree import get_fanout_children
+from loopchain.baseservice.span_recorder import SpanRecorder
 from loopchain.blockchain import (BlockChain, CandidateBlocks, Epoch, BlockchainError, NID, exception, NoConfirmInfo,
                                   BlockHeightMismatch, RoundMismatch)
 from loopchain.blockchain.blocks import Block, BlockVerifier, BlockSerializer
@@ -22,16 +28,18 @@ from loopchain.blockchain.exception import (ConfirmInfoInvalid, ConfirmInfoInval
                                             NotReadyToConfirmInfo, UnrecordedBlock, UnexpectedLeader)
 from loopchain.blockchain.exception import ConfirmInfoInvalidNeedBlockSync, TransactionDuplicatedHashError
 from loopchain.blockchain.exception import InvalidUnconfirmedBlock, DuplicationUnconfirmedBlock, ScoreInvokeError
-from loopchain.blockchain.transactions import Transaction, TransactionSerializer, v2, v3
+from loopchain.blockchain.transactions import Transaction
 from loopchain.blockchain.types import ExternalAddress
 from loopchain.blockchain.types import TransactionStatusInQueue, Hash32
 from loopchain.blockchain.votes.v0_1a import BlockVote, LeaderVote, BlockVotes, LeaderVotes
 from loopchain.channel.channel_property import ChannelProperty
 from loopchain.peer import status_code
+from loopchain.peer.block_fetcher import BlockFetcher
 from loopchain.peer.consensus_siever import ConsensusSiever
-from loopchain.protos import loopchain_pb2, loopchain_pb2_grpc, message_code
+from loopchain.peer.tx_relayer import TxRelayer
+from loopchain.peer.vote_relay import VoteRelay, dumps_votes
+from loopchain.protos import loopchain_pb2, message_code
 from loopchain.store.key_value_store import KeyValueStore
-from loopchain.tools.grpc_helper import GRPCHelper
 from loopchain.utils.message_queue import StubCollection
 
 if TYPE_CHECKING:
@@ -53,6 +61,11 @@ class BlockManager:
 
         self.__txQueue = AgingCache(max_age_seconds=conf.MAX_TX_QUEUE_AGING_SECONDS,
                                     default_item_status=TransactionStatusInQueue.normal)
+        self.span_recorder = SpanRecorder(
+            conf.CONSENSUS_TRACE_HEIGHTS,
+            os.path.join(conf.CONSENSUS_TRACE_DIR, f"consensus_trace_{channel_name}.json")
+            if conf.CONSENSUS_TRACE_DIR else None
+        )
         self.blockchain = BlockChain(channel_name, store_identity, self)
         self.__peer_type = None
         self.__consensus_algorithm = None
@@ -69,6 +82,10 @@ class BlockManager:
         # old_block_hashes[height][new_block_hash] = old_block_hash
         self.__old_block_hashes: DefaultDict[int, Dict[Hash32, Hash32]] = defaultdict(dict)
         self.epoch: Epoch = None
+        self.__vote_relay: Optional[VoteRelay] = None
+        # (block_hash, round) of unconfirmed blocks sent or forwarded through the fan-out tree
+        self.__fanout_sent: 'OrderedDict[Tuple[Hash32, int], None]' = OrderedDict()
+        self.__fanout_lock = threading.Lock()
 
     @property
     def channel_name(self):
@@ -164,12 +181,98 @@ class BlockManager:
             f"target_reps_hash({target_reps_hash})")
 
         block_dumped = self.blockchain.block_dumps(block_)
+        block_send = loopchain_pb2.BlockSend(block=block_dumped, round_=round_, channel=self.__channel_name)
+
+        # The first broadcast goes through the fan-out tree, and the rebroadcasts go to all reps directly
+        # for the reps which missed it by a failed inner node of the tree.
+        if conf.BROADCAST_FANOUT > 0 and target_reps_hash == self.blockchain.get_reps_hash_by_header(block_.header):
+            if self.__mark_fanout_sent(block_.header.hash, round_):
+                self.__send_to_fanout_children(block_, block_send, target_reps_hash)
+                return
+
         ObjectManager().channel_service.broadcast_scheduler.schedule_broadcast(
             "AnnounceUnconfirmedBlock",
-            loopchain_pb2.BlockSend(block=block_dumped, round_=round_, channel=self.__channel_name),
+            block_send,
             reps_hash=target_reps_hash
         )
 
+    def forward_unconfirmed_block(self, block_: Block, block_dumped: bytes, round_: int):
+        """Forward the unconfirmed block to the children of this node in the fan-out tree of the height.
+
+        Only a block of the next height from the expected leader is forwarded, so that a rep can not amplify
+        its blocks through the tree. A block which is not forwarded still reaches the reps by the rebroadcasts.
+        """
+        if conf.BROADCAST_FANOUT <= 0:
+            return
+        with self.__fanout_lock:
+            if (block_.header.hash, round_) in self.__fanout_sent:
+                return
+
+        reps_hash = self.blockchain.get_reps_hash_by_header(block_.header)
+        try:
+            self.__verify_block_to_forward(block_, round_, reps_hash)
+        except (InvalidUnconfirmedBlock, UnexpectedLeader) as e:
+            util.logger.debug(f"Do not forward block({block_.header.hash}). {e}")
+            return
+
+        block_verifier = BlockVerifier.new(block_.header.version, self.blockchain.tx_versioner)
+        try:
+            block_verifier.verify_signature(block_)
+        except RuntimeError as e:
+            util.logger.warning(f"Do not forward block({block_.header.hash}). {e}")
+            return
+
+        if not self.__mark_fanout_sent(block_.header.hash, round_):
+            return
+        block_send = loopchain_pb2.BlockSend(block=block_dumped, round_=round_, channel=self.__channel_name)
+        self.__send_to_fanout_children(block_, block_send, reps_hash)
+
+    def __verify_block_to_forward(self, block_: Block, round_: int, reps_hash: Hash32):
+        header = block_.header
+        if not self.epoch:
+            raise InvalidUnconfirmedBlock("Epoch is not initialized.")
+
+        last_u_block = self.blockchain.last_unconfirmed_block
+        block_height = self.blockchain.block_height
+        if header.height == block_height + 1:
+            if header.height == self.epoch.height and round_ > self.epoch.round:
+                raise InvalidUnconfirmedBlock(f"Expected round({self.epoch.round}), round({round_})")
+            expected_leaders = {self.epoch.leader_id}
+        elif last_u_block and header.height == last_u_block.header.height + 1 == block_height + 2:
+            # The leader of the last unconfirmed block goes on, or hands over to the next one.
+            last_u_header = last_u_block.header
+            last_u_reps_hash = self.blockchain.get_reps_hash_by_header(last_u_header)
+            reps = self.blockchain.find_preps_addresses_by_roothash(last_u_reps_hash)
+            expected_leaders = {last_u_header.peer_id, last_u_header.next_leader,
+                                self.blockchain.get_next_rep_in_reps(last_u_header.peer_id, reps)}
+            expected_leaders = {leader.hex_hx() for leader in expected_leaders if leader}
+        else:
+            raise InvalidUnconfirmedBlock(f"Expected height({block_height + 1}), height({header.height})")
+
+        if header.peer_id.hex_hx() not in expected_leaders:
+            raise UnexpectedLeader(f"Expected leader({expected_leaders}), leader({header.peer_id.hex_hx()})")
+        if header.peer_id not in self.blockchain.find_preps_addresses_by_roothash(reps_hash):
+            raise UnexpectedLeader(f"Leader({header.peer_id.hex_hx()}) is not in reps({reps_hash})")
+
+    def __mark_fanout_sent(self, block_hash: Hash32, round_: int) -> bool:
+        with self.__fanout_lock:
+            key = (block_hash, round_)
+            if key in self.__fanout_sent:
+                return False
+            self.__fanout_sent[key] = None
+            while len(self.__fanout_sent) > conf.MAX_FANOUT_SENT_BLOCKS:
+                self.__fanout_sent.popitem(last=False)
+            return True
+
+    def __send_to_fanout_children(self, block_: Block, block_send, reps_hash: Hash32):
+        targets = self.blockchain.find_preps_targets_by_roothash(reps_hash)
+        children = get_fanout_children(list(targets), block_.header.peer_id.hex_hx(), ChannelProperty().peer_id,
+                                       block_.header.height, conf.BROADCAST_FANOUT)
+        broadcast_scheduler = self.__channel_service.broadcast_scheduler
+        for child in children:
+            broadcast_scheduler.schedule_send("AnnounceUnconfirmedBlock", block_send,
+                                              target=targets[child], reps_hash=reps_hash)
+
     def add_tx_obj(self, tx):
         """전송 받은 tx 를 Block 생성을 위해서 큐에 입력한다. load 하지 않은 채 입력한다.
 
@@ -218,30 +321,13 @@ class BlockManager:
 
         items = list(self.__txQueue.d.values())
         self.__txQueue.d.clear()
+        if not items:
+            return
 
-        for item in items:
-            tx = item.value
-            if not util.is_in_time_boundary(tx.timestamp, conf.TIMESTAMP_BOUNDARY_SECOND, util.get_now_time_stamp()):
-                continue
-
-            ts = TransactionSerializer.new(tx.version, tx.type(), self.blockchain.tx_versioner)
-            if tx.version == v2.version:
-                rest_method = RestMethod.SendTransaction2
-            elif tx.version == v3.version:
-                rest_method = RestMethod.SendTransaction3
-            else:
-                continue
-
-            raw_data = ts.to_raw_data(tx)
-            raw_data["from_"] = raw_data.pop("from")
-            for i in range(conf.RELAY_RETRY_TIMES):
-                try:
-                    await rs_client.call_async(rest_method,
-                                               rest_method.value.params(**raw_data))
-                except Exception as e:
-                    util.logger.warning(f"Relay failed. Tx({tx}), {e}")
-                else:
-                    break
+        tx_relayer = TxRelayer(rs_client, self.blockchain.tx_versioner)
+        result = await tx_relayer.relay(item.value for item in items)
+        util.logger.info(f"Relay txs to {rs_client.target}: relayed({result.relayed}), failed({result.failed}), "
+                         f"skipped({result.skipped})")
 
     def __validate_duplication_of_unconfirmed_block(self, unconfirmed_block: Block):
         if self.blockchain.last_block.header.height >= unconfirmed_block.header.height:
@@ -333,7 +419,8 @@ class BlockManager:
             util.logger.info(f"Can't add confirmed block if state is not Watch. {confirmed_block.header.hash.hex()}")
             return
 
-        self.blockchain.add_block(confirmed_block, confirm_info=confirm_info)
+        with self.span_recorder.span("add_confirmed_block", confirmed_block.header.height):
+            self.blockchain.add_block(confirmed_block, confirm_info=confirm_info)
 
     def rebuild_block(self):
         self.blockchain.rebuild_transaction_count()
@@ -411,15 +498,45 @@ class BlockManager:
                 traceback.print_exc()
                 raise exception.BlockError(f"Received block is invalid: original exception={e}")
 
-            votes_dumped: bytes = response.confirm_info
-            try:
-                votes_serialized = json.loads(votes_dumped)
-                votes = BlockVotes.deserialize_votes(votes_serialized)
-            except json.JSONDecodeError:
-                votes = votes_dumped
+            votes = self.__loads_confirm_info(response.confirm_info)
 
         return block, response.max_block_height, response.unconfirmed_block_height, votes, response.response_code
 
+    def __block_request_range_by_voter(self, peer_stub, block_height, count):
+        """Request blocks of `count` heights from the block_height by a stream of BlockSyncRange.
+
+        :return: [(block, max_block_height, unconfirmed_block_height, confirm_info, response_code), ...]
+            It may have fewer blocks than `count` if the peer does not have them.
+        """
+        replies = peer_stub.BlockSyncRange(loopchain_pb2.BlockSyncRangeRequest(
+            from_height=block_height,
+            to_height=block_height + count - 1,
+            chunk_size=conf.BLOCK_SYNC_RANGE_CHUNK_SIZE,
+            channel=self.__channel_name
+        ), conf.GRPC_TIMEOUT)
+
+        responses = []
+        for reply in replies:
+            if reply.response_code != message_code.Response.success:
+                break
+            for sync_block in reply.blocks:
+                try:
+                    block = self.blockchain.block_loads(sync_block.block)
+                except Exception as e:
+                    traceback.print_exc()
+                    raise exception.BlockError(f"Received block is invalid: original exception={e}")
+                votes = self.__loads_confirm_info(sync_block.confirm_info)
+                responses.append((block, reply.max_block_height, reply.unconfirmed_block_height, votes,
+                                  reply.response_code))
+        return responses
+
+    def __loads_confirm_info(self, votes_dumped: bytes):
+        try:
+            votes_serialized = json.loads(votes_dumped)
+            return BlockVotes.deserialize_votes(votes_serialized)
+        except json.JSONDecodeError:
+            return votes_dumped
+
     def __block_request_by_citizen(self, block_height):
         rs_client = ObjectManager().channel_service.rs_client
         get_block_result = rs_client.call(
@@ -549,6 +666,7 @@ class BlockManager:
         """
         peer_index = 0
         retry_number = 0
+        scoreboard = PeerScoreboard()
 
         while max_height > my_height:
             if self.__channel_service.state_machine.state != 'BlockSync':
@@ -556,6 +674,7 @@ class BlockManager:
 
             peer_target, peer_stub = peer_stubs[peer_index]
             util.logger.info(f"Block Height Sync Target : {peer_target} / request height({my_height + 1})")
+            start_time = time.monotonic()
             try:
                 block, max_block_height, current_unconfirmed_block_height, confirm_info, response_code = \
                     self.__block_request(peer_stub, my_height + 1)
@@ -566,6 +685,9 @@ class BlockManager:
                 util.logger.warning("There is a bad peer, I hate you: " + str(e))
                 traceback.print_exc()
                 response_code = message_code.Response.fail
+                scoreboard.record_failure(peer_target, e)
+            else:
+                scoreboard.record_success(peer_target, time.monotonic() - start_time, 1)
 
             if response_code == message_code.Response.success:
                 util.logger.debug(f"try add block height: {block.header.height}")
@@ -578,23 +700,7 @@ class BlockManager:
                         unconfirmed_block_height = current_unconfirmed_block_height
 
                 try:
-                    result = True
-                    if max_height == unconfirmed_block_height == block.header.height \
-                            and max_height > 0 and not confirm_info:
-                        self.candidate_blocks.add_block(
-                            block, self.blockchain.find_preps_addresses_by_header(block.header))
-                        self.blockchain.last_unconfirmed_block = block
-                        result = True
-                    else:
-                        result = self.__add_block_by_sync(block, confirm_info)
-
-                    if result:
-                        if block.header.height == 0:
-                            self.__rebuild_nid(block)
-                        elif self.blockchain.find_nid() is None:
-                            genesis_block = self.blockchain.find_block_by_height(0)
-                            self.__rebuild_nid(genesis_block)
-
+                    result = self.__add_block_in_sync(block, confirm_info, max_height, unconfirmed_block_height)
                 except KeyError as e:
                     result = False
                     util.logger.error("fail block height sync: " + str(e))
@@ -630,6 +736,112 @@ class BlockManager:
 
         return my_height, max_height
 
+    def __add_block_in_sync(self, block_: Block, confirm_info, max_height, unconfirmed_block_height) -> bool:
+        if max_height == unconfirmed_block_height == block_.header.height \
+                and max_height > 0 and not confirm_info:
+            self.candidate_blocks.add_block(
+                block_, self.blockchain.find_preps_addresses_by_header(block_.header))
+            self.blockchain.last_unconfirmed_block = block_
+            result = True
+        else:
+            result = self.__add_block_by_sync(block_, confirm_info)
+
+        if result:
+            if block_.header.height == 0:
+                self.__rebuild_nid(block_)
+            elif self.blockchain.find_nid() is None:
+                genesis_block = self.blockchain.find_block_by_height(0)
+                self.__rebuild_nid(genesis_block)
+        return result
+
+    def __block_request_to_peers_in_parallel(self, peer_stubs, peer_heights, my_height, unconfirmed_block_height,
+                                             max_height):
+        """Request blocks ahead to peer_stubs concurrently by `BlockFetcher` and add them in height order.
+        The last block is left to `__block_request_to_peers_in_sync`, because it may be an unconfirmed block.
+        A peer is asked only for the blocks up to its height in `peer_heights`.
+
+        :return: my_height, max_height, unconfirmed_block_height, whether all blocks are added without failure
+        """
+        range_unsupported_stubs = set()
+        fetcher = BlockFetcher(peer_stubs,
+                               partial(self.__block_request_to_fetch, range_unsupported_stubs),
+                               my_height + 1,
+                               max_height - 1,
+                               window=conf.BLOCK_SYNC_WINDOW,
+                               batch_size=conf.BLOCK_SYNC_RANGE_SIZE,
+                               workers=conf.BLOCK_SYNC_WORKERS,
+                               retry_times=conf.BLOCK_SYNC_RETRY_NUMBER,
+                               verify=self.__verify_block_ahead if conf.BLOCK_SYNC_VERIFY_WORKERS > 0 else None,
+                               verify_workers=conf.BLOCK_SYNC_VERIFY_WORKERS,
+                               scoreboard=PeerScoreboard(),
+                               peer_heights=peer_heights)
+        try:
+            for height, peer_target, response in fetcher:
+                if self.__channel_service.state_machine.state != 'BlockSync':
+                    return my_height, max_height, unconfirmed_block_height, False
+
+                block, max_block_height, current_unconfirmed_block_height, confirm_info, _ = response
+                max_block_height = max(max_block_height, current_unconfirmed_block_height)
+                fetcher.update_peer_height(peer_target, max_block_height)
+                if max_block_height > max_height:
+                    util.logger.spam(f"set max_height :{max_height} -> {max_block_height}")
+                    max_height = max_block_height
+                    fetcher.extend(max_height - 1)
+                    if current_unconfirmed_block_height == max_block_height:
+                        unconfirmed_block_height = current_unconfirmed_block_height
+
+                try:
+                    result = self.__add_block_in_sync(block, confirm_info, max_height, unconfirmed_block_height)
+                except KeyError as e:
+                    util.logger.error(f"fail block height sync: {e}")
+                    result = False
+                except exception.BlockError:
+                    util.exit_and_msg("Block Error Clear all block and restart peer.")
+                    result = False
+                except Exception as e:
+                    util.logger.warning(f"fail block height sync: {e}")
+                    self.__block_height_sync_bad_targets[peer_target] = max_block_height
+                    result = False
+
+                if not result:
+                    util.logger.warning(f"Block height({height}) synchronization is fail by {peer_target}.")
+                    return my_height, max_height, unconfirmed_block_height, False
+                my_height = height
+        except ConnectionError as e:
+            util.logger.warning(f"{e}")
+            return my_height, max_height, unconfirmed_block_height, False
+        finally:
+            fetcher.close()
+            util.logger.info(f"Block height sync of channel({self.__channel_name}) stats: {fetcher.get_stats()}")
+
+        return my_height, max_height, unconfirmed_block_height, True
+
+    def __verify_block_ahead(self, response):
+        """Verify hashes and signatures of the transactions in the fetched block before its turn.
+        The results are cached in the transactions, so `__add_block_by_sync` does not compute them again
+        and only the checks which depend on the chain, e.g. duplicated transactions, remain in height order.
+        """
+        block: Block = response[0]
+        block_version = self.blockchain.block_versioner.get_version(block.header.height)
+        block_verifier = BlockVerifier.new(block_version, self.blockchain.tx_versioner, raise_exceptions=False)
+        block_verifier.verify_transactions_loosely(block)
+
+    def __block_request_to_fetch(self, range_unsupported_stubs: set, peer_stub, block_height, count):
+        """Request blocks by BlockSyncRange, or by BlockSync to the peer which does not support BlockSyncRange."""
+        if count > 1 and peer_stub not in range_unsupported_stubs:
+            try:
+                return self.__block_request_range_by_voter(peer_stub, block_height, count)
+            except grpc.RpcError as e:
+                if e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                    raise
+                range_unsupported_stubs.add(peer_stub)
+
+        response = self.__block_request_by_voter(block_height, peer_stub)
+        response_code = response[-1]
+        if response_code != message_code.Response.success:
+            raise exception.InvalidBlockSyncTarget(f"Fail to get block({block_height}). code({response_code})")
+        return [response]
+
     def __block_height_sync(self):
         def _handle_exception(e):
             util.logger.warning(f"exception during block_height_sync :: {type(e)}, {e}")
@@ -638,7 +850,7 @@ class BlockManager:
 
         # Make Peer Stub List [peer_stub, ...] and get max_height of network
         try:
-            max_height, unconfirmed_block_height, peer_stubs = self.__get_peer_stub_list()
+            max_height, unconfirmed_block_height, peer_stubs, peer_heights = self.__get_peer_stub_list()
         except ConnectionError as exc:
             _handle_exception(exc)
             return False
@@ -655,7 +867,16 @@ class BlockManager:
         self.blockchain.prevent_next_block_mismatch(self.blockchain.block_height + 1)
 
         try:
-            if peer_stubs:
+            is_parallel_synced = True
+            if peer_stubs and conf.BLOCK_SYNC_WINDOW > 1 and \
+                    self.__channel_service.is_support_node_function(conf.NodeFunction.Vote):
+                my_height, max_height, unconfirmed_block_height, is_parallel_synced = \
+                    self.__block_request_to_peers_in_parallel(peer_stubs,
+                                                              peer_heights,
+                                                              my_height,
+                                                              unconfirmed_block_height,
+                                                              max_height)
+            if peer_stubs and is_parallel_synced:
                 my_height, max_height = self.__block_request_to_peers_in_sync(peer_stubs,
                                                                               my_height,
                                                                               unconfirmed_block_height,
@@ -715,24 +936,27 @@ class BlockManager:
         else:
             return block.header.next_leader.hex_hx()
 
-    def __get_peer_stub_list(self) -> Tuple[int, int, List[Tuple]]:
+    def __get_peer_stub_list(self) -> Tuple[int, int, List[Tuple], Dict[str, int]]:
         """It updates peer list for block manager refer to peer list on the loopchain network.
         This peer list is not same to the peer list of the loopchain network.
 
         :return max_height: a height of current blockchain
         :return unconfirmed_block_height: unconfirmed_block_height on the network
         :return peer_stubs: current peer list on the network (target, peer_stub)
+        :return peer_heights: {target: max height of the peer}
         """
         max_height = -1      # current max height
         unconfirmed_block_height = -1
         peer_stubs = []     # peer stub list for block height synchronization
+        peer_heights = {}
 
         if not ObjectManager().channel_service.is_support_node_function(conf.NodeFunction.Vote):
             rs_client = ObjectManager().channel_service.rs_client
             status_response = rs_client.call(RestMethod.Status)
             max_height = status_response['block_height']
             peer_stubs.append((rs_client.target, rs_client))
-            return max_height, unconfirmed_block_height, peer_stubs
+            peer_heights[rs_client.target] = max_height
+            return max_height, unconfirmed_block_height, peer_stubs, peer_heights
 
         # Make Peer Stub List [peer_stub, ...] and get max_height of network
         self.__block_height_sync_bad_targets = {k: v for k, v in self.__block_height_sync_bad_targets.items()
@@ -746,31 +970,35 @@ class BlockManager:
         else:
             reps_hash = self.__channel_service.peer_manager.prepared_reps_hash
         rep_targets = self.blockchain.find_preps_targets_by_roothash(reps_hash)
-        target_list = list(rep_targets.values())
+        target_list = [target for target in rep_targets.values()
+                       if target != peer_target and target not in self.__block_height_sync_bad_targets]
+        # Back off from peers in cooldown, and ask healthy peers first.
+        scoreboard = PeerScoreboard()
+        target_list = scoreboard.sort_targets(
+            [target for target in target_list if scoreboard.is_available(target)] or target_list)
+        util.logger.debug(f"try to targets({target_list})")
+
+        # Probe all targets at once, so a slow or dead peer does not delay the others.
+        stub_pool = PeerStubPool()
+        responses = stub_pool.call_all(target_list, "GetStatus", loopchain_pb2.StatusRequest(
+            request='block_sync',
+            channel=self.__channel_name,
+        ), conf.GRPC_TIMEOUT_SHORT)
+
         for target in target_list:
-            if target == peer_target:
-                continue
-            if target in self.__block_height_sync_bad_targets:
+            response = responses.get(target)
+            if response is None:
+                util.logger.warning(f"This peer({target}) has already been removed from the block height target node.")
                 continue
-            util.logger.debug(f"try to target({target})")
-            channel = GRPCHelper().create_client_channel(target)
-            stub = loopchain_pb2_grpc.PeerServiceStub(channel)
-            try:
-                response = stub.GetStatus(loopchain_pb2.StatusRequest(
-                    request='block_sync',
-                    channel=self.__channel_name,
-                ), conf.GRPC_TIMEOUT_SHORT)
-                target_block_height = max(response.block_height, response.unconfirmed_block_height)
 
-                if target_block_height > my_height:
-                    peer_stubs.append((target, stub))
-                    max_height = max(max_height, target_block_height)
-                    unconfirmed_block_height = max(unconfirmed_block_height, response.unconfirmed_block_height)
+            target_block_height = max(response.block_height, response.unconfirmed_block_height)
+            if target_block_height > my_height:
+                peer_stubs.append((target, stub_pool.get(target).stub))
+                peer_heights[target] = target_block_height
+                max_height = max(max_height, target_block_height)
+                unconfirmed_block_height = max(unconfirmed_block_height, response.unconfirmed_block_height)
 
-            except Exception as e:
-                util.logger.warning(f"This peer has already been removed from the block height target node. {e}")
-
-        return max_height, unconfirmed_block_height, peer_stubs
+        return max_height, unconfirmed_block_height, peer_stubs, peer_heights
 
     def new_epoch(self):
         new_leader_id = self.get_next_leader()
@@ -784,6 +1012,8 @@ class BlockManager:
         if self.consensus_algorithm:
             self.consensus_algorithm.stop()
 
+        self.span_recorder.close()
+
     def add_complain(self, vote: LeaderVote):
         util.logger.spam(f"add_complain vote({vote})")
 
@@ -896,6 +1126,12 @@ class BlockManager:
                                                                       request,
                                                                       reps_hash=reps_hash)
 
+        # The leader did not give a block in time, so it is asked later than healthy peers in block height sync.
+        leader_target = self.blockchain.find_preps_targets_by_roothash(reps_hash).get(complained_leader_id)
+        if leader_target:
+            PeerScoreboard().record_failure(leader_target,
+                                            TimeoutError(f"Leader complained in round({self.epoch.round})"))
+
     def vote_unconfirmed_block(self, block: Block, round_: int, is_validated):
         util.logger.debug(f"vote_unconfirmed_block() ({block.header.height}/{block.header.hash}/{is_validated})")
 
@@ -916,6 +1152,19 @@ class BlockManager:
         if not target_reps_hash:
             target_reps_hash = self.__channel_service.peer_manager.prepared_reps_hash
 
+        if conf.ALLOW_AGGREGATED_VOTES:
+            if block.header.peer_id == ChannelProperty().peer_address:
+                self.vote_relay.add(vote)
+                return vote
+
+            proposer_target = self.blockchain.find_preps_targets_by_roothash(target_reps_hash).get(
+                block.header.peer_id.hex_hx())
+            if proposer_target:
+                self.__channel_service.broadcast_scheduler.schedule_send(
+                    "VoteUnconfirmedBlock", block_vote, target=proposer_target)
+                return vote
+            util.logger.debug(f"Cannot find the proposer({block.header.peer_id.hex_hx()}). Broadcast the vote.")
+
         self.__channel_service.broadcast_scheduler.schedule_broadcast(
             "VoteUnconfirmedBlock",
             block_vote,
@@ -924,6 +1173,33 @@ class BlockManager:
 
         return vote
 
+    @property
+    def vote_relay(self) -> VoteRelay:
+        if self.__vote_relay is None:
+            loop = self.__channel_service.timer_service.get_event_loop()
+            self.__vote_relay = VoteRelay(
+                self.candidate_blocks,
+                ChannelProperty().peer_address,
+                self.__broadcast_votes,
+                lambda delay, callback, *args: loop.call_soon_threadsafe(loop.call_later, delay, callback, *args)
+            )
+        return self.__vote_relay
+
+    def relay_votes(self, votes: List[BlockVote]):
+        """Relay the votes added by `VoteUnconfirmedBlock` in a batch if this node proposed the block."""
+        if conf.ALLOW_AGGREGATED_VOTES:
+            for vote in votes:
+                self.vote_relay.add(vote)
+
+    def __broadcast_votes(self, block: Block, votes: List[BlockVote]):
+        util.logger.debug(f"Relay {len(votes)} votes of height({block.header.height}) block({block.header.hash})")
+        block_vote = loopchain_pb2.BlockVote(vote=dumps_votes(votes), channel=ChannelProperty().name)
+        self.__channel_service.broadcast_scheduler.schedule_broadcast(
+            "VoteUnconfirmedBlock",
+            block_vote,
+            reps_hash=block.header.reps_hash or self.__channel_service.peer_manager.prepared_reps_hash
+        )
+
     def verify_confirm_info(self, unconfirmed_block: Block):
         unconfirmed_header = unconfirmed_block.header
         my_height = self.blockchain.block_height
@@ -0,0 +1,119 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Controller of block generation interval and tx size of a block"""
+
+import json
+from dataclasses import dataclass, asdict
+from typing import Iterable, List
+
+import loopchain.utils as util
+from loopchain import configure as conf
+
+# Invoke may take this share of the interval at most before the tx size budget grows.
+INVOKE_SHARE_OF_INTERVAL = 0.5
+# A block is full if its txs fill this ratio of the budget. Txs are packed one by one, so a budget is not filled exactly.
+FULL_BLOCK_RATIO = 0.9
+
+
+@dataclass(frozen=True)
+class BlockPaceObservation:
+    height: int
+    tx_pool_depth: int  # txs left in the tx queue after packing the block
+    packed_tx_size: int  # bytes of txs packed into the block
+    invoke_latency: float  # seconds
+    vote_latency: float  # seconds
+
+
+@dataclass(frozen=True)
+class BlockPaceDecision:
+    height: int
+    interval: float
+    max_tx_size: int
+    reason: str
+
+
+class BlockPaceController:
+    """Tune the interval of block generation and the tx size budget of a block within the bounds.
+
+    - idle: no tx is pending. The interval grows to stop churning empty blocks.
+    - saturated: the block is full and txs are still pending. The interval shrinks
+      down to the time of invoke and voting, and the budget grows while invoke is fast enough.
+    - steady: otherwise. The interval returns to the base interval.
+
+    In every state the budget shrinks if invoke takes longer than the interval.
+    A decision depends only on the observations and the bounds, so replaying logged observations
+    reproduces the same decisions.
+    """
+
+    def __init__(self,
+                 base_interval: float = None,
+                 min_interval: float = None,
+                 max_interval: float = None,
+                 base_tx_size: int = None,
+                 min_tx_size: int = None,
+                 max_tx_size: int = None):
+        self.base_interval = conf.INTERVAL_BLOCKGENERATION if base_interval is None else base_interval
+        self.min_interval = conf.BLOCK_PACE_MIN_INTERVAL if min_interval is None else min_interval
+        self.max_interval = conf.BLOCK_PACE_MAX_INTERVAL if max_interval is None else max_interval
+        self.base_tx_size = conf.MAX_TX_SIZE_IN_BLOCK if base_tx_size is None else base_tx_size
+        self.min_tx_size = conf.BLOCK_PACE_MIN_TX_SIZE if min_tx_size is None else min_tx_size
+        self.max_tx_size = conf.BLOCK_PACE_MAX_TX_SIZE if max_tx_size is None else max_tx_size
+
+        self.interval = self.base_interval
+        self.tx_size = self.base_tx_size
+
+    def observe(self, observation: BlockPaceObservation) -> BlockPaceDecision:
+        busy_time = observation.invoke_latency + observation.vote_latency
+        floor_interval = max(self.min_interval, busy_time)
+
+        interval, tx_size = self.interval, self.tx_size
+        if observation.tx_pool_depth == 0 and observation.packed_tx_size == 0:
+            reason = "idle"
+            interval = interval * 2
+        elif observation.tx_pool_depth > 0 and observation.packed_tx_size >= tx_size * FULL_BLOCK_RATIO:
+            reason = "saturated"
+            interval = max(floor_interval, interval / 2)
+            if observation.invoke_latency <= interval * INVOKE_SHARE_OF_INTERVAL:
+                tx_size = tx_size * 2
+        else:
+            reason = "steady"
+            if interval > self.base_interval:
+                interval = max(self.base_interval, interval / 2)
+            elif interval < self.base_interval:
+                interval = min(self.base_interval, interval * 2)
+
+        if observation.invoke_latency > interval:
+            reason += ",slow_invoke"
+            tx_size = tx_size // 2
+
+        self.interval = round(min(self.max_interval, max(floor_interval, interval)), 3)
+        self.tx_size = min(self.max_tx_size, max(self.min_tx_size, tx_size))
+
+        decision = BlockPaceDecision(height=observation.height,
+                                     interval=self.interval,
+                                     max_tx_size=self.tx_size,
+                                     reason=reason)
+        util.logger.info(f"BlockPace {json.dumps({'observation': asdict(observation), 'decision': asdict(decision)})}")
+        return decision
+
+    @classmethod
+    def replay(cls, observations: Iterable[BlockPaceObservation], **bounds) -> List[BlockPaceDecision]:
+        controller = cls(**bounds)
+        return [controller.observe(observation) for observation in observations]
+
+    @staticmethod
+    def parse_log(line: str) -> BlockPaceObservation:
+        """Parse an observation from the log of a decision to replay it."""
+        record = json.loads(line[line.index("BlockPace ") + len("BlockPace "):])
+        return BlockPaceObservation(**record["observation"])
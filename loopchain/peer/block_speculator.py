@@ -0,0 +1,157 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Speculative block production for pipelined consensus"""
+
+import asyncio
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Optional
+
+import loopchain.utils as util
+from loopchain.blockchain.types import Hash32, TransactionStatusInQueue
+
+if TYPE_CHECKING:
+    from loopchain.blockchain.blocks import Block, BlockBuilder
+    from loopchain.peer import BlockManager
+
+# Versions of block whose invoke does not depend on the votes of its previous block.
+VOTE_INDEPENDENT_INVOKE_VERSIONS = ("0.1a",)
+
+
+@dataclass
+class SpeculativeBlock:
+    prev_hash: Hash32
+    height: int
+    leader_id: str
+    round_: int
+    block_builder: 'BlockBuilder'
+    block: Optional['Block'] = None
+    invoke_results: Optional[dict] = None
+
+
+class BlockSpeculator:
+    """Build the next block while votes of the unconfirmed block are being collected.
+
+    Txs of the next block are packed and verified on top of the unconfirmed block.
+    If the invoke of its block version does not depend on the votes of the previous block,
+    the next block is also built and invoked on the state of the unconfirmed block.
+
+    A speculative block is taken only when the block it is built on is the latest block
+    and the leader and round are unchanged. Otherwise it is discarded
+    and its txs are returned to the tx queue.
+    """
+
+    def __init__(self, block_manager: 'BlockManager', loop: asyncio.AbstractEventLoop):
+        self.__block_manager = block_manager
+        self.__loop = loop
+        self.__task: Optional[asyncio.Future] = None
+
+        self.hit_count = 0
+        self.miss_count = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self.__task is not None and not self.__task.done()
+
+    def start(self, prev_block: 'Block', build_candidate_block: Callable[['BlockBuilder', 'Block'], 'Block'],
+              max_tx_size: int = None):
+        """Start to build the next block of `prev_block`.
+
+        :param prev_block: unconfirmed block whose votes are being collected
+        :param build_candidate_block: function which fills the header of the block builder and builds it
+        :param max_tx_size: tx size budget of the next block
+        """
+        self.discard()
+        self.__task = asyncio.ensure_future(self.__speculate(prev_block, build_candidate_block, max_tx_size),
+                                            loop=self.__loop)
+
+    async def take(self, prev_hash: Hash32, leader_id: str, round_: int) -> Optional[SpeculativeBlock]:
+        """Take the speculative block if it is built on `prev_hash` by the same leader and round.
+
+        It waits for the speculation if it is not finished yet.
+        """
+        task, self.__task = self.__task, None
+        if task is None:
+            return None
+
+        try:
+            speculative_block: SpeculativeBlock = await task
+        except Exception as e:
+            util.logger.warning(f"Speculative block is discarded. {e!r}")
+            self.miss_count += 1
+            return None
+
+        if (speculative_block.prev_hash == prev_hash
+                and speculative_block.leader_id == leader_id
+                and speculative_block.round_ == round_):
+            util.logger.debug(f"Take speculative block height({speculative_block.height}) "
+                              f"invoked({speculative_block.block is not None})")
+            self.hit_count += 1
+            return speculative_block
+
+        util.logger.info(f"Speculative block height({speculative_block.height}) is discarded. "
+                         f"prev_hash({speculative_block.prev_hash.hex()}) != ({prev_hash.hex()})")
+        self.miss_count += 1
+        self.__restore_txs(speculative_block)
+        return None
+
+    def discard(self):
+        task, self.__task = self.__task, None
+        if task is None:
+            return
+
+        # Packing txs runs in another thread and can not be cancelled. Restore txs after it is finished.
+        task.add_done_callback(self.__restore_txs_of_task)
+        self.miss_count += 1
+
+    async def __speculate(self, prev_block: 'Block', build_candidate_block, max_tx_size) -> SpeculativeBlock:
+        epoch = self.__block_manager.epoch
+        blockchain = self.__block_manager.blockchain
+        speculative_block = SpeculativeBlock(prev_hash=prev_block.header.hash,
+                                             height=prev_block.header.height + 1,
+                                             leader_id=epoch.leader_id,
+                                             round_=epoch.round,
+                                             block_builder=None)
+
+        block_builder = await self.__loop.run_in_executor(
+            None, partial(epoch.makeup_block, None, [], max_tx_size=max_tx_size))
+        speculative_block.block_builder = block_builder
+
+        if block_builder.version in VOTE_INDEPENDENT_INVOKE_VERSIONS:
+            try:
+                block = build_candidate_block(block_builder, prev_block)
+                block, invoke_results = await self.__loop.run_in_executor(
+                    None, partial(blockchain.score_invoke, block, prev_block, is_block_editable=True))
+            except Exception as e:
+                # Invoke on the state of unconfirmed block may not be supported by the score service.
+                util.logger.info(f"Speculative invoke failed. Only packed txs are used. {e!r}")
+            else:
+                speculative_block.block = block
+                speculative_block.invoke_results = invoke_results
+
+        return speculative_block
+
+    def __restore_txs_of_task(self, task: asyncio.Future):
+        if task.cancelled() or task.exception():
+            return
+        self.__restore_txs(task.result())
+
+    def __restore_txs(self, speculative_block: SpeculativeBlock):
+        tx_queue = self.__block_manager.get_tx_queue()
+        for tx_hash in speculative_block.block_builder.transactions:
+            try:
+                if tx_queue.get_item_status(tx_hash.hex()) == TransactionStatusInQueue.added_to_block:
+                    tx_queue.set_item_status(tx_hash.hex(), TransactionStatusInQueue.normal)
+            except KeyError:
+                continue
@@ -15,6 +15,8 @@
 
 import asyncio
 import json
+import time
+from contextlib import asynccontextmanager
 from functools import partial
 from typing import TYPE_CHECKING, Optional
 
@@ -26,6 +28,8 @@ from loopchain.blockchain.exception import NotEnoughVotes, ThereIsNoCandidateBlo
 from loopchain.blockchain.types import ExternalAddress, Hash32
 from loopchain.blockchain.votes.v0_1a import BlockVotes
 from loopchain.channel.channel_property import ChannelProperty
+from loopchain.peer.block_pace_controller import BlockPaceController, BlockPaceObservation
+from loopchain.peer.block_speculator import BlockSpeculator
 from loopchain.peer.consensus_base import ConsensusBase
 
 if TYPE_CHECKING:
@@ -41,6 +45,9 @@ class ConsensusSiever(ConsensusBase):
 
         self._loop: asyncio.BaseEventLoop = None
         self._vote_queue: asyncio.Queue = None
+        self._block_speculator: BlockSpeculator = None
+        self._block_pace_controller: Optional[BlockPaceController] = \
+            BlockPaceController() if conf.ALLOW_ADAPTIVE_BLOCK_PACE else None
 
         util.logger.debug(f"Stop previous broadcast!")
         self.stop_broadcast_send_unconfirmed_block_timer()
@@ -48,6 +55,7 @@ class ConsensusSiever(ConsensusBase):
     def start_timer(self, timer_service: TimerService):
         self._loop = timer_service.get_event_loop()
         self.__lock = asyncio.Lock(loop=self._loop)
+        self._block_speculator = BlockSpeculator(self._block_manager, self._loop)
         self.__block_generation_timer = SlotTimer(
             TimerService.TIMER_KEY_BLOCK_GENERATE,
             conf.INTERVAL_BLOCKGENERATION,
@@ -70,6 +78,8 @@ class ConsensusSiever(ConsensusBase):
         self.__block_generation_timer.stop()
         if self._loop:
             self.__put_vote(None)
+        if self._block_speculator:
+            self._loop.call_soon_threadsafe(self._block_speculator.discard)
 
     @property
     def is_running(self):
@@ -83,8 +93,8 @@ class ConsensusSiever(ConsensusBase):
         util.logger.debug("Cannot vote before starting consensus.")
         # raise RuntimeError("Cannot vote before starting consensus.")
 
-    def __build_candidate_block(self, block_builder: 'BlockBuilder'):
-        last_block = self._blockchain.last_block
+    def __build_candidate_block(self, block_builder: 'BlockBuilder', last_block: Block = None):
+        last_block = last_block or self._blockchain.last_block
         block_builder.height = last_block.header.height + 1
         block_builder.prev_hash = last_block.header.hash
         block_builder.signer = ChannelProperty().peer_auth
@@ -132,7 +142,22 @@ class ConsensusSiever(ConsensusBase):
 
     async def consensus(self):
         util.logger.debug(f"-------------------consensus-------------------")
-        async with self.__lock:
+        last_block = self._blockchain.last_unconfirmed_block or self._blockchain.last_block
+        height = last_block.header.height + 1
+        with self._block_manager.span_recorder.span("consensus", height):
+            await self.__consensus(height)
+
+    @asynccontextmanager
+    async def __acquire_lock(self, height: int):
+        with self._block_manager.span_recorder.span("wait_for_consensus_lock", height):
+            await self.__lock.acquire()
+        try:
+            yield
+        finally:
+            self.__lock.release()
+
+    async def __consensus(self, height: int):
+        async with self.__acquire_lock(height):
             if self._block_manager.epoch.leader_id != ChannelProperty().peer_id:
                 util.logger.warning(
                     f"This peer is not leader. epoch leader={self._block_manager.epoch.leader_id}")
@@ -169,8 +194,19 @@ class ConsensusSiever(ConsensusBase):
                 is_unrecorded_block = False
 
             skip_add_tx = is_unrecorded_block or complained_result
-            block_builder = self._block_manager.epoch.makeup_block(
-                complain_votes, last_block_vote_list, new_term, skip_add_tx)
+            speculative_block = None
+            if complained_result or new_term or skip_add_tx:
+                self._block_speculator.discard()
+            else:
+                speculative_block = await self._block_speculator.take(self._blockchain.latest_block.header.hash,
+                                                                      self._block_manager.epoch.leader_id,
+                                                                      self._block_manager.epoch.round)
+            if speculative_block:
+                block_builder = speculative_block.block_builder
+                block_builder.prev_votes = last_block_vote_list
+            else:
+                block_builder = self._block_manager.epoch.makeup_block(
+                    complain_votes, last_block_vote_list, new_term, skip_add_tx, self.__max_tx_size)
             need_next_call = False
             try:
                 if complained_result or new_term:
@@ -211,15 +247,28 @@ class ConsensusSiever(ConsensusBase):
                     return self.__block_generation_timer.call()
 
             util.logger.spam(f"self._block_manager.epoch.leader_id: {self._block_manager.epoch.leader_id}")
-            candidate_block = self.__build_candidate_block(block_builder)
-            candidate_block, invoke_results = self._blockchain.score_invoke(
-                candidate_block, self._blockchain.latest_block,
-                is_block_editable=True, is_unrecorded_block=is_unrecorded_block)
+            tx_pool_depth = max(0, self._block_manager.get_count_of_unconfirmed_tx() - len(block_builder.transactions))
+            span_recorder = self._block_manager.span_recorder
+            candidate_height = self._blockchain.latest_block.header.height + 1
+            invoke_start_time = time.monotonic()
+            if speculative_block and speculative_block.block:
+                candidate_block = speculative_block.block
+            else:
+                if speculative_block:
+                    block_builder.reset_cache()
+                    block_builder.fixed_timestamp = util.get_time_stamp()
+                with span_recorder.span("score_invoke", candidate_height):
+                    candidate_block = self.__build_candidate_block(block_builder)
+                    candidate_block, invoke_results = self._blockchain.score_invoke(
+                        candidate_block, self._blockchain.latest_block,
+                        is_block_editable=True, is_unrecorded_block=is_unrecorded_block)
+            invoke_latency = time.monotonic() - invoke_start_time
 
             util.logger.spam(f"candidate block : {candidate_block.header}")
-            self._block_manager.candidate_blocks.add_block(
-                candidate_block, self._blockchain.find_preps_addresses_by_header(candidate_block.header))
-            self.__broadcast_block(candidate_block)
+            with span_recorder.span("broadcast_block", candidate_height):
+                self._block_manager.candidate_blocks.add_block(
+                    candidate_block, self._blockchain.find_preps_addresses_by_header(candidate_block.header))
+                self.__broadcast_block(candidate_block)
 
             if is_unrecorded_block:
                 self._blockchain.last_unconfirmed_block = None
@@ -228,11 +277,25 @@ class ConsensusSiever(ConsensusBase):
                                                            self._block_manager.epoch.round,
                                                            True)
                 self._blockchain.last_unconfirmed_block = candidate_block
+                if conf.ALLOW_PIPELINED_BLOCK_GENERATION and not candidate_block.header.prep_changed:
+                    self._block_speculator.start(candidate_block, self.__build_candidate_block, self.__max_tx_size)
+                vote_start_time = time.monotonic()
                 try:
                     await self._wait_for_voting(candidate_block)
                 except NotEnoughVotes:
+                    self._block_speculator.discard()
                     return
 
+                if self._block_pace_controller:
+                    self.__adapt_block_pace(BlockPaceObservation(
+                        height=candidate_block.header.height,
+                        tx_pool_depth=tx_pool_depth,
+                        packed_tx_size=sum(tx.size(self._blockchain.tx_versioner)
+                                           for tx in candidate_block.body.transactions.values()),
+                        invoke_latency=round(invoke_latency, 3),
+                        vote_latency=round(time.monotonic() - vote_start_time, 3)
+                    ))
+
             if not candidate_block.header.prep_changed:
                 if (self._blockchain.made_block_count_reached_max(self._blockchain.last_block) or
                         self._block_manager.epoch.leader_id != ChannelProperty().peer_id):
@@ -240,12 +303,28 @@ class ConsensusSiever(ConsensusBase):
 
             self.__block_generation_timer.call()
 
+    @property
+    def __max_tx_size(self) -> Optional[int]:
+        return self._block_pace_controller.tx_size if self._block_pace_controller else None
+
+    def __adapt_block_pace(self, observation: BlockPaceObservation):
+        decision = self._block_pace_controller.observe(observation)
+        if decision.interval != self.__block_generation_timer.duration:
+            self.__block_generation_timer.set_duration(decision.interval)
+
     async def _wait_for_voting(self, block: 'Block'):
         """Waiting validator's vote for the candidate_block.
 
+        CandidateBlocks resolves the quorum future as soon as the votes are completed,
+        so this wakes up by the vote which completes the votes, or by stop sentinel, or by timeout.
+
         :param block:
         :return: vote_result or None
         """
+        with self._block_manager.span_recorder.span("wait_for_voting", block.header.height):
+            return await self.__wait_for_voting(block)
+
+    async def __wait_for_voting(self, block: 'Block'):
         while True:
             vote = self._block_manager.candidate_blocks.get_votes(block.header.hash, self._block_manager.epoch.round)
             if not vote:
@@ -257,17 +336,32 @@ class ConsensusSiever(ConsensusBase):
                 self.stop_broadcast_send_unconfirmed_block_timer()
                 return vote
 
-            await asyncio.sleep(conf.WAIT_SECONDS_FOR_VOTE)
-
             try:
                 timeout = self.__check_timeout(block)
-                if not await asyncio.wait_for(self._vote_queue.get(), timeout=timeout):  # sentinel
-                    raise NotEnoughVotes
-            except (TimeoutError, asyncio.TimeoutError):
-                util.logger.warning("Timed Out Block not confirmed duration: " +
-                                    str(util.diff_in_seconds(block.header.timestamp)))
+            except TimeoutError:
+                self.__warn_vote_timeout(block)
                 raise NotEnoughVotes
 
+            quorum = self._block_manager.candidate_blocks.wait_for_quorum(
+                block.header.hash, self._block_manager.epoch.round, self._loop)
+            sentinel = asyncio.ensure_future(self._vote_queue.get(), loop=self._loop)
+            done, pending = await asyncio.wait({quorum, sentinel},
+                                               timeout=timeout,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for future in pending:
+                future.cancel()
+
+            if not done:
+                self.__warn_vote_timeout(block)
+                raise NotEnoughVotes
+            if sentinel in done and not sentinel.result():  # sentinel
+                raise NotEnoughVotes
+
+    @staticmethod
+    def __warn_vote_timeout(block: 'Block'):
+        util.logger.warning("Timed Out Block not confirmed duration: " +
+                            str(util.diff_in_seconds(block.header.timestamp)))
+
     def __check_timeout(self, block):
         timeout_timestamp = block.header.timestamp + conf.BLOCK_VOTE_TIMEOUT * 1_000_000
         timeout = -util.diff_in_seconds(timeout_timestamp)
@@ -26,7 +26,8 @@ class PeerOuterService(loopchain_pb2_grpc.PeerServiceServicer):
             message_code.Request.get_tx_result: self.__handler_get_tx_result,
             message_code.Request.get_balance: self.__handler_get_balance,
             message_code.Request.get_tx_by_address: self.__handler_get_tx_by_address,
-            message_code.Request.get_total_supply: self.__handler_get_total_supply
+            message_code.Request.get_total_supply: self.__handler_get_total_supply,
+            message_code.Request.get_consensus_trace: self.__handler_get_consensus_trace
         }
 
         self.__status_cache = None
@@ -109,6 +110,25 @@ class PeerOuterService(loopchain_pb2_grpc.PeerServiceServicer):
                                      meta=str(next_index),
                                      object=tx_list_dumped)
 
+    def __handler_get_consensus_trace(self, request, context):
+        """Get durations of consensus phases by block height
+
+        :param request: meta may have "height_count" and "chrome_trace"
+        :param context:
+        :return:
+        """
+        params = json.loads(request.meta) if request.meta else {}
+
+        channel_stub = StubCollection().channel_stubs[request.channel]
+        future = asyncio.run_coroutine_threadsafe(
+            channel_stub.async_task().get_consensus_trace(params.get("height_count"),
+                                                          params.get("chrome_trace", False)),
+            self.peer_service.inner_service.loop
+        )
+        trace_dumped = json.dumps(future.result()).encode(encoding=conf.PEER_DATA_ENCODING)
+
+        return loopchain_pb2.Message(code=message_code.Response.success, object=trace_dumped)
+
     def Request(self, request, context):
         # utils.logger.debug(f"Peer Service got request({request.code})")
 
@@ -292,7 +312,7 @@ class PeerOuterService(loopchain_pb2_grpc.PeerServiceServicer):
         """
         utils.logger.spam(f"peer_outer_service:AddTxList try validate_dumped_tx_message")
         channel_name = request.channel or conf.LOOPCHAIN_DEFAULT_CHANNEL
-        StubCollection().channel_tx_receiver_stubs[channel_name].sync_task().add_tx_list(request)
+        StubCollection().get_channel_tx_receiver_stub(channel_name).sync_task().add_tx_list(request)
         return loopchain_pb2.CommonReply(response_code=message_code.Response.success, message="success")
 
     def GetTx(self, request, context):
@@ -420,6 +440,45 @@ class PeerOuterService(loopchain_pb2_grpc.PeerServiceServicer):
             block=block_dumped,
             unconfirmed_block_height=unconfirmed_block_height)
 
+    def BlockSyncRange(self, request, context):
+        """Stream blocks from `from_height` to `to_height` in chunks of `chunk_size` blocks.
+
+        The chunk size is limited by BLOCK_SYNC_RANGE_MAX_CHUNK_SIZE and BLOCK_SYNC_RANGE_MAX_CHUNK_BYTES,
+        and the chunk size in use is told in every reply. The stream stops at the last block of this peer.
+        """
+        channel_name = conf.LOOPCHAIN_DEFAULT_CHANNEL if request.channel == '' else request.channel
+        logging.info(f"BlockSyncRange request height({request.from_height}~{request.to_height}) "
+                     f"chunk_size({request.chunk_size}) channel({channel_name})")
+
+        chunk_size = min(request.chunk_size or conf.BLOCK_SYNC_RANGE_CHUNK_SIZE, conf.BLOCK_SYNC_RANGE_MAX_CHUNK_SIZE)
+        chunk_size = max(chunk_size, 1)
+        height = request.from_height
+        last_height = height + conf.BLOCK_SYNC_RANGE_MAX_BLOCKS - 1
+        if request.to_height:
+            last_height = min(last_height, request.to_height)
+
+        channel_stub = StubCollection().channel_stubs[channel_name]
+        while height <= last_height and context.is_active():
+            future = asyncio.run_coroutine_threadsafe(
+                channel_stub.async_task().block_sync_range(height,
+                                                           min(chunk_size, last_height - height + 1),
+                                                           conf.BLOCK_SYNC_RANGE_MAX_CHUNK_BYTES),
+                self.peer_service.inner_service.loop
+            )
+            response_code, max_block_height, unconfirmed_block_height, blocks = future.result()
+
+            yield loopchain_pb2.BlockSyncRangeReply(
+                response_code=response_code,
+                max_block_height=max_block_height,
+                unconfirmed_block_height=unconfirmed_block_height,
+                chunk_size=chunk_size,
+                blocks=[loopchain_pb2.SyncBlock(block_height=block_height, confirm_info=confirm_info, block=block)
+                        for block_height, confirm_info, block in blocks])
+
+            if response_code != message_code.Response.success:
+                break
+            height = blocks[-1][0] + 1
+
     def VoteUnconfirmedBlock(self, request, context):
         channel_name = conf.LOOPCHAIN_DEFAULT_CHANNEL if request.channel == '' else request.channel
 
@@ -0,0 +1,129 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Relay of transactions to a rep by batch requests"""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple
+
+from loopchain import configure as conf
+from loopchain import utils as util
+from loopchain.baseservice import RestMethod, PeerScoreboard
+from loopchain.blockchain.transactions import Transaction, TransactionSerializer, TransactionVersioner, v2, v3
+
+if TYPE_CHECKING:
+    from loopchain.baseservice import RestClient
+
+
+class RelayResult(NamedTuple):
+    relayed: int
+    failed: int
+    skipped: int  # out of the time boundary or unknown versions
+
+
+class TxRelayer:
+    """Relay transactions by json-rpc batch requests of `batch_size` txs.
+    At most `concurrency` requests are sent at once over connections pooled up to it.
+
+    A request which fails to be sent is retried `retry_times` in total with exponential backoff.
+    The target is switched to the next one while it is in cooldown of `PeerScoreboard`.
+    A tx which the rep rejects is not retried.
+    """
+
+    def __init__(self, rs_client: 'RestClient', tx_versioner: TransactionVersioner,
+                 batch_size=conf.RELAY_BATCH_SIZE,
+                 concurrency=conf.RELAY_CONCURRENCY,
+                 retry_times=conf.RELAY_RETRY_TIMES,
+                 backoff=conf.RELAY_RETRY_BACKOFF):
+        self.__rs_client = rs_client
+        self.__tx_versioner = tx_versioner
+        self.__batch_size = max(batch_size, 1)
+        self.__concurrency = max(concurrency, 1)
+        self.__retry_times = max(retry_times, 1)
+        self.__backoff = backoff
+
+    async def relay(self, txs: Iterable[Transaction]) -> RelayResult:
+        params_by_method: Dict[RestMethod, List] = defaultdict(list)
+        skipped = 0
+        now = util.get_now_time_stamp()
+        for tx in txs:
+            rest_method = self.__get_rest_method(tx)
+            if rest_method is None or not util.is_in_time_boundary(tx.timestamp, conf.TIMESTAMP_BOUNDARY_SECOND, now):
+                skipped += 1
+                continue
+
+            ts = TransactionSerializer.new(tx.version, tx.type(), self.__tx_versioner)
+            raw_data = ts.to_raw_data(tx)
+            raw_data["from_"] = raw_data.pop("from")
+            params_by_method[rest_method].append(rest_method.value.params(**raw_data))
+
+        batches = [(rest_method, params_list[i:i + self.__batch_size])
+                   for rest_method, params_list in params_by_method.items()
+                   for i in range(0, len(params_list), self.__batch_size)]
+        if not batches:
+            return RelayResult(0, 0, skipped)
+
+        semaphore = asyncio.Semaphore(self.__concurrency)
+        async with self.__rs_client.create_session(self.__concurrency) as session:
+            results = await asyncio.gather(*[self.__relay_batch(semaphore, session, rest_method, params_list)
+                                             for rest_method, params_list in batches])
+
+        relayed = sum(results)
+        failed = sum(len(params_list) for _, params_list in batches) - relayed
+        return RelayResult(relayed, failed, skipped)
+
+    async def __relay_batch(self, semaphore: asyncio.Semaphore, session, rest_method: RestMethod,
+                            params_list: List) -> int:
+        """:return: count of txs relayed"""
+        scoreboard = PeerScoreboard()
+        async with semaphore:
+            for i in range(self.__retry_times):
+                if i > 0:
+                    await asyncio.sleep(self.__backoff * (2 ** (i - 1)))
+
+                target = self.__rs_client.target
+                start_time = time.monotonic()
+                try:
+                    responses = await self.__rs_client.call_batch_async(rest_method, params_list, session)
+                except Exception as e:
+                    util.logger.warning(f"Relay of {len(params_list)} txs failed. "
+                                        f"({i + 1}/{self.__retry_times}) {e!r}")
+                    scoreboard.record_failure(target, e)
+                    if not scoreboard.is_available(target):
+                        self.__switch_target(self.__rs_client)
+                    continue
+
+                scoreboard.record_success(target, time.monotonic() - start_time)
+                for response in responses:
+                    if "error" in response:
+                        util.logger.debug(f"Relayed tx is rejected. {response['error']}")
+                return sum(1 for response in responses if "error" not in response)
+        return 0
+
+    @staticmethod
+    def __switch_target(rs_client: 'RestClient'):
+        """Relay to the next fastest endpoint while the current one is in cooldown of PeerScoreboard."""
+        try:
+            rs_client.init_next_target()
+        except StopIteration:
+            util.logger.warning(f"No other endpoint to relay txs instead of {rs_client.target}.")
+
+    @staticmethod
+    def __get_rest_method(tx: Transaction):
+        if tx.version == v2.version:
+            return RestMethod.SendTransaction2
+        if tx.version == v3.version:
+            return RestMethod.SendTransaction3
+        return None
@@ -0,0 +1,116 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Relay of block votes in a batch"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Set, Tuple, TYPE_CHECKING
+
+from loopchain import configure as conf
+from loopchain.blockchain.types import ExternalAddress, Hash32
+from loopchain.blockchain.votes.v0_1a import BlockVote
+
+if TYPE_CHECKING:
+    from loopchain.blockchain import CandidateBlocks
+    from loopchain.blockchain.blocks import Block
+
+# The number of blocks of which votes are kept to be relayed.
+MAX_RELAYED_BLOCKS = 100
+
+
+def dumps_votes(votes: List[BlockVote]) -> str:
+    """Dump votes into `vote` of `VoteUnconfirmedBlock` as a json array.
+    `loads_votes` also takes a json object of a single vote, which a node of the old version sends."""
+    return json.dumps([vote.serialize() for vote in votes])
+
+
+def loads_votes(vote_dumped: str) -> List[BlockVote]:
+    vote_serialized = json.loads(vote_dumped)
+    if isinstance(vote_serialized, list):
+        return [BlockVote.deserialize(vote_data) for vote_data in vote_serialized]
+    return [BlockVote.deserialize(vote_serialized)]
+
+
+class VoteRelay:
+    """Relay votes of the blocks proposed by this node to reps in a batch.
+
+    Validators send their votes only to the proposer, and the proposer relays them.
+    Votes which arrive in `conf.VOTE_AGGREGATION_DELAY` are relayed together,
+    and votes of a block are relayed again only if new votes arrived after the last relay.
+    It takes O(n) messages for votes of a block instead of O(n^2) of broadcasting each vote.
+
+    Votes are kept here until they are relayed, because the proposer may confirm the block
+    and remove it from candidate blocks before the delay.
+    """
+
+    def __init__(self,
+                 candidate_blocks: 'CandidateBlocks',
+                 peer_address: ExternalAddress,
+                 broadcast: Callable[['Block', List[BlockVote]], None],
+                 call_later: Callable):
+        """
+        :param candidate_blocks:
+        :param peer_address: address of this node
+        :param broadcast: send the votes of the block to reps
+        :param call_later: call_later(delay, callback, *args). It must be thread safe.
+        """
+        self.__candidate_blocks = candidate_blocks
+        self.__peer_address = peer_address
+        self.__broadcast = broadcast
+        self.__call_later = call_later
+
+        self.__lock = threading.Lock()
+        # {(block_hash, round): (block, {rep: vote}, count of votes relayed)}
+        self.__relays: 'OrderedDict[Tuple[Hash32, int], Tuple[Block, Dict[ExternalAddress, BlockVote], int]]' = \
+            OrderedDict()
+        self.__scheduled: Set[Tuple[Hash32, int]] = set()
+
+    def add(self, vote: BlockVote):
+        """Relay the vote with the other votes of the block after the delay if this node proposed the block."""
+        blocks = [candidate_block.block
+                  for candidate_block in self.__candidate_blocks.get_candidates_of_height(vote.block_height)
+                  if candidate_block.block and candidate_block.block.header.peer_id == self.__peer_address and
+                  vote.block_hash in (candidate_block.hash, Hash32.empty())]
+
+        keys = []
+        with self.__lock:
+            for block in blocks:
+                key = (block.header.hash, vote.round_)
+                if key not in self.__relays:
+                    self.__relays[key] = (block, {}, 0)
+                    while len(self.__relays) > MAX_RELAYED_BLOCKS:
+                        self.__relays.popitem(last=False)
+                self.__relays[key][1][vote.rep] = vote
+
+                if key not in self.__scheduled:
+                    self.__scheduled.add(key)
+                    keys.append(key)
+
+        for key in keys:
+            self.__call_later(conf.VOTE_AGGREGATION_DELAY, self.__relay, key)
+
+    def __relay(self, key: Tuple[Hash32, int]):
+        with self.__lock:
+            self.__scheduled.discard(key)
+            try:
+                block, votes, relayed_count = self.__relays[key]
+            except KeyError:
+                return
+            if relayed_count >= len(votes):
+                return
+            self.__relays[key] = (block, votes, len(votes))
+            vote_list = list(votes.values())
+
+        self.__broadcast(block, vote_list)
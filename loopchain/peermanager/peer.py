@@ -18,8 +18,7 @@ import logging
 import typing
 
 from loopchain import configure as conf
-from loopchain.baseservice import StubManager
-from loopchain.protos import loopchain_pb2_grpc
+from loopchain.baseservice import StubManager, PeerStubPool
 
 
 class Peer:
@@ -50,9 +49,7 @@ class Peer:
     def stub_manager(self):
         if not self.__stub_manager:
             try:
-                self.__stub_manager = StubManager(self.target,
-                                                  loopchain_pb2_grpc.PeerServiceStub,
-                                                  conf.GRPC_SSL_TYPE)
+                self.__stub_manager = PeerStubPool().get(self.target)
             except Exception as e:
                 logging.exception(f"Create Peer create stub_manager fail target : {self.target} \n"
                                   f"exception : {e}")
@@ -22,6 +22,7 @@ class Request:
     get_balance = 905  # josn-rpc:icx_getBalance
     get_tx_by_address = 906  # json-rpc:icx_getTransactionByAddress
     get_total_supply = 907  # json-rpc:icx_getTotalSupply
+    get_consensus_trace = 908  # durations of consensus phases by block height
 
 
 class MetaParams:
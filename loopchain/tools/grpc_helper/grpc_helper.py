@@ -35,7 +35,14 @@ class GRPCHelper(metaclass=SingletonMetaClass):
         self.__keys = GRPCSecureKeyCollection()
 
     def start_outer_server(self, port: str = None) -> grpc.Server:
-        outer_server = grpc.server(futures.ThreadPoolExecutor(conf.MAX_WORKERS, "GRPCOuterThread"))
+        options = []
+        if conf.GRPC_KEEPALIVE_TIME > 0:
+            # Allow keepalive pings of the pooled channels of peers.
+            options = [
+                ("grpc.keepalive_permit_without_calls", 1),
+                ("grpc.http2.min_ping_interval_without_data_ms", conf.GRPC_KEEPALIVE_TIME * 1000)
+            ]
+        outer_server = grpc.server(futures.ThreadPoolExecutor(conf.MAX_WORKERS, "GRPCOuterThread"), options=options)
         target_host = f'[::]:{port}'
         self.add_server_port(outer_server, target_host)
         logging.debug(f"outer target host = {target_host}")
@@ -75,12 +82,14 @@ class GRPCHelper(metaclass=SingletonMetaClass):
 
         logging.info(f"Server now listen: {host}, secure level : {str(ssl_auth_type)}")
 
-    def create_client_channel(self, host, ssl_auth_type: conf.SSLAuthType=None, key_load_type: conf.KeyLoadType=None):
+    def create_client_channel(self, host, ssl_auth_type: conf.SSLAuthType=None, key_load_type: conf.KeyLoadType=None,
+                              options=None):
         """
 
         :param host: Target host you want to connect
         :param ssl_auth_type: It notices that which type of SSL auth is used. None : conf.GRPC_SSL_TYPE
         :param key_load_type: It determines where keys has to be loaded. None : conf.GRPC_SSL_KEY_LOAD_TYPE
+        :param options: gRPC channel options. e.g. keepalive
         :return: grpc channel
         """
         if ssl_auth_type is None:
@@ -92,7 +101,7 @@ class GRPCHelper(metaclass=SingletonMetaClass):
         self.__keys.reset(ssl_auth_type, key_load_type)
 
         connector: GRPCConnector = self.__connectors[ssl_auth_type]
-        channel = connector.create_client_channel(self.__keys, host, ssl_auth_type)
+        channel = connector.create_client_channel(self.__keys, host, ssl_auth_type, options)
 
         logging.info(f"Client Channel : {host}, secure level : {str(ssl_auth_type)}")
 
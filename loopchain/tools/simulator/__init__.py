@@ -0,0 +1,25 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process simulators of the consensus.
+
+`LeaderStackSimulator` runs the consensus classes of a leader peer, so it measures a change of the consensus code.
+`ConsensusSimulator` runs a model of the protocol on the virtual clock, so it compares parameters of the protocol.
+"""
+
+from .broadcast import BroadcastReport, simulate_broadcast
+from .leader import LeaderStackReport, LeaderStackSimulator
+from .network import EventScheduler, InMemoryTransport, TransportStats
+from .node import NodeConfig, SimNode
+from .score import MockScoreInvoker
+from .simulator import ConsensusSimulator, SimulationReport
@@ -0,0 +1,113 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Run a simulation of the consensus and print its report as json.
+
+python3 -m loopchain.tools.simulator --nodes 7 --tps 1000 --duration 60 --crash-leader-at 20
+python3 -m loopchain.tools.simulator --leader-stack --tps 500 --duration 10 --interval 0.5
+"""
+
+import argparse
+import json
+import sys
+
+from loopchain.tools.simulator import ConsensusSimulator, LeaderStackSimulator, MockScoreInvoker
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="python3 -m loopchain.tools.simulator")
+    parser.add_argument("--leader-stack", action="store_true",
+                        help="run the consensus classes of a leader on the wall clock instead of the model")
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=60, help="seconds, simulated unless --leader-stack")
+    parser.add_argument("--tps", type=float, default=0, help="txs submitted per second")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="ratio of lost messages")
+    parser.add_argument("--interval", type=float, default=None, help="block generation interval in seconds")
+    parser.add_argument("--complain-timeout", type=float, default=None, help="seconds")
+    parser.add_argument("--max-tx-size", type=int, default=None, help="tx size budget of a block in bytes")
+    parser.add_argument("--invoke-latency", type=float, default=0.01, help="seconds per block")
+    parser.add_argument("--invoke-latency-per-tx", type=float, default=0.0002, help="seconds per tx")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="ALLOW_PIPELINED_BLOCK_GENERATION of the leader. Requires --leader-stack")
+    parser.add_argument("--block-versions", type=json.loads, default=None,
+                        help='heights of block versions of the leader, e.g. {"0.1a": 0}. Requires --leader-stack')
+    parser.add_argument("--adaptive-pace", action="store_true",
+                        help="ALLOW_ADAPTIVE_BLOCK_PACE of the leader. Requires --leader-stack")
+    parser.add_argument("--aggregated-votes", action="store_true", help="relay votes in batches by the proposer")
+    parser.add_argument("--crash-leader-at", type=float, default=None, help="simulated seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.leader_stack:
+        _run_leader_stack(parser, args)
+        return
+    if args.pipelined or args.block_versions or args.adaptive_pace:
+        parser.error("--pipelined, --block-versions and --adaptive-pace require --leader-stack")
+
+    simulator = ConsensusSimulator(
+        args.nodes,
+        seed=args.seed,
+        latency=args.latency,
+        jitter=args.jitter,
+        loss=args.loss,
+        invoker=MockScoreInvoker(args.invoke_latency, args.invoke_latency_per_tx),
+        block_interval=args.interval,
+        complain_timeout=args.complain_timeout,
+        max_tx_size=args.max_tx_size,
+        aggregated_votes=args.aggregated_votes
+    )
+    if args.tps:
+        simulator.submit_txs(args.tps, args.duration)
+    if args.crash_leader_at is not None:
+        simulator.crash_leader(at=args.crash_leader_at)
+
+    report = simulator.run(args.duration)
+    print(json.dumps(report.to_dict(), indent=2))
+
+
+def _run_leader_stack(parser, args):
+    unsupported = [option for option, value in (("--loss", args.loss),
+                                                ("--complain-timeout", args.complain_timeout),
+                                                ("--aggregated-votes", args.aggregated_votes),
+                                                ("--crash-leader-at", args.crash_leader_at)) if value]
+    if unsupported:
+        parser.error(f"{', '.join(unsupported)} not supported with --leader-stack")
+
+    configure = {
+        "ALLOW_PIPELINED_BLOCK_GENERATION": args.pipelined,
+        "ALLOW_ADAPTIVE_BLOCK_PACE": args.adaptive_pace
+    }
+    if args.max_tx_size is not None:
+        configure["MAX_TX_SIZE_IN_BLOCK"] = args.max_tx_size
+
+    simulator = LeaderStackSimulator(
+        args.nodes,
+        seed=args.seed,
+        latency=args.latency,
+        jitter=args.jitter,
+        invoker=MockScoreInvoker(args.invoke_latency, args.invoke_latency_per_tx),
+        block_interval=args.interval,
+        block_versions=args.block_versions,
+        configure=configure
+    )
+    if args.tps:
+        simulator.submit_txs(args.tps, args.duration)
+
+    report = simulator.run(args.duration)
+    print(json.dumps(report.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
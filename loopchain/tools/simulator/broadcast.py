@@ -0,0 +1,91 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Broadcast of a block through the fan-out tree on the virtual clock"""
+
+from dataclasses import dataclass
+from typing import Dict, List
+
+from loopchain.baseservice.broadcast_tree import get_fanout_children
+from loopchain.tools.simulator.network import EventScheduler, InMemoryTransport
+
+
+@dataclass
+class BroadcastReport:
+    node_count: int
+    fanout: int
+    received_count: int  # nodes which received the message except the root
+    time_to_last_node: float
+    messages: int
+
+    def to_dict(self) -> dict:
+        return {
+            "node_count": self.node_count,
+            "fanout": self.fanout,
+            "received_count": self.received_count,
+            "time_to_last_node": self.time_to_last_node,
+            "messages": self.messages
+        }
+
+
+def simulate_broadcast(node_count: int,
+                       fanout: int,
+                       *,
+                       message_size: int = 1024 * 1024,
+                       bandwidth: float = 100 * 1024 * 1024 / 8,
+                       latency: float = 0.05,
+                       jitter: float = 0.0,
+                       loss: float = 0.0,
+                       height: int = 1,
+                       seed: int = 0) -> BroadcastReport:
+    """Broadcast a message from the first node as `BlockManager` does with `conf.BROADCAST_FANOUT`.
+
+    Every node forwards the message once to its children of the tree, and the uplink of each node sends
+    messages one by one, so the time to the last node shows the cost of the direct mesh (`fanout` 0)
+    which sends all messages from the uplink of the root.
+
+    :param message_size: bytes of the message. e.g. a dumped block
+    :param bandwidth: bytes per second of the uplink of a node
+    """
+    scheduler = EventScheduler()
+    transport = InMemoryTransport(scheduler, latency=latency, jitter=jitter, loss=loss, seed=seed,
+                                  bandwidth=bandwidth)
+    node_ids = [f"node{index}" for index in range(node_count)]
+    root = node_ids[0]
+    received_times: Dict[str, float] = {}
+
+    def _forward(node_id: str):
+        children: List[str] = get_fanout_children(node_ids, root, node_id, height, fanout)
+        for child in children:
+            transport.send(node_id, child, height, message_size)
+
+    def _receive(node_id: str, src: str, message):
+        if node_id in received_times:
+            return
+        received_times[node_id] = scheduler.now
+        _forward(node_id)
+
+    for node_id in node_ids:
+        transport.register(node_id, lambda src, message, node_id=node_id: _receive(node_id, src, message))
+
+    received_times[root] = scheduler.now
+    _forward(root)
+    scheduler.run_until(float("inf"))
+
+    return BroadcastReport(
+        node_count=node_count,
+        fanout=fanout,
+        received_count=len(received_times) - 1,
+        time_to_last_node=max(received_times.values()),
+        messages=transport.stats.sent
+    )
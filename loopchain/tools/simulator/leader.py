@@ -0,0 +1,491 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Simulator which runs the consensus of a leader peer by its real classes"""
+
+import hashlib
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import loopchain.utils as util
+from loopchain import configure as conf
+from loopchain.baseservice import ObjectManager, TimerService
+from loopchain.baseservice.broadcast_tree import get_fanout_children
+from loopchain.blockchain.blocks import Block, BlockSerializer, BlockVersioner
+from loopchain.blockchain.transactions import Transaction, TransactionBuilder, TransactionVersioner, v3
+from loopchain.blockchain.types import ExternalAddress, Hash32
+from loopchain.blockchain.votes.v0_1a import BlockVote
+from loopchain.channel.channel_property import ChannelProperty
+from loopchain.components import SingletonMetaClass
+from loopchain.crypto.signature import Signer
+from loopchain.peer import BlockManager
+from loopchain.peer.consensus_siever import ConsensusSiever
+from loopchain.peer.vote_relay import dumps_votes, loads_votes
+from loopchain.peermanager import Peer, PeerManager
+from loopchain.tools.simulator.score import MockScoreInvoker
+from loopchain.utils.message_queue import StubCollection
+
+# Txs are added to the tx queue of the leader in every tick of this seconds.
+TX_SUBMIT_TICK = 0.1
+
+
+@dataclass(frozen=True)
+class _Commit:
+    time: float
+    height: int
+    tx_count: int
+    tx_pool_depth: int  # txs left in the tx queue of the leader after the block is added
+    block_pace: Optional[Tuple[float, int]]  # (interval, max_tx_size) decided by `BlockPaceController` for the block
+
+
+@dataclass
+class LeaderStackReport:
+    duration: float
+    height: int
+    block_count: int
+    tx_count: int
+    block_times: List[float]
+    tx_pool_depths: List[int]
+    speculative_hit_count: int  # speculative blocks of `BlockSpeculator` taken by the leader
+    speculative_miss_count: int  # speculative blocks discarded
+    block_pace_intervals: List[float]  # intervals decided by `BlockPaceController` if ALLOW_ADAPTIVE_BLOCK_PACE
+    block_pace_tx_sizes: List[int]  # tx size budgets decided by `BlockPaceController`
+
+    @property
+    def blocks_per_second(self) -> float:
+        return self.block_count / self.duration if self.duration else 0.0
+
+    @property
+    def tx_per_second(self) -> float:
+        return self.tx_count / self.duration if self.duration else 0.0
+
+    @property
+    def mean_block_time(self) -> Optional[float]:
+        return statistics.mean(self.block_times) if self.block_times else None
+
+    @property
+    def mean_tx_pool_depth(self) -> Optional[float]:
+        return statistics.mean(self.tx_pool_depths) if self.tx_pool_depths else None
+
+    def to_dict(self) -> dict:
+        return {
+            "duration": self.duration,
+            "height": self.height,
+            "block_count": self.block_count,
+            "tx_count": self.tx_count,
+            "blocks_per_second": self.blocks_per_second,
+            "tx_per_second": self.tx_per_second,
+            "mean_block_time": self.mean_block_time,
+            "mean_tx_pool_depth": self.mean_tx_pool_depth,
+            "speculative_hit_count": self.speculative_hit_count,
+            "speculative_miss_count": self.speculative_miss_count,
+            "last_block_pace_interval": self.block_pace_intervals[-1] if self.block_pace_intervals else None,
+            "last_block_pace_tx_size": self.block_pace_tx_sizes[-1] if self.block_pace_tx_sizes else None
+        }
+
+
+class LeaderStackSimulator:
+    """Run `BlockManager`, `BlockChain`, `Epoch`, `ConsensusSiever` and `BlockSpeculator` of a leader peer.
+
+    Those classes are bound to the process singletons of `ObjectManager`, `ChannelProperty` and `StubCollection`,
+    so the simulator sets new singletons for the leader while it runs and restores the previous ones after it.
+    Only one peer can run them in a process. The other reps are validators in memory: they decode
+    the unconfirmed block broadcast by the leader, take the invoke latency of `MockScoreInvoker`, and send
+    their votes back to the leader after the network latency. Validators do not run the code of a peer.
+    The score service of the leader is `MockScoreInvoker`, and the blocks are written to plyvel in a temporary dir.
+
+    It runs on the wall clock. `configure` values such as ALLOW_PIPELINED_BLOCK_GENERATION and
+    ALLOW_ADAPTIVE_BLOCK_PACE are set while it runs, so reports measure the consensus code of the leader with them.
+    MAX_MADE_BLOCK_COUNT is raised for a run, because validators can not take the leader role.
+
+    Usage:
+        simulator = LeaderStackSimulator(node_count=4, latency=0.05, block_interval=0.5,
+                                         configure={"ALLOW_PIPELINED_BLOCK_GENERATION": True})
+        simulator.submit_txs(tps=500, duration=10)
+        report = simulator.run(10)
+    """
+
+    def __init__(self,
+                 node_count: int = 4,
+                 *,
+                 seed: int = 0,
+                 latency: float = 0.05,
+                 jitter: float = 0.0,
+                 invoker: MockScoreInvoker = None,
+                 block_interval: float = None,
+                 block_versions: Dict[str, int] = None,
+                 configure: Dict[str, Any] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.invoker = invoker or MockScoreInvoker()
+        self.channel_name = conf.LOOPCHAIN_DEFAULT_CHANNEL
+
+        self.__random = random.Random(seed)
+        self.__signers = [Signer.from_prikey(hashlib.sha256(f"node:{seed}:{index}".encode()).digest())
+                          for index in range(node_count)]
+        self.__tx_signer = Signer.from_prikey(hashlib.sha256(f"tx:{seed}".encode()).digest())
+        self.__tx_nonce = itertools.count()
+        self.__tx_versioner = TransactionVersioner()
+        self.__tx_ticks: List[Tuple[float, List[Transaction]]] = []
+
+        self.__block_versions = block_versions
+        self.__configure = {
+            "MAX_MADE_BLOCK_COUNT": 2 ** 31,
+            "INTERVAL_BLOCKGENERATION": conf.INTERVAL_BLOCKGENERATION if block_interval is None else block_interval,
+            **(configure or {})
+        }
+        self.__commits: List[_Commit] = []
+        self.__start_time: Optional[float] = None
+        self.__end_time: Optional[float] = None
+        self.__speculator_counts = (0, 0)
+
+        self.block_manager: Optional[BlockManager] = None
+        self.validators: List[_Validator] = []
+
+    @property
+    def leader_id(self) -> str:
+        return self.__signers[0].address
+
+    def submit_txs(self, tps: float, duration: float, start: float = 0.0):
+        """Submit `tps` txs per second to the leader during `duration` seconds from `start` of a run.
+
+        Txs are signed here, so signing does not take the time of the run.
+        """
+        tick_count = int(duration / TX_SUBMIT_TICK)
+        for tick in range(tick_count):
+            tx_count = int((tick + 1) * tps * TX_SUBMIT_TICK) - int(tick * tps * TX_SUBMIT_TICK)
+            self.__tx_ticks.append((start + tick * TX_SUBMIT_TICK, [self.__new_tx() for _ in range(tx_count)]))
+
+    def run(self, duration: float) -> 'LeaderStackReport':
+        storage_path = tempfile.mkdtemp(prefix="loopchain_simulator_")
+        try:
+            with self.__patched_configure(storage_path), _new_singletons(ObjectManager, ChannelProperty,
+                                                                          StubCollection):
+                channel = self.__start(storage_path)
+                try:
+                    time.sleep(duration)
+                finally:
+                    self.__stop(channel)
+        finally:
+            shutil.rmtree(storage_path, ignore_errors=True)
+        return self.report()
+
+    def report(self) -> 'LeaderStackReport':
+        commits = [commit for commit in self.__commits if commit.height > 0]
+        commit_times = [commit.time for commit in commits]
+        return LeaderStackReport(
+            duration=(self.__end_time - self.__start_time) if self.__start_time is not None else 0.0,
+            height=max((commit.height for commit in commits), default=0),
+            block_count=len(commits),
+            tx_count=sum(commit.tx_count for commit in commits),
+            block_times=[later - earlier for earlier, later in zip(commit_times, commit_times[1:])],
+            tx_pool_depths=[commit.tx_pool_depth for commit in commits],
+            speculative_hit_count=self.__speculator_counts[0],
+            speculative_miss_count=self.__speculator_counts[1],
+            block_pace_intervals=[commit.block_pace[0] for commit in commits if commit.block_pace],
+            block_pace_tx_sizes=[commit.block_pace[1] for commit in commits if commit.block_pace]
+        )
+
+    def deliver(self, callback, *args):
+        """Call the callback in the loop of the leader after the network latency."""
+        latency = self.latency + (self.__random.uniform(0, self.jitter) if self.jitter else 0.0)
+        self.__loop.call_soon_threadsafe(self.__loop.call_later, latency, callback, *args)
+
+    def add_votes(self, vote_dumped: str):
+        """`ChannelInnerTask.vote_unconfirmed_block` of the leader"""
+        votes = loads_votes(vote_dumped)
+        candidate_blocks = self.block_manager.candidate_blocks
+        if len(votes) == 1:
+            candidate_blocks.add_vote(votes[0])
+        else:
+            candidate_blocks.add_votes(votes)
+
+        accepted_votes = [vote for vote in votes if candidate_blocks.has_vote(vote)]
+        self.block_manager.relay_votes(accepted_votes)
+        if self.block_manager.consensus_algorithm:
+            for vote in accepted_votes:
+                self.block_manager.consensus_algorithm.vote(vote)
+
+    def on_commit(self, block: Block):
+        # The controller decides the pace of a block after its votes, so the decision of the block is made by now.
+        block_pace_controller = getattr(self.block_manager.consensus_algorithm, "_block_pace_controller", None)
+        self.__commits.append(_Commit(time=time.monotonic(),
+                                      height=block.header.height,
+                                      tx_count=len(block.body.transactions),
+                                      tx_pool_depth=self.block_manager.get_count_of_unconfirmed_tx(),
+                                      block_pace=(block_pace_controller.interval, block_pace_controller.tx_size)
+                                      if block_pace_controller else None))
+
+    @property
+    def __loop(self):
+        return ObjectManager().channel_service.timer_service.get_event_loop()
+
+    def __start(self, storage_path: str) -> '_LeaderChannel':
+        leader = self.__signers[0]
+        channel_property = ChannelProperty()
+        channel_property.name = self.channel_name
+        channel_property.peer_id = leader.address
+        channel_property.peer_address = ExternalAddress.fromhex_address(leader.address)
+        channel_property.peer_auth = leader
+        channel_property.peer_target = _target(0)
+        channel_property.node_type = conf.NodeType.CommunityNode
+
+        score_stub = _ScoreStub(self.invoker)
+        StubCollection().icon_score_stubs[self.channel_name] = score_stub
+
+        channel = _LeaderChannel(self, score_stub)
+        ObjectManager().channel_service = channel
+        for order, signer in enumerate(self.__signers, 1):
+            channel.peer_manager.add_peer(Peer(signer.address, _target(order - 1), order=order))
+
+        self.block_manager = channel.block_manager = BlockManager(
+            name="loopchain.peer.BlockManager",
+            channel_service=channel,
+            peer_id=leader.address,
+            channel_name=self.channel_name,
+            store_identity=f"simulator_{os.getpid()}"
+        )
+        blockchain = self.block_manager.blockchain
+        reps_hash = channel.peer_manager.prepared_reps_hash
+        blockchain.write_preps(reps_hash, channel.peer_manager.serialize_as_preps())
+
+        self.validators = [
+            _Validator(self, signer, _target(index), blockchain.block_versioner, blockchain.tx_versioner)
+            for index, signer in enumerate(self.__signers[1:], 1)
+        ]
+        channel.timer_service.start()
+
+        blockchain.init_blockchain()
+        blockchain.generate_genesis_block(blockchain.find_preps_addresses_by_roothash(reps_hash))
+
+        self.__start_time = time.monotonic()
+        for when, txs in self.__tx_ticks:
+            self.__loop.call_soon_threadsafe(self.__loop.call_later, when, self.__add_txs, txs)
+        self.block_manager.start_block_generate_timer()
+        return channel
+
+    def __stop(self, channel: '_LeaderChannel'):
+        self.__end_time = time.monotonic()
+        if self.block_manager:
+            block_speculator = getattr(self.block_manager.consensus_algorithm, "_block_speculator", None)
+            if block_speculator:
+                self.__speculator_counts = (block_speculator.hit_count, block_speculator.miss_count)
+            self.block_manager.stop_block_generate_timer()
+            ConsensusSiever.stop_broadcast_send_unconfirmed_block_timer()
+        if channel.timer_service.is_run():
+            channel.timer_service.stop()
+            channel.timer_service.wait()
+        if self.block_manager:
+            self.block_manager.stop()
+
+    def __add_txs(self, txs: List[Transaction]):
+        for tx in txs:
+            self.block_manager.add_tx_obj(tx)
+
+    def __new_tx(self) -> Transaction:
+        tx_builder = TransactionBuilder.new(v3.version, None, self.__tx_versioner)
+        tx_builder.signer = self.__tx_signer
+        tx_builder.to_address = ExternalAddress(self.__random.getrandbits(160).to_bytes(ExternalAddress.size, 'big'))
+        tx_builder.value = 1
+        tx_builder.step_limit = 100_000
+        tx_builder.nid = 3
+        tx_builder.nonce = next(self.__tx_nonce)
+        return tx_builder.build()
+
+    @contextmanager
+    def __patched_configure(self, storage_path: str):
+        genesis_data_path = os.path.join(storage_path, "genesis.json")
+        with open(genesis_data_path, "w") as f:
+            json.dump({"transaction_data": {"nid": "0x3", "accounts": [], "message": "simulator"}}, f)
+
+        channel_option = dict(conf.CHANNEL_OPTION[self.channel_name], genesis_data_path=genesis_data_path)
+        if self.__block_versions:
+            channel_option["block_versions"] = self.__block_versions
+
+        values = {
+            **self.__configure,
+            "DEFAULT_STORAGE_PATH": storage_path,
+            "CHANNEL_OPTION": dict(conf.CHANNEL_OPTION, **{self.channel_name: channel_option})
+        }
+        saved_values = {name: getattr(conf, name) for name in values}
+        try:
+            for name, value in values.items():
+                setattr(conf, name, value)
+            yield
+        finally:
+            for name, value in saved_values.items():
+                setattr(conf, name, value)
+
+
+class _ScoreStub:
+    """Score service of the leader. An invoke takes the latency of `MockScoreInvoker` on the wall clock."""
+
+    def __init__(self, invoker: MockScoreInvoker):
+        self.__invoker = invoker
+        self.last_block_height = -1
+
+    def sync_task(self):
+        return self
+
+    def invoke(self, request: dict) -> dict:
+        transactions = request["transactions"]
+        time.sleep(self.__invoker.latency(len(transactions)))
+        self.__invoker.invoke_count += 1
+
+        block_hash = request["block"]["blockHash"]
+        tx_results = {}
+        for transaction in transactions:
+            tx_hash = transaction["params"]["txHash"]
+            tx_hash = tx_hash[2:] if tx_hash.startswith("0x") else tx_hash
+            tx_results[tx_hash] = {
+                "status": "0x1",
+                "blockHeight": request["block"]["blockHeight"],
+                "txHash": "0x" + tx_hash
+            }
+        return {
+            "txResults": tx_results,
+            "stateRootHash": hashlib.sha3_256(block_hash.encode()).hexdigest()
+        }
+
+    def query(self, request: dict) -> dict:
+        return {"lastBlock": {"blockHeight": hex(self.last_block_height)}}
+
+
+class _Broadcaster:
+    """Broadcast scheduler of the leader, which delivers messages to the validators."""
+
+    def __init__(self, simulator: LeaderStackSimulator):
+        self.__simulator = simulator
+
+    def schedule_broadcast(self, method_name, method_param, *, reps_hash=None, retry_times=None, timeout=None):
+        for validator in self.__simulator.validators:
+            self.__simulator.deliver(validator.receive, method_name, method_param)
+
+    def schedule_send(self, method_name, method_param, *, target: str, reps_hash=None):
+        for validator in self.__simulator.validators:
+            if validator.target == target:
+                self.__simulator.deliver(validator.receive, method_name, method_param)
+
+    def reset_audience_reps_hash(self):
+        pass
+
+
+class _LeaderChannel:
+    """`ChannelService` of the leader with the parts which the consensus of a leader uses"""
+
+    def __init__(self, simulator: LeaderStackSimulator, score_stub: _ScoreStub):
+        self.__simulator = simulator
+        self.__score_stub = score_stub
+
+        self.timer_service = TimerService()
+        self.peer_manager = PeerManager()
+        self.broadcast_scheduler = _Broadcaster(simulator)
+        self.state_machine = SimpleNamespace(state="BlockGenerate")
+        self.inner_service = SimpleNamespace(notify_new_block=lambda height: None)
+        self.block_manager: Optional[BlockManager] = None
+
+    def score_write_precommit_state(self, block: Block):
+        self.__score_stub.last_block_height = block.header.height
+        self.__simulator.on_commit(block)
+
+    def reset_leader(self, new_leader_id, block_height=0, complained=False):
+        if new_leader_id != ChannelProperty().peer_id:
+            util.logger.warning(f"Leader of the simulator does not change to ({new_leader_id}).")
+
+    def switch_role(self):
+        pass
+
+
+class _Validator:
+    """A rep which votes for the blocks of the leader after the invoke latency"""
+
+    def __init__(self,
+                 simulator: LeaderStackSimulator,
+                 signer: Signer,
+                 target: str,
+                 block_versioner: BlockVersioner,
+                 tx_versioner: TransactionVersioner):
+        self.signer = signer
+        self.target = target
+        self.__simulator = simulator
+        self.__block_versioner = block_versioner
+        self.__tx_versioner = tx_versioner
+        self.__votes: Dict[Tuple[Hash32, int], str] = {}
+        self.__validating = set()
+
+    def receive(self, method_name: str, message):
+        if method_name != "AnnounceUnconfirmedBlock":
+            return
+
+        block = self.__block_loads(message.block)
+        self.__forward(block, message)
+
+        key = (block.header.hash, message.round_)
+        if key in self.__votes:
+            # The leader broadcasts the block again if it has not got enough votes. Some votes may be late.
+            self.__simulator.deliver(self.__simulator.add_votes, self.__votes[key])
+        elif key not in self.__validating:
+            self.__validating.add(key)
+            loop = ObjectManager().channel_service.timer_service.get_event_loop()
+            loop.call_later(self.__simulator.invoker.latency(len(block.body.transactions)), self.__vote, block, key)
+
+    def __vote(self, block: Block, key: Tuple[Hash32, int]):
+        self.__validating.discard(key)
+        vote = BlockVote.new(self.signer, util.get_time_stamp(), block.header.height, key[1], block.header.hash)
+        self.__votes[key] = dumps_votes([vote])
+        self.__simulator.deliver(self.__simulator.add_votes, self.__votes[key])
+
+    def __forward(self, block: Block, message):
+        if conf.BROADCAST_FANOUT <= 0:
+            return
+
+        rep_ids = [self.__simulator.leader_id, *(validator.signer.address for validator in self.__simulator.validators)]
+        children = get_fanout_children(rep_ids, block.header.peer_id.hex_hx(), self.signer.address,
+                                       block.header.height, conf.BROADCAST_FANOUT)
+        for validator in self.__simulator.validators:
+            if validator.signer.address in children:
+                self.__simulator.deliver(validator.receive, "AnnounceUnconfirmedBlock", message)
+
+    def __block_loads(self, block_dumped: bytes) -> Block:
+        block_serialized = json.loads(zlib.decompress(block_dumped))
+        block_version = self.__block_versioner.get_version(self.__block_versioner.get_height(block_serialized))
+        return BlockSerializer.new(block_version, self.__tx_versioner).deserialize(block_serialized)
+
+
+def _target(index: int) -> str:
+    return f"127.0.0.1:{7100 + index * 100}"
+
+
+@contextmanager
+def _new_singletons(*classes: SingletonMetaClass):
+    """New instances of the singleton classes are made in the context. The previous ones are restored after it."""
+    instances = SingletonMetaClass._instances
+    saved_instances = {cls: instances.pop(cls, None) for cls in classes}
+    try:
+        yield
+    finally:
+        for cls, instance in saved_instances.items():
+            instances.pop(cls, None)
+            if instance is not None:
+                instances[cls] = instance
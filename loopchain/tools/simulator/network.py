@@ -0,0 +1,165 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Virtual clock and in-memory transport of the consensus simulator"""
+
+import heapq
+import itertools
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class ScheduledEvent:
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when: float, callback: Callable, args: tuple):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class EventScheduler:
+    """Discrete event scheduler on a virtual clock.
+
+    Events run in the order of their time and of scheduling, so a simulation is reproducible
+    and does not take the wall clock time it simulates.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.__queue: List[Tuple[float, int, ScheduledEvent]] = []
+        self.__sequence = itertools.count()
+
+    def timestamp(self) -> int:
+        """Current time in microseconds as the timestamps of blocks and votes"""
+        return int(self.now * 1_000_000)
+
+    def call_at(self, when: float, callback: Callable, *args) -> ScheduledEvent:
+        event = ScheduledEvent(max(when, self.now), callback, args)
+        heapq.heappush(self.__queue, (event.when, next(self.__sequence), event))
+        return event
+
+    def call_later(self, delay: float, callback: Callable, *args) -> ScheduledEvent:
+        return self.call_at(self.now + delay, callback, *args)
+
+    def run_until(self, end_time: float):
+        while self.__queue and self.__queue[0][0] <= end_time:
+            when, _, event = heapq.heappop(self.__queue)
+            if event.cancelled:
+                continue
+            self.now = when
+            event.callback(*event.args)
+        self.now = max(self.now, end_time)
+
+    def __len__(self):
+        return len(self.__queue)
+
+
+@dataclass
+class TransportStats:
+    sent: int = 0
+    delivered: int = 0
+    lost: int = 0
+    partitioned: int = 0
+
+
+class InMemoryTransport:
+    """Deliver messages between nodes in a process with latency, loss and partition.
+
+    Latency of a message is `latency` plus a uniform jitter in [0, `jitter`].
+    If `bandwidth` is given, messages sent by a node go out one by one through its uplink of the bandwidth,
+    so a message waits until the previous messages of the node are sent.
+    A message is lost by the probability of `loss`.
+    Nodes in different groups of a partition can not reach each other.
+    """
+
+    def __init__(self, scheduler: EventScheduler, latency: float = 0.05, jitter: float = 0.0, loss: float = 0.0,
+                 seed: int = 0, bandwidth: float = None):
+        self.__scheduler = scheduler
+        self.__random = random.Random(seed)
+        self.__handlers: Dict[str, Callable[[str, Any], None]] = {}
+        self.__links: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self.__groups: Optional[Dict[str, int]] = None
+        self.__uplink_free_times: Dict[str, float] = {}
+
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.bandwidth = bandwidth  # bytes per second of the uplink of a node
+        self.stats = TransportStats()
+
+    @property
+    def node_ids(self) -> List[str]:
+        return list(self.__handlers)
+
+    def register(self, node_id: str, handler: Callable[[str, Any], None]):
+        self.__handlers[node_id] = handler
+
+    def set_link(self, src: str, dst: str, latency: float = None, loss: float = None):
+        """Override latency and loss of the link from `src` to `dst`."""
+        self.__links[(src, dst)] = (self.latency if latency is None else latency,
+                                    self.loss if loss is None else loss)
+
+    def partition(self, *groups: Iterable[str]):
+        """Split nodes into groups. Nodes which are not in any group are in the same group together."""
+        self.__groups = {}
+        for group_index, group in enumerate(groups):
+            for node_id in group:
+                self.__groups[node_id] = group_index
+
+    def heal(self):
+        self.__groups = None
+
+    def is_reachable(self, src: str, dst: str) -> bool:
+        if self.__groups is None:
+            return True
+        return self.__groups.get(src, -1) == self.__groups.get(dst, -1)
+
+    def send(self, src: str, dst: str, message: Any, size: int = 0):
+        """Send the message. `size` in bytes takes time of the uplink if `bandwidth` is set."""
+        self.stats.sent += 1
+        if not self.is_reachable(src, dst):
+            self.stats.partitioned += 1
+            return
+
+        latency, loss = self.__links.get((src, dst), (self.latency, self.loss))
+        if loss and self.__random.random() < loss:
+            self.stats.lost += 1
+            return
+
+        if self.jitter:
+            latency += self.__random.uniform(0, self.jitter)
+        if self.bandwidth:
+            sent_time = max(self.__scheduler.now, self.__uplink_free_times.get(src, 0.0)) + size / self.bandwidth
+            self.__uplink_free_times[src] = sent_time
+            latency += sent_time - self.__scheduler.now
+        self.__scheduler.call_later(latency, self.__deliver, src, dst, message)
+
+    def broadcast(self, src: str, message: Any, size: int = 0):
+        for dst in self.__handlers:
+            if dst != src:
+                self.send(src, dst, message, size)
+
+    def __deliver(self, src: str, dst: str, message: Any):
+        # The partition is checked again. A message on the wire is lost if a partition happens meanwhile.
+        if not self.is_reachable(src, dst):
+            self.stats.partitioned += 1
+            return
+
+        self.stats.delivered += 1
+        self.__handlers[dst](src, message)
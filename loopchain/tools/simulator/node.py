@@ -0,0 +1,553 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""A node of the consensus simulator, which models the consensus of a peer"""
+
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import loopchain.utils as util
+from loopchain import configure as conf
+from loopchain.baseservice.aging_cache import AgingCache
+from loopchain.blockchain import BlockChain, CandidateBlocks
+from loopchain.blockchain.blocks import Block, BlockBuilder, BlockSerializer
+from loopchain.blockchain.transactions import TransactionVersioner
+from loopchain.blockchain.types import ExternalAddress, Hash32, TransactionStatusInQueue
+from loopchain.blockchain.votes.v0_1a import BlockVote, BlockVotes, LeaderVote, LeaderVotes
+from loopchain.blockchain.votes.votes import VoteError
+from loopchain.crypto.signature import Signer
+from loopchain.peer.vote_relay import VoteRelay
+from loopchain.store.key_value_store_dict import KeyValueStoreDict
+from loopchain.tools.simulator.network import EventScheduler, InMemoryTransport, ScheduledEvent
+from loopchain.tools.simulator.score import MockScoreInvoker
+
+# Max count of blocks in a reply of block sync.
+MAX_BLOCKS_IN_SYNC_REPLY = 100
+
+
+@dataclass(frozen=True)
+class NodeConfig:
+    block_interval: float
+    complain_timeout: float
+    rebroadcast_interval: float
+    sync_retry_interval: float
+    max_tx_size: int
+    blocks_per_leader: int
+    aggregated_votes: bool
+
+
+@dataclass(frozen=True)
+class BlockMessage:
+    block: Block
+    round_: int
+
+
+@dataclass(frozen=True)
+class VoteMessage:
+    vote: BlockVote
+
+
+@dataclass(frozen=True)
+class VoteBatchMessage:
+    votes: List[BlockVote]
+
+
+@dataclass(frozen=True)
+class ComplainMessage:
+    vote: LeaderVote
+
+
+@dataclass(frozen=True)
+class BlockRequestMessage:
+    from_height: int
+
+
+@dataclass(frozen=True)
+class BlocksMessage:
+    blocks: List[Tuple[Block, list]]
+
+
+class SimNode:
+    """A model of a peer which runs the consensus of block version 0.1a on the virtual clock.
+
+    It is not `BlockManager`, `ConsensusSiever` or `Epoch`. Those are bound to the channel singletons of
+    `ObjectManager` and `ChannelProperty`, so only one stack of them lives in a process.
+    The node models their flow and shares `CandidateBlocks`, the votes, `VoteRelay` and the block builder with them:
+    the leader packs txs, invokes and broadcasts a block, every peer invokes and votes for it,
+    and the block is added to the dict store by the quorum of votes.
+    Peers complain the leader who does not make a block in `complain_timeout`, and a peer behind
+    catches up by block sync from the peer who sent a message of the higher height.
+    If `aggregated_votes` is set, validators send votes to the proposer and the proposer relays them in batches.
+
+    So reports show the cost of the protocol by its parameters. A change of the consensus code of the peer
+    is not tested by the simulator unless the model is changed too. `LeaderStackSimulator` runs the code of a leader.
+    """
+
+    BLOCK_VERSION = "0.1a"
+
+    def __init__(self,
+                 signer: Signer,
+                 reps: List[ExternalAddress],
+                 genesis_block: Block,
+                 config: NodeConfig,
+                 scheduler: EventScheduler,
+                 transport: InMemoryTransport,
+                 invoker: MockScoreInvoker,
+                 on_commit: Callable[['SimNode', Block], None]):
+        self.signer = signer
+        self.node_id: str = signer.address
+        self.rep = ExternalAddress.fromhex_address(signer.address)
+        self.reps = reps
+        self.config = config
+
+        self.__scheduler = scheduler
+        self.__transport = transport
+        self.__invoker = invoker
+        self.__on_commit = on_commit
+
+        self.tx_versioner = TransactionVersioner()
+        self.store = KeyValueStoreDict()
+        self.tx_queue = AgingCache(max_age_seconds=conf.MAX_TX_QUEUE_AGING_SECONDS,
+                                   default_item_status=TransactionStatusInQueue.normal)
+        self.candidate_blocks = CandidateBlocks(self)
+        self.last_block: Block = None
+        self.total_tx = 0
+        self.round = 0
+        self.leader_id: str = genesis_block.header.next_leader.hex_hx()
+        self.is_running = False
+        self.vote_message_count = 0  # messages of votes sent
+        self.vote_verify_count = 0  # signatures of votes verified
+
+        self.__vote_relay = VoteRelay(self.candidate_blocks, self.rep, self.__relay_votes, scheduler.call_later)
+        self.__voted: Dict[Tuple[Hash32, int], BlockVote] = {}
+        self.__validating: Set[Tuple[Hash32, int]] = set()
+        self.__complain_votes: Dict[int, LeaderVotes] = {}
+        self.__proposing_block: Optional[Block] = None  # block being invoked to be proposed
+        self.__unconfirmed_block: Optional[Block] = None
+        self.__made_block_count = 0
+        self.__last_slot_time: Optional[float] = None  # time when the leader started the last consensus
+        self.__sync_requested_at: Optional[float] = None
+
+        self.__proposal_timer: Optional[ScheduledEvent] = None
+        self.__rebroadcast_timer: Optional[ScheduledEvent] = None
+        self.__complain_timer: Optional[ScheduledEvent] = None
+
+        self.__write_block(genesis_block, [])
+        transport.register(self.node_id, self.receive)
+
+    @property
+    def block_height(self) -> int:
+        return self.last_block.header.height
+
+    @property
+    def is_leader(self) -> bool:
+        return self.leader_id == self.node_id
+
+    def start(self):
+        self.is_running = True
+        self.__arm_complain_timer()
+        if self.is_leader:
+            self.__schedule_proposal()
+
+    def stop(self):
+        self.is_running = False
+        if self.__complain_timer:
+            self.__complain_timer.cancel()
+            self.__complain_timer = None
+        self.__cancel_proposal()
+        self.__discard_unconfirmed_block()
+
+    def find_block_hash_by_height(self, height: int) -> Optional[Hash32]:
+        try:
+            block_hash_encoded = self.store.get(
+                BlockChain.BLOCK_HEIGHT_KEY + height.to_bytes(conf.BLOCK_HEIGHT_BYTES_LEN, byteorder='big'))
+        except KeyError:
+            return None
+        return Hash32.fromhex(block_hash_encoded.decode("utf-8"), ignore_prefix=True)
+
+    def find_block_by_height(self, height: int) -> Optional[Block]:
+        block_hash = self.find_block_hash_by_height(height)
+        if block_hash is None:
+            return None
+
+        block_dumped = self.store.get(block_hash.hex().encode("utf-8"))
+
+        block_serializer = BlockSerializer.new(self.BLOCK_VERSION, self.tx_versioner)
+        return block_serializer.deserialize(json.loads(block_dumped))
+
+    def find_confirm_info_by_hash(self, block_hash: Hash32) -> list:
+        try:
+            confirm_info = self.store.get(BlockChain.CONFIRM_INFO_KEY + block_hash.hex().encode("utf-8"))
+        except KeyError:
+            return []
+        return BlockVotes.deserialize_votes(json.loads(confirm_info))
+
+    def receive(self, src: str, message):
+        if not self.is_running:
+            return
+
+        if isinstance(message, VoteMessage):
+            self.__on_vote(src, message.vote)
+        elif isinstance(message, VoteBatchMessage):
+            self.__on_vote_batch(src, message.votes)
+        elif isinstance(message, BlockMessage):
+            self.__on_block(src, message.block, message.round_)
+        elif isinstance(message, ComplainMessage):
+            self.__on_complain(src, message.vote)
+        elif isinstance(message, BlockRequestMessage):
+            self.__on_block_request(src, message.from_height)
+        elif isinstance(message, BlocksMessage):
+            self.__on_blocks(message.blocks)
+
+    # ----- Leader
+    def __schedule_proposal(self):
+        self.__cancel_proposal()
+
+        # Consensus starts in every slot of the interval like `SlotTimer`. A new leader starts at once.
+        if self.__last_slot_time is None:
+            when = self.__scheduler.now
+        else:
+            when = self.__last_slot_time + self.config.block_interval
+        self.__proposal_timer = self.__scheduler.call_at(when, self.__propose)
+
+    def __propose(self):
+        self.__proposal_timer = None
+        if not self.is_leader or self.__unconfirmed_block:
+            return
+        self.__last_slot_time = self.__scheduler.now
+
+        block = self.__proposing_block = self.__build_block(self.last_block)
+        self.__proposal_timer = self.__scheduler.call_later(
+            self.__invoker.latency(len(block.body.transactions)), self.__broadcast_proposal, block)
+
+    def __cancel_proposal(self):
+        if self.__proposal_timer:
+            self.__proposal_timer.cancel()
+            self.__proposal_timer = None
+
+        proposing_block, self.__proposing_block = self.__proposing_block, None
+        if proposing_block:
+            self.__restore_txs(proposing_block)
+
+    def __build_block(self, prev_block: Block) -> Block:
+        block_builder = BlockBuilder.new(self.BLOCK_VERSION, self.tx_versioner)
+        block_builder.height = prev_block.header.height + 1
+        block_builder.prev_hash = prev_block.header.hash
+        block_builder.signer = self.signer
+        block_builder.fixed_timestamp = self.__scheduler.timestamp()
+        block_builder.confirm_prev_block = True
+        if self.__made_block_count + 1 >= self.config.blocks_per_leader:
+            block_builder.next_leader = self.__next_rep(self.rep)
+        else:
+            block_builder.next_leader = self.rep
+
+        block_tx_size = 0
+        while block_tx_size < self.config.max_tx_size:
+            tx = self.tx_queue.get_item_in_status(get_status=TransactionStatusInQueue.normal,
+                                                  set_status=TransactionStatusInQueue.added_to_block)
+            if tx is None:
+                break
+            block_builder.transactions[tx.hash] = tx
+            block_tx_size += tx.size(self.tx_versioner)
+
+        return block_builder.build()
+
+    def __broadcast_proposal(self, block: Block):
+        self.__proposal_timer = None
+        self.__proposing_block = None
+        if not self.is_leader or block.header.prev_hash != self.last_block.header.hash:
+            self.__restore_txs(block)
+            return
+
+        self.__invoker.invoke(block)
+        self.__made_block_count += 1
+        self.__unconfirmed_block = block
+        self.candidate_blocks.add_block(block, self.reps)
+        self.__transport.broadcast(self.node_id, BlockMessage(block, self.round))
+        self.__rebroadcast_timer = self.__scheduler.call_later(
+            self.config.rebroadcast_interval, self.__rebroadcast, block, self.round)
+
+        self.__vote(block)
+
+    def __rebroadcast(self, block: Block, round_: int):
+        self.__rebroadcast_timer = None
+        if self.__unconfirmed_block is not block or self.round != round_:
+            return
+
+        self.__transport.broadcast(self.node_id, BlockMessage(block, round_))
+        self.__rebroadcast_timer = self.__scheduler.call_later(
+            self.config.rebroadcast_interval, self.__rebroadcast, block, round_)
+
+    def __discard_unconfirmed_block(self, committed_block: Block = None):
+        if self.__rebroadcast_timer:
+            self.__rebroadcast_timer.cancel()
+            self.__rebroadcast_timer = None
+
+        unconfirmed_block, self.__unconfirmed_block = self.__unconfirmed_block, None
+        if unconfirmed_block and unconfirmed_block is not committed_block:
+            self.__restore_txs(unconfirmed_block)
+
+    def __restore_txs(self, block: Block):
+        for tx_hash in block.body.transactions:
+            try:
+                if self.tx_queue.get_item_status(tx_hash.hex()) == TransactionStatusInQueue.added_to_block:
+                    self.tx_queue.set_item_status(tx_hash.hex(), TransactionStatusInQueue.normal)
+            except KeyError:
+                continue
+
+    # ----- Validator
+    def __on_block(self, src: str, block: Block, round_: int):
+        height = block.header.height
+        if height <= self.block_height:
+            return
+        if height > self.block_height + 1:
+            self.__request_blocks(src)
+            return
+        if block.header.prev_hash != self.last_block.header.hash or round_ < self.round:
+            return
+        if round_ == self.round and block.header.peer_id.hex_hx() != self.leader_id:
+            return
+        if round_ > self.round:
+            # Complain of this round is completed in other peers.
+            self.__new_round(round_, block.header.peer_id.hex_hx())
+
+        key = (block.header.hash, round_)
+        if key in self.__voted:
+            # The leader broadcasts the block again if votes are not enough. Some votes may be lost.
+            self.__send_vote(block, self.__voted[key])
+            return
+        if key in self.__validating:
+            return
+
+        self.__arm_complain_timer()
+        self.__validating.add(key)
+        self.__scheduler.call_later(self.__invoker.latency(len(block.body.transactions)),
+                                    self.__on_block_validated, block, round_)
+
+    def __on_block_validated(self, block: Block, round_: int):
+        self.__validating.discard((block.header.hash, round_))
+        if not self.is_running or round_ != self.round or block.header.prev_hash != self.last_block.header.hash:
+            return
+
+        self.__invoker.invoke(block)
+        self.candidate_blocks.add_block(block, self.reps)
+        self.__vote(block)
+
+    def __vote(self, block: Block):
+        vote = BlockVote.new(self.signer, self.__scheduler.timestamp(),
+                             block.header.height, self.round, block.header.hash)
+        self.__voted[(block.header.hash, self.round)] = vote
+        self.__add_vote(vote)
+        self.__send_vote(block, vote)
+
+    def __send_vote(self, block: Block, vote: BlockVote):
+        if not self.config.aggregated_votes:
+            self.vote_message_count += len(self.__transport.node_ids) - 1
+            self.__transport.broadcast(self.node_id, VoteMessage(vote))
+        elif block.header.peer_id == self.rep:
+            self.__vote_relay.add(vote)
+        else:
+            self.vote_message_count += 1
+            self.__transport.send(self.node_id, block.header.peer_id.hex_hx(), VoteMessage(vote))
+
+    def __relay_votes(self, block: Block, votes: List[BlockVote]):
+        self.vote_message_count += len(self.__transport.node_ids) - 1
+        self.__transport.broadcast(self.node_id, VoteBatchMessage(votes))
+
+    def __on_vote(self, src: str, vote: BlockVote):
+        if vote.block_height <= self.block_height:
+            return
+        if vote.block_height > self.block_height + 1:
+            self.__request_blocks(src)
+            return
+        self.__add_vote(vote)
+        if self.config.aggregated_votes:
+            self.__vote_relay.add(vote)
+
+    def __on_vote_batch(self, src: str, votes: List[BlockVote]):
+        if any(vote.block_height > self.block_height + 1 for vote in votes):
+            self.__request_blocks(src)
+        votes = [vote for vote in votes if vote.block_height == self.block_height + 1]
+        if not votes:
+            return
+
+        self.vote_verify_count += self.candidate_blocks.add_votes(votes)
+        for block_hash, round_ in {(vote.block_hash, vote.round_) for vote in votes}:
+            self.__try_commit(block_hash, round_)
+
+    def __add_vote(self, vote: BlockVote):
+        self.vote_verify_count += 1
+        try:
+            self.candidate_blocks.add_vote(vote)
+        except (VoteError, RuntimeError) as e:
+            util.logger.debug(f"{self.node_id} ignores vote. {e}")
+            return
+        self.__try_commit(vote.block_hash, vote.round_)
+
+    def __try_commit(self, block_hash: Hash32, round_: int):
+        candidate_block = self.candidate_blocks.blocks.get(block_hash)
+        if (candidate_block is None or candidate_block.block is None
+                or candidate_block.height != self.block_height + 1):
+            return
+
+        votes = candidate_block.votes.get(round_)
+        if votes and votes.get_result():
+            self.__commit(candidate_block.block, votes.votes)
+
+    def __commit(self, block: Block, votes: list):
+        self.__write_block(block, votes)
+        self.candidate_blocks.remove_block(block.header.hash)
+        for tx_hash in block.body.transactions:
+            try:
+                del self.tx_queue[tx_hash.hex()]
+            except KeyError:
+                continue
+
+        self.round = 0
+        self.__voted.clear()
+        self.__complain_votes.clear()
+
+        was_leader = self.is_leader
+        self.leader_id = block.header.next_leader.hex_hx()
+        self.__discard_unconfirmed_block(committed_block=block)
+        if self.is_leader:
+            if not was_leader:
+                self.__made_block_count = 0
+                self.__last_slot_time = None
+            self.__schedule_proposal()
+        else:
+            self.__cancel_proposal()
+
+        self.__arm_complain_timer()
+        self.__on_commit(self, block)
+
+    def __write_block(self, block: Block, votes: list):
+        if block.header.height > 0:
+            self.total_tx += len(block.body.transactions)
+
+        block_serializer = BlockSerializer.new(block.header.version, self.tx_versioner)
+        block_serialized = json.dumps(block_serializer.serialize(block))
+        block_hash_encoded = block.header.hash.hex().encode(encoding='UTF-8')
+
+        batch = self.store.WriteBatch()
+        batch.put(block_hash_encoded, block_serialized.encode("utf-8"))
+        batch.put(BlockChain.LAST_BLOCK_KEY, block_hash_encoded)
+        batch.put(BlockChain.TRANSACTION_COUNT_KEY,
+                  self.total_tx.to_bytes((self.total_tx.bit_length() + 7) // 8, byteorder='big'))
+        batch.put(
+            BlockChain.BLOCK_HEIGHT_KEY +
+            block.header.height.to_bytes(conf.BLOCK_HEIGHT_BYTES_LEN, byteorder='big'),
+            block_hash_encoded)
+        if votes:
+            batch.put(BlockChain.CONFIRM_INFO_KEY + block_hash_encoded,
+                      json.dumps(BlockVotes.serialize_votes(votes)).encode("utf-8"))
+        batch.write()
+
+        self.last_block = block
+
+    # ----- Block sync
+    def __request_blocks(self, src: str):
+        now = self.__scheduler.now
+        if self.__sync_requested_at is not None and now - self.__sync_requested_at < self.config.sync_retry_interval:
+            return
+
+        self.__sync_requested_at = now
+        self.__transport.send(self.node_id, src, BlockRequestMessage(self.block_height + 1))
+
+    def __on_block_request(self, src: str, from_height: int):
+        to_height = min(self.block_height, from_height + MAX_BLOCKS_IN_SYNC_REPLY - 1)
+        blocks = []
+        for height in range(from_height, to_height + 1):
+            block = self.find_block_by_height(height)
+            blocks.append((block, self.find_confirm_info_by_hash(block.header.hash)))
+
+        if blocks:
+            self.__transport.send(self.node_id, src, BlocksMessage(blocks))
+
+    def __on_blocks(self, blocks: List[Tuple[Block, list]]):
+        self.__sync_requested_at = None
+        for block, votes in blocks:
+            if block.header.height != self.block_height + 1 or block.header.prev_hash != self.last_block.header.hash:
+                continue
+
+            round_ = next((vote.round_ for vote in votes if vote), 0)
+            block_votes = BlockVotes(self.reps, conf.VOTING_RATIO, block.header.height, round_, block.header.hash,
+                                     votes)
+            if not block_votes.get_result():
+                util.logger.warning(f"{self.node_id} received block({block.header.height}) without quorum.")
+                return
+            self.__commit(block, votes)
+
+    # ----- Leader complain
+    def __arm_complain_timer(self):
+        if self.__complain_timer:
+            self.__complain_timer.cancel()
+        self.__complain_timer = self.__scheduler.call_later(self.config.complain_timeout, self.__complain)
+
+    def __complain(self):
+        self.__complain_timer = None
+        if not self.is_leader:
+            old_leader = ExternalAddress.fromhex_address(self.leader_id)
+            vote = LeaderVote.new(self.signer, self.__scheduler.timestamp(), self.block_height + 1, self.round,
+                                  old_leader, self.__next_rep(old_leader))
+            self.__transport.broadcast(self.node_id, ComplainMessage(vote))
+            self.__add_complain(vote)
+
+        if self.__complain_timer is None:
+            self.__arm_complain_timer()
+
+    def __on_complain(self, src: str, vote: LeaderVote):
+        if vote.block_height > self.block_height + 1:
+            # Peers complain the leader of the next height. This peer missed the votes of the last block.
+            self.__request_blocks(src)
+            return
+        self.__add_complain(vote)
+
+    def __add_complain(self, vote: LeaderVote):
+        if vote.block_height != self.block_height + 1 or vote.round_ != self.round:
+            return
+
+        leader_votes = self.__complain_votes.get(vote.round_)
+        if leader_votes is None:
+            leader_votes = LeaderVotes(self.reps, conf.LEADER_COMPLAIN_RATIO, vote.block_height, vote.round_,
+                                       ExternalAddress.fromhex_address(self.leader_id))
+            self.__complain_votes[vote.round_] = leader_votes
+
+        try:
+            leader_votes.add_vote(vote)
+        except (VoteError, RuntimeError) as e:
+            util.logger.debug(f"{self.node_id} ignores complain. {e}")
+            return
+
+        if leader_votes.is_completed():
+            new_leader = leader_votes.get_result()
+            if new_leader and new_leader != ExternalAddress.empty():
+                self.__new_round(self.round + 1, new_leader.hex_hx())
+
+    def __new_round(self, round_: int, leader_id: str):
+        util.logger.info(f"{self.node_id} height({self.block_height + 1}) round({round_}) leader({leader_id})")
+        self.round = round_
+        self.leader_id = leader_id
+
+        self.__cancel_proposal()
+        self.__discard_unconfirmed_block()
+
+        if self.is_leader:
+            self.__made_block_count = 0
+            self.__last_slot_time = None
+            self.__schedule_proposal()
+        self.__arm_complain_timer()
+
+    def __next_rep(self, rep: ExternalAddress) -> ExternalAddress:
+        return self.reps[(self.reps.index(rep) + 1) % len(self.reps)]
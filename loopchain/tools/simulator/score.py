@@ -0,0 +1,46 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Score invoker of the consensus simulator"""
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from loopchain.blockchain.blocks import Block
+
+
+class MockScoreInvoker:
+    """Invoke a block without the score service.
+
+    Every tx succeeds. Invoke takes `base_latency` plus `latency_per_tx` for each tx on the virtual clock.
+    """
+
+    def __init__(self, base_latency: float = 0.01, latency_per_tx: float = 0.0002):
+        self.base_latency = base_latency
+        self.latency_per_tx = latency_per_tx
+        self.invoke_count = 0
+
+    def latency(self, tx_count: int) -> float:
+        return self.base_latency + self.latency_per_tx * tx_count
+
+    def invoke(self, block: 'Block') -> dict:
+        self.invoke_count += 1
+        return {
+            tx_hash.hex(): {
+                "status": "0x1",
+                "blockHeight": hex(block.header.height),
+                "blockHash": block.header.hash.hex_0x(),
+                "txHash": tx_hash.hex_0x()
+            }
+            for tx_hash in block.body.transactions
+        }
@@ -0,0 +1,268 @@
+# Copyright 2019 ICON Foundation
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""In-process multi-node consensus simulator"""
+
+import hashlib
+import itertools
+import random
+import statistics
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loopchain import configure as conf
+from loopchain.blockchain.blocks import Block, BlockBuilder
+from loopchain.blockchain.transactions import Transaction, TransactionBuilder, TransactionVersioner, v3
+from loopchain.blockchain.types import ExternalAddress
+from loopchain.crypto.signature import Signer
+from loopchain.tools.simulator.network import EventScheduler, InMemoryTransport, TransportStats
+from loopchain.tools.simulator.node import NodeConfig, SimNode
+from loopchain.tools.simulator.score import MockScoreInvoker
+
+# Txs are submitted to nodes in every tick of this seconds.
+TX_SUBMIT_TICK = 0.1
+
+
+@dataclass(frozen=True)
+class _Commit:
+    time: float
+    tx_count: int
+    proposer: str
+
+
+@dataclass
+class SimulationReport:
+    duration: float
+    height: int
+    block_count: int
+    tx_count: int
+    block_times: List[float]
+    leader_recovery_times: List[float]
+    consistent: bool
+    vote_messages: int
+    vote_verifications: int
+    transport: TransportStats
+
+    @property
+    def blocks_per_second(self) -> float:
+        return self.block_count / self.duration if self.duration else 0.0
+
+    @property
+    def tx_per_second(self) -> float:
+        return self.tx_count / self.duration if self.duration else 0.0
+
+    @property
+    def mean_block_time(self) -> Optional[float]:
+        return statistics.mean(self.block_times) if self.block_times else None
+
+    def to_dict(self) -> dict:
+        return {
+            "duration": self.duration,
+            "height": self.height,
+            "block_count": self.block_count,
+            "tx_count": self.tx_count,
+            "blocks_per_second": self.blocks_per_second,
+            "tx_per_second": self.tx_per_second,
+            "mean_block_time": self.mean_block_time,
+            "leader_recovery_times": self.leader_recovery_times,
+            "consistent": self.consistent,
+            "vote_messages": self.vote_messages,
+            "vote_verifications": self.vote_verifications,
+            "transport": asdict(self.transport)
+        }
+
+
+class ConsensusSimulator:
+    """Run `SimNode`s of a channel in a process on the virtual clock.
+
+    Nodes talk through `InMemoryTransport` and invoke blocks by `MockScoreInvoker`,
+    so block time, tx throughput and leader complain recovery of the consensus model are measured
+    deterministically without RabbitMQ, gRPC and the score service. The same seed gives the same report.
+    `aggregated_votes` switches the model only. It is not read from the configure of a peer.
+    It does not run the consensus code of a peer. Measure a change of the code by `LeaderStackSimulator`.
+
+    Usage:
+        simulator = ConsensusSimulator(node_count=4, latency=0.05)
+        simulator.submit_txs(tps=500, duration=30)
+        simulator.crash_leader(at=10)
+        report = simulator.run(60)
+    """
+
+    def __init__(self,
+                 node_count: int = 4,
+                 *,
+                 seed: int = 0,
+                 latency: float = 0.05,
+                 jitter: float = 0.0,
+                 loss: float = 0.0,
+                 invoker: MockScoreInvoker = None,
+                 block_interval: float = None,
+                 complain_timeout: float = None,
+                 rebroadcast_interval: float = None,
+                 max_tx_size: int = None,
+                 blocks_per_leader: int = None,
+                 aggregated_votes: bool = False):
+        self.scheduler = EventScheduler()
+        self.transport = InMemoryTransport(self.scheduler, latency=latency, jitter=jitter, loss=loss, seed=seed)
+        self.invoker = invoker or MockScoreInvoker()
+
+        block_interval = conf.INTERVAL_BLOCKGENERATION if block_interval is None else block_interval
+        self.config = NodeConfig(
+            block_interval=block_interval,
+            complain_timeout=conf.TIMEOUT_FOR_LEADER_COMPLAIN if complain_timeout is None else complain_timeout,
+            rebroadcast_interval=block_interval if rebroadcast_interval is None else rebroadcast_interval,
+            sync_retry_interval=max(block_interval, latency * 4),
+            max_tx_size=conf.MAX_TX_SIZE_IN_BLOCK if max_tx_size is None else max_tx_size,
+            blocks_per_leader=conf.MAX_MADE_BLOCK_COUNT if blocks_per_leader is None else blocks_per_leader,
+            aggregated_votes=aggregated_votes
+        )
+
+        signers = [Signer.from_prikey(hashlib.sha256(f"node:{seed}:{index}".encode()).digest())
+                   for index in range(node_count)]
+        reps = [ExternalAddress.fromhex_address(signer.address) for signer in signers]
+        genesis_block = self.__new_genesis_block(reps[0])
+        self.nodes: List[SimNode] = [
+            SimNode(signer, reps, genesis_block, self.config, self.scheduler, self.transport, self.invoker,
+                    self.__on_commit)
+            for signer in signers
+        ]
+
+        self.__random = random.Random(seed)
+        self.__tx_versioner = TransactionVersioner()
+        self.__tx_signer = Signer.from_prikey(hashlib.sha256(f"tx:{seed}".encode()).digest())
+        self.__tx_nonce = itertools.count()
+        self.__commits: Dict[int, _Commit] = {}
+        self.__leader_failures: List[Tuple[float, str]] = []
+
+        for node in self.nodes:
+            node.start()
+
+    @property
+    def leader(self) -> SimNode:
+        """The leader in the view of the running node of the highest block"""
+        running_nodes = [node for node in self.nodes if node.is_running] or self.nodes
+        latest_node = max(running_nodes, key=lambda node: (node.block_height, node.round))
+        return next(node for node in self.nodes if node.node_id == latest_node.leader_id)
+
+    def run(self, duration: float) -> 'SimulationReport':
+        self.scheduler.run_until(self.scheduler.now + duration)
+        return self.report()
+
+    def report(self, since: float = 0.0) -> 'SimulationReport':
+        commits = [commit for _, commit in sorted(self.__commits.items()) if commit.time >= since]
+        commit_times = [commit.time for commit in commits]
+        return SimulationReport(
+            duration=self.scheduler.now - since,
+            height=max(self.__commits, default=0),
+            block_count=len(commits),
+            tx_count=sum(commit.tx_count for commit in commits),
+            block_times=[later - earlier for earlier, later in zip(commit_times, commit_times[1:])],
+            leader_recovery_times=self.__leader_recovery_times(),
+            consistent=self.is_consistent(),
+            vote_messages=sum(node.vote_message_count for node in self.nodes),
+            vote_verifications=sum(node.vote_verify_count for node in self.nodes),
+            transport=TransportStats(**asdict(self.transport.stats))
+        )
+
+    def is_consistent(self) -> bool:
+        """All nodes have the same blocks up to the lowest height of them."""
+        lowest_height = min(node.block_height for node in self.nodes)
+        for height in range(1, lowest_height + 1):
+            if len({node.find_block_hash_by_height(height) for node in self.nodes}) != 1:
+                return False
+        return True
+
+    def submit_txs(self, tps: float, duration: float, start: float = None):
+        """Submit `tps` txs per second to every running node during `duration` seconds from `start`."""
+        start = self.scheduler.now if start is None else start
+        tick_count = int(duration / TX_SUBMIT_TICK)
+        for tick in range(tick_count):
+            tx_count = int((tick + 1) * tps * TX_SUBMIT_TICK) - int(tick * tps * TX_SUBMIT_TICK)
+            self.scheduler.call_at(start + tick * TX_SUBMIT_TICK, self.__submit_txs, tx_count)
+
+    def crash(self, node_index: int, at: float = None):
+        self.scheduler.call_at(self.__time(at), self.__crash, node_index)
+
+    def crash_leader(self, at: float = None):
+        self.scheduler.call_at(self.__time(at), self.__crash, None)
+
+    def restart(self, node_index: int, at: float = None):
+        self.scheduler.call_at(self.__time(at), self.nodes[node_index].start)
+
+    def partition(self, *groups: Iterable[int], at: float = None):
+        """Split nodes by the groups of node indexes."""
+        self.scheduler.call_at(self.__time(at), self.__partition, [list(group) for group in groups], False)
+
+    def isolate_leader(self, at: float = None):
+        self.scheduler.call_at(self.__time(at), self.__partition, None, True)
+
+    def heal(self, at: float = None):
+        self.scheduler.call_at(self.__time(at), self.transport.heal)
+
+    def __time(self, at: Optional[float]) -> float:
+        return self.scheduler.now if at is None else at
+
+    def __crash(self, node_index: Optional[int]):
+        node = self.leader if node_index is None else self.nodes[node_index]
+        if node is self.leader:
+            self.__leader_failures.append((self.scheduler.now, node.node_id))
+        node.stop()
+
+    def __partition(self, groups: Optional[List[List[int]]], isolate_leader: bool):
+        if isolate_leader:
+            leader = self.leader
+            self.__leader_failures.append((self.scheduler.now, leader.node_id))
+            self.transport.partition([leader.node_id])
+        else:
+            self.transport.partition(*[[self.nodes[index].node_id for index in group] for group in groups])
+
+    def __submit_txs(self, tx_count: int):
+        for _ in range(tx_count):
+            tx = self.__new_tx()
+            for node in self.nodes:
+                if node.is_running:
+                    node.tx_queue[tx.hash.hex()] = tx
+
+    def __new_tx(self) -> Transaction:
+        tx_builder = TransactionBuilder.new(v3.version, None, self.__tx_versioner)
+        tx_builder.signer = self.__tx_signer
+        tx_builder.to_address = ExternalAddress(self.__random.getrandbits(160).to_bytes(ExternalAddress.size, 'big'))
+        tx_builder.value = 1
+        tx_builder.step_limit = 100_000
+        tx_builder.nid = 3
+        tx_builder.nonce = next(self.__tx_nonce)
+        tx_builder.fixed_timestamp = self.scheduler.timestamp()
+        return tx_builder.build()
+
+    def __on_commit(self, node: SimNode, block: Block):
+        if block.header.height not in self.__commits:
+            self.__commits[block.header.height] = _Commit(time=self.scheduler.now,
+                                                          tx_count=len(block.body.transactions),
+                                                          proposer=block.header.peer_id.hex_hx())
+
+    def __leader_recovery_times(self) -> List[float]:
+        recovery_times = []
+        for failed_time, failed_leader in self.__leader_failures:
+            recovered_time = min((commit.time for commit in self.__commits.values()
+                                  if commit.time > failed_time and commit.proposer != failed_leader), default=None)
+            if recovered_time is not None:
+                recovery_times.append(recovered_time - failed_time)
+        return recovery_times
+
+    @staticmethod
+    def __new_genesis_block(leader: ExternalAddress) -> Block:
+        block_builder = BlockBuilder.new(SimNode.BLOCK_VERSION, TransactionVersioner())
+        block_builder.height = 0
+        block_builder.fixed_timestamp = 0
+        block_builder.next_leader = leader
+        return block_builder.build()
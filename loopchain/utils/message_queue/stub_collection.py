@@ -12,9 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import itertools
 import logging
 
-from typing import Dict, TYPE_CHECKING
+from typing import Dict, List, TYPE_CHECKING
 from loopchain.components import SingletonMetaClass
 
 if TYPE_CHECKING:
@@ -33,6 +34,8 @@ class StubCollection(metaclass=SingletonMetaClass):
         self.channel_stubs: Dict[str, ChannelInnerStub] = {}
         self.channel_tx_creator_stubs: Dict[str, ChannelTxCreatorInnerStub] = {}
         self.channel_tx_receiver_stubs: Dict[str, ChannelTxReceiverInnerStub] = {}
+        self.channel_tx_receiver_worker_stubs: Dict[str, List[ChannelTxReceiverInnerStub]] = {}
+        self.__channel_tx_receiver_stub_cycles: Dict[str, itertools.cycle] = {}
         self.score_stubs: Dict[str, ScoreInnerStub] = {}
         self.icon_score_stubs: Dict[str, IconScoreInnerStub] = {}
 
@@ -71,17 +74,27 @@ class StubCollection(metaclass=SingletonMetaClass):
         return stub
 
     async def create_channel_tx_receiver_stub(self, channel_name):
+        """Create stubs for every tx receiver worker of the channel and return the stub of the first worker."""
         from loopchain import configure as conf
-        from loopchain.channel.channel_inner_service import ChannelTxReceiverInnerStub
+        from loopchain.channel.channel_inner_service import ChannelTxReceiverInnerService, ChannelTxReceiverInnerStub
 
-        queue_name = conf.CHANNEL_TX_RECEIVER_QUEUE_NAME_FORMAT.format(
-            channel_name=channel_name, amqp_key=self.amqp_key)
-        stub = ChannelTxReceiverInnerStub(self.amqp_target, queue_name, conf.AMQP_USERNAME, conf.AMQP_PASSWORD)
-        await stub.connect(conf.AMQP_CONNECTION_ATTEMPTS, conf.AMQP_RETRY_DELAY)
-        self.channel_tx_receiver_stubs[channel_name] = stub
+        stubs = []
+        for worker_index in range(ChannelTxReceiverInnerService.get_worker_count(channel_name)):
+            queue_name = ChannelTxReceiverInnerService.get_queue_name(channel_name, self.amqp_key, worker_index)
+            stub = ChannelTxReceiverInnerStub(self.amqp_target, queue_name, conf.AMQP_USERNAME, conf.AMQP_PASSWORD)
+            await stub.connect(conf.AMQP_CONNECTION_ATTEMPTS, conf.AMQP_RETRY_DELAY)
+            stubs.append(stub)
 
-        logging.debug(f"ChannelTxReceiverTasks : {channel_name}, Queue : {queue_name}")
-        return stub
+            logging.debug(f"ChannelTxReceiverTasks : {channel_name}, Queue : {queue_name}")
+
+        self.channel_tx_receiver_stubs[channel_name] = stubs[0]
+        self.channel_tx_receiver_worker_stubs[channel_name] = stubs
+        self.__channel_tx_receiver_stub_cycles[channel_name] = itertools.cycle(stubs)
+        return stubs[0]
+
+    def get_channel_tx_receiver_stub(self, channel_name) -> 'ChannelTxReceiverInnerStub':
+        """Get the stub of tx receiver workers in turn to distribute AddTxList requests."""
+        return next(self.__channel_tx_receiver_stub_cycles[channel_name])
 
     async def create_score_stub(self, channel_name, score_package_name):
         from loopchain import configure as conf
@@ -0,0 +1,78 @@
+import json
+import zlib
+
+from loopchain.baseservice.block_batch import CatchUpWindow, dumps_block_batch, loads_block_batch
+
+
+def _block(height: int) -> dict:
+    return {"version": "0.1a", "height": height, "confirmed_transaction_list": []}
+
+
+def _blocks(from_height: int, to_height: int):
+    return [(height, _block(height), f"votes of {height}") for height in range(from_height, to_height + 1)]
+
+
+def test_block_batch():
+    blocks = [
+        (0, None, zlib.compress(json.dumps(_block(0)).encode())),
+        (1, b'[{"vote": 1}]', zlib.compress(json.dumps(_block(1)).encode()))
+    ]
+
+    assert loads_block_batch(dumps_block_batch(blocks)) == [(0, _block(0), ""), (1, _block(1), '[{"vote": 1}]')]
+
+
+class TestCatchUpWindow:
+    def test_window(self):
+        catch_up = CatchUpWindow(11, batch_size=10, window=3)
+
+        # The first reply tells the max height.
+        assert catch_up.requests() == [(11, 10)]
+        assert catch_up.requests() == []
+
+        catch_up.receive(11, 45, _blocks(11, 20))
+        assert catch_up.requests() == [(21, 10), (31, 10)]
+
+        catch_up.receive(31, 45, _blocks(31, 40))
+        # Received blocks which are not taken yet hold the window.
+        assert catch_up.requests() == []
+        # Blocks are given in height order only.
+        assert catch_up.pop_ready(10) == [(block, votes) for _, block, votes in _blocks(11, 20)]
+        assert catch_up.requests() == [(41, 5)]
+
+        catch_up.receive(21, 45, _blocks(21, 30))
+        assert [block["height"] for block, _ in catch_up.pop_ready(20)] == list(range(21, 41))
+        assert not catch_up.done
+
+        catch_up.receive(41, 45, _blocks(41, 45))
+        assert catch_up.requests() == []
+        assert len(catch_up.pop_ready(40)) == 5
+        assert catch_up.done
+
+    def test_short_batch(self):
+        catch_up = CatchUpWindow(1, batch_size=10, window=2)
+        catch_up.requests()
+
+        catch_up.receive(1, 100, _blocks(1, 4))
+        assert catch_up.requests() == [(5, 6), (11, 10)]
+
+    def test_blocks_published_one_by_one(self):
+        catch_up = CatchUpWindow(1, batch_size=10, window=2)
+        catch_up.requests()
+        catch_up.receive(1, 10, _blocks(1, 10))
+
+        # Blocks 1 ~ 3 are added by the subscription of new blocks meanwhile.
+        assert [block["height"] for block, _ in catch_up.pop_ready(3)] == list(range(4, 11))
+        assert catch_up.done
+
+    def test_stop_by_empty_batch(self):
+        catch_up = CatchUpWindow(1, batch_size=10, window=2)
+        catch_up.requests()
+        catch_up.receive(1, 30, _blocks(1, 10))
+        catch_up.pop_ready(0)
+        assert catch_up.requests() == [(11, 10), (21, 10)]
+
+        catch_up.receive(11, 30, [])
+        assert not catch_up.done
+        catch_up.receive(21, 30, _blocks(21, 30))
+        assert catch_up.requests() == []
+        assert catch_up.done
@@ -0,0 +1,27 @@
+import pytest
+
+from loopchain.baseservice.broadcast_tree import get_fanout_children, get_fanout_order
+
+NODES = [f"hx{index:040x}" for index in range(22)]
+
+
+@pytest.mark.parametrize("fanout", [1, 3, 4, 21, 30])
+def test_every_node_has_a_parent(fanout):
+    root = NODES[5]
+    children = [child for node in NODES for child in get_fanout_children(NODES, root, node, 7, fanout)]
+
+    assert sorted(children) == sorted(node for node in NODES if node != root)
+    assert all(len(get_fanout_children(NODES, root, node, 7, fanout)) <= fanout for node in NODES)
+
+
+def test_direct_mesh():
+    root = NODES[0]
+    assert get_fanout_children(NODES, root, root, 1, 0) == get_fanout_order(NODES, root, 1)[1:]
+    assert get_fanout_children(NODES, root, NODES[1], 1, 0) == []
+
+
+def test_tree_changes_by_height():
+    root = NODES[0]
+    assert get_fanout_order(NODES, root, 1) == get_fanout_order(list(reversed(NODES)), root, 1)
+    assert get_fanout_order(NODES, root, 1) != get_fanout_order(NODES, root, 2)
+    assert get_fanout_children(NODES, root, "hx_unknown", 1, 4) == []
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from loopchain.baseservice.peer_outbox import PeerOutbox
+from loopchain.baseservice.peer_scoreboard import PeerScoreboard
+
+
+class _StubManager:
+    def __init__(self, delay=0.0, fail_times=0):
+        self.delay = delay
+        self.fail_times = fail_times
+        self.calls = []
+        self.blocked = threading.Event()
+        self.blocked.set()
+
+    def call(self, method_name, message, timeout=None, is_stub_reuse=True, is_raise=False):
+        self.blocked.wait()
+        time.sleep(self.delay)
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise ConnectionError("fail to send")
+        self.calls.append((method_name, message))
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def new_outbox():
+    PeerScoreboard.clear()
+    outboxes = []
+
+    def _new_outbox(target, stub_manager, **kwargs):
+        outbox = PeerOutbox(target, stub_manager, **kwargs)
+        outbox.start()
+        outboxes.append(outbox)
+        return outbox
+
+    yield _new_outbox
+
+    for outbox in outboxes:
+        outbox.stop()
+    PeerScoreboard.clear()
+
+
+class TestPeerOutbox:
+    def test_slow_peer_does_not_delay_others(self, new_outbox):
+        slow_stub = _StubManager(delay=0.5)
+        fast_stub = _StubManager()
+        outboxes = [new_outbox("slow", slow_stub), new_outbox("fast", fast_stub)]
+
+        start_time = time.monotonic()
+        for index in range(10):
+            for outbox in outboxes:
+                outbox.put("VoteUnconfirmedBlock", index, retry_times=0, timeout=1)
+
+        assert _wait_until(lambda: len(fast_stub.calls) == 10)
+        assert time.monotonic() - start_time < 0.5
+        assert fast_stub.calls == [("VoteUnconfirmedBlock", index) for index in range(10)]
+        assert outboxes[0].get_stats()["depth"] > 0
+
+    def test_drop_policy(self, new_outbox):
+        stub_manager = _StubManager()
+        stub_manager.blocked.clear()
+        outbox = new_outbox("peer0", stub_manager, max_size=4)
+        # The sender holds the first message until it is unblocked.
+        outbox.put("VoteUnconfirmedBlock", "vote0", 0, 1)
+        assert _wait_until(lambda: outbox.get_stats()["depth"] == 0)
+
+        outbox.put("AnnounceUnconfirmedBlock", "block1", 0, 1)
+        outbox.put("AddTxList", "txs1", 0, 1)
+        outbox.put("AnnounceUnconfirmedBlock", "block1", 0, 1)  # a rebroadcast replaces the stale one
+        outbox.put("VoteUnconfirmedBlock", "vote1", 0, 1)
+        outbox.put("AnnounceUnconfirmedBlock", "block2", 0, 1)
+        assert outbox.get_stats()["depth"] == 4
+
+        # Stale blocks first, and then the oldest txs.
+        assert outbox.put("VoteUnconfirmedBlock", "vote2", 0, 1)
+        assert outbox.put("VoteUnconfirmedBlock", "vote3", 0, 1)
+        assert outbox.put("VoteUnconfirmedBlock", "vote4", 0, 1)
+        # Messages to keep are not dropped for others.
+        assert not outbox.put("AddTxList", "txs2", 0, 1)
+
+        stub_manager.blocked.set()
+        assert _wait_until(lambda: outbox.get_stats()["sent"] == 5)
+        assert [message for _, message in stub_manager.calls] == ["vote0", "vote1", "vote2", "vote3", "vote4"]
+        assert outbox.get_stats()["dropped"] == {"AnnounceUnconfirmedBlock": 3, "AddTxList": 2}
+
+    def test_retry_with_backoff(self, new_outbox):
+        stub_manager = _StubManager(fail_times=2)
+        outbox = new_outbox("peer0", stub_manager, backoff=0.05)
+
+        start_time = time.monotonic()
+        outbox.put("ComplainLeader", "complain", retry_times=2, timeout=1)
+        assert _wait_until(lambda: outbox.get_stats()["sent"] == 1)
+        # 0.05 and 0.1 seconds of backoff
+        assert time.monotonic() - start_time >= 0.15
+        assert PeerScoreboard().to_dict()["peer0"]["errors"] == 2
+
+        stub_manager.fail_times = 1
+        outbox.put("ComplainLeader", "complain", retry_times=0, timeout=1)
+        assert _wait_until(lambda: outbox.get_stats()["failed"] == 1)
@@ -0,0 +1,76 @@
+import pytest
+
+from loopchain import configure as conf
+from loopchain.baseservice.peer_scoreboard import PeerScoreboard
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+@pytest.fixture
+def scoreboard(clock):
+    PeerScoreboard.clear()
+    yield PeerScoreboard(clock)
+    PeerScoreboard.clear()
+
+
+class TestPeerScoreboard:
+    def test_record(self, scoreboard):
+        scoreboard.record_success("peer0", 0.1, served_blocks=10)
+        scoreboard.record_success("peer0", 0.2)
+        scoreboard.record_failure("peer0", TimeoutError())
+        scoreboard.record_failure("peer0", ValueError())
+
+        score = scoreboard.to_dict()["peer0"]
+        assert score["requests"] == 4
+        assert score["errors"] == 2
+        assert score["timeouts"] == 1
+        assert score["rtt"] == pytest.approx(0.1 * (1 - conf.PEER_SCORE_WEIGHT) + 0.2 * conf.PEER_SCORE_WEIGHT)
+        assert score["blocks_per_second"] == pytest.approx(100)
+        assert 0 < score["error_rate"] < 1
+        assert score["cooldown"] == 0
+
+    def test_exponential_cooldown(self, scoreboard, clock):
+        for _ in range(conf.PEER_FAILURES_TO_COOLDOWN - 1):
+            scoreboard.record_failure("peer0")
+        assert scoreboard.is_available("peer0")
+
+        cooldowns = []
+        for _ in range(3):
+            scoreboard.record_failure("peer0")
+            cooldowns.append(scoreboard.to_dict()["peer0"]["cooldown"])
+        assert cooldowns == [conf.PEER_COOLDOWN_BASE, conf.PEER_COOLDOWN_BASE * 2, conf.PEER_COOLDOWN_BASE * 4]
+        assert not scoreboard.is_available("peer0")
+
+        for _ in range(20):
+            scoreboard.record_failure("peer0")
+        assert scoreboard.to_dict()["peer0"]["cooldown"] == conf.PEER_COOLDOWN_MAX
+
+        clock.now += conf.PEER_COOLDOWN_MAX
+        assert scoreboard.is_available("peer0")
+
+        scoreboard.record_failure("peer0")
+        scoreboard.record_success("peer0", 0.1)
+        assert scoreboard.is_available("peer0")
+
+    def test_sort_targets(self, scoreboard):
+        scoreboard.record_success("slow", 1.0)
+        scoreboard.record_success("fast", 0.01)
+        for _ in range(conf.PEER_FAILURES_TO_COOLDOWN):
+            scoreboard.record_failure("dead")
+        scoreboard.record_success("flaky", 0.01)
+        scoreboard.record_failure("flaky")
+        scoreboard.record_failure("flaky")
+
+        assert scoreboard.sort_targets(["dead", "flaky", "slow", "unknown", "fast"]) == \
+            ["unknown", "fast", "slow", "flaky", "dead"]
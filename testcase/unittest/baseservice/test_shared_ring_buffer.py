@@ -0,0 +1,222 @@
+import multiprocessing as mp
+import queue
+import statistics
+import threading
+import time
+
+import pytest
+
+from loopchain.baseservice.shared_ring_buffer import SharedRingBuffer
+from loopchain.blockchain.transactions import TransactionEnvelope, TransactionVerifier, TransactionVersioner
+from loopchain.blockchain.transactions import v3
+from loopchain.channel.channel_inner_service import _TxSharedRingBuffer
+from loopchain.crypto.hashing.hash_generator import HashGenerator
+from testcase.unittest.blockchain.conftest import TxFactory
+
+tx_versioner = TransactionVersioner()
+
+
+def _produce(ring_buffer: SharedRingBuffer, frame_count: int):
+    for i in range(frame_count):
+        ring_buffer.put(i.to_bytes(4, "big") * 50)
+    ring_buffer.close()
+
+
+class TestSharedRingBuffer:
+    def test_put_and_get_all(self):
+        ring_buffer = SharedRingBuffer(capacity=1024)
+        frames = [b"a" * 10, b"b" * 20, b"c" * 30]
+        for frame in frames:
+            ring_buffer.put(frame)
+
+        assert ring_buffer.get_all(timeout=0) == frames
+        assert ring_buffer.usage() == 0
+
+    def test_frames_wrap_around(self):
+        ring_buffer = SharedRingBuffer(capacity=100)
+        for i in range(50):
+            frame = bytes([i]) * 30
+            ring_buffer.put(frame)
+            assert ring_buffer.get_all(timeout=0) == [frame]
+
+    def test_put_raises_full_if_no_space_until_timeout(self):
+        ring_buffer = SharedRingBuffer(capacity=100)
+        ring_buffer.put(b"a" * 40)
+        ring_buffer.put(b"b" * 40)
+
+        with pytest.raises(queue.Full):
+            ring_buffer.put(b"c" * 40, timeout=0.1)
+
+        ring_buffer.get_all(timeout=0)
+        ring_buffer.put(b"c" * 40, timeout=0.1)
+
+    def test_put_too_large_frame(self):
+        ring_buffer = SharedRingBuffer(capacity=100)
+
+        with pytest.raises(ValueError):
+            ring_buffer.put(b"a" * 100)
+
+    def test_get_all_returns_empty_after_close(self):
+        ring_buffer = SharedRingBuffer(capacity=100)
+        ring_buffer.put(b"a")
+        ring_buffer.close()
+
+        assert ring_buffer.get_all() == [b"a"]
+        assert ring_buffer.get_all() == []
+
+    def test_between_processes(self):
+        frame_count = 2000
+        ctx = mp.get_context("spawn")
+        ring_buffer = SharedRingBuffer(capacity=10000, ctx=ctx)
+
+        process = ctx.Process(target=_produce, args=(ring_buffer, frame_count))
+        process.start()
+
+        frames = []
+        while True:
+            received = ring_buffer.get_all(timeout=10)
+            if not received:
+                break
+            frames.extend(received)
+        process.join()
+
+        assert len(frames) == frame_count
+        for i, frame in enumerate(frames):
+            assert frame == i.to_bytes(4, "big") * 50
+
+
+@pytest.fixture
+def tx_envelope_list(tx_factory: TxFactory):
+    tx_envelope_list = []
+    for _ in range(100):
+        tx = tx_factory(v3.version)
+        tv = TransactionVerifier.new(tx.version, tx.type(), tx_versioner)
+        tv.verify(tx)
+        tx_envelope_list.append(TransactionEnvelope.seal(tx, tx_versioner))
+    return tx_envelope_list
+
+
+def _produce_tx_envelope_lists(tx_queue, tx_envelope_list, batch_count, events, put_times_queue):
+    ready_event, start_event, done_event = events
+    ready_event.set()
+    start_event.wait()
+    put_times = []
+    for _ in range(batch_count):
+        put_times.append(time.monotonic())
+        tx_queue.put(tx_envelope_list)
+    put_times_queue.put(put_times)
+    # The exit of the process does not take CPU from the consumer until it gets all txs.
+    done_event.wait()
+
+
+class TestTxSharedRingBuffer:
+    def test_transfer_tx_envelope_list(self, tx_envelope_list):
+        tx_queue = _TxSharedRingBuffer(tx_versioner, capacity=1024 * 1024)
+        tx_queue.put(tx_envelope_list)
+        tx_queue.put(tx_envelope_list[:10])
+
+        received = tx_queue.get()
+        assert len(received) == len(tx_envelope_list) + 10
+        for sent, tx_envelope in zip(tx_envelope_list, received):
+            assert tx_envelope.hash == sent.hash
+            assert tx_envelope.size == sent.size
+            assert tx_envelope.is_trustable(tx_versioner)
+            assert tx_envelope.tx.raw_data == sent.tx.raw_data
+
+        tx_queue.put(None)
+        assert tx_queue.get() is None
+
+    def test_not_hash_txs_again(self, tx_envelope_list, monkeypatch):
+        generated = []
+        generate_hash = HashGenerator.generate_hash
+        monkeypatch.setattr(HashGenerator, "generate_hash",
+                            lambda self, origin_data: generated.append(origin_data) or generate_hash(self, origin_data))
+
+        tx_queue = _TxSharedRingBuffer(tx_versioner, capacity=1024 * 1024)
+        tx_queue.put(tx_envelope_list)
+        received = tx_queue.get()
+
+        assert [tx_envelope.tx.hash for tx_envelope in received] == [sent.hash for sent in tx_envelope_list]
+        assert generated == []
+
+    def test_skip_known_txs_before_decoding(self, tx_envelope_list, monkeypatch):
+        known_hashes = {tx_envelope.hash for tx_envelope in tx_envelope_list[:60]}
+        tx_queue = _TxSharedRingBuffer(tx_versioner, capacity=1024 * 1024, is_known_tx=known_hashes.__contains__)
+        tx_queue.put(tx_envelope_list)
+
+        decoded = []
+        from_bytes = TransactionEnvelope.from_bytes
+        monkeypatch.setattr(TransactionEnvelope, "from_bytes",
+                            lambda record, versioner: decoded.append(record) or from_bytes(record, versioner))
+
+        received = tx_queue.get()
+        assert [tx_envelope.hash for tx_envelope in received] == [sent.hash for sent in tx_envelope_list[60:]]
+        assert len(decoded) == 40
+
+    def test_drop_broken_frame(self, tx_envelope_list):
+        tx_queue = _TxSharedRingBuffer(tx_versioner, capacity=1024 * 1024)
+        ring_buffer: SharedRingBuffer = tx_queue._TxSharedRingBuffer__ring_buffer
+        tx_queue.put(tx_envelope_list[:10])
+        frame, = ring_buffer.get_all(timeout=0)
+
+        # A byte of a tx hash is broken.
+        broken_frame = bytearray(frame)
+        broken_frame[_TxSharedRingBuffer._frame_header.size + _TxSharedRingBuffer._record_header.size] ^= 0xff
+        ring_buffer.put(bytes(broken_frame))
+        ring_buffer.put(frame)
+
+        received = tx_queue.get()
+        assert [tx_envelope.hash for tx_envelope in received] == [sent.hash for sent in tx_envelope_list[:10]]
+
+    def test_backpressure(self, tx_envelope_list):
+        tx_queue = _TxSharedRingBuffer(tx_versioner, capacity=100 * 1024)
+        tx_queue.put(tx_envelope_list)
+
+        with pytest.raises(queue.Full):
+            for _ in range(100):
+                tx_queue.put(tx_envelope_list, timeout=0)
+
+    @pytest.mark.parametrize("transport", ["mp_queue", "shared_memory"])
+    def test_benchmark_transport(self, benchmark, tx_envelope_list, transport):
+        """Compare throughput and latency of transports with 5000 txs in batches of 100.
+        A tx receiver process puts txs, and this process gets them as the channel process does.
+        """
+        batch_count = 50
+        batch_size = len(tx_envelope_list)
+        ctx = mp.get_context("spawn")
+        latencies = []
+        producers = []
+
+        def _setup():
+            if transport == "mp_queue":
+                tx_queue = ctx.Queue()
+            else:
+                tx_queue = _TxSharedRingBuffer(tx_versioner, capacity=32 * 1024 * 1024)
+            ready_event, start_event, done_event = ctx.Event(), ctx.Event(), ctx.Event()
+            put_times_queue = ctx.Queue()
+            producer = ctx.Process(target=_produce_tx_envelope_lists,
+                                   args=(tx_queue, tx_envelope_list, batch_count,
+                                         (ready_event, start_event, done_event), put_times_queue))
+            producer.start()
+            producers.append((producer, done_event))
+            ready_event.wait()
+            return (tx_queue, start_event, put_times_queue), {}
+
+        def _transfer(tx_queue, start_event, put_times_queue):
+            start_event.set()
+            received_times = []
+            received_count = 0
+            while received_count < batch_count * batch_size:
+                received_count += len(tx_queue.get())
+                received_times.extend([time.monotonic()] * (received_count // batch_size - len(received_times)))
+
+            put_times = put_times_queue.get()
+            latencies.extend(received - put for put, received in zip(put_times, received_times))
+
+        benchmark.pedantic(_transfer, setup=_setup, rounds=5)
+        for producer, done_event in producers:
+            done_event.set()
+            producer.join()
+        benchmark.extra_info["txs_per_second"] = batch_count * batch_size / benchmark.stats.stats.mean
+        benchmark.extra_info["latency_mean"] = statistics.mean(latencies)
+        benchmark.extra_info["latency_max"] = max(latencies)
@@ -0,0 +1,65 @@
+import json
+import threading
+
+import pytest
+
+from loopchain.baseservice.span_recorder import Span, SpanRecorder
+
+
+def _span(name: str, height: int, duration: float = 0.1) -> Span:
+    return Span(name=name, height=height, start=1_500_000_000 + height, duration=duration,
+                thread_id=threading.get_ident())
+
+
+class TestSpanRecorder:
+    def test_sum_phases_by_height(self):
+        recorder = SpanRecorder(max_heights=10)
+        recorder.record(_span("makeup_block", 1, 0.1))
+        recorder.record(_span("score_invoke", 1, 0.2))
+        recorder.record(_span("wait_for_voting", 1, 0.3))
+        recorder.record(_span("wait_for_voting", 1, 0.4))
+
+        heights = recorder.get_heights()
+        assert [height["height"] for height in heights] == [1]
+        assert heights[0]["phases"] == {"makeup_block": 0.1, "score_invoke": 0.2, "wait_for_voting": 0.7}
+
+    def test_keep_last_heights(self):
+        recorder = SpanRecorder(max_heights=3)
+        for height in (2, 1, 3, 5, 4):
+            recorder.record(_span("add_block", height))
+
+        assert [height["height"] for height in recorder.get_heights()] == [3, 4, 5]
+        assert [height["height"] for height in recorder.get_heights(2)] == [4, 5]
+        assert recorder.get_spans(1) is None
+
+    def test_span_context(self):
+        recorder = SpanRecorder(max_heights=10)
+        with pytest.raises(ValueError):
+            with recorder.span("score_invoke", 7):
+                raise ValueError
+
+        span, = recorder.get_spans(7)
+        assert span.name == "score_invoke"
+        assert span.duration >= 0
+
+    def test_disabled(self):
+        recorder = SpanRecorder(max_heights=0)
+        with recorder.span("add_block", 1):
+            pass
+
+        assert not recorder.enabled
+        assert recorder.get_heights() == []
+
+    def test_write_chrome_trace(self, tmp_path):
+        trace_path = tmp_path / "consensus_trace.json"
+        recorder = SpanRecorder(max_heights=10, trace_path=str(trace_path))
+        recorder.record(_span("makeup_block", 1, 0.1))
+        recorder.record(_span("add_block", 1, 0.25))
+        recorder.close()
+
+        # The file is JSON array format of Chrome trace, which does not need a closing bracket.
+        events = json.loads(trace_path.read_text().rstrip().rstrip(",") + "]")
+        assert events == recorder.to_chrome_trace()["traceEvents"]
+        assert events[1]["ph"] == "X"
+        assert events[1]["dur"] == 250_000
+        assert events[1]["args"] == {"height": 1}
@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+from loopchain.baseservice import stub_pool
+from loopchain.baseservice.peer_scoreboard import PeerScoreboard
+from loopchain.baseservice.stub_pool import PeerStubPool
+
+# seconds to respond by target. None never responds.
+DELAYS = {"peer0": 0.01, "peer1": None, "peer2": 0.02, "peer3": 0.01}
+
+
+class _StubManager:
+    executor = ThreadPoolExecutor(8)
+    created = []
+
+    def __init__(self, target, stub_type, ssl_auth_type=None, options=None):
+        self.target = target
+        self.options = options
+        self.created.append(target)
+
+    def call_async(self, method_name, message, call_back=None, timeout=None):
+        delay = DELAYS[self.target]
+        if delay is None:
+            return Future()
+
+        def _call():
+            time.sleep(delay)
+            return f"{method_name} of {self.target}"
+        return self.executor.submit(_call)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(stub_pool, "StubManager", _StubManager)
+    _StubManager.created = []
+    PeerStubPool.clear()
+    PeerScoreboard.clear()
+    yield PeerStubPool()
+    PeerStubPool.clear()
+    PeerScoreboard.clear()
+
+
+class TestPeerStubPool:
+    def test_reuse_stub_manager(self, pool):
+        stub_managers = []
+
+        def _get():
+            stub_managers.append(pool.get("peer0"))
+
+        threads = [threading.Thread(target=_get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(set(map(id, stub_managers))) == 1
+        assert _StubManager.created == ["peer0"]
+        assert PeerStubPool().get("peer0") is stub_managers[0]
+        assert ("grpc.keepalive_permit_without_calls", 1) in stub_managers[0].options
+
+        pool.discard("peer0")
+        assert pool.get("peer0") is not stub_managers[0]
+
+    def test_call_all_in_deadline(self, pool):
+        start_time = time.monotonic()
+        responses = pool.call_all(DELAYS.keys(), "GetStatus", None, timeout=0.2)
+        elapsed = time.monotonic() - start_time
+
+        assert responses == {target: f"GetStatus of {target}" for target in ("peer0", "peer2", "peer3")}
+        # The dead peer costs the deadline once, not a timeout for each peer.
+        assert elapsed < 0.4
+
+        scores = PeerScoreboard().to_dict()
+        assert scores["peer1"]["timeouts"] == 1
+        assert scores["peer0"]["errors"] == 0 and scores["peer0"]["rtt"] > 0
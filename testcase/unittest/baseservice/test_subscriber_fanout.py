@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import pytest
+
+from loopchain.baseservice.subscriber_fanout import BlockAnnouncement, SubscriberFanout
+
+CITIZEN_COUNT = 1000
+
+
+def _block_serialized(height: int) -> dict:
+    return {
+        "version": "0.3",
+        "height": height,
+        "transactions": [{"from": f"hx{index:040x}", "to": f"hx{height:040x}", "value": hex(index)}
+                         for index in range(100)]
+    }
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestSubscriberFanout:
+    def test_share_payload(self):
+        async def _test():
+            fanout = SubscriberFanout(max_queue_size=2)
+            queues = [fanout.subscribe(f"citizen{index}") for index in range(3)]
+            assert fanout.subscribe("citizen0") is queues[0]
+
+            announcement = BlockAnnouncement(1, json.dumps(_block_serialized(1)), b"")
+            assert fanout.publish(announcement) == []
+            return [queue.get_nowait() for queue in queues], announcement
+
+        payloads, announcement = _run(_test())
+        assert all(payload is announcement for payload in payloads)
+
+    def test_drop_slow_subscriber(self):
+        async def _test():
+            fanout = SubscriberFanout(max_queue_size=2)
+            fast_queue = fanout.subscribe("fast")
+            slow_queue = fanout.subscribe("slow")
+
+            dropped = []
+            for height in range(4):
+                dropped += fanout.publish(height)
+                fast_queue.get_nowait()
+
+            assert dropped == ["slow"]
+            assert "slow" not in fanout and "fast" in fanout
+            assert slow_queue.qsize() == 2
+
+            # It subscribes again to resync.
+            assert fanout.subscribe("slow") is not slow_queue
+            fanout.unsubscribe("fast")
+            assert len(fanout) == 1
+
+        _run(_test())
+
+    def test_wake_waiter_on_unsubscribe(self):
+        async def _test():
+            fanout = SubscriberFanout(max_queue_size=2)
+            waiter = asyncio.ensure_future(fanout.subscribe("citizen0").get())
+            await asyncio.sleep(0)
+            assert not waiter.done()
+
+            # The citizen is disconnected, and it reconnects with the same id.
+            fanout.unsubscribe("citizen0")
+            assert await asyncio.wait_for(waiter, timeout=1) is None
+            new_waiter = asyncio.ensure_future(fanout.subscribe("citizen0").get())
+            fanout.publish(1)
+            assert await asyncio.wait_for(new_waiter, timeout=1) == 1
+
+            # A queue which is full is left as it is.
+            full_queue = fanout.subscribe("citizen1")
+            fanout.publish(2)
+            fanout.publish(3)
+            fanout.unsubscribe("citizen1")
+            assert [full_queue.get_nowait() for _ in range(full_queue.qsize())] == [2, 3]
+
+        _run(_test())
+
+    @pytest.mark.parametrize("announcer", ["per_citizen", "fanout"])
+    def test_benchmark_announce(self, benchmark, announcer):
+        """Announce a block to 1000 citizens.
+        `per_citizen` serializes the block for each citizen as `announce_new_block` did.
+        """
+        block_serialized = _block_serialized(1)
+
+        async def _per_citizen():
+            condition = asyncio.Condition()
+
+            async def _citizen():
+                async with condition:
+                    await condition.wait()
+                return json.dumps(block_serialized)
+
+            citizens = [asyncio.ensure_future(_citizen()) for _ in range(CITIZEN_COUNT)]
+            await asyncio.sleep(0)
+            async with condition:
+                condition.notify_all()
+            return await asyncio.gather(*citizens)
+
+        async def _fanout():
+            fanout = SubscriberFanout(max_queue_size=4)
+
+            async def _citizen(queue):
+                announcement = await queue.get()
+                return announcement.block_json
+
+            citizens = [asyncio.ensure_future(_citizen(fanout.subscribe(f"citizen{index}")))
+                        for index in range(CITIZEN_COUNT)]
+            await asyncio.sleep(0)
+            fanout.publish(BlockAnnouncement(1, json.dumps(block_serialized), b""))
+            return await asyncio.gather(*citizens)
+
+        payloads = benchmark(lambda: _run(_per_citizen() if announcer == "per_citizen" else _fanout()))
+        assert len(payloads) == CITIZEN_COUNT
+        benchmark.extra_info["citizens"] = CITIZEN_COUNT
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from loopchain.baseservice.histogram import Histogram
+from loopchain.baseservice.tx_batcher import TxBatcher
+from loopchain.baseservice.tx_item_helper import TxItem
+
+channel = "icon_dex"
+
+
+def _tx_item(index: int) -> TxItem:
+    return TxItem(json.dumps({"version": "0x3", "nonce": hex(index), "data": "a" * 100}), channel)
+
+
+class TestHistogram:
+    def test_observe(self):
+        histogram = Histogram((1, 10, 100))
+        for value in (0.5, 1, 5, 50, 500):
+            histogram.observe(value)
+
+        assert histogram.to_dict() == {
+            "buckets": {"1": 2, "10": 1, "100": 1, "+Inf": 1},
+            "count": 5,
+            "sum": 556.5
+        }
+
+
+class TestTxBatcher:
+    def test_item_size_is_wire_size(self):
+        tx_items = [_tx_item(i) for i in range(10)]
+        batcher = TxBatcher(channel, max_count=100)
+        for tx_item in tx_items:
+            batcher.add(tx_item)
+
+        message = batcher.pop_message()
+        channel_field_size = 2 + len(channel)
+        assert message.ByteSize() == sum(len(tx_item) for tx_item in tx_items) + channel_field_size
+
+    def test_ready_by_count(self):
+        batcher = TxBatcher(channel, max_count=4)
+        for i in range(3):
+            batcher.add(_tx_item(i))
+        assert not batcher.is_ready()
+
+        batcher.add(_tx_item(3))
+        assert batcher.is_ready()
+        assert batcher.get_flush_delay() == 0
+
+    def test_ready_by_size(self):
+        tx_item = _tx_item(0)
+        batcher = TxBatcher(channel, max_size=len(tx_item) * 2, max_count=100)
+        batcher.add(tx_item)
+        assert not batcher.is_ready()
+
+        batcher.add(_tx_item(1))
+        assert batcher.is_ready()
+
+    def test_no_delay_if_empty(self):
+        batcher = TxBatcher(channel)
+
+        assert batcher.get_flush_delay() is None
+        assert batcher.pop_message() is None
+
+    def test_latency_budget_shrinks_as_queue_gets_deeper(self):
+        batcher = TxBatcher(channel, max_count=10, max_delay=0.1, min_delay=0.01)
+        budgets = []
+        for i in range(9):
+            batcher.add(_tx_item(i))
+            budgets.append(batcher.get_latency_budget())
+
+        assert budgets == sorted(budgets, reverse=True)
+        assert budgets[0] == pytest.approx(0.09)
+        assert budgets[-1] == pytest.approx(0.01)
+        assert batcher.get_flush_delay() <= budgets[-1]
+
+    def test_pop_message_in_limits(self):
+        tx_item = _tx_item(0)
+        batcher = TxBatcher(channel, max_size=len(tx_item) * 3, max_count=100)
+        for i in range(5):
+            batcher.add(_tx_item(i))
+
+        assert len(batcher.pop_message().tx_list) == 3
+        assert len(batcher.pop_message().tx_list) == 2
+        assert len(batcher) == 0
+        assert batcher.size == 0
+
+        stats = batcher.get_stats()
+        assert stats["batch_size"]["count"] == 2
+        assert stats["batch_size"]["sum"] == 5
+        assert stats["batch_delay"]["count"] == 2
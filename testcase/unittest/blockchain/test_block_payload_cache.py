@@ -0,0 +1,130 @@
+import os
+
+import pytest
+
+from loopchain.blockchain.block_payload_cache import BlockPayloadCache, PayloadType
+from loopchain.blockchain.blocks import BlockBuilder
+from loopchain.blockchain.transactions import TransactionVersioner
+from loopchain.blockchain.types import Hash32
+
+
+def _new_block(height, timestamp=0, confirm_prev_block=True):
+    block_builder = BlockBuilder.new("0.1a", TransactionVersioner())
+    block_builder.height = height
+    block_builder.prev_hash = Hash32(os.urandom(Hash32.size))
+    block_builder.signer = pytest.SIGNERS[0]
+    block_builder.fixed_timestamp = timestamp
+    block_builder.confirm_prev_block = confirm_prev_block
+    return block_builder.build()
+
+
+class _Encoder:
+    def __init__(self, size=10):
+        self.size = size
+        self.count = 0
+
+    def __call__(self) -> bytes:
+        self.count += 1
+        return os.urandom(self.size)
+
+
+class TestBlockPayloadCache:
+    def test_encode_once(self):
+        cache = BlockPayloadCache(max_size=1024)
+        block = _new_block(1)
+        encode = _Encoder()
+
+        payload = cache.get(PayloadType.dumped, block, encode)
+        assert cache.get(PayloadType.dumped, block, encode) == payload
+        assert encode.count == 1
+
+        cache.get(PayloadType.serialized_json, block, encode)
+        assert encode.count == 2
+
+    def test_confirm_prev_block_is_part_of_key(self):
+        cache = BlockPayloadCache(max_size=1024)
+        block = _new_block(1, confirm_prev_block=True)
+        block_without_confirm = _new_block(1, confirm_prev_block=False)
+        object.__setattr__(block_without_confirm, "header", block.header)
+        encode = _Encoder()
+
+        cache.get(PayloadType.dumped, block, encode)
+        cache.get(PayloadType.dumped, block_without_confirm, encode)
+        assert encode.count == 2
+        assert len(cache) == 2
+
+    def test_drop_replaced_blocks(self):
+        cache = BlockPayloadCache(max_size=1024)
+        replaced, block, lower_block = _new_block(2, timestamp=0), _new_block(2, timestamp=1), _new_block(1)
+        cache.get(PayloadType.dumped, lower_block, _Encoder())
+        cache.get(PayloadType.dumped, replaced, _Encoder())
+        cache.get(PayloadType.serialized_json, replaced, _Encoder())
+
+        cache.get(PayloadType.dumped, block, _Encoder())
+        assert len(cache) == 2
+        assert cache.size == 20
+
+        cache.confirm(1, Hash32(os.urandom(Hash32.size)))
+        assert len(cache) == 1
+
+    def test_bounded_by_size(self):
+        cache = BlockPayloadCache(max_size=100)
+        blocks = [_new_block(height) for height in range(1, 6)]
+        for block in blocks:
+            cache.get(PayloadType.dumped, block, _Encoder(30))
+
+        assert cache.size == 90
+        assert len(cache) == 3
+
+        encode = _Encoder(30)
+        cache.get(PayloadType.dumped, blocks[0], encode)
+        assert encode.count == 1
+
+        too_large = _Encoder(101)
+        cache.get(PayloadType.dumped, blocks[1], too_large)
+        assert too_large.count == 1
+        assert cache.size == 90
+
+    def test_get_by_key(self):
+        cache = BlockPayloadCache(max_size=1024)
+        block = _new_block(1)
+        encode = _Encoder()
+
+        payload = cache.get_by_key(PayloadType.dumped, 1, block.header.hash, None, encode)
+        assert cache.get_by_key(PayloadType.dumped, 1, block.header.hash, None, encode) == payload
+        assert encode.count == 1
+
+        cache.get(PayloadType.dumped, block, encode)
+        assert encode.count == 2
+
+        cache.get_by_key(PayloadType.dumped, 1, Hash32(os.urandom(Hash32.size)), None, encode)
+        assert len(cache) == 1
+
+    def test_size_of_str_in_bytes(self):
+        cache = BlockPayloadCache(max_size=100)
+        block, replaced = _new_block(1, timestamp=0), _new_block(1, timestamp=1)
+
+        cache.get(PayloadType.serialized_json, block, lambda: "가" * 10)
+        assert cache.size == 30
+
+        # A str which is short in characters but larger than the cache in bytes is not cached.
+        cache.get(PayloadType.serialized_json, replaced, lambda: "가" * 40)
+        assert cache.size == 30 and len(cache) == 1
+
+    def test_drop_replaced_blocks_by_height(self):
+        cache = BlockPayloadCache(max_size=1024)
+        blocks = [_new_block(height) for height in range(1, 11)]
+        for block in blocks:
+            cache.get(PayloadType.dumped, block, _Encoder())
+
+        cache.confirm(5, Hash32(os.urandom(Hash32.size)))
+        cache.confirm(5, Hash32(os.urandom(Hash32.size)))
+        assert len(cache) == 9
+        assert cache.size == 90
+
+        # Evicted payloads are not dropped again by their height.
+        small_cache = BlockPayloadCache(max_size=20)
+        for block in blocks[:3]:
+            small_cache.get(PayloadType.dumped, block, _Encoder())
+        small_cache.confirm(1, Hash32(os.urandom(Hash32.size)))
+        assert small_cache.size == 20 and len(small_cache) == 2
@@ -0,0 +1,98 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from loopchain import configure as conf
+from loopchain.blockchain import CandidateBlocks
+from loopchain.blockchain.blocks import BlockBuilder
+from loopchain.blockchain.transactions import TransactionVersioner
+from loopchain.blockchain.types import Hash32
+from loopchain.blockchain.votes.v0_1a import BlockVote
+
+REPS_COUNT = 4
+
+
+def _new_block(height, prev_hash, timestamp=0):
+    block_builder = BlockBuilder.new("0.1a", TransactionVersioner())
+    block_builder.height = height
+    block_builder.prev_hash = prev_hash
+    block_builder.signer = pytest.SIGNERS[0]
+    block_builder.fixed_timestamp = timestamp
+    return block_builder.build()
+
+
+def _new_vote(height, block_hash, signer_index=0):
+    return BlockVote.new(pytest.SIGNERS[signer_index], 0, height, 0, block_hash)
+
+
+@pytest.fixture
+def blockchain():
+    return SimpleNamespace(block_height=0)
+
+
+@pytest.fixture
+def candidate_blocks(blockchain):
+    return CandidateBlocks(blockchain)
+
+
+class TestCandidateBlocksIndex:
+    def test_remove_block_drops_siblings_and_lower_heights(self, blockchain, candidate_blocks):
+        prev_hash = Hash32(os.urandom(Hash32.size))
+        siblings = [_new_block(1, prev_hash, timestamp) for timestamp in range(3)]
+        for block in siblings:
+            candidate_blocks.add_block(block, pytest.REPS[:REPS_COUNT])
+
+        blockchain.block_height = 1
+        next_block = _new_block(2, siblings[0].header.hash)
+        candidate_blocks.add_block(next_block, pytest.REPS[:REPS_COUNT])
+        future_hash = Hash32(os.urandom(Hash32.size))
+        candidate_blocks.add_vote(_new_vote(3, future_hash))
+        assert candidate_blocks.get_stats()["backlog"] == 5
+
+        candidate_blocks.remove_block(siblings[0].header.hash)
+        assert set(candidate_blocks.blocks) == {next_block.header.hash, future_hash}
+
+        candidate_blocks.remove_block(next_block.header.hash)
+        assert set(candidate_blocks.blocks) == {future_hash}
+
+        stats = candidate_blocks.get_stats()
+        assert stats["backlog"] == 1
+        assert stats["heights"] == 1
+        assert stats["lowest_height"] == stats["highest_height"] == 3
+
+    def test_empty_vote_goes_to_candidates_of_its_height(self, candidate_blocks):
+        prev_hash = Hash32(os.urandom(Hash32.size))
+        blocks = [_new_block(1, prev_hash, timestamp) for timestamp in range(2)]
+        for block in blocks:
+            candidate_blocks.add_block(block, pytest.REPS[:REPS_COUNT])
+        candidate_blocks.add_vote(_new_vote(2, Hash32(os.urandom(Hash32.size))))
+
+        candidate_blocks.add_vote(_new_vote(1, Hash32.empty()))
+        for block in blocks:
+            votes = candidate_blocks.get_votes(block.header.hash, 0)
+            assert votes.get_count(False) == 1
+
+    def test_evict_lowest_heights(self, candidate_blocks, monkeypatch):
+        monkeypatch.setattr(conf, "MAX_CANDIDATE_BLOCKS", 10)
+        for height in range(1, 8):
+            for signer_index in range(2):
+                candidate_blocks.add_vote(_new_vote(height, Hash32(os.urandom(Hash32.size)), signer_index))
+
+        stats = candidate_blocks.get_stats()
+        assert stats["backlog"] <= 10
+        assert stats["evicted"] == 14 - stats["backlog"]
+        assert stats["highest_height"] == 7
+        assert all(candidate.height >= stats["lowest_height"] for candidate in candidate_blocks.blocks.values())
+
+    def test_do_not_evict_height_of_new_candidate(self, candidate_blocks, monkeypatch):
+        monkeypatch.setattr(conf, "MAX_CANDIDATE_BLOCKS", 2)
+        for height in (5, 6):
+            candidate_blocks.add_vote(_new_vote(height, Hash32(os.urandom(Hash32.size))))
+
+        block = _new_block(1, Hash32(os.urandom(Hash32.size)))
+        candidate_blocks.add_block(block, pytest.REPS[:REPS_COUNT])
+
+        assert block.header.hash in candidate_blocks.blocks
+        assert candidate_blocks.get_stats()["lowest_height"] == 1
+        assert candidate_blocks.get_stats()["backlog"] == 2
@@ -0,0 +1,128 @@
+import asyncio
+import statistics
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from loopchain.blockchain import CandidateBlocks
+from loopchain.blockchain.blocks import BlockBuilder
+from loopchain.blockchain.transactions import TransactionVersioner
+from loopchain.blockchain.types import Hash32
+from loopchain.blockchain.votes.v0_1a import BlockVote
+
+REP_COUNT = 22
+
+
+@pytest.fixture
+def block():
+    block_builder = BlockBuilder.new("0.1a", TransactionVersioner())
+    block_builder.height = 0
+    block_builder.prev_hash = None
+    return block_builder.build()
+
+
+@pytest.fixture
+def candidate_blocks(block):
+    candidate_blocks = CandidateBlocks(SimpleNamespace(block_height=block.header.height - 1))
+    candidate_blocks.add_block(block, pytest.REPS[:REP_COUNT])
+    return candidate_blocks
+
+
+def _new_votes(block, agree=True):
+    block_hash = block.header.hash if agree else Hash32.empty()
+    return [BlockVote.new(signer, 0, block.header.height, 0, block_hash) for signer in pytest.SIGNERS[:REP_COUNT]]
+
+
+class TestQuorumFuture:
+    def test_resolved_when_quorum_reached(self, block, candidate_blocks):
+        loop = asyncio.new_event_loop()
+        future = candidate_blocks.wait_for_quorum(block.header.hash, 0, loop)
+        votes = candidate_blocks.get_votes(block.header.hash, 0)
+
+        for vote in _new_votes(block):
+            candidate_blocks.add_vote(vote)
+            loop.run_until_complete(asyncio.sleep(0, loop=loop))
+            assert future.done() == votes.is_completed()
+
+        assert future.result().get_result() is True
+        loop.close()
+
+    def test_resolved_when_failed(self, block, candidate_blocks):
+        loop = asyncio.new_event_loop()
+        future = candidate_blocks.wait_for_quorum(block.header.hash, 0, loop)
+
+        for vote in _new_votes(block, agree=False):
+            candidate_blocks.add_vote(vote)
+        result = loop.run_until_complete(asyncio.wait_for(future, timeout=1, loop=loop))
+
+        assert result.get_result() is False
+        loop.close()
+
+    def test_resolved_at_once_if_already_completed(self, block, candidate_blocks):
+        for vote in _new_votes(block):
+            candidate_blocks.add_vote(vote)
+
+        loop = asyncio.new_event_loop()
+        future = candidate_blocks.wait_for_quorum(block.header.hash, 0, loop)
+        result = loop.run_until_complete(asyncio.wait_for(future, timeout=1, loop=loop))
+
+        assert result.get_result() is True
+        loop.close()
+
+    def test_votes_before_block(self, block):
+        candidate_blocks = CandidateBlocks(SimpleNamespace(block_height=block.header.height - 1))
+        for vote in _new_votes(block):
+            candidate_blocks.add_vote(vote)
+
+        loop = asyncio.new_event_loop()
+        future = candidate_blocks.wait_for_quorum(block.header.hash, 0, loop)
+        assert not future.done()
+
+        candidate_blocks.add_block(block, pytest.REPS[:REP_COUNT])
+        result = loop.run_until_complete(asyncio.wait_for(future, timeout=1, loop=loop))
+
+        assert result.get_result() is True
+        loop.close()
+
+    def test_cancelled_when_block_removed(self, block, candidate_blocks):
+        loop = asyncio.new_event_loop()
+        future = candidate_blocks.wait_for_quorum(block.header.hash, 0, loop)
+
+        candidate_blocks.remove_block(block.header.hash)
+        loop.run_until_complete(asyncio.sleep(0, loop=loop))
+
+        assert future.cancelled()
+        loop.close()
+
+
+def test_benchmark_vote_to_commit_latency(benchmark, block):
+    """Latency from adding the vote which reaches the quorum to the wake up of the waiting leader."""
+    votes = _new_votes(block)
+    latencies = []
+
+    def _vote_to_commit():
+        candidate_blocks = CandidateBlocks(SimpleNamespace(block_height=block.header.height - 1))
+        candidate_blocks.add_block(block, pytest.REPS[:REP_COUNT])
+        loop = asyncio.new_event_loop()
+        future = candidate_blocks.wait_for_quorum(block.header.hash, 0, loop)
+        quorum = candidate_blocks.get_votes(block.header.hash, 0).quorum
+        completed_times = []
+
+        def _add_votes():
+            for i, vote in enumerate(votes):
+                if i == quorum - 1:
+                    completed_times.append(time.perf_counter())
+                candidate_blocks.add_vote(vote)
+
+        voter = threading.Thread(target=_add_votes)
+        voter.start()
+        loop.run_until_complete(asyncio.wait_for(future, timeout=5, loop=loop))
+        latencies.append(time.perf_counter() - completed_times[0])
+        voter.join()
+        loop.close()
+
+    benchmark(_vote_to_commit)
+    benchmark.extra_info["latency_mean"] = statistics.mean(latencies)
+    benchmark.extra_info["latency_max"] = max(latencies)
@@ -0,0 +1,89 @@
+import os
+import threading
+
+import pytest
+
+from loopchain.blockchain.blocks import BlockBuilder, BlockVerifier
+from loopchain.blockchain.transactions import TransactionVersioner, v3
+from loopchain.blockchain.types import Hash32
+from loopchain.crypto.signature import SignVerifier
+from loopchain.peer.block_fetcher import BlockFetcher
+from testcase.unittest.blockchain.conftest import TxFactory
+
+tx_versioner = TransactionVersioner()
+
+BLOCK_COUNT = 20
+TX_COUNT = 20
+
+
+def _new_chain(tx_factory: TxFactory):
+    blocks = []
+    prev_hash = Hash32(os.urandom(Hash32.size))
+    for height in range(1, BLOCK_COUNT + 1):
+        block_builder = BlockBuilder.new("0.1a", tx_versioner)
+        block_builder.height = height
+        block_builder.prev_hash = prev_hash
+        block_builder.signer = pytest.SIGNERS[0]
+        for _ in range(TX_COUNT):
+            tx = tx_factory(v3.version)
+            block_builder.transactions[tx.hash] = tx
+        block = block_builder.build()
+        blocks.append(block)
+        prev_hash = block.header.hash
+    return blocks
+
+
+def _verify_ahead(response):
+    block = response[0]
+    BlockVerifier.new(block.header.version, tx_versioner, raise_exceptions=False).verify_transactions_loosely(block)
+
+
+def _replay(blocks, verify):
+    """Replay the chain as block height sync does. Score invoke and add_block are left out."""
+    def _request(peer_stub, height, count):
+        return [(block,) for block in blocks[height - 1:height - 1 + count]]
+
+    fetcher = BlockFetcher([("peer0", "stub0")], _request, 1, len(blocks), window=8, batch_size=4, workers=2,
+                           verify=verify, verify_workers=2)
+    try:
+        for _, _, (block,) in fetcher:
+            block_verifier = BlockVerifier.new(block.header.version, tx_versioner)
+            block_verifier.verify_transactions_loosely(block)
+    finally:
+        fetcher.close()
+
+
+@pytest.fixture
+def verified_signatures(monkeypatch):
+    """[(tx hash, thread), ...] of signatures verified"""
+    verified = []
+    verify_hash = SignVerifier.verify_hash
+
+    def _verify_hash(self, origin_data, signature):
+        verified.append((origin_data, threading.current_thread()))
+        return verify_hash(self, origin_data, signature)
+
+    monkeypatch.setattr(SignVerifier, "verify_hash", _verify_hash)
+    return verified
+
+
+def test_verify_ahead_caches_results(tx_factory: TxFactory):
+    chain = _new_chain(tx_factory)
+    _replay(chain, _verify_ahead)
+
+    for block in chain:
+        for tx in block.body.transactions.values():
+            assert getattr(tx, "_cache_verify_hash") is True
+            assert getattr(tx, "_cache_verify_signature") is True
+
+
+@pytest.mark.parametrize("verify", [None, _verify_ahead])
+def test_verify_each_tx_once(tx_factory: TxFactory, verified_signatures, verify):
+    chain = _new_chain(tx_factory)
+    _replay(chain, verify)
+
+    tx_hashes = [tx.hash for block in chain for tx in block.body.transactions.values()]
+    assert sorted(tx_hash for tx_hash, _ in verified_signatures) == sorted(tx_hashes)
+    # Verified ahead, nothing is left to the ordered stage.
+    in_order = [thread for _, thread in verified_signatures if thread is threading.current_thread()]
+    assert len(in_order) == (len(tx_hashes) if verify is None else 0)
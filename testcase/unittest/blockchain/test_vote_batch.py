@@ -0,0 +1,81 @@
+import dataclasses
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from loopchain.blockchain import CandidateBlocks
+from loopchain.blockchain.blocks import BlockBuilder
+from loopchain.blockchain.transactions import TransactionVersioner
+from loopchain.blockchain.types import Hash32
+from loopchain.blockchain.votes.v0_1a import BlockVote
+
+REPS_COUNT = 4
+
+
+def _new_block(height):
+    block_builder = BlockBuilder.new("0.1a", TransactionVersioner())
+    block_builder.height = height
+    block_builder.prev_hash = Hash32(os.urandom(Hash32.size))
+    block_builder.signer = pytest.SIGNERS[0]
+    block_builder.fixed_timestamp = 0
+    return block_builder.build()
+
+
+def _new_votes(block, signer_indexes):
+    return [BlockVote.new(pytest.SIGNERS[index], 0, block.header.height, 0, block.header.hash)
+            for index in signer_indexes]
+
+
+@pytest.fixture
+def candidate_blocks():
+    return CandidateBlocks(SimpleNamespace(block_height=0))
+
+
+class TestAddVotes:
+    def test_add_same_batch_again(self, candidate_blocks):
+        block = _new_block(1)
+        candidate_blocks.add_block(block, pytest.REPS[:REPS_COUNT])
+        votes = _new_votes(block, range(REPS_COUNT))
+
+        assert candidate_blocks.add_votes(votes[:2]) == 2
+        assert candidate_blocks.add_votes(votes + votes[:1]) == 2
+        assert candidate_blocks.add_votes(votes) == 0
+
+        block_votes = candidate_blocks.blocks[block.header.hash].votes[0]
+        assert block_votes.votes == votes
+        assert block_votes.get_result()
+
+    def test_skip_invalid_signature(self, candidate_blocks):
+        block = _new_block(1)
+        candidate_blocks.add_block(block, pytest.REPS[:REPS_COUNT])
+        vote, other_vote = _new_votes(block, [1, 2])
+        forged_vote = dataclasses.replace(vote, signature=other_vote.signature)
+
+        assert candidate_blocks.add_votes([forged_vote, other_vote]) == 2
+
+        block_votes = candidate_blocks.blocks[block.header.hash].votes[0]
+        assert block_votes.votes[1] is None
+        assert block_votes.votes[2] == other_vote
+
+    def test_buffer_votes_before_block(self, candidate_blocks):
+        block = _new_block(1)
+        votes = _new_votes(block, range(REPS_COUNT))
+        candidate_blocks.add_votes(votes)
+        candidate_blocks.add_votes(votes)
+
+        candidate_blocks.add_block(block, pytest.REPS[:REPS_COUNT])
+        assert candidate_blocks.blocks[block.header.hash].votes[0].votes == votes
+
+    def test_has_vote_only_taken(self, candidate_blocks):
+        block = _new_block(1)
+        candidate_blocks.add_block(block, pytest.REPS[:REPS_COUNT])
+        vote, other_vote = _new_votes(block, [1, 2])
+        forged_vote = dataclasses.replace(vote, signature=other_vote.signature)
+        no_right_vote = _new_votes(block, [REPS_COUNT])[0]
+
+        candidate_blocks.add_votes([forged_vote, other_vote, no_right_vote])
+
+        assert [candidate_blocks.has_vote(vote) for vote in (forged_vote, other_vote, no_right_vote)] == \
+            [False, True, False]
+        assert not candidate_blocks.has_vote(_new_votes(_new_block(2), [0])[0])
@@ -1,6 +1,8 @@
+import json
+
 import pytest
 
-from loopchain.blockchain.transactions import Transaction, TransactionVersioner
+from loopchain.blockchain.transactions import Transaction, TransactionSerializer, TransactionVersioner
 from loopchain.blockchain.transactions import genesis, v2, v3
 from testcase.unittest.blockchain.conftest import TxFactory
 
@@ -22,6 +24,29 @@ class TestTransactions:
         tx.size(versioner=TransactionVersioner())
         assert getattr(tx, _size_attr_name_)
 
+    def test_raw_json_is_encoded_once(self, tx_factory: TxFactory, tx_version: str):
+        from loopchain.blockchain.transactions.transaction import _raw_json_attr_name_
+
+        tx_versioner = TransactionVersioner()
+        tx = tx_factory(tx_version)
+        assert not hasattr(tx, _raw_json_attr_name_)
+
+        ts = TransactionSerializer.new(tx.version, tx.type(), tx_versioner)
+        raw_json = tx.raw_json(tx_versioner)
+        assert json.loads(raw_json) == ts.to_raw_data(tx)
+        assert tx.raw_json(tx_versioner) is raw_json
+
+    def test_raw_json_keeps_original_string(self, tx_factory: TxFactory, tx_version: str):
+        tx_versioner = TransactionVersioner()
+        tx = tx_factory(tx_version)
+        ts = TransactionSerializer.new(tx.version, tx.type(), tx_versioner)
+
+        original_json = json.dumps(ts.to_raw_data(tx), indent=2)
+        received_tx = ts.from_(json.loads(original_json))
+        received_tx.set_raw_json(original_json)
+
+        assert received_tx.raw_json(tx_versioner) is original_json
+
     def test_is_signed(self, tx_factory: TxFactory, tx_version: str):
         tx: Transaction = tx_factory(tx_version)
 
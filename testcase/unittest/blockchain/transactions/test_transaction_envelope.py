@@ -0,0 +1,124 @@
+import json
+import pickle
+import queue
+
+import pytest
+
+from loopchain.blockchain.transactions import TransactionEnvelope, TransactionSerializer
+from loopchain.blockchain.transactions import TransactionVerifier, TransactionVersioner
+from loopchain.blockchain.transactions import v2, v3
+from loopchain.channel.channel_inner_service import ChannelTxReceiverInnerTask
+from loopchain.protos import loopchain_pb2
+from testcase.unittest.blockchain.conftest import TxFactory
+
+tx_versioner = TransactionVersioner()
+verified_attrs = ["_cache_verify_hash", "_cache_verify_signature"]
+
+
+def _transfer(tx_envelope: TransactionEnvelope) -> TransactionEnvelope:
+    """Simulate mp.Queue between tx receiver and channel process."""
+    return pickle.loads(pickle.dumps(tx_envelope))
+
+
+@pytest.mark.parametrize("tx_version", [
+    v2.version, v3.version
+])
+class TestTransactionEnvelope:
+    def _verified_tx(self, tx_factory: TxFactory, tx_version):
+        tx = tx_factory(tx_version)
+        tv = TransactionVerifier.new(tx.version, tx.type(), tx_versioner)
+        tv.verify(tx)
+        return tx
+
+    def test_seal_verified_tx(self, tx_version, tx_factory: TxFactory):
+        tx = self._verified_tx(tx_factory, tx_version)
+        tx_envelope = TransactionEnvelope.seal(tx, tx_versioner)
+
+        assert tx_envelope.verified
+        assert tx_envelope.hash == tx.hash
+        assert tx_envelope.size == tx.size(tx_versioner)
+        assert tx_envelope.is_trustable(tx_versioner)
+
+    def test_seal_not_verified_tx(self, tx_version, tx_factory: TxFactory):
+        tx = tx_factory(tx_version)
+        tx_envelope = TransactionEnvelope.seal(tx, tx_versioner)
+
+        assert not tx_envelope.verified
+        assert not tx_envelope.is_trustable(tx_versioner)
+
+    def test_open_trusted_envelope_restores_results(self, tx_version, tx_factory: TxFactory):
+        tx = self._verified_tx(tx_factory, tx_version)
+        tx_envelope = _transfer(TransactionEnvelope.seal(tx, tx_versioner))
+
+        opened_tx = tx_envelope.open(tx_versioner, trust=True)
+        assert opened_tx.hash == tx.hash
+        for attr_name in verified_attrs:
+            assert getattr(opened_tx, attr_name) is True
+
+    def test_open_without_trust_drops_results(self, tx_version, tx_factory: TxFactory):
+        tx = self._verified_tx(tx_factory, tx_version)
+        tx_envelope = _transfer(TransactionEnvelope.seal(tx, tx_versioner))
+
+        opened_tx = tx_envelope.open(tx_versioner, trust=False)
+        for attr_name in verified_attrs:
+            assert not hasattr(opened_tx, attr_name)
+
+    def test_open_with_different_verifier_version_drops_results(self, tx_version, tx_factory: TxFactory):
+        tx = self._verified_tx(tx_factory, tx_version)
+        tx_envelope = _transfer(TransactionEnvelope.seal(tx, tx_versioner))
+
+        other_versioner = TransactionVersioner()
+        other_versioner.hash_generator_versions[tx_version] += 1
+        assert not tx_envelope.is_trustable(other_versioner)
+
+        opened_tx = tx_envelope.open(other_versioner, trust=True)
+        for attr_name in verified_attrs:
+            assert not hasattr(opened_tx, attr_name)
+
+
+def _make_tx_send_list(tx_factory: TxFactory, tx_count: int, channel_name="icon_dex"):
+    tx_send_list = []
+    for _ in range(tx_count):
+        tx = tx_factory(v3.version)
+        ts = TransactionSerializer.new(tx.version, tx.type(), tx_versioner)
+        tx_send_list.append(loopchain_pb2.TxSend(tx_json=json.dumps(ts.to_raw_data(tx)), channel=channel_name))
+    return loopchain_pb2.TxSendList(channel=channel_name, tx_list=tx_send_list)
+
+
+def test_add_tx_list_skips_duplicated_tx_json(tx_factory: TxFactory):
+    request = _make_tx_send_list(tx_factory, 10)
+
+    tx_queue = queue.Queue()
+    task = ChannelTxReceiverInnerTask(tx_versioner, tx_queue)
+    task._ChannelTxReceiverInnerTask__nid = 3
+
+    task.add_tx_list(request)
+    tx_envelope_list = tx_queue.get_nowait()
+    assert len(tx_envelope_list) == 10
+    for tx_envelope, tx_item in zip(tx_envelope_list, request.tx_list):
+        assert tx_envelope.tx.raw_json(tx_versioner) == tx_item.tx_json
+
+    task.add_tx_list(request)
+    assert tx_queue.empty()
+
+
+@pytest.mark.parametrize("trust", [True, False])
+def test_benchmark_add_tx_list(benchmark, tx_factory: TxFactory, trust):
+    """Benchmark txs/second from AddTxList request to the transaction verified in channel process."""
+    tx_count = 100
+    request = _make_tx_send_list(tx_factory, tx_count)
+
+    tx_queue = queue.Queue()
+
+    def _add_tx_list():
+        # New task for each round, not to skip txs as duplicated.
+        task = ChannelTxReceiverInnerTask(tx_versioner, tx_queue)
+        task._ChannelTxReceiverInnerTask__nid = 3
+        task.add_tx_list(request)
+        for tx_envelope in tx_queue.get():
+            tx = _transfer(tx_envelope).open(tx_versioner, trust=trust)
+            tv = TransactionVerifier.new(tx.version, tx.type(), tx_versioner)
+            tv.verify(tx)
+
+    benchmark(_add_tx_list)
+    benchmark.extra_info["txs_per_second"] = tx_count / benchmark.stats.stats.mean
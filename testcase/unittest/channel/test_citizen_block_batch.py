@@ -0,0 +1,119 @@
+import inspect
+import json
+import os
+import zlib
+from types import SimpleNamespace
+
+import pytest
+
+from loopchain import configure as conf
+from loopchain.baseservice.block_batch import CatchUpWindow, loads_block_batch
+from loopchain.blockchain.blocks import BlockBuilder, BlockSerializer
+from loopchain.blockchain.transactions import TransactionVersioner
+from loopchain.blockchain.types import Hash32
+from loopchain.channel.channel_inner_service import ChannelInnerTask
+from loopchain.crypto.signature import Signer
+from loopchain.protos import message_code
+
+tx_versioner = TransactionVersioner()
+signer = Signer.new()
+
+BLOCK_COUNT = 10
+
+
+class _BlockChain:
+    """Blocks stored as BlockChain keeps them in DB"""
+    def __init__(self):
+        self.block_versioner = SimpleNamespace(get_version=lambda height: "0.1a")
+        self.last_unconfirmed_block = None
+        self.blocks_serialized = {}
+        self.__hashes = {}
+        self.__block_data = {}
+
+        prev_hash = Hash32(os.urandom(Hash32.size))
+        for height in range(1, BLOCK_COUNT + 1):
+            block_builder = BlockBuilder.new("0.1a", tx_versioner)
+            block_builder.height = height
+            block_builder.prev_hash = prev_hash
+            block_builder.signer = signer
+            block_builder.fixed_timestamp = height
+            block = block_builder.build()
+            prev_hash = block.header.hash
+
+            block_serialized = BlockSerializer.new("0.1a", tx_versioner).serialize(block)
+            self.blocks_serialized[height] = block_serialized
+            self.__hashes[height] = block.header.hash
+            self.__block_data[block.header.hash] = json.dumps(block_serialized).encode()
+
+    @property
+    def block_height(self):
+        return BLOCK_COUNT
+
+    def find_block_hash_by_height(self, height):
+        return self.__hashes.get(height)
+
+    def find_block_data_by_hash(self, block_hash):
+        return self.__block_data.get(block_hash)
+
+    def find_confirm_info_by_hash(self, block_hash):
+        return f'["votes of {block_hash.hex()}"]'.encode()
+
+    def block_data_dumps(self, block_height, block_hash, block_data):
+        return zlib.compress(block_data)
+
+
+@pytest.fixture
+def blockchain():
+    return _BlockChain()
+
+
+@pytest.fixture
+def citizen_block_batch(blockchain):
+    channel_inner_task = ChannelInnerTask(None)
+    channel_inner_task._blockchain = blockchain
+    # The handler without the wrapper of the message queue
+    citizen_block_batch = inspect.unwrap(ChannelInnerTask.citizen_block_batch)
+    return lambda from_height, count: citizen_block_batch(channel_inner_task, from_height, count)
+
+
+class TestCitizenBlockBatch:
+    def test_batch_by_count(self, citizen_block_batch, blockchain, monkeypatch):
+        monkeypatch.setattr(conf, "CITIZEN_BLOCK_BATCH_SIZE", 4)
+        response_code, max_block_height, batch = citizen_block_batch(3, 100)
+
+        assert response_code == message_code.Response.success
+        assert max_block_height == BLOCK_COUNT
+        blocks = loads_block_batch(batch)
+        assert [height for height, _, _ in blocks] == [3, 4, 5, 6]
+        assert [block for _, block, _ in blocks] == [blockchain.blocks_serialized[height] for height in range(3, 7)]
+        assert json.loads(blocks[0][2]) == [f"votes of {blockchain.find_block_hash_by_height(3).hex()}"]
+
+    def test_no_block_beyond_height(self, citizen_block_batch):
+        response_code, max_block_height, batch = citizen_block_batch(BLOCK_COUNT + 1, 10)
+
+        assert response_code == message_code.Response.fail_wrong_block_height
+        assert loads_block_batch(batch) == []
+
+    def test_catch_up_by_batches_cut_by_size(self, citizen_block_batch, blockchain, monkeypatch):
+        # A batch has 2 blocks at most by its size.
+        block_size = len(zlib.compress(blockchain.find_block_data_by_hash(blockchain.find_block_hash_by_height(1))))
+        monkeypatch.setattr(conf, "CITIZEN_BLOCK_BATCH_MAX_BYTES", int(block_size * 2.5) + 200)
+
+        catch_up = CatchUpWindow(1, batch_size=4, window=2)
+        citizen_height = 0
+        added = []
+        batch_sizes = []
+        while not catch_up.done:
+            requests = catch_up.requests()
+            assert requests
+            for from_height, count in requests:
+                _, max_block_height, batch = citizen_block_batch(from_height, count)
+                blocks = loads_block_batch(batch)
+                batch_sizes.append(len(blocks))
+                catch_up.receive(from_height, max_block_height, blocks)
+            for block, _ in catch_up.pop_ready(citizen_height):
+                added.append(block)
+                citizen_height += 1
+
+        assert added == [blockchain.blocks_serialized[height] for height in range(1, BLOCK_COUNT + 1)]
+        assert max(batch_sizes) == 2
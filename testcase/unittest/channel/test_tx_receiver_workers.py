@@ -0,0 +1,42 @@
+import pytest
+
+from loopchain import configure as conf
+from loopchain.channel.channel_inner_service import ChannelTxReceiverInnerService
+
+channel_name = "icon_dex"
+amqp_key = "amqp_key"
+
+
+class TestTxReceiverWorkers:
+    @pytest.fixture(autouse=True)
+    def channel_option(self, monkeypatch):
+        channel_option = {}
+        monkeypatch.setattr(conf, "CHANNEL_OPTION", {channel_name: channel_option})
+        return channel_option
+
+    def test_worker_count_default(self, monkeypatch):
+        monkeypatch.setattr(conf, "CHANNEL_TX_RECEIVER_WORKERS", 3)
+
+        assert ChannelTxReceiverInnerService.get_worker_count(channel_name) == 3
+
+    def test_worker_count_by_channel_option(self, channel_option):
+        channel_option["tx_receiver_workers"] = 4
+
+        assert ChannelTxReceiverInnerService.get_worker_count(channel_name) == 4
+
+    def test_worker_count_at_least_one(self, channel_option):
+        channel_option["tx_receiver_workers"] = 0
+
+        assert ChannelTxReceiverInnerService.get_worker_count(channel_name) == 1
+
+    def test_first_worker_uses_legacy_queue_name(self):
+        queue_name = ChannelTxReceiverInnerService.get_queue_name(channel_name, amqp_key)
+
+        assert queue_name == conf.CHANNEL_TX_RECEIVER_QUEUE_NAME_FORMAT.format(channel_name=channel_name,
+                                                                              amqp_key=amqp_key)
+
+    def test_queue_names_are_unique_per_worker(self):
+        queue_names = {ChannelTxReceiverInnerService.get_queue_name(channel_name, amqp_key, worker_index)
+                       for worker_index in range(4)}
+
+        assert len(queue_names) == 4
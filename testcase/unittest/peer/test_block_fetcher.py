@@ -0,0 +1,152 @@
+import threading
+import time
+
+import pytest
+
+from loopchain.baseservice.peer_scoreboard import PeerScoreboard
+from loopchain.peer.block_fetcher import BlockFetcher
+
+PEERS = [("peer0", "stub0"), ("peer1", "stub1"), ("peer2", "stub2")]
+
+
+class _Request:
+    def __init__(self, failing_stubs=(), max_height=100, short_stubs=()):
+        self.failing_stubs = set(failing_stubs)
+        self.short_stubs = set(short_stubs)  # stubs which give a block at a time
+        self.max_height = max_height
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def __call__(self, stub, height, count):
+        with self.lock:
+            self.requests.append((stub, height, count))
+        # Later heights arrive earlier to check the order.
+        time.sleep(0.001 * (height % 3))
+        if stub in self.failing_stubs or height > self.max_height:
+            raise ConnectionError(f"{stub} fails")
+        if stub in self.short_stubs:
+            count = 1
+        return [f"block{height}" for height in range(height, min(height + count, self.max_height + 1))]
+
+
+def _fetch_all(fetcher):
+    try:
+        return [(height, response) for height, _, response in fetcher]
+    finally:
+        fetcher.close()
+
+
+class TestBlockFetcher:
+    def test_yield_in_height_order(self):
+        request = _Request()
+        fetcher = BlockFetcher(PEERS, request, 1, 30, window=8, workers=4)
+
+        assert _fetch_all(fetcher) == [(height, f"block{height}") for height in range(1, 31)]
+        assert {stub for stub, _, _ in request.requests} == {"stub0", "stub1", "stub2"}
+        assert fetcher.get_stats()["blocks"] == 30
+
+    def test_failover_to_other_peers(self):
+        request = _Request(failing_stubs={"stub1"})
+        fetcher = BlockFetcher(PEERS, request, 1, 30, window=4, workers=2, max_peer_failures=2)
+
+        assert [height for height, _ in _fetch_all(fetcher)] == list(range(1, 31))
+        assert len([stub for stub, _, _ in request.requests if stub == "stub1"]) <= 3
+        assert fetcher.get_stats()["peer_blocks"]["peer1"] == 0
+
+    def test_raise_if_no_peer_has_block(self):
+        request = _Request(max_height=5)
+        fetcher = BlockFetcher(PEERS, request, 1, 10, window=4, workers=2, retry_times=3)
+
+        fetched = []
+        with pytest.raises(ConnectionError):
+            for height, _, _ in fetcher:
+                fetched.append(height)
+        fetcher.close()
+        assert fetched == [1, 2, 3, 4, 5]
+
+    def test_extend(self):
+        fetcher = BlockFetcher(PEERS, _Request(), 1, 3, window=2, workers=2)
+
+        fetched = []
+        try:
+            for height, _, _ in fetcher:
+                fetched.append(height)
+                if height == 3:
+                    fetcher.extend(6)
+        finally:
+            fetcher.close()
+        assert fetched == [1, 2, 3, 4, 5, 6]
+
+    def test_batch(self):
+        request = _Request(short_stubs={"stub1"})
+        fetcher = BlockFetcher(PEERS, request, 1, 50, window=16, batch_size=5, workers=2)
+
+        assert _fetch_all(fetcher) == [(height, f"block{height}") for height in range(1, 51)]
+        assert all(count <= 5 for _, _, count in request.requests)
+        # The rest of a batch which stub1 did not give is requested again.
+        assert len(request.requests) > 10
+
+    def test_verify_ahead(self):
+        verified = set()
+
+        def _verify(response):
+            time.sleep(0.005)
+            verified.add(response)
+            if response == "block3":
+                raise ValueError("invalid block")
+
+        fetcher = BlockFetcher(PEERS, _Request(), 1, 20, window=8, workers=2, verify=_verify, verify_workers=4)
+        fetched = []
+        try:
+            for height, _, response in fetcher:
+                assert response in verified
+                fetched.append(height)
+        finally:
+            fetcher.close()
+        # An exception of the verification ahead does not stop fetching. The caller verifies blocks again.
+        assert fetched == list(range(1, 21))
+        assert "verify_wait" in fetcher.get_stats()
+
+    def test_ask_peers_only_for_their_heights(self):
+        PeerScoreboard.clear()
+        scoreboard = PeerScoreboard()
+        try:
+            request = _Request(max_height=30)
+            peer_heights = {"peer0": 30, "peer1": 10, "peer2": 20}
+            fetcher = BlockFetcher(PEERS, request, 1, 30, window=4, batch_size=2, workers=2, retry_times=1,
+                                   scoreboard=scoreboard, peer_heights=peer_heights)
+
+            fetched = []
+            try:
+                for height, _, _ in fetcher:
+                    fetched.append(height)
+                    if height == 15:
+                        # peer1 reports a higher height while fetching.
+                        fetcher.update_peer_height("peer1", 24)
+            finally:
+                fetcher.close()
+
+            assert fetched == list(range(1, 31))
+            assert all(height <= 24 for stub, height, _ in request.requests if stub == "stub1")
+            assert any(height > 10 for stub, height, _ in request.requests if stub == "stub1")
+            assert all(height <= 20 for stub, height, _ in request.requests if stub == "stub2")
+            assert all(score["errors"] == 0 for score in scoreboard.to_dict().values())
+        finally:
+            PeerScoreboard.clear()
+
+    def test_scoreboard(self):
+        PeerScoreboard.clear()
+        scoreboard = PeerScoreboard()
+        try:
+            request = _Request(failing_stubs={"stub1"})
+            fetcher = BlockFetcher(PEERS, request, 1, 30, window=4, workers=2, max_peer_failures=100,
+                                   scoreboard=scoreboard)
+
+            assert [height for height, _ in _fetch_all(fetcher)] == list(range(1, 31))
+            scores = scoreboard.to_dict()
+            assert scores["peer1"]["errors"] == scores["peer1"]["requests"] > 0
+            assert scores["peer0"]["errors"] == 0 and scores["peer0"]["blocks_per_second"] > 0
+            # The failing peer is not asked in its cooldown though max_peer_failures is not reached.
+            assert scores["peer1"]["requests"] < 10
+        finally:
+            PeerScoreboard.clear()
@@ -0,0 +1,107 @@
+import os
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+
+from loopchain import configure as conf
+from loopchain.baseservice.broadcast_tree import get_fanout_order
+from loopchain.blockchain import BlockChain
+from loopchain.blockchain.blocks import BlockBuilder
+from loopchain.blockchain.transactions import TransactionVersioner
+from loopchain.blockchain.types import ExternalAddress, Hash32
+from loopchain.channel.channel_property import ChannelProperty
+from loopchain.crypto.signature import Signer
+from loopchain.peer.block_manager import BlockManager
+
+SIGNERS = [Signer.new() for _ in range(8)]
+REPS = [ExternalAddress.fromhex_address(signer.address) for signer in SIGNERS]
+OUTSIDER = Signer.new()
+
+
+def _new_block(height, signer, next_leader=None):
+    block_builder = BlockBuilder.new("0.1a", TransactionVersioner())
+    block_builder.height = height
+    block_builder.prev_hash = Hash32(os.urandom(Hash32.size))
+    block_builder.signer = signer
+    block_builder.next_leader = next_leader or ExternalAddress.fromhex_address(signer.address)
+    block_builder.fixed_timestamp = 0
+    return block_builder.build()
+
+
+class _BroadcastScheduler:
+    def __init__(self):
+        self.sent = []
+
+    def schedule_send(self, method_name, message, target, reps_hash):
+        self.sent.append(target)
+
+
+def _new_block_manager(block_height, leader_index=0, last_u_block=None):
+    blockchain = SimpleNamespace(
+        block_height=block_height,
+        last_unconfirmed_block=last_u_block,
+        tx_versioner=TransactionVersioner(),
+        get_reps_hash_by_header=lambda header: Hash32.empty(),
+        get_next_rep_in_reps=BlockChain.get_next_rep_in_reps,
+        find_preps_addresses_by_roothash=lambda reps_hash: tuple(REPS),
+        find_preps_targets_by_roothash=lambda reps_hash: OrderedDict((rep.hex_hx(), f"target{index}")
+                                                                     for index, rep in enumerate(REPS))
+    )
+
+    block_manager = BlockManager.__new__(BlockManager)
+    block_manager.blockchain = blockchain
+    block_manager.epoch = SimpleNamespace(height=block_height + 1, round=0, leader_id=REPS[leader_index].hex_hx())
+    block_manager._BlockManager__channel_name = "icon_dex"
+    block_manager._BlockManager__channel_service = SimpleNamespace(broadcast_scheduler=_BroadcastScheduler())
+    block_manager._BlockManager__fanout_sent = OrderedDict()
+    block_manager._BlockManager__fanout_lock = threading.Lock()
+    return block_manager
+
+
+def _forward(block_manager, block, round_=0) -> list:
+    # This node is the first child of the proposer, which has children of its own.
+    order = get_fanout_order([rep.hex_hx() for rep in REPS], block.header.peer_id.hex_hx(), block.header.height)
+    ChannelProperty().peer_id = order[1]
+    block_manager.forward_unconfirmed_block(block, b"block_dumped", round_)
+    return block_manager._BlockManager__channel_service.broadcast_scheduler.sent
+
+
+@pytest.fixture(autouse=True)
+def fanout(monkeypatch):
+    monkeypatch.setattr(conf, "BROADCAST_FANOUT", 2)
+    monkeypatch.setattr(ChannelProperty(), "peer_id", ChannelProperty().peer_id)
+
+
+class TestForwardUnconfirmedBlock:
+    def test_forward_block_of_leader_once(self):
+        block_manager = _new_block_manager(block_height=10)
+        block = _new_block(11, SIGNERS[0])
+
+        children = _forward(block_manager, block)
+        assert 0 < len(children) <= 2
+        assert _forward(block_manager, block) == children
+
+    @pytest.mark.parametrize("height, signer, round_", [
+        (11, SIGNERS[2], 0),  # not the leader
+        (11, OUTSIDER, 0),  # not in reps
+        (12, SIGNERS[0], 0),  # a height ahead
+        (10, SIGNERS[0], 0),  # a height already added
+        (11, SIGNERS[0], 1),  # a round ahead
+    ])
+    def test_not_forward_unexpected_block(self, height, signer, round_):
+        block_manager = _new_block_manager(block_height=10)
+        assert _forward(block_manager, _new_block(height, signer), round_) == []
+
+    def test_not_forward_outsider_as_leader(self):
+        block_manager = _new_block_manager(block_height=10)
+        block_manager.epoch.leader_id = ExternalAddress.fromhex_address(OUTSIDER.address).hex_hx()
+        assert _forward(block_manager, _new_block(11, OUTSIDER)) == []
+
+    def test_forward_block_next_to_unconfirmed_block(self):
+        last_u_block = _new_block(11, SIGNERS[0], next_leader=REPS[3])
+        block_manager = _new_block_manager(block_height=10, last_u_block=last_u_block)
+
+        assert _forward(block_manager, _new_block(12, SIGNERS[5])) == []
+        assert _forward(block_manager, _new_block(12, SIGNERS[3]))
@@ -0,0 +1,101 @@
+from typing import List
+
+import pytest
+
+from loopchain.peer.block_pace_controller import BlockPaceController, BlockPaceDecision, BlockPaceObservation
+
+TX_SIZE = 500  # bytes
+INVOKE_SECONDS_PER_BYTE = 0.2 / (1024 * 1024)
+VOTE_LATENCY = 0.15
+
+BOUNDS = dict(base_interval=2, min_interval=0.5, max_interval=10,
+              base_tx_size=1024 * 1024, min_tx_size=128 * 1024, max_tx_size=4 * 1024 * 1024)
+
+
+class _Simulator:
+    """Deterministic model of a leader: txs arrive at a rate, the block takes txs up to the budget."""
+
+    def __init__(self, controller: BlockPaceController):
+        self.controller = controller
+        self.pool_size = 0
+        self.now = 0.0
+        self.height = 0
+        self.observations: List[BlockPaceObservation] = []
+        self.decisions: List[BlockPaceDecision] = []
+
+    def run(self, tps: int, duration: float):
+        end_time = self.now + duration
+        while self.now < end_time:
+            interval = self.controller.interval
+            self.pool_size += int(tps * interval) * TX_SIZE
+            self.now += interval
+
+            packed_tx_size = min(self.pool_size, self.controller.tx_size) // TX_SIZE * TX_SIZE
+            self.pool_size -= packed_tx_size
+            self.height += 1
+
+            observation = BlockPaceObservation(height=self.height,
+                                               tx_pool_depth=self.pool_size // TX_SIZE,
+                                               packed_tx_size=packed_tx_size,
+                                               invoke_latency=round(packed_tx_size * INVOKE_SECONDS_PER_BYTE, 3),
+                                               vote_latency=VOTE_LATENCY)
+            self.observations.append(observation)
+            self.decisions.append(self.controller.observe(observation))
+
+
+@pytest.fixture
+def simulator():
+    return _Simulator(BlockPaceController(**BOUNDS))
+
+
+class TestBlockPaceController:
+    def test_idle_network_stretches_interval(self, simulator):
+        simulator.run(tps=0, duration=60)
+
+        assert simulator.controller.interval == BOUNDS["max_interval"]
+        assert all(decision.reason == "idle" for decision in simulator.decisions)
+
+    def test_saturated_network_shortens_interval_and_grows_budget(self, simulator):
+        simulator.run(tps=20000, duration=30)
+
+        assert simulator.controller.interval < BOUNDS["base_interval"]
+        assert simulator.controller.interval >= BOUNDS["min_interval"]
+        assert simulator.controller.tx_size > BOUNDS["base_tx_size"]
+        assert "saturated" in {decision.reason for decision in simulator.decisions}
+
+    def test_budget_shrinks_if_invoke_is_slow(self):
+        controller = BlockPaceController(**BOUNDS)
+        decision = controller.observe(BlockPaceObservation(height=1, tx_pool_depth=10, packed_tx_size=1000,
+                                                           invoke_latency=5, vote_latency=0.1))
+
+        assert decision.reason.endswith("slow_invoke")
+        assert decision.max_tx_size == BOUNDS["base_tx_size"] // 2
+
+    def test_backlog_drains_then_returns_to_base(self, simulator):
+        simulator.run(tps=12000, duration=20)
+        simulator.run(tps=100, duration=120)
+
+        assert simulator.pool_size < simulator.controller.tx_size
+        assert simulator.controller.interval == BOUNDS["base_interval"]
+
+    def test_bounds(self, simulator):
+        for tps in (0, 50000, 10, 100000, 0):
+            simulator.run(tps=tps, duration=30)
+
+        for decision in simulator.decisions:
+            assert BOUNDS["min_interval"] <= decision.interval <= BOUNDS["max_interval"]
+            assert BOUNDS["min_tx_size"] <= decision.max_tx_size <= BOUNDS["max_tx_size"]
+
+    def test_replay_reproduces_decisions(self, simulator, caplog):
+        for tps in (0, 30000, 100):
+            simulator.run(tps=tps, duration=30)
+
+        assert BlockPaceController.replay(simulator.observations, **BOUNDS) == simulator.decisions
+
+    def test_parse_log(self):
+        observation = BlockPaceObservation(height=3, tx_pool_depth=7, packed_tx_size=1500,
+                                           invoke_latency=0.012, vote_latency=0.3)
+        line = ('BlockPace {"observation": {"height": 3, "tx_pool_depth": 7, "packed_tx_size": 1500, '
+                '"invoke_latency": 0.012, "vote_latency": 0.3}, "decision": {}}')
+
+        assert BlockPaceController.parse_log(line) == observation
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from loopchain.baseservice.aging_cache import AgingCache
+from loopchain.blockchain.types import Hash32, TransactionStatusInQueue
+from loopchain.peer.block_speculator import BlockSpeculator
+
+LEADER_ID = "hx" + "a" * 40
+
+
+class _Epoch:
+    def __init__(self, tx_queue: AgingCache, version):
+        self.tx_queue = tx_queue
+        self.version = version
+        self.leader_id = LEADER_ID
+        self.round = 0
+        self.packed = threading.Event()
+
+    def makeup_block(self, complain_votes, prev_votes, new_term=False, skip_add_tx=False, max_tx_size=None):
+        transactions = {}
+        while True:
+            tx_hash = self.tx_queue.get_item_in_status(TransactionStatusInQueue.normal,
+                                                       TransactionStatusInQueue.added_to_block)
+            if tx_hash is None:
+                break
+            transactions[tx_hash] = tx_hash
+        self.packed.set()
+        return SimpleNamespace(version=self.version, transactions=transactions, prev_votes=prev_votes)
+
+
+def _new_block(height):
+    return SimpleNamespace(header=SimpleNamespace(hash=Hash32(os.urandom(Hash32.size)), height=height))
+
+
+def _build_candidate_block(block_builder, prev_block):
+    return SimpleNamespace(header=SimpleNamespace(hash=Hash32(os.urandom(Hash32.size)),
+                                                  height=prev_block.header.height + 1))
+
+
+def _new_block_manager(version="0.4", tx_count=10, invoke=None):
+    tx_queue = AgingCache(max_age_seconds=60, default_item_status=TransactionStatusInQueue.normal)
+    for _ in range(tx_count):
+        tx_hash = Hash32(os.urandom(Hash32.size))
+        tx_queue[tx_hash.hex()] = tx_hash
+
+    def _score_invoke(block, prev_block, is_block_editable=False):
+        return block, {}
+
+    return SimpleNamespace(epoch=_Epoch(tx_queue, version),
+                           blockchain=SimpleNamespace(score_invoke=invoke or _score_invoke),
+                           get_tx_queue=lambda: tx_queue)
+
+
+def _statuses(block_manager):
+    tx_queue = block_manager.get_tx_queue()
+    return {tx_queue.get_item_status(key) for key in tx_queue}
+
+
+@pytest.mark.asyncio
+async def test_take_speculative_block():
+    block_manager = _new_block_manager()
+    speculator = BlockSpeculator(block_manager, asyncio.get_event_loop())
+    prev_block = _new_block(10)
+
+    speculator.start(prev_block, _build_candidate_block)
+    speculative_block = await speculator.take(prev_block.header.hash, LEADER_ID, 0)
+
+    assert speculative_block.height == 11
+    assert len(speculative_block.block_builder.transactions) == 10
+    assert speculative_block.block is None
+    assert speculator.hit_count == 1
+    assert _statuses(block_manager) == {TransactionStatusInQueue.added_to_block}
+
+
+@pytest.mark.asyncio
+async def test_invoke_if_version_allows():
+    block_manager = _new_block_manager(version="0.1a")
+    speculator = BlockSpeculator(block_manager, asyncio.get_event_loop())
+    prev_block = _new_block(10)
+
+    speculator.start(prev_block, _build_candidate_block)
+    speculative_block = await speculator.take(prev_block.header.hash, LEADER_ID, 0)
+
+    assert speculative_block.block.header.height == 11
+    assert speculative_block.invoke_results == {}
+
+
+@pytest.mark.asyncio
+async def test_invoke_failure_keeps_packed_txs():
+    def _fail_invoke(block, prev_block, is_block_editable=False):
+        raise RuntimeError("prev block is not committed")
+
+    block_manager = _new_block_manager(version="0.1a", invoke=_fail_invoke)
+    speculator = BlockSpeculator(block_manager, asyncio.get_event_loop())
+    prev_block = _new_block(10)
+
+    speculator.start(prev_block, _build_candidate_block)
+    speculative_block = await speculator.take(prev_block.header.hash, LEADER_ID, 0)
+
+    assert speculative_block.block is None
+    assert len(speculative_block.block_builder.transactions) == 10
+
+
+@pytest.mark.parametrize("prev_changed, leader_changed", [(True, False), (False, True)])
+@pytest.mark.asyncio
+async def test_discard_if_prev_block_or_leader_changed(prev_changed, leader_changed):
+    block_manager = _new_block_manager()
+    speculator = BlockSpeculator(block_manager, asyncio.get_event_loop())
+    prev_block = _new_block(10)
+
+    speculator.start(prev_block, _build_candidate_block)
+    prev_hash = Hash32(os.urandom(Hash32.size)) if prev_changed else prev_block.header.hash
+    leader_id = "hx" + "b" * 40 if leader_changed else LEADER_ID
+    speculative_block = await speculator.take(prev_hash, leader_id, 0)
+
+    assert speculative_block is None
+    assert speculator.miss_count == 1
+    assert _statuses(block_manager) == {TransactionStatusInQueue.normal}
+
+
+@pytest.mark.asyncio
+async def test_discard_restores_txs_after_packing():
+    block_manager = _new_block_manager()
+    speculator = BlockSpeculator(block_manager, asyncio.get_event_loop())
+
+    speculator.start(_new_block(10), _build_candidate_block)
+    speculator.discard()
+    assert await speculator.take(Hash32.empty(), LEADER_ID, 0) is None
+
+    while not block_manager.epoch.packed.is_set():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.01)
+
+    assert _statuses(block_manager) == {TransactionStatusInQueue.normal}
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from loopchain.baseservice import RestMethod
+from loopchain.baseservice.peer_scoreboard import PeerScoreboard
+from loopchain.blockchain.transactions import TransactionBuilder, TransactionVersioner
+from loopchain.blockchain.types import ExternalAddress
+from loopchain.crypto.signature import Signer
+from loopchain.peer.tx_relayer import TxRelayer
+
+tx_versioner = TransactionVersioner()
+signer = Signer.new()
+RTT = 0.05
+
+
+def _new_tx(version="0x3", timestamp=None, nonce=1):
+    tx_builder = TransactionBuilder.new(version=version, type_=None, versioner=tx_versioner)
+    tx_builder.signer = signer
+    tx_builder.to_address = ExternalAddress(os.urandom(20))
+    tx_builder.value = 1000
+    tx_builder.nonce = nonce
+    if version == "0x2":
+        tx_builder.fee = 10
+    else:
+        tx_builder.step_limit = 1000000
+        tx_builder.nid = 3
+    if timestamp is not None:
+        tx_builder.fixed_timestamp = timestamp
+    return tx_builder.build()
+
+
+class _Session:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+
+class _RestClient:
+    def __init__(self, fail_times=0):
+        self.target = "https://rep0"
+        self.fail_times = fail_times
+        self.requests = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    def create_session(self, limit):
+        return _Session()
+
+    def init_next_target(self):
+        self.target = "https://rep1"
+
+    async def call_batch_async(self, method, params_list, session, timeout=None):
+        self.requests.append((method, len(params_list)))
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            await asyncio.sleep(RTT)
+        finally:
+            self.concurrent -= 1
+
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise ConnectionError("fail to relay")
+        # A tx of nonce 2 is rejected by the rep.
+        return [{"error": {"code": -32000}} if params.nonce == "0x2" else {"result": "0x0"} for params in params_list]
+
+
+@pytest.fixture(autouse=True)
+def scoreboard():
+    PeerScoreboard.clear()
+    yield
+    PeerScoreboard.clear()
+
+
+def _relay(tx_relayer, txs):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(tx_relayer.relay(txs))
+    finally:
+        loop.close()
+
+
+class TestTxRelayer:
+    def test_relay_concurrently_in_batches(self):
+        rs_client = _RestClient()
+        tx_relayer = TxRelayer(rs_client, tx_versioner, batch_size=10, concurrency=4, backoff=0)
+        txs = [_new_tx() for _ in range(75)] + [_new_tx("0x2") for _ in range(5)]
+
+        start_time = time.monotonic()
+        result = _relay(tx_relayer, txs)
+        elapsed = time.monotonic() - start_time
+
+        assert result.relayed == 80 and result.failed == 0 and result.skipped == 0
+        assert sorted(rs_client.requests, key=lambda request: request[0].name) == \
+            [(RestMethod.SendTransaction2, 5)] + [(RestMethod.SendTransaction3, 10)] * 7 + \
+            [(RestMethod.SendTransaction3, 5)]
+        assert rs_client.max_concurrent == 4
+        # 9 requests in 3 rounds instead of 80 RTTs one by one
+        assert elapsed < RTT * 5
+
+    def test_retry_with_backoff(self):
+        rs_client = _RestClient(fail_times=2)
+        tx_relayer = TxRelayer(rs_client, tx_versioner, batch_size=10, concurrency=1, retry_times=3, backoff=0.01)
+
+        result = _relay(tx_relayer, [_new_tx() for _ in range(5)])
+
+        assert result.relayed == 5
+        assert len(rs_client.requests) == 3
+        assert PeerScoreboard().to_dict()["https://rep0"]["errors"] == 2
+
+    def test_failed_and_skipped_txs(self):
+        rs_client = _RestClient(fail_times=2)
+        tx_relayer = TxRelayer(rs_client, tx_versioner, batch_size=10, concurrency=1, retry_times=2, backoff=0)
+        txs = [_new_tx() for _ in range(14)] + [_new_tx(nonce=2), _new_tx(timestamp=1)]
+
+        result = _relay(tx_relayer, txs)
+
+        # The first batch is given up after 2 failures, and a tx in the second batch is rejected.
+        assert result == (4, 11, 1)
+        assert len(rs_client.requests) == 3
+        assert rs_client.target == "https://rep0"
@@ -0,0 +1,91 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from loopchain.blockchain import CandidateBlocks
+from loopchain.blockchain.blocks import BlockBuilder
+from loopchain.blockchain.transactions import TransactionVersioner
+from loopchain.blockchain.types import Hash32
+from loopchain.blockchain.votes.v0_1a import BlockVote
+from loopchain.peer.vote_relay import VoteRelay, dumps_votes, loads_votes
+
+REPS_COUNT = 4
+
+
+def _new_block(height, signer_index=0):
+    block_builder = BlockBuilder.new("0.1a", TransactionVersioner())
+    block_builder.height = height
+    block_builder.prev_hash = Hash32(os.urandom(Hash32.size))
+    block_builder.signer = pytest.SIGNERS[signer_index]
+    block_builder.fixed_timestamp = 0
+    return block_builder.build()
+
+
+def _new_vote(block, signer_index):
+    return BlockVote.new(pytest.SIGNERS[signer_index], 0, block.header.height, 0, block.header.hash)
+
+
+class _Relay:
+    def __init__(self, candidate_blocks):
+        self.scheduled = []
+        self.broadcasted = []
+        self.relay = VoteRelay(candidate_blocks, pytest.REPS[0],
+                               lambda block, votes: self.broadcasted.append((block, votes)),
+                               lambda delay, callback, *args: self.scheduled.append((callback, args)))
+
+    def run_scheduled(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for callback, args in scheduled:
+            callback(*args)
+
+
+@pytest.fixture
+def candidate_blocks():
+    return CandidateBlocks(SimpleNamespace(block_height=0))
+
+
+class TestVoteRelay:
+    def test_coalesce_votes(self, candidate_blocks):
+        block = _new_block(1)
+        candidate_blocks.add_block(block, pytest.REPS[:REPS_COUNT])
+        relay = _Relay(candidate_blocks)
+
+        votes = [_new_vote(block, index) for index in range(3)]
+        for vote in votes:
+            candidate_blocks.add_vote(vote)
+            relay.relay.add(vote)
+        assert len(relay.scheduled) == 1
+
+        relay.run_scheduled()
+        assert relay.broadcasted == [(block, votes)]
+
+        # Nothing new to relay
+        relay.relay.add(votes[0])
+        relay.run_scheduled()
+        assert len(relay.broadcasted) == 1
+
+        vote = _new_vote(block, 3)
+        candidate_blocks.add_vote(vote)
+        relay.relay.add(vote)
+        relay.run_scheduled()
+        assert relay.broadcasted[-1] == (block, votes + [vote])
+
+    def test_relay_only_own_blocks(self, candidate_blocks):
+        block = _new_block(1, signer_index=1)
+        candidate_blocks.add_block(block, pytest.REPS[:REPS_COUNT])
+        relay = _Relay(candidate_blocks)
+
+        vote = _new_vote(block, 0)
+        candidate_blocks.add_vote(vote)
+        relay.relay.add(vote)
+        relay.run_scheduled()
+        assert relay.broadcasted == []
+
+
+def test_dumps_and_loads_votes():
+    block = _new_block(1)
+    votes = [_new_vote(block, index) for index in range(2)]
+
+    assert loads_votes(dumps_votes(votes)) == votes
+    assert loads_votes(dumps_votes(votes[:1])) == votes[:1]
@@ -1,5 +1,10 @@
+import asyncio
 import os
+
 import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
 from loopchain.baseservice import RestClient, RestMethod
 from loopchain.blockchain.types import Hash32, ExternalAddress
 from loopchain.blockchain.transactions import TransactionBuilder, TransactionSerializer, TransactionVersioner
@@ -25,6 +30,65 @@ class TestRestClient:
         assert params == request_params_results[rest_method]
 
 
+class _Rep:
+    """A rep which validates all requests of a batch before dispatching them, as iconrpcserver does."""
+    def __init__(self):
+        self.posts = []
+
+    async def handle(self, request: web.Request):
+        body = await request.json()
+        self.posts.append(body)
+        if request.path.startswith("/api/v2") and isinstance(body, list):
+            return web.Response(status=500, text="Internal Server Error")
+
+        requests_ = body if isinstance(body, list) else [body]
+        if any(req["params"]["nonce"] == "0x2" for req in requests_):
+            return web.json_response({"jsonrpc": "2.0", "error": {"code": -32602, "message": "Invalid params"},
+                                      "id": None if isinstance(body, list) else body["id"]})
+
+        responses = [{"jsonrpc": "2.0", "result": req["params"]["nonce"], "id": req["id"]} for req in requests_]
+        return web.json_response(responses if isinstance(body, list) else responses[0])
+
+
+class TestCallBatchAsync:
+    @staticmethod
+    def _call_batch(rest_method: RestMethod, nonces):
+        rep = _Rep()
+        params = request_params[rest_method]
+
+        async def _call():
+            app = web.Application()
+            app.router.add_post("/{tail:.*}", rep.handle)
+            async with TestServer(app) as server:
+                rest_client = RestClient()
+                rest_client._target = f"http://{server.host}:{server.port}"
+                async with rest_client.create_session(limit=2) as session:
+                    return await rest_client.call_batch_async(
+                        rest_method, [params._replace(nonce=nonce) for nonce in nonces], session)
+
+        loop = asyncio.new_event_loop()
+        try:
+            return rep, loop.run_until_complete(_call())
+        finally:
+            loop.close()
+
+    def test_batch(self):
+        rep, responses = self._call_batch(RestMethod.SendTransaction3, ["0x1", "0x3", "0x4"])
+        assert [response["result"] for response in responses] == ["0x1", "0x3", "0x4"]
+        assert len(rep.posts) == 1
+
+    def test_rejected_batch_is_sent_one_by_one(self):
+        rep, responses = self._call_batch(RestMethod.SendTransaction3, ["0x1", "0x2", "0x3"])
+        assert [response.get("result") for response in responses] == ["0x1", None, "0x3"]
+        assert responses[1]["error"]["code"] == -32602
+        assert len(rep.posts) == 4
+
+    def test_v2_is_sent_one_by_one(self):
+        rep, responses = self._call_batch(RestMethod.SendTransaction2, ["0x1", "0x2"])
+        assert [response.get("result") for response in responses] == ["0x1", None]
+        assert all(isinstance(post, dict) for post in rep.posts)
+
+
 tv = TransactionVersioner()
 tb = TransactionBuilder.new(version="0x2", type_=None, versioner=tv)
 tb.signer = Signer.new()
@@ -17,8 +17,10 @@
 """Test Vote Object"""
 import os
 import logging
+import random
 import unittest
 import hashlib
+from collections import Counter
 import testcase.unittest.test_util as test_util
 
 from loopchain.crypto.signature import Signer
@@ -291,6 +293,77 @@ class TestVote(unittest.TestCase):
         duplicate_leader_vote = LeaderVote.new(self.signers[0], 0, 0, 0, old_leader, self.reps[2])
         self.assertRaises(votes.VoteDuplicateError, leader_votes.add_vote, duplicate_leader_vote)
 
+    def test_block_votes_tallies_with_random_order(self):
+        ratio = 0.67
+        reps, signers = self.reps[:30], self.signers[:30]
+        block_hash = Hash32(os.urandom(Hash32.size))
+
+        for case in range(10):
+            agree_count = random.randint(0, len(signers))
+            vote_list = [BlockVote.new(signer, 0, 0, 0, block_hash if i < agree_count else Hash32.empty())
+                         for i, signer in enumerate(signers)]
+            vote_count = random.randint(0, len(vote_list))
+
+            results = set()
+            for _ in range(10):
+                random.shuffle(vote_list)
+                block_votes = BlockVotes(reps, ratio, 0, 0, block_hash)
+                for block_vote in vote_list[:vote_count]:
+                    block_votes.add_vote(block_vote)
+                    block_votes.verify_tallies()
+
+                    true_count = sum(1 for v in block_votes.votes if v and v.block_hash == block_hash)
+                    false_count = sum(1 for v in block_votes.votes if v and v.block_hash == Hash32.empty())
+                    if true_count >= block_votes.quorum:
+                        expected = True
+                    elif false_count >= len(reps) - block_votes.quorum + 1:
+                        expected = False
+                    else:
+                        expected = None
+                    self.assertEqual(block_votes.get_result(), expected)
+                results.add((block_votes.is_completed(), block_votes.get_result()))
+
+            self.assertEqual(len(results), 1, f"case({case}) results({results})")
+
+    def test_leader_votes_tallies_with_random_order(self):
+        ratio = 0.51
+        reps, signers = self.reps[:30], self.signers[:30]
+        old_leader = reps[0]
+        candidates = [reps[1], reps[2], ExternalAddress.empty()]
+
+        for case in range(10):
+            vote_list = [LeaderVote.new(signer, 0, 0, 0, old_leader, random.choice(candidates))
+                         for signer in signers]
+            vote_count = random.randint(0, len(vote_list))
+
+            results = set()
+            for _ in range(10):
+                random.shuffle(vote_list)
+                leader_votes = LeaderVotes(reps, ratio, 0, 0, old_leader)
+                for leader_vote in vote_list[:vote_count]:
+                    leader_votes.add_vote(leader_vote)
+                    leader_votes.verify_tallies()
+
+                counter = Counter(v.new_leader for v in leader_votes.votes if v)
+                self.assertEqual(leader_votes.empty_count, len(reps) - vote_count)
+                self.assertEqual(leader_votes.get_majority()[0][1] if counter else 0,
+                                 max(counter.values(), default=0))
+                results.add((leader_votes.is_completed(), leader_votes.get_result()))
+
+            self.assertEqual(len(results), 1, f"case({case}) results({results})")
+
+    def test_deserialized_leader_votes_keep_tallies(self):
+        ratio = 0.51
+        old_leader = self.reps[0]
+        leader_votes = LeaderVotes(self.reps, ratio, 0, 0, old_leader)
+        for signer in self.signers[:60]:
+            leader_votes.add_vote(LeaderVote.new(signer, 0, 0, 0, old_leader, self.reps[1]))
+
+        serialized = [leader_vote.serialize() for leader_vote in leader_votes.votes if leader_vote]
+        deserialized = LeaderVotes.deserialize(serialized, ratio)
+        deserialized.verify_tallies()
+        self.assertEqual(deserialized.get_result(), self.reps[1])
+
 
 if __name__ == '__main__':
     unittest.main()
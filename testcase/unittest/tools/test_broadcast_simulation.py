@@ -0,0 +1,29 @@
+import pytest
+
+from loopchain.tools.simulator import simulate_broadcast
+
+
+@pytest.mark.parametrize("node_count", [4, 22, 100])
+def test_reach_all_nodes(node_count):
+    mesh = simulate_broadcast(node_count, 0)
+    tree = simulate_broadcast(node_count, 4)
+
+    assert mesh.received_count == tree.received_count == node_count - 1
+    assert mesh.messages == tree.messages == node_count - 1
+
+
+def test_tree_is_faster_with_many_reps():
+    mesh = simulate_broadcast(100, 0)
+    tree = simulate_broadcast(100, 4)
+    assert tree.time_to_last_node < mesh.time_to_last_node / 3
+
+    # A hop costs more than the uplink with a few reps.
+    assert simulate_broadcast(4, 0).time_to_last_node <= simulate_broadcast(4, 1).time_to_last_node
+
+
+@pytest.mark.parametrize("fanout", [0, 2, 4, 8], ids=["mesh", "fanout2", "fanout4", "fanout8"])
+@pytest.mark.parametrize("node_count", [4, 22, 100])
+def test_benchmark_time_to_last_node(benchmark, node_count, fanout):
+    """Simulated seconds until the last rep receives a block of 1MB by 100Mbps uplinks and 50ms latency."""
+    report = benchmark.pedantic(simulate_broadcast, args=(node_count, fanout), rounds=1, iterations=1)
+    benchmark.extra_info.update(report.to_dict())
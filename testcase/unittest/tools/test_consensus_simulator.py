@@ -0,0 +1,127 @@
+import pytest
+
+from loopchain.tools.simulator import ConsensusSimulator, EventScheduler, InMemoryTransport, MockScoreInvoker
+
+BLOCK_INTERVAL = 1
+COMPLAIN_TIMEOUT = 5
+
+
+def _new_transport(**kwargs):
+    scheduler = EventScheduler()
+    transport = InMemoryTransport(scheduler, **kwargs)
+    received = []
+    for node_id in ("a", "b", "c"):
+        transport.register(node_id, lambda src, message, dst=node_id: received.append((scheduler.now, src, dst, message)))
+    return scheduler, transport, received
+
+
+class TestInMemoryTransport:
+    def test_deliver_after_latency_in_order(self):
+        scheduler, transport, received = _new_transport(latency=0.1)
+        transport.send("a", "b", 1)
+        transport.send("a", "b", 2)
+        transport.broadcast("c", 3)
+
+        scheduler.run_until(0.05)
+        assert received == []
+
+        scheduler.run_until(1)
+        assert received == [(0.1, "a", "b", 1), (0.1, "a", "b", 2), (0.1, "c", "a", 3), (0.1, "c", "b", 3)]
+
+    def test_same_seed_loses_same_messages(self):
+        def _run(seed):
+            scheduler, transport, received = _new_transport(latency=0.1, jitter=0.05, loss=0.3, seed=seed)
+            for message in range(100):
+                transport.send("a", "b", message)
+            scheduler.run_until(1)
+            return received, transport.stats
+
+        received, stats = _run(seed=7)
+        assert 0 < stats.lost < 100
+        assert stats.delivered + stats.lost == stats.sent == 100
+        assert _run(seed=7) == (received, stats)
+
+    def test_partition_and_heal(self):
+        scheduler, transport, received = _new_transport(latency=0.1)
+        transport.partition(["a"])
+        transport.broadcast("b", "partitioned")
+        scheduler.run_until(1)
+        assert [(dst, message) for _, _, dst, message in received] == [("c", "partitioned")]
+
+        transport.heal()
+        transport.send("b", "a", "healed")
+        scheduler.run_until(2)
+        assert received[-1][2:] == ("a", "healed")
+
+
+class TestConsensusSimulator:
+    def test_nodes_agree_on_blocks(self):
+        simulator = ConsensusSimulator(4, block_interval=BLOCK_INTERVAL)
+        simulator.submit_txs(tps=100, duration=20)
+        report = simulator.run(30)
+
+        assert report.consistent
+        assert {node.block_height for node in simulator.nodes} == {report.height}
+        assert report.tx_count == 2000
+        assert report.mean_block_time == pytest.approx(BLOCK_INTERVAL, abs=0.1)
+
+    def test_same_seed_same_report(self):
+        def _run(seed):
+            simulator = ConsensusSimulator(7, block_interval=BLOCK_INTERVAL, jitter=0.05, loss=0.1, seed=seed)
+            simulator.submit_txs(tps=100, duration=10)
+            return simulator.run(15).to_dict()
+
+        report = _run(seed=1)
+        assert report["transport"]["lost"] > 0
+        assert _run(seed=1) == report
+
+    def test_recover_from_leader_crash(self):
+        simulator = ConsensusSimulator(4, block_interval=BLOCK_INTERVAL, complain_timeout=COMPLAIN_TIMEOUT,
+                                       blocks_per_leader=1000)
+        simulator.submit_txs(tps=100, duration=30)
+        simulator.crash_leader(at=10.5)
+        report = simulator.run(40)
+
+        assert report.consistent
+        assert len(report.leader_recovery_times) == 1
+        assert report.leader_recovery_times[0] <= COMPLAIN_TIMEOUT + BLOCK_INTERVAL
+        assert report.tx_count == 3000
+
+    def test_partitioned_node_catches_up(self):
+        simulator = ConsensusSimulator(4, block_interval=BLOCK_INTERVAL, complain_timeout=COMPLAIN_TIMEOUT)
+        simulator.partition([3], at=5)
+        simulator.heal(at=15)
+        report = simulator.run(30)
+
+        assert report.consistent
+        assert report.height - simulator.nodes[3].block_height <= 1
+        assert report.transport.partitioned > 0
+
+    def test_aggregated_votes_reduce_vote_messages(self):
+        def _run(aggregated_votes):
+            simulator = ConsensusSimulator(7, block_interval=0.5, aggregated_votes=aggregated_votes)
+            simulator.submit_txs(tps=100, duration=20)
+            return simulator.run(20)
+
+        broadcast, aggregated = _run(aggregated_votes=False), _run(aggregated_votes=True)
+
+        assert broadcast.consistent and aggregated.consistent
+        # Votes take a hop more through the proposer, but the consensus keeps going over leader changes.
+        assert aggregated.block_count >= broadcast.block_count * 0.5
+        # n - 1 votes to the proposer and a relay or two of n - 1 messages, instead of n * (n - 1) messages.
+        assert aggregated.vote_messages / aggregated.block_count < broadcast.vote_messages / broadcast.block_count * 0.6
+
+
+def test_benchmark_block_generation(benchmark):
+    """Blocks/s and tx/s of the consensus model of 7 nodes under load. Wall time is the cost of the simulation itself.
+    It does not measure `BlockManager` and `ConsensusSiever` of a peer.
+    """
+    def _simulate():
+        simulator = ConsensusSimulator(7, block_interval=0.5, jitter=0.02, invoker=MockScoreInvoker(0.1, 0.0002))
+        simulator.submit_txs(tps=1000, duration=30)
+        return simulator.run(30)
+
+    report = benchmark.pedantic(_simulate, rounds=1, iterations=1)
+
+    assert report.consistent
+    benchmark.extra_info.update(report.to_dict())
@@ -0,0 +1,92 @@
+import pytest
+
+from loopchain.baseservice import ObjectManager
+from loopchain.channel.channel_property import ChannelProperty
+from loopchain.tools.simulator import LeaderStackSimulator, MockScoreInvoker
+
+
+class TestLeaderStackSimulator:
+    def test_leader_commits_submitted_txs(self):
+        object_manager, channel_property = ObjectManager(), ChannelProperty()
+
+        simulator = LeaderStackSimulator(4, block_interval=0.2, invoker=MockScoreInvoker(0.01, 0.0001))
+        simulator.submit_txs(tps=100, duration=2)
+        report = simulator.run(4)
+
+        assert report.block_count >= 5
+        assert report.height == report.block_count
+        assert report.tx_count == 200
+        assert report.tx_pool_depths[-1] == 0
+
+        # The singletons of the leader live only in the run.
+        assert ObjectManager() is object_manager
+        assert ChannelProperty() is channel_property
+
+    def test_pipelined_generation_shortens_block_time(self):
+        """`BlockSpeculator` of 0.1a invokes the next block while votes of the unconfirmed block are collected."""
+        def _run(pipelined):
+            simulator = LeaderStackSimulator(4, block_interval=0.1, invoker=MockScoreInvoker(0.2, 0.0002),
+                                             block_versions={"0.1a": 0},
+                                             configure={"ALLOW_PIPELINED_BLOCK_GENERATION": pipelined})
+            simulator.submit_txs(tps=200, duration=5)
+            return simulator.run(5)
+
+        serial, pipelined = _run(pipelined=False), _run(pipelined=True)
+
+        assert serial.speculative_hit_count == 0
+        assert pipelined.speculative_hit_count >= pipelined.block_count - 2
+        assert pipelined.blocks_per_second >= serial.blocks_per_second * 1.5
+        assert pipelined.tx_per_second >= serial.tx_per_second * 0.9
+
+    def test_adaptive_block_pace_drains_tx_pool(self):
+        """`BlockPaceController` grows the tx size budget of full blocks while txs are pending."""
+        def _run(adaptive):
+            simulator = LeaderStackSimulator(4, block_interval=1, invoker=MockScoreInvoker(0.05, 0.0001),
+                                             configure={"ALLOW_ADAPTIVE_BLOCK_PACE": adaptive,
+                                                        "MAX_TX_SIZE_IN_BLOCK": 64 * 1024,
+                                                        "BLOCK_PACE_MIN_TX_SIZE": 64 * 1024})
+            simulator.submit_txs(tps=300, duration=5)
+            return simulator.run(7)
+
+        static, adaptive = _run(adaptive=False), _run(adaptive=True)
+
+        assert static.block_pace_intervals == []
+        assert adaptive.block_pace_tx_sizes[0] > 64 * 1024
+        assert adaptive.tx_count >= static.tx_count * 1.5
+        assert adaptive.mean_tx_pool_depth < static.mean_tx_pool_depth
+
+
+@pytest.mark.parametrize("pipelined", [False, True], ids=["serial", "pipelined"])
+@pytest.mark.parametrize("block_versions", [{"0.1a": 0}, {"0.1a": 0, "0.3": 1}], ids=["0.1a", "0.3"])
+def test_benchmark_block_generation(benchmark, block_versions, pipelined):
+    """Blocks/s and tx/s of a leader of 4 reps, whose invoke is slower than the block interval.
+    Speculation of 0.3 packs txs only, because the invoke of a block takes the votes of its previous block.
+    """
+    def _simulate():
+        simulator = LeaderStackSimulator(4, block_interval=0.1, invoker=MockScoreInvoker(0.3, 0.0002),
+                                         block_versions=block_versions,
+                                         configure={"ALLOW_PIPELINED_BLOCK_GENERATION": pipelined})
+        simulator.submit_txs(tps=500, duration=10)
+        return simulator.run(10)
+
+    report = benchmark.pedantic(_simulate, rounds=1, iterations=1)
+
+    assert report.block_count > 0
+    benchmark.extra_info.update(report.to_dict())
+
+
+@pytest.mark.parametrize("adaptive", [False, True], ids=["static", "adaptive"])
+def test_benchmark_block_pace(benchmark, adaptive):
+    """Block time, tx/s and tx pool depth of a leader whose blocks are full under load, and idle after it."""
+    def _simulate():
+        simulator = LeaderStackSimulator(4, block_interval=2, invoker=MockScoreInvoker(0.1, 0.0002),
+                                         configure={"ALLOW_ADAPTIVE_BLOCK_PACE": adaptive,
+                                                    "MAX_TX_SIZE_IN_BLOCK": 128 * 1024,
+                                                    "BLOCK_PACE_MIN_TX_SIZE": 64 * 1024})
+        simulator.submit_txs(tps=600, duration=15)
+        return simulator.run(25)
+
+    report = benchmark.pedantic(_simulate, rounds=1, iterations=1)
+
+    assert report.block_count > 0
+    benchmark.extra_info.update(report.to_dict())